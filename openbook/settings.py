@@ -306,29 +306,53 @@ else:
         'OPTIONS': db_options,
     }
 
+    # Comma separated reader hostnames, each with an optional weight, e.g. "reader-1:2,reader-2:1"
+    RDS_HOSTNAMES_READERS = os.environ.get('RDS_HOSTNAMES_READERS') or RDS_HOSTNAME_READER or ''
+
     DATABASES = {
         'default': writer_db_config,
-        'Reader': {
+    }
+
+    REPLICATED_DATABASE_SLAVES = []
+    REPLICATED_DATABASE_SLAVES_WEIGHTS = {}
+
+    readers = [reader.strip() for reader in RDS_HOSTNAMES_READERS.split(',') if reader.strip()]
+
+    for reader_index, reader in enumerate(readers):
+        reader_hostname, reader_separator, reader_weight = reader.partition(':')
+        reader_alias = 'Reader' if reader_index == 0 else 'Reader%d' % (reader_index + 1)
+
+        DATABASES[reader_alias] = {
             'ENGINE': 'django.db.backends.mysql',
             'NAME': RDS_DB_NAME,
             'USER': RDS_USERNAME,
             'PASSWORD': RDS_PASSWORD,
-            'HOST': RDS_HOSTNAME_READER,
+            'HOST': reader_hostname,
             'PORT': RDS_PORT,
             'OPTIONS': db_options,
         }
-    }
 
-    DATABASE_ROUTERS = ['django_replicated.router.ReplicationRouter']
+        REPLICATED_DATABASE_SLAVES.append(reader_alias)
+        REPLICATED_DATABASE_SLAVES_WEIGHTS[reader_alias] = int(reader_weight or 1)
 
-    REPLICATED_DATABASE_SLAVES = ['Reader', ]
+    DATABASE_ROUTERS = ['openbook_common.db_router.ReplicationRouter']
 
-    MIDDLEWARE.append('django_replicated.middleware.ReplicationMiddleware', )
+    MIDDLEWARE.append('openbook_common.middleware.ReplicationMiddleware', )
 
     REPLICATED_VIEWS_OVERRIDES = {
         '/admin/*': 'master',
     }
 
+# Read replicas
+
+# Seconds the reads of a client keep going to the primary after it wrote something
+REPLICATION_STICKY_SECONDS = int(os.environ.get('REPLICATION_STICKY_SECONDS', '5'))
+REPLICATED_FORCE_MASTER_COOKIE_MAX_AGE = REPLICATION_STICKY_SECONDS
+# Replicas lagging behind the primary by more seconds than this get no reads
+REPLICATION_MAX_LAG_SECONDS = int(os.environ.get('REPLICATION_MAX_LAG_SECONDS', '3'))
+# Seconds every process reuses the measured lag of a replica for
+REPLICATION_LAG_CHECK_SECONDS = int(os.environ.get('REPLICATION_LAG_CHECK_SECONDS', '5'))
+
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
 
@@ -458,6 +482,8 @@ VIDEO_ENCODING_FORMATS = {
         },
     ]
 }
+# Cores the encodings of a video may use at once, formats get encoded in parallel when above VIDEO_ENCODING_THREADS
+VIDEO_ENCODING_CPU_BUDGET = int(os.environ.get('VIDEO_ENCODING_CPU_BUDGET', '1'))
 
 PROXY_URL = os.environ.get('PROXY_URL', '')
 
@@ -504,6 +530,9 @@ DEVICE_NAME_MAX_LENGTH = 32
 DEVICE_UUID_MAX_LENGTH = 64
 SEARCH_QUERIES_MAX_LENGTH = 120
 FEATURE_IMPORTER_ENABLED = os.environ.get('FEATURE_IMPORTER_ENABLED', 'True') == 'True'
+FEATURE_TIMELINES_STORE_ENABLED = os.environ.get('FEATURE_TIMELINES_STORE_ENABLED', 'False') == 'True'
+FEATURE_NOTIFICATIONS_STREAM_ENABLED = os.environ.get('FEATURE_NOTIFICATIONS_STREAM_ENABLED', 'False') == 'True'
+TIMELINE_MAX_LENGTH = int(os.environ.get('TIMELINE_MAX_LENGTH', '800'))
 MODERATION_REPORT_DESCRIPTION_MAX_LENGTH = 1000
 MODERATED_OBJECT_DESCRIPTION_MAX_LENGTH = 1000
 GLOBAL_HIDE_CONTENT_AFTER_REPORTS_AMOUNT = int(os.environ.get('GLOBAL_HIDE_CONTENT_AFTER_REPORTS_AMOUNT', '20'))
@@ -528,6 +557,11 @@ ALERT_HOOK_URL = os.environ.get('ALERT_HOOK_URL')
 MIN_UNIQUE_TOP_POST_REACTIONS_COUNT = int(os.environ.get('MIN_UNIQUE_TOP_POST_REACTIONS_COUNT', '5'))
 MIN_UNIQUE_TOP_POST_COMMENTS_COUNT = int(os.environ.get('MIN_UNIQUE_TOP_POST_COMMENTS_COUNT', '5'))
 MIN_UNIQUE_TRENDING_POST_REACTIONS_COUNT = int(os.environ.get('MIN_UNIQUE_TRENDING_POST_REACTIONS_COUNT', '5'))
+TRENDING_POSTS_WINDOW_HOURS = int(os.environ.get('TRENDING_POSTS_WINDOW_HOURS', '12'))
+TRENDING_POSTS_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_POSTS_HALF_LIFE_HOURS', '3'))
+TRENDING_POSTS_BUCKET_MINUTES = int(os.environ.get('TRENDING_POSTS_BUCKET_MINUTES', '30'))
+# Reactions and comments ids below the top posts curation watermark checked again, for the ones committed late
+TOP_POSTS_CURATION_WATERMARK_OVERLAP = int(os.environ.get('TOP_POSTS_CURATION_WATERMARK_OVERLAP', '1000'))
 
 # Email Config
 
@@ -579,3 +613,33 @@ if IS_PRODUCTION:
 # ONE SIGNAL
 ONE_SIGNAL_APP_ID = os.environ.get('ONE_SIGNAL_APP_ID')
 ONE_SIGNAL_API_KEY = os.environ.get('ONE_SIGNAL_API_KEY')
+
+# PUSH NOTIFICATIONS
+PUSH_NOTIFICATIONS_BACKEND = os.environ.get('PUSH_NOTIFICATIONS_BACKEND',
+                                            'openbook_notifications.push.OneSignalPushBackend')
+# Seconds the push notifications with the same content get collected for, to be sent together
+PUSH_NOTIFICATIONS_GROUP_WINDOW_SECONDS = int(os.environ.get('PUSH_NOTIFICATIONS_GROUP_WINDOW_SECONDS', '2'))
+
+if TESTING:
+    PUSH_NOTIFICATIONS_BACKEND = 'openbook_notifications.push.FakePushBackend'
+    PUSH_NOTIFICATIONS_GROUP_WINDOW_SECONDS = 0
+
+# REACTION NOTIFICATIONS
+# Seconds the reactions to the same post or comment get collected for, to be notified as one
+REACTION_NOTIFICATIONS_COALESCING_WINDOW_SECONDS = int(
+    os.environ.get('REACTION_NOTIFICATIONS_COALESCING_WINDOW_SECONDS', '60'))
+
+if TESTING:
+    REACTION_NOTIFICATIONS_COALESCING_WINDOW_SECONDS = 0
+
+# NOTIFICATIONS RETENTION
+# Days read notifications are kept for
+NOTIFICATIONS_RETENTION_DAYS = int(os.environ.get('NOTIFICATIONS_RETENTION_DAYS', '90'))
+# Hours within which the notifications of the same type about the same post or comment get merged into one
+NOTIFICATIONS_COMPACTION_WINDOW_HOURS = int(os.environ.get('NOTIFICATIONS_COMPACTION_WINDOW_HOURS', '6'))
+
+# NOTIFICATIONS STREAM
+# Seconds a notifications stream stays open before the client has to reconnect
+NOTIFICATIONS_STREAM_TIMEOUT_SECONDS = int(os.environ.get('NOTIFICATIONS_STREAM_TIMEOUT_SECONDS', '300'))
+# Seconds without events after which a heartbeat gets sent, keeping proxies from closing the stream
+NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS = int(os.environ.get('NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS', '20'))
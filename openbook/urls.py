@@ -70,7 +70,7 @@ from openbook_moderation.views.report.views import ReportUser, ReportPost, Repor
     ReportPostComment, ReportHashtag
 from openbook_moderation.views.user.views import UserModerationPenalties, UserPendingModeratedObjectsCommunities
 from openbook_notifications.views import Notifications, NotificationItem, ReadNotifications, ReadNotification, \
-    UnreadNotificationsCount
+    UnreadNotificationsCount, NotificationsStream
 from openbook_posts.views.post.views import PostItem, PostOpen, PostClose, MutePost, UnmutePost, TranslatePost, \
     PostPreviewLinkData, SearchPostParticipants, GetPostParticipants, PublishPost, PostStatus
 from openbook_posts.views.post_comment.post_comment_reaction.views import PostCommentReactionItem
@@ -369,6 +369,7 @@ notifications_patterns = [
     path('', Notifications.as_view(), name='notifications'),
     path('read/', ReadNotifications.as_view(), name='read-notifications'),
     path('unread/count/', UnreadNotificationsCount.as_view(), name='unread-notifications-count'),
+    path('stream/', NotificationsStream.as_view(), name='notifications-stream'),
     path('<int:notification_id>/', include(notification_patterns)),
 ]
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openbook.settings")
 
 application = get_wsgi_application()
+
+# Load the reference data before serving the first request
+from openbook_common.utils.reference_data import warm_reference_data  # noqa: E402
+
+warm_reference_data()
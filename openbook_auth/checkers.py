@@ -4,10 +4,11 @@ from rest_framework.exceptions import ValidationError, PermissionDenied, NotFoun
 from django.utils.translation import ugettext_lazy as _
 
 from openbook_common.utils.model_loaders import get_post_model, get_community_model, get_post_comment_model, \
-    get_language_model, get_user_model, get_emoji_group_model, get_post_reaction_model, get_user_invite_model, \
+    get_user_model, get_post_reaction_model, get_user_invite_model, \
     get_community_notifications_subscription_model, get_user_notifications_subscription_model
 
 from openbook_common import checkers as common_checkers
+from openbook_common.utils import reference_data
 
 
 def check_follow_lists_ids(user, lists_ids):
@@ -811,8 +812,7 @@ def check_can_accept_guidelines(user):
 
 
 def check_can_set_language_with_id(user, language_id):
-    Language = get_language_model()
-    if not Language.objects.filter(pk=language_id).exists():
+    if not reference_data.get_language_with_id(language_id):
         raise ValidationError('Please provide a valid language id')
 
 
@@ -1154,9 +1154,7 @@ def check_can_get_reactions_for_post_comment(user, post_comment):
 
 
 def check_can_react_with_emoji_id(user, emoji_id):
-    EmojiGroup = get_emoji_group_model()
-
-    if not EmojiGroup.objects.filter(emojis__id=emoji_id, is_reaction_group=True).exists():
+    if emoji_id not in reference_data.get_reaction_emojis_ids():
         raise ValidationError(
             _('Not a valid emoji to react with'),
         )
@@ -6,9 +6,9 @@ from django.contrib.auth.validators import UnicodeUsernameValidator, ASCIIUserna
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.utils import six, timezone, translation
+from django.utils import six, timezone
 from django.template.loader import render_to_string
 from django.utils.translation import ugettext_lazy as _
 from imagekit.models import ProcessedImageField
@@ -21,12 +21,19 @@ from openbook.settings import USERNAME_MAX_LENGTH
 from openbook_auth.helpers import upload_to_user_cover_directory, upload_to_user_avatar_directory
 from openbook_hashtags.queries import make_search_hashtag_query_for_user_with_id, \
     make_get_hashtag_with_name_for_user_with_id_query
-from openbook_notifications.helpers import get_notification_language_code_for_target_user
+from openbook_notifications.bulk_deletion import bulk_delete_notifications
+from openbook_notifications import unread_counts, reaction_coalescing
+from openbook_notifications.helpers import get_push_message_for_target_user, PUSH_MESSAGE_POST_COMMENT, \
+    PUSH_MESSAGE_POST_COMMENT_ON_COMMENTED_POST, PUSH_MESSAGE_POST_COMMENT_REPLY, \
+    PUSH_MESSAGE_POST_COMMENT_REPLY_ON_OWN_POST, PUSH_MESSAGE_POST_COMMENT_REPLY_ON_REPLIED_COMMENT
+from openbook_posts import timelines, notification_targets
+from openbook_posts.exclusions import get_post_exclusions_for_user_with_id, delete_post_exclusions_for_users_with_ids
 from openbook_posts.queries import make_get_hashtag_posts_for_user_with_id_query
 from openbook_posts.query_collections import get_posts_for_user_collection
 from openbook_translation import translation_strategy
 from openbook_common.helpers import get_supported_translation_language
 from openbook_common.models import Badge, Language
+from openbook_common.utils import reference_data
 from openbook_common.utils.helpers import delete_file_field
 from openbook_common.utils.model_loaders import get_connection_model, get_circle_model, get_follow_model, \
     get_list_model, get_community_invite_model, \
@@ -83,6 +90,10 @@ class User(AbstractUser):
 
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     invite_count = models.SmallIntegerField(default=0)
+    # Denormalized counters, maintained by the Follow and Post signal receivers
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
     JWT_TOKEN_TYPE_CHANGE_EMAIL = 'CE'
     JWT_TOKEN_TYPE_PASSWORD_RESET = 'PR'
@@ -224,7 +235,7 @@ class User(AbstractUser):
                       'creator__username', 'creator__id', 'creator__profile__name',
                       'creator__profile__avatar', 'creator__profile__badges__id',
                       'language', 'media_height', 'media_width', 'media_thumbnail', 'public_reactions',
-                      'comments_enabled',
+                      'comments_enabled', 'comments_count',
                       'creator__profile__badges__keyword', 'creator__profile__id', 'community__id',
                       'community__name', 'community__avatar', 'community__color', 'community__title',)
 
@@ -275,8 +286,11 @@ class User(AbstractUser):
         return self.moderation_penalties.filter(
             moderated_object__category__severity=moderation_severity).count()
 
-    def count_unread_notifications(self):
-        return self.notifications.filter(read=False).count()
+    def count_unread_notifications(self, types=None):
+        return unread_counts.count_unread_notifications_for_user_with_id(user_id=self.pk, types=types)
+
+    def get_unread_notifications_counts(self):
+        return unread_counts.get_unread_notifications_counts_for_user_with_id(user_id=self.pk)
 
     def count_public_posts_for_user(self, user):
         """
@@ -462,8 +476,7 @@ class User(AbstractUser):
 
     def set_language_with_id(self, language_id):
         check_can_set_language_with_id(user=self, language_id=language_id)
-        Language = get_language_model()
-        language = Language.objects.get(pk=language_id)
+        language = reference_data.get_language_with_id(language_id)
         self.language = language
         self.translation_language = get_supported_translation_language(language.code)
         self.save()
@@ -1044,10 +1057,7 @@ class User(AbstractUser):
         else:
             post_reaction = post.react(reactor=self, emoji_id=emoji_id)
             if post_reaction.post.creator_id != self.pk:
-                if post.creator.has_reaction_notifications_enabled_for_post_with_id(post_id=post.pk) and \
-                        not post.creator.has_blocked_user_with_id(self.pk):
-                    self._create_post_reaction_notification(post_reaction=post_reaction)
-                self._send_post_reaction_push_notification(post_reaction=post_reaction)
+                self._coalesce_post_reaction_notification(post_reaction=post_reaction)
 
         return post_reaction
 
@@ -1077,12 +1087,7 @@ class User(AbstractUser):
         else:
             post_comment_reaction = post_comment.react(reactor=self, emoji_id=emoji_id)
             if post_comment_reaction.post_comment.commenter_id != self.pk:
-                commenter_has_reaction_notifications_enabled = post_comment.commenter.has_reaction_notifications_enabled_for_post_comment(
-                    post_comment=post_comment)
-
-                if commenter_has_reaction_notifications_enabled:
-                    self._send_post_comment_reaction_push_notification(post_comment_reaction=post_comment_reaction)
-                self._create_post_comment_reaction_notification(post_comment_reaction=post_comment_reaction)
+                self._coalesce_post_comment_reaction_notification(post_comment_reaction=post_comment_reaction)
 
         return post_comment_reaction
 
@@ -1178,46 +1183,34 @@ class User(AbstractUser):
         post_creator = post.creator
         post_commenter = self
 
-        Post = get_post_model()
-
-        # Language should also be prefetched here, for some reason it doesnt work....
-        post_notification_target_users = Post.get_post_comment_notification_target_users(post=post,
-                                                                                         post_commenter=post_commenter).only(
-            'id', 'username', 'notifications_settings__post_comment_notifications')
-        PostCommentNotification = get_post_comment_notification_model()
+        post_notification_target_users = notification_targets.get_post_comment_notification_target_users(
+            post_comment=post_comment)
 
         for post_notification_target_user in post_notification_target_users:
-            if post_notification_target_user.pk == post_commenter.pk or \
-                    not post_notification_target_user.can_see_post_comment(post_comment=post_comment):
+            if not post_notification_target_user.has_notifications_enabled:
                 continue
-            post_notification_target_user_is_post_creator = post_notification_target_user.id == post_creator.id
-            post_notification_target_has_comment_notifications_enabled = post_notification_target_user.has_comment_notifications_enabled_for_post_with_id(
-                post_id=post_comment.post_id)
-
-            if post_notification_target_has_comment_notifications_enabled:
-                target_user_language_code = get_notification_language_code_for_target_user(
-                    post_notification_target_user)
-                with translation.override(target_user_language_code):
-                    if post_notification_target_user_is_post_creator:
-                        notification_message = {
-                            "en": _('%(post_commenter_name)s · %(post_commenter_username)s commented on your post.') % {
-                                'post_commenter_username': post_commenter.username,
-                                'post_commenter_name': post_commenter.profile.name,
-                            }}
-                    else:
-                        notification_message = {
-                            "en": _(
-                                '%(post_commenter_name)s · @%(post_commenter_username)s commented on a post you also commented on.') % {
-                                      'post_commenter_username': post_commenter.username,
-                                      'post_commenter_name': post_commenter.profile.name,
-                                  }}
 
-                    self._send_post_comment_push_notification(post_comment=post_comment,
-                                                              notification_message=notification_message,
-                                                              notification_target_user=post_notification_target_user)
+            if post_notification_target_user.id == post_creator.id:
+                push_message_name = PUSH_MESSAGE_POST_COMMENT
+            else:
+                push_message_name = PUSH_MESSAGE_POST_COMMENT_ON_COMMENTED_POST
 
-            PostCommentNotification.create_post_comment_notification(post_comment_id=post_comment.pk,
-                                                                     owner_id=post_notification_target_user.id)
+            notification_message = {
+                "en": get_push_message_for_target_user(message_name=push_message_name,
+                                                       target_user=post_notification_target_user) % {
+                          'post_commenter_username': post_commenter.username,
+                          'post_commenter_name': post_commenter.profile.name,
+                      }}
+
+            self._send_post_comment_push_notification(post_comment=post_comment,
+                                                      notification_message=notification_message,
+                                                      notification_target_user=post_notification_target_user)
+
+        PostCommentNotification = get_post_comment_notification_model()
+        PostCommentNotification.bulk_create_post_comment_notifications(
+            post_comment_id=post_comment.pk,
+            owners_ids=[post_notification_target_user.id for post_notification_target_user in
+                        post_notification_target_users])
 
         return post_comment
 
@@ -1231,65 +1224,40 @@ class User(AbstractUser):
     def reply_to_comment_for_post(self, post_comment, post, text):
         check_can_reply_to_post_comment_for_post(user=self, post_comment=post_comment, post=post)
         post_comment_reply = post_comment.reply_to_comment(text=text, commenter=self)
-        comment_creator = post_comment.commenter.id
+        comment_creator = post_comment.commenter_id
         post_creator = post.creator
         replier = self
-        post = post_comment.post
 
-        Post = get_post_model()
-
-        # Language should also be prefetched here, for some reason it doesnt work....
-        post_notification_target_users = Post.get_post_comment_reply_notification_target_users(
-            post_commenter=self,
-            parent_post_comment=post_comment).only(
-            'id', 'username', 'notifications_settings__post_comment_reply_notifications')
-
-        PostCommentReplyNotification = get_post_comment_reply_notification_model()
+        post_notification_target_users = notification_targets.get_post_comment_reply_notification_target_users(
+            post_comment_reply=post_comment_reply)
 
         for post_notification_target_user in post_notification_target_users:
-            if post_notification_target_user.pk == replier.pk or \
-                    not post_notification_target_user.can_see_post_comment(post_comment=post_comment_reply):
+            if not post_notification_target_user.has_notifications_enabled:
                 continue
-            post_notification_target_user_is_post_comment_creator = post_notification_target_user.id == comment_creator
-            post_notification_target_user_is_post_creator = post_notification_target_user.id == post_creator.id
-            post_notification_target_has_comment_reply_notifications_enabled = \
-                post_notification_target_user.has_reply_notifications_enabled_for_post_comment(
-                    post_comment=post_comment)
-
-            if post_notification_target_has_comment_reply_notifications_enabled:
-                target_user_language_code = get_notification_language_code_for_target_user(
-                    post_notification_target_user)
-
-                with translation.override(target_user_language_code):
-                    if post_notification_target_user_is_post_comment_creator:
-                        notification_message = {
-                            "en": _(
-                                '%(post_commenter_name)s · @%(post_commenter_username)s replied to your comment on a post.') % {
-                                      'post_commenter_username': replier.username,
-                                      'post_commenter_name': replier.profile.name,
-                                  }}
-                    elif post_notification_target_user_is_post_creator:
-                        notification_message = {
-                            "en": _(
-                                '%(post_commenter_name)s · %(post_commenter_username)s replied to a comment on your post.') % {
-                                      'post_commenter_username': replier.username,
-                                      'post_commenter_name': replier.profile.name,
-                                  }}
-                    else:
-                        notification_message = {
-                            "en": _(
-                                '%(post_commenter_name)s · @%(post_commenter_username)s replied on a comment you also replied on.') % {
-                                      'post_commenter_username': replier.username,
-                                      'post_commenter_name': replier.profile.name,
-                                  }}
 
-                    self._send_post_comment_push_notification(post_comment=post_comment_reply,
-                                                              notification_message=notification_message,
-                                                              notification_target_user=post_notification_target_user)
+            if post_notification_target_user.id == comment_creator:
+                push_message_name = PUSH_MESSAGE_POST_COMMENT_REPLY
+            elif post_notification_target_user.id == post_creator.id:
+                push_message_name = PUSH_MESSAGE_POST_COMMENT_REPLY_ON_OWN_POST
+            else:
+                push_message_name = PUSH_MESSAGE_POST_COMMENT_REPLY_ON_REPLIED_COMMENT
+
+            notification_message = {
+                "en": get_push_message_for_target_user(message_name=push_message_name,
+                                                       target_user=post_notification_target_user) % {
+                          'post_commenter_username': replier.username,
+                          'post_commenter_name': replier.profile.name,
+                      }}
 
-            PostCommentReplyNotification.create_post_comment_reply_notification(
-                post_comment_id=post_comment_reply.pk,
-                owner_id=post_notification_target_user.id)
+            self._send_post_comment_push_notification(post_comment=post_comment_reply,
+                                                      notification_message=notification_message,
+                                                      notification_target_user=post_notification_target_user)
+
+        PostCommentReplyNotification = get_post_comment_reply_notification_model()
+        PostCommentReplyNotification.bulk_create_post_comment_reply_notifications(
+            post_comment_id=post_comment_reply.pk,
+            owners_ids=[post_notification_target_user.id for post_notification_target_user in
+                        post_notification_target_users])
 
         return post_comment_reply
 
@@ -1548,6 +1516,7 @@ class User(AbstractUser):
         Community = get_community_model()
         community_to_join = Community.objects.get(name=community_name)
         community_to_join.add_member(self)
+        self._invalidate_timeline()
 
         # Clean up_full any invites
         CommunityInvite = get_community_invite_model()
@@ -1572,6 +1541,7 @@ class User(AbstractUser):
             self.unsubscribe_from_community_notifications(community=community_to_leave)
 
         community_to_leave.remove_member(self)
+        self._remove_posts_from_timeline(posts_query=Q(community_id=community_to_leave.pk))
 
         return community_to_leave
 
@@ -2421,25 +2391,27 @@ class User(AbstractUser):
                       'post__community__avatar',
                       'post__community__color', 'post__community__title')
 
-        reported_posts_exclusion_query = ~Q(post__moderated_object__reports__reporter_id=self.pk)
+        post_exclusions = get_post_exclusions_for_user_with_id(user_id=self.pk)
+
+        reported_posts_exclusion_query = post_exclusions.make_exclude_reported_posts_query(post_field='post_id')
         excluded_top_posts_communities_query = ~Q(post__community__top_posts_community_exclusions__user=self.pk)
 
         top_community_posts_query = Q(post__is_closed=False,
                                       post__is_deleted=False,
                                       post__status=Post.STATUS_PUBLISHED)
 
-        top_community_posts_query.add(~Q(Q(post__creator__blocked_by_users__blocker_id=self.pk) | Q(
-            post__creator__user_blocks__blocked_user_id=self.pk)), Q.AND)
+        top_community_posts_query.add(
+            post_exclusions.make_exclude_blocked_users_posts_query(creator_field='post__creator_id'), Q.AND)
         top_community_posts_query.add(Q(post__community__type=Community.COMMUNITY_TYPE_PUBLIC), Q.AND)
-        top_community_posts_query.add(~Q(post__community__banned_users__id=self.pk), Q.AND)
+        top_community_posts_query.add(
+            post_exclusions.make_exclude_banned_communities_posts_query(community_field='post__community_id'), Q.AND)
 
         if max_id:
             top_community_posts_query.add(Q(id__lt=max_id), Q.AND)
         elif min_id:
             top_community_posts_query.add(Q(id__gt=min_id), Q.AND)
 
-        ModeratedObject = get_moderated_object_model()
-        top_community_posts_query.add(~Q(post__moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.AND)
+        top_community_posts_query.add(post_exclusions.make_exclude_approved_posts_query(post_field='post_id'), Q.AND)
 
         if exclude_joined_communities:
             # exclude communities the user is a member of
@@ -2460,6 +2432,8 @@ class User(AbstractUser):
         """
 
         if not circles_ids and not lists_ids:
+            if timelines.is_timelines_store_enabled():
+                return self._get_timeline_posts_from_store(max_id=max_id, min_id=min_id, count=count)
             return self._get_timeline_posts_with_no_filters(max_id=max_id)
 
         return self._get_timeline_posts_with_filters(max_id=max_id, circles_ids=circles_ids, lists_ids=lists_ids)
@@ -2507,7 +2481,8 @@ class User(AbstractUser):
 
         timeline_posts_query.add(Q(is_deleted=False, status=Post.STATUS_PUBLISHED), Q.AND)
 
-        timeline_posts_query.add(~Q(moderated_object__reports__reporter_id=self.pk), Q.AND)
+        post_exclusions = get_post_exclusions_for_user_with_id(user_id=self.pk)
+        timeline_posts_query.add(post_exclusions.make_exclude_reported_posts_query(), Q.AND)
 
         return Post.objects.filter(timeline_posts_query).distinct()
 
@@ -2530,8 +2505,8 @@ class User(AbstractUser):
                       'community__color',
                       'community__title')
 
-        ModeratedObject = get_moderated_object_model()
-        reported_posts_exclusion_query = ~Q(moderated_object__reports__reporter_id=self.pk)
+        post_exclusions = get_post_exclusions_for_user_with_id(user_id=self.pk)
+        reported_posts_exclusion_query = post_exclusions.make_exclude_reported_posts_query()
 
         own_posts_query = Q(creator=self.pk, community__isnull=True, is_deleted=False, status=Post.STATUS_PUBLISHED)
 
@@ -2546,13 +2521,12 @@ class User(AbstractUser):
         community_posts_query = Q(community__memberships__user__id=self.pk, is_closed=False, is_deleted=False,
                                   status=Post.STATUS_PUBLISHED)
 
-        community_posts_query.add(~Q(Q(creator__blocked_by_users__blocker_id=self.pk) | Q(
-            creator__user_blocks__blocked_user_id=self.pk)), Q.AND)
+        community_posts_query.add(post_exclusions.make_exclude_blocked_users_posts_query(), Q.AND)
 
         if max_id:
             community_posts_query.add(Q(id__lt=max_id), Q.AND)
 
-        community_posts_query.add(~Q(moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.AND)
+        community_posts_query.add(post_exclusions.make_exclude_approved_posts_query(), Q.AND)
 
         community_posts_query.add(reported_posts_exclusion_query, Q.AND)
 
@@ -2581,6 +2555,76 @@ class User(AbstractUser):
 
         return final_queryset
 
+    def _get_timeline_posts_from_store(self, max_id=None, min_id=None, count=None):
+        """
+        Reads the timeline from the materialized timelines store, rebuilding it first if it's cold.
+        The posts that became invisible since they were fanned out get removed from the store, and the store keeps
+        being read until `count` visible posts are found or it runs out, so only the end of the timeline comes back
+        short. As the skipped posts are gone from the store, a cursor on the last post served continues right
+        after the last post read.
+        """
+        if not timelines.is_timeline_warm_for_user_with_id(user_id=self.pk):
+            self.rebuild_timeline()
+
+        Post = get_post_model()
+        post_exclusions = get_post_exclusions_for_user_with_id(user_id=self.pk)
+
+        posts_select_related = ('creator', 'creator__profile', 'community', 'image')
+
+        posts_prefetch_related = ('circles', 'creator__profile__badges')
+
+        posts_only = ('text', 'id', 'uuid', 'created', 'image__width', 'image__height', 'image__image',
+                      'creator__username', 'creator__id', 'creator__profile__name', 'creator__profile__avatar',
+                      'creator__profile__badges__id', 'creator__profile__badges__keyword',
+                      'creator__profile__id', 'community__id', 'community__name', 'community__avatar',
+                      'community__color',
+                      'community__title')
+
+        visible_posts_query = Q(is_deleted=False, status=Post.STATUS_PUBLISHED)
+
+        visible_posts_query.add(post_exclusions.make_exclude_reported_posts_query(), Q.AND)
+
+        community_posts_query = Q(is_closed=False)
+        community_posts_query.add(post_exclusions.make_exclude_approved_posts_query(), Q.AND)
+
+        visible_posts_query.add(Q(community__isnull=True) | community_posts_query, Q.AND)
+
+        visible_post_ids = []
+        read_max_id = max_id
+
+        while True:
+            timeline_post_ids = timelines.get_timeline_post_ids_for_user_with_id(user_id=self.pk,
+                                                                                 max_id=read_max_id,
+                                                                                 min_id=min_id, count=count)
+            if not timeline_post_ids:
+                break
+
+            read_visible_post_ids = set(Post.objects.filter(visible_posts_query, id__in=timeline_post_ids).values_list(
+                'id', flat=True))
+
+            invisible_post_ids = [post_id for post_id in timeline_post_ids if post_id not in read_visible_post_ids]
+            if invisible_post_ids:
+                timelines.remove_posts_with_ids_from_timeline_of_user_with_id(user_id=self.pk,
+                                                                              posts_ids=invisible_post_ids)
+
+            visible_post_ids.extend(post_id for post_id in timeline_post_ids if post_id in read_visible_post_ids)
+
+            if not count or len(visible_post_ids) >= count or len(timeline_post_ids) < count:
+                break
+
+            read_max_id = timeline_post_ids[-1]
+
+        if count:
+            visible_post_ids = visible_post_ids[:count]
+
+        return Post.objects.select_related(*posts_select_related).prefetch_related(
+            *posts_prefetch_related).only(*posts_only).filter(id__in=visible_post_ids)
+
+    def rebuild_timeline(self):
+        timeline_posts = self._get_timeline_posts_with_no_filters().order_by('-id').values_list('id', flat=True)
+        timeline_post_ids = list(timeline_posts[:settings.TIMELINE_MAX_LENGTH])
+        timelines.set_timeline_for_user_with_id(user_id=self.pk, post_ids=timeline_post_ids)
+
     def get_global_moderated_objects(self, types=None, max_id=None, verified=None, statuses=None):
         check_can_get_global_moderated_objects(user=self)
         ModeratedObject = get_moderated_object_model()
@@ -2703,6 +2747,7 @@ class User(AbstractUser):
 
         Follow = get_follow_model()
         follow = Follow.create_follow(user_id=self.pk, followed_user_id=user_id, lists_ids=lists_ids)
+        self._invalidate_timeline()
         self._create_follow_notification(followed_user_id=user_id)
         self._send_follow_push_notification(followed_user_id=user_id)
 
@@ -2716,6 +2761,7 @@ class User(AbstractUser):
         follow = self.follows.get(followed_user_id=user_id)
         self._delete_follow_notification(followed_user_id=user_id)
         follow.delete()
+        self._remove_posts_from_timeline(posts_query=Q(creator_id=user_id, community__isnull=True))
 
     def update_follow_for_user(self, user, lists_ids=None):
         return self.update_follow_for_user_with_id(user.pk, lists_ids=lists_ids)
@@ -2787,6 +2833,7 @@ class User(AbstractUser):
 
         check_connection_circles_ids(user=self, circles_ids=circles_ids)
         connection = self.update_connection_with_user_with_id(user_id, circles_ids=circles_ids)
+        self._invalidate_timeline()
 
         # Automatically follow user
         if not self.is_following_user_with_id(user_id):
@@ -2813,6 +2860,9 @@ class User(AbstractUser):
         connection.circles.add(*circles_ids)
         connection.save()
 
+        # The posts of our circles the user can see changed
+        self._invalidate_timeline_for_user_with_id(user_id=user_id)
+
         return connection
 
     def disconnect_from_user(self, user):
@@ -2830,6 +2880,8 @@ class User(AbstractUser):
         connection = self.connections.get(target_connection__user_id=user_id)
         connection.delete()
 
+        self._invalidate_timeline_for_user_with_id(user_id=user_id)
+
         return connection
 
     def get_connection_for_user_with_id(self, user_id):
@@ -2857,7 +2909,19 @@ class User(AbstractUser):
         if types:
             notifications_query.add(Q(notification_type__in=types), Q.AND)
 
-        self.notifications.filter(notifications_query).update(read=True)
+        read_notifications = self.notifications.filter(notifications_query)
+        read_amounts_by_type = dict(read_notifications.values_list('notification_type').annotate(
+            count=Count('id')).order_by())
+
+        read_notifications_count = read_notifications.update(read=True)
+
+        if read_notifications_count == sum(read_amounts_by_type.values()):
+            unread_counts.increment_unread_notifications_counts(amounts_by_user_id_and_type={
+                (self.pk, notification_type): -amount for notification_type, amount in read_amounts_by_type.items()
+            })
+        else:
+            # Notifications got created or read in between
+            unread_counts.delete_unread_notifications_counts_for_users_with_ids(users_ids=[self.pk])
 
     def get_unread_notifications(self, max_id=None, types=None):
         notifications_query = Q(read=False)
@@ -2872,6 +2936,9 @@ class User(AbstractUser):
     def read_notification_with_id(self, notification_id):
         check_can_read_notification_with_id(user=self, notification_id=notification_id)
         notification = self.notifications.get(id=notification_id)
+        if not notification.read:
+            unread_counts.decrement_unread_notifications_count_for_user_with_id(
+                user_id=self.pk, notification_type=notification.notification_type)
         notification.read = True
         notification.save()
         return notification
@@ -2883,6 +2950,7 @@ class User(AbstractUser):
 
     def delete_own_notifications(self):
         self.notifications.all().delete()
+        unread_counts.delete_unread_notifications_counts_for_users_with_ids(users_ids=[self.pk])
 
     def delete_outgoing_notifications(self):
         """
@@ -2891,7 +2959,9 @@ class User(AbstractUser):
         """
         # Remove all user new post notifications
         UserNewPostNotification = get_user_new_post_notification_model()
-        UserNewPostNotification.objects.filter(user_notifications_subscription__user=self).delete()
+        bulk_delete_notifications(typed_notifications_querysets=[
+            UserNewPostNotification.objects.filter(user_notifications_subscription__user=self)
+        ])
 
         # Removes all user connection requests
         ConnectionRequestNotification = get_connection_request_notification_model()
@@ -3055,6 +3125,9 @@ class User(AbstractUser):
         UserBlock = get_user_block_model()
         UserBlock.create_user_block(blocker_id=self.pk, blocked_user_id=user_id)
 
+        self._remove_posts_from_timeline(posts_query=Q(creator_id=user_id))
+        user_to_block._remove_posts_from_timeline(posts_query=Q(creator_id=self.pk))
+
         return user_to_block
 
     def unblock_user_with_username(self, username):
@@ -3301,27 +3374,16 @@ class User(AbstractUser):
         PostCommentReplyNotification.delete_post_comment_notification(post_comment_id=post_comment.pk,
                                                                       owner_id=post_comment.post.creator_id)
 
-    def _create_post_reaction_notification(self, post_reaction):
-        PostReactionNotification = get_post_reaction_notification_model()
-        PostReactionNotification.create_post_reaction_notification(post_reaction_id=post_reaction.pk,
-                                                                   owner_id=post_reaction.post.creator_id)
-
-    def _send_post_reaction_push_notification(self, post_reaction):
-        helpers.send_post_reaction_push_notification(post_reaction=post_reaction)
+    def _coalesce_post_reaction_notification(self, post_reaction):
+        reaction_coalescing.add_post_reaction_to_buffer(post_reaction=post_reaction)
 
     def _delete_post_reaction_notification(self, post_reaction):
         PostReactionNotification = get_post_reaction_notification_model()
         PostReactionNotification.delete_post_reaction_notification(post_reaction_id=post_reaction.pk,
                                                                    owner_id=post_reaction.post.creator_id)
 
-    def _create_post_comment_reaction_notification(self, post_comment_reaction):
-        PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.create_post_comment_reaction_notification(
-            post_comment_reaction_id=post_comment_reaction.pk,
-            owner_id=post_comment_reaction.post_comment.commenter_id)
-
-    def _send_post_comment_reaction_push_notification(self, post_comment_reaction):
-        helpers.send_post_comment_reaction_push_notification(post_comment_reaction=post_comment_reaction)
+    def _coalesce_post_comment_reaction_notification(self, post_comment_reaction):
+        reaction_coalescing.add_post_comment_reaction_to_buffer(post_comment_reaction=post_comment_reaction)
 
     def _delete_post_comment_reaction_notification(self, post_comment_reaction):
         PostCommentReactionNotification = get_post_comment_reaction_notification_model()
@@ -3378,6 +3440,18 @@ class User(AbstractUser):
         ConnectionRequestNotification.delete_connection_request_notification_for_users_with_ids(user_a_id=self.pk,
                                                                                                 user_b_id=user_id)
 
+    def _invalidate_timeline(self):
+        self._invalidate_timeline_for_user_with_id(user_id=self.pk)
+
+    def _invalidate_timeline_for_user_with_id(self, user_id):
+        if timelines.is_timelines_store_enabled():
+            timelines.delete_timeline_for_user_with_id(user_id=user_id)
+
+    def _remove_posts_from_timeline(self, posts_query):
+        if timelines.is_timelines_store_enabled():
+            timelines.remove_posts_matching_query_from_timeline_of_user_with_id(user_id=self.pk,
+                                                                                posts_query=posts_query)
+
     def _reset_auth_token(self):
         self.auth_token.delete()
         bootstrap_user_auth_token(user=self)
@@ -3433,8 +3507,7 @@ class User(AbstractUser):
         return posts_query
 
     def _get_world_circle_id(self):
-        Circle = get_circle_model()
-        return Circle.get_world_circle().pk
+        return reference_data.get_world_circle_id()
 
     def _get_default_connection_circles(self):
         """
@@ -3809,6 +3882,12 @@ class UserBlock(models.Model):
                                                                                          blocker_id=user_a_id)).exists()
 
 
+@receiver(post_save, sender=UserBlock, dispatch_uid='delete_user_block_post_exclusions_on_save')
+@receiver(post_delete, sender=UserBlock, dispatch_uid='delete_user_block_post_exclusions_on_delete')
+def delete_user_block_post_exclusions(sender, instance, **kwargs):
+    delete_post_exclusions_for_users_with_ids(users_ids=[instance.blocker_id, instance.blocked_user_id])
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='bootstrap_notifications_settings')
 def create_user_notifications_settings(sender, instance=None, created=False, **kwargs):
     """"
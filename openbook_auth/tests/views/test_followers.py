@@ -8,6 +8,7 @@ import logging
 import json
 
 from openbook_common.tests.helpers import make_user, make_authentication_headers_for_user
+from openbook_common.utils.pagination import NEXT_CURSOR_HEADER
 
 fake = Faker()
 
@@ -71,6 +72,34 @@ class FollowersAPITests(OpenbookAPITestCase):
 
         self.assertEqual(0, len(response_followers))
 
+    def test_can_retrieve_followers_with_cursor(self):
+        """
+        should be able to retrieve the followers page after the next cursor of the previous page
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user)
+
+        followers_ids = []
+
+        for i in range(0, 3):
+            follower = make_user()
+            follower.follow_user_with_id(user.pk)
+            followers_ids.append(follower.pk)
+
+        url = self._get_url()
+        response = self.client.get(url, {'count': 2}, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([response_follower.get('id') for response_follower in json.loads(response.content)],
+                         [followers_ids[2], followers_ids[1]])
+
+        response = self.client.get(url, {'count': 2, 'cursor': response[NEXT_CURSOR_HEADER]}, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([response_follower.get('id') for response_follower in json.loads(response.content)],
+                         [followers_ids[0]])
+        self.assertNotIn(NEXT_CURSOR_HEADER, response)
+
     def _get_url(self):
         return reverse('followers')
 
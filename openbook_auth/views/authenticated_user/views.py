@@ -14,7 +14,7 @@ from openbook_auth.views.auth.serializers import AuthenticatedUserNotificationsS
 from openbook_auth.views.authenticated_user.serializers import GetAuthenticatedUserSerializer, \
     UpdateAuthenticatedUserSerializer, DeleteAuthenticatedUserSerializer, UpdateAuthenticatedUserSettingsSerializer, \
     AuthenticatedUserLanguageSerializer, AuthenticatedUserAllLanguagesSerializer
-from openbook_common.utils.model_loaders import get_language_model
+from openbook_common.utils import reference_data
 from openbook_moderation.permissions import IsNotSuspended, check_user_is_not_suspended
 from openbook_common.responses import ApiMessageResponse
 
@@ -208,8 +208,7 @@ class AuthenticatedUserLanguage(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request):
-        Language = get_language_model()
-        languages = Language.objects.all()
+        languages = reference_data.get_languages()
         all_languages_serializer = AuthenticatedUserAllLanguagesSerializer(
             languages, context={'request': request}, many=True)
         return Response(all_languages_serializer.data, status=status.HTTP_200_OK)
@@ -5,12 +5,17 @@ from openbook_auth.models import User, UserProfile
 from openbook_common.models import Badge
 from openbook_common.serializers_fields.user import \
     IsFollowingField, IsConnectedField, IsFollowedField
+from openbook_common.utils.pagination import CURSOR_MAX_LENGTH
 
 
 class GetFollowersSerializer(serializers.Serializer):
     max_id = serializers.IntegerField(
         required=False,
     )
+    cursor = serializers.CharField(
+        required=False,
+        max_length=CURSOR_MAX_LENGTH,
+    )
     count = serializers.IntegerField(
         required=False,
         max_value=20
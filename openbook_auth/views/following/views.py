@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from openbook_common.utils.pagination import KeysetPaginator, add_next_cursor_header
 from openbook_auth.views.following.serializers import GetFollowingsSerializer, FollowingsUserSerializer, \
     SearchFollowingsSerializer
 
@@ -19,14 +20,16 @@ class Followings(APIView):
 
         count = data.get('count', 10)
         max_id = data.get('max_id')
+        cursor = data.get('cursor')
 
         user = request.user
-        users = user.get_followings(max_id=max_id).order_by(
-            '-id')[:count]
+        paginator = KeysetPaginator(queryset=user.get_followings(max_id=max_id), ordering=('-id',))
+        users = paginator.get_page(count=count, cursor=cursor)
 
         users_serializer = FollowingsUserSerializer(users, many=True, context={'request': request})
 
-        return Response(users_serializer.data, status=status.HTTP_200_OK)
+        return add_next_cursor_header(Response(users_serializer.data, status=status.HTTP_200_OK),
+                                      paginator.get_next_cursor(users))
 
 
 class SearchFollowings(APIView):
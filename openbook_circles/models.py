@@ -1,11 +1,13 @@
-from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 # Create your models here.
 from django.utils import timezone
 
 from openbook.settings import CIRCLE_MAX_LENGTH, COLOR_ATTR_MAX_LENGTH
 from openbook_auth.models import User
+from openbook_common.utils import reference_data
 from openbook_common.utils.model_loaders import get_connection_model
 from openbook_connections.models import Connection
 from openbook_posts.models import Post
@@ -60,11 +62,11 @@ class Circle(models.Model):
 
     @classmethod
     def get_world_circle(cls):
-        return Circle.objects.get(pk=cls.get_world_circle_id())
+        return reference_data.get_world_circle()
 
     @classmethod
     def get_world_circle_id(cls):
-        return settings.WORLD_CIRCLE_ID
+        return reference_data.get_world_circle_id()
 
     @property
     def users(self):
@@ -91,3 +93,10 @@ class Circle(models.Model):
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_save, sender=Circle, dispatch_uid='clear_reference_data_on_world_circle_save')
+@receiver(post_delete, sender=Circle, dispatch_uid='clear_reference_data_on_world_circle_delete')
+def clear_reference_data_on_world_circle_change(sender, instance, **kwargs):
+    if instance.pk == reference_data.get_world_circle_id():
+        reference_data.clear_reference_data()
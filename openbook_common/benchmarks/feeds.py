@@ -0,0 +1,163 @@
+"""
+Feed benchmarks.
+
+Runs every feed entry point for a sample of viewers of a synthetic graph and records the query count, the SQL time
+and the wall time of each run. The first run of every viewer is reported apart as the cold run, as it is the one
+building the redis exclusion sets and timelines the following runs reuse.
+
+The results are plain dicts meant to be dumped as JSON, one file per run, so two revisions can be compared with
+compare_feed_benchmark_results.
+"""
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from openbook_common.utils.model_loaders import get_post_model
+from openbook_posts import timelines
+from openbook_posts.jobs import curate_top_posts, curate_trending_posts
+
+FEED_COUNT = 10
+
+COMPARED_METRICS = ('queries_count', 'sql_time', 'wall_time')
+
+
+def run_feed_benchmarks(graph, viewers_count=10, repeat=5):
+    Post = get_post_model()
+
+    curate_top_posts(full_rescan=True)
+    curate_trending_posts()
+
+    viewers = graph.users[:viewers_count]
+    commented_post = max(graph.posts, key=lambda post: post.comments_count, default=None)
+    profile_users = {viewer.pk: _get_followed_user(graph, viewer) for viewer in viewers}
+
+    entry_points = {
+        'timeline': lambda viewer: list(
+            viewer.get_timeline_posts(count=FEED_COUNT + 1).order_by('-id')[:FEED_COUNT + 1]),
+        'top_posts': lambda viewer: list(viewer.get_top_posts().order_by('-id')[:FEED_COUNT + 1]),
+        'trending_posts': lambda viewer: list(
+            Post.get_trending_posts_for_user_with_id(user_id=viewer.pk).order_by('-id')[:FEED_COUNT]),
+        'profile_posts': lambda viewer: list(
+            viewer.get_posts_for_user(user=profile_users[viewer.pk]).order_by('-id')[:FEED_COUNT + 1]),
+    }
+
+    if commented_post:
+        entry_points['post_comments'] = lambda viewer: list(
+            viewer.get_comments_for_post_with_id(commented_post.pk).order_by('-created', '-id')[:FEED_COUNT + 1])
+
+    results = {}
+
+    for entry_point_name, entry_point in entry_points.items():
+        cold_runs = []
+        warm_runs = []
+        refused_runs_count = 0
+
+        for viewer in viewers:
+            for run_index in range(repeat):
+                try:
+                    run = _measure(entry_point, viewer)
+                except APIException:
+                    # E.g. the viewer got blocked by the creator of the commented post
+                    refused_runs_count += 1
+                    continue
+                (cold_runs if run_index == 0 else warm_runs).append(run)
+
+        results[entry_point_name] = {
+            'cold': _summarize_runs(cold_runs),
+            'warm': _summarize_runs(warm_runs),
+            'refused_runs_count': refused_runs_count,
+        }
+
+    return {
+        'revision': _get_revision(),
+        'created': timezone.now().isoformat(),
+        'database_vendor': connections['default'].vendor,
+        'timelines_store_enabled': timelines.is_timelines_store_enabled(),
+        'viewers_count': len(viewers),
+        'repeat': repeat,
+        'graph': graph.get_summary(),
+        'results': results,
+    }
+
+
+def compare_feed_benchmark_results(baseline, current):
+    """
+    Returns the relative change of the median of every metric, e.g. 0.25 when it went up by a quarter
+    """
+    comparison = {}
+
+    for entry_point_name, entry_point_results in current['results'].items():
+        baseline_results = baseline['results'].get(entry_point_name)
+        if not baseline_results:
+            continue
+
+        comparison[entry_point_name] = {}
+        for temperature in ('cold', 'warm'):
+            if not baseline_results[temperature] or not entry_point_results[temperature]:
+                continue
+
+            comparison[entry_point_name][temperature] = {}
+            for metric in COMPARED_METRICS:
+                baseline_median = baseline_results[temperature]['median_%s' % metric]
+                current_median = entry_point_results[temperature]['median_%s' % metric]
+                comparison[entry_point_name][temperature][metric] = \
+                    (current_median - baseline_median) / baseline_median if baseline_median else None
+
+    return comparison
+
+
+def _measure(entry_point, viewer):
+    with ExitStack() as stack:
+        contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in settings.DATABASES]
+        started = time.perf_counter()
+        items = entry_point(viewer)
+        wall_time = time.perf_counter() - started
+
+    captured_queries = [query for context in contexts for query in context.captured_queries]
+
+    return {
+        'queries_count': len(captured_queries),
+        'sql_time': sum(float(query['time']) for query in captured_queries),
+        'wall_time': wall_time,
+        'items_count': len(items),
+    }
+
+
+def _summarize_runs(runs):
+    if not runs:
+        return {}
+
+    summary = {'runs_count': len(runs)}
+
+    for metric in COMPARED_METRICS:
+        values = [run[metric] for run in runs]
+        summary['median_%s' % metric] = statistics.median(values)
+        summary['max_%s' % metric] = max(values)
+
+    summary['median_items_count'] = statistics.median([run['items_count'] for run in runs])
+
+    return summary
+
+
+def _get_followed_user(graph, viewer):
+    followed_user_id = viewer.follows.values_list('followed_user_id', flat=True).first()
+
+    for user in graph.users:
+        if user.pk == followed_user_id:
+            return user
+
+    return viewer
+
+
+def _get_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,160 @@
+"""
+Synthetic social graph generator for the feed benchmarks.
+
+The graph gets built through the same model methods the API uses, so the denormalized counters, the timeline stores,
+the trending buckets and the exclusion sets end up as they would in production. Who follows, joins, posts, reacts,
+reports and blocks whom comes from a seeded generator, so the same parameters always build the same graph. Only the
+names and texts made by the mixer and faker helpers differ between runs.
+"""
+import random
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from rest_framework.exceptions import APIException
+
+from openbook_common.tests.helpers import make_users, make_community, make_reactions_emoji_group, make_emoji, \
+    make_moderation_category, make_fake_post_text, make_fake_post_comment_text
+from openbook_common.utils.model_loaders import get_post_model
+
+GRAPH_FIXTURES = (
+    'openbook_circles/fixtures/circles.json',
+    'openbook_common/fixtures/languages.json',
+)
+
+# Returned for the actions the API refused
+SKIPPED = object()
+
+
+class SyntheticGraphParameters():
+
+    def __init__(self, users_count=100, follows_per_user=20, connections_per_user=5, communities_count=10,
+                 memberships_per_user=3, posts_per_user=5, community_posts_ratio=0.5, reactions_per_post=6,
+                 comments_per_post=3, reports_per_user=1, blocks_per_user=1, seed=0):
+        self.users_count = users_count
+        self.follows_per_user = follows_per_user
+        self.connections_per_user = connections_per_user
+        self.communities_count = communities_count
+        self.memberships_per_user = memberships_per_user
+        self.posts_per_user = posts_per_user
+        self.community_posts_ratio = community_posts_ratio
+        self.reactions_per_post = reactions_per_post
+        self.comments_per_post = comments_per_post
+        self.reports_per_user = reports_per_user
+        self.blocks_per_user = blocks_per_user
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class SyntheticGraph():
+
+    def __init__(self, users, communities, posts, skipped_actions_count):
+        self.users = users
+        self.communities = communities
+        self.posts = posts
+        self.skipped_actions_count = skipped_actions_count
+
+    def get_summary(self):
+        return {
+            'users': len(self.users),
+            'communities': len(self.communities),
+            'posts': len(self.posts),
+            'skipped_actions': self.skipped_actions_count,
+        }
+
+
+def make_synthetic_graph(parameters):
+    """
+    Builds the graph in the current database. Actions the API would refuse, e.g. following a user twice or reacting
+    to the post of a blocked user, are skipped and counted.
+    """
+    call_command('loaddata', *GRAPH_FIXTURES, verbosity=0)
+
+    # No push notifications for the generated activity
+    with patch('openbook_notifications.helpers._send_notification_to_user'):
+        return _SyntheticGraphBuilder(parameters=parameters).build()
+
+
+class _SyntheticGraphBuilder():
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.random = random.Random(parameters.seed)
+        self.skipped_actions_count = 0
+
+    def build(self):
+        parameters = self.parameters
+
+        users = make_users(parameters.users_count)
+        emojis = [make_emoji(group=make_reactions_emoji_group()) for i in range(3)]
+        moderation_category = make_moderation_category()
+
+        communities = [make_community(creator=self.random.choice(users)) for i in range(parameters.communities_count)]
+
+        memberships = {user.pk: [] for user in users}
+        for community in communities:
+            memberships[community.creator_id].append(community)
+
+        for user in users:
+            for community in self._sample(communities, parameters.memberships_per_user):
+                if community in memberships[user.pk]:
+                    continue
+                if self._attempt(user.join_community_with_name, community_name=community.name) is not SKIPPED:
+                    memberships[user.pk].append(community)
+
+            for followed_user in self._sample_other_users(users, user, parameters.follows_per_user):
+                self._attempt(user.follow_user_with_id, user_id=followed_user.pk)
+
+            for connected_user in self._sample_other_users(users, user, parameters.connections_per_user):
+                if self._attempt(user.connect_with_user_with_id, user_id=connected_user.pk) is not SKIPPED:
+                    self._attempt(connected_user.confirm_connection_with_user_with_id, user_id=user.pk)
+
+        posts = []
+        for user in users:
+            for i in range(parameters.posts_per_user):
+                if memberships[user.pk] and self.random.random() < parameters.community_posts_ratio:
+                    post = self._attempt(user.create_community_post,
+                                         community_name=self.random.choice(memberships[user.pk]).name,
+                                         text=make_fake_post_text())
+                else:
+                    post = self._attempt(user.create_public_post, text=make_fake_post_text())
+
+                if post is not SKIPPED:
+                    posts.append(post)
+
+        for post in posts:
+            for reactor in self._sample_other_users(users, post.creator, parameters.reactions_per_post):
+                self._attempt(reactor.react_to_post_with_id, post_id=post.pk, emoji_id=self.random.choice(emojis).pk)
+
+            for commenter in self._sample(users, parameters.comments_per_post):
+                self._attempt(commenter.comment_post_with_id, post_id=post.pk, text=make_fake_post_comment_text())
+
+        # Reports and blocks go last, they hide posts and users from the actions above
+        for user in users:
+            others_posts = [post for post in posts if post.creator_id != user.pk]
+            for post in self._sample(others_posts, parameters.reports_per_user):
+                self._attempt(user.report_post, post=post, category_id=moderation_category.pk)
+
+            for blocked_user in self._sample_other_users(users, user, parameters.blocks_per_user):
+                self._attempt(user.block_user_with_id, user_id=blocked_user.pk)
+
+        Post = get_post_model()
+
+        return SyntheticGraph(users=users, communities=communities,
+                              posts=list(Post.objects.filter(pk__in=[post.pk for post in posts])),
+                              skipped_actions_count=self.skipped_actions_count)
+
+    def _sample(self, population, amount):
+        return self.random.sample(population, min(amount, len(population)))
+
+    def _sample_other_users(self, users, user, amount):
+        return self._sample([other_user for other_user in users if other_user.pk != user.pk], amount)
+
+    def _attempt(self, action, **kwargs):
+        try:
+            return action(**kwargs)
+        except (APIException, ValidationError):
+            self.skipped_actions_count += 1
+            return SKIPPED
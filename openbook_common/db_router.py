@@ -1,3 +1,14 @@
+import logging
+import random
+
+import django_replicated.router
+from django.conf import settings
+
+from openbook_common.utils import replication
+
+log = logging.getLogger(__name__)
+
+
 class DBRouter(object):
     def db_for_read(self, model, **hints):
         """
@@ -28,3 +39,44 @@ class DBRouter(object):
         Returning None means that no specific routing
         """
         return True
+
+
+class ReplicationRouter(django_replicated.router.ReplicationRouter):
+    """
+    Reads from one of the healthy replicas, picked randomly by their REPLICATED_DATABASE_SLAVES_WEIGHTS, skipping the
+    ones lagging too far behind the primary. Falls back to the primary when no replica can be read from or the client
+    of the current request wrote something within the sticky window.
+    """
+
+    def __init__(self):
+        super(ReplicationRouter, self).__init__()
+        self.SLAVES_WEIGHTS = getattr(settings, 'REPLICATED_DATABASE_SLAVES_WEIGHTS', {})
+
+    def db_for_read(self, *args, **kwargs):
+        if self.state() == 'master':
+            return self.db_for_write(*args, **kwargs)
+
+        if self.state() in self.context.chosen:
+            return self.context.chosen[self.state()]
+
+        chosen = self._choose_replica()
+        self.context.chosen[self.state()] = chosen
+
+        log.debug('db_for_read: %s', chosen)
+        return chosen
+
+    def _choose_replica(self):
+        replicas = [replica for replica in self.SLAVES if
+                    self.SLAVES_WEIGHTS.get(replica, 1) > 0 and self._can_read_from_replica(replica)]
+
+        if not replicas or replication.is_current_request_within_sticky_window():
+            return self.DEFAULT_DB_ALIAS
+
+        weights = [self.SLAVES_WEIGHTS.get(replica, 1) for replica in replicas]
+        return random.choices(replicas, weights=weights)[0]
+
+    def _can_read_from_replica(self, replica):
+        if replica == self.DEFAULT_DB_ALIAS:
+            return True
+
+        return self.is_alive(replica) and not replication.is_replica_lagging(replica)
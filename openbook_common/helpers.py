@@ -9,6 +9,7 @@ from urllib.parse import urlparse
 from urlextract import URLExtract
 
 from openbook.settings import ALERT_HOOK_URL
+from openbook_common.utils import reference_data
 from openbook_common.utils.model_loaders import get_language_model
 from openbook_translation import translation_strategy
 
@@ -26,18 +27,23 @@ def get_detected_language_code(text):
 
 def get_language_for_text(text):
     language_code = get_detected_language_code(text)
-    Language = get_language_model()
-    if language_code is not None and Language.objects.filter(code=language_code).exists():
-        return Language.objects.get(code=language_code)
 
-    return None
+    if language_code is None:
+        return None
+
+    return reference_data.get_language_with_code(language_code)
 
 
 def get_supported_translation_language(language_code):
     Language = get_language_model()
     supported_translation_code = translation_strategy.get_supported_translation_language_code(language_code)
 
-    return Language.objects.get(code=supported_translation_code)
+    language = reference_data.get_language_with_code(supported_translation_code)
+
+    if not language:
+        raise Language.DoesNotExist()
+
+    return language
 
 
 def extract_urls_from_string(text):
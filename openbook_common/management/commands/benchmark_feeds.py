@@ -0,0 +1,91 @@
+import json
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from openbook_common.benchmarks.feeds import run_feed_benchmarks, compare_feed_benchmark_results
+from openbook_common.benchmarks.graph import SyntheticGraphParameters, make_synthetic_graph
+from openbook_common.utils.reference_data import clear_reference_data
+from openbook_posts.exclusions import delete_all_post_exclusions
+from openbook_posts.timelines import delete_all_timelines
+from openbook_posts.top_posts_curation import delete_top_posts_curation_watermark
+from openbook_posts.trending import delete_all_trending_buckets
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the feed queries against a synthetic social graph built in a throwaway test database. ' \
+           'Only runs with DEBUG on, as it wipes the timelines, trending buckets and exclusion sets in redis.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, required=True, help='JSON file the results are written to')
+        parser.add_argument('--baseline', type=str, help='JSON results of a previous run to compare against')
+        parser.add_argument('--viewers', type=int, default=10, help='Amount of users the feeds are fetched for')
+        parser.add_argument('--repeat', type=int, default=5, help='Amount of runs per feed and viewer')
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--connections-per-user', type=int, default=5)
+        parser.add_argument('--communities', type=int, default=10)
+        parser.add_argument('--memberships-per-user', type=int, default=3)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--community-posts-ratio', type=float, default=0.5)
+        parser.add_argument('--reactions-per-post', type=int, default=6)
+        parser.add_argument('--comments-per-post', type=int, default=3)
+        parser.add_argument('--reports-per-user', type=int, default=1)
+        parser.add_argument('--blocks-per-user', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG:
+            raise CommandError('The feed benchmarks only run with DEBUG on')
+
+        parameters = SyntheticGraphParameters(users_count=options['users'],
+                                              follows_per_user=options['follows_per_user'],
+                                              connections_per_user=options['connections_per_user'],
+                                              communities_count=options['communities'],
+                                              memberships_per_user=options['memberships_per_user'],
+                                              posts_per_user=options['posts_per_user'],
+                                              community_posts_ratio=options['community_posts_ratio'],
+                                              reactions_per_post=options['reactions_per_post'],
+                                              comments_per_post=options['comments_per_post'],
+                                              reports_per_user=options['reports_per_user'],
+                                              blocks_per_user=options['blocks_per_user'],
+                                              seed=options['seed'])
+
+        old_databases_config = setup_databases(verbosity=0, interactive=False)
+        self._clear_redis_state()
+
+        try:
+            logger.info('Building synthetic graph %s' % parameters.to_dict())
+            graph = make_synthetic_graph(parameters=parameters)
+            logger.info('Built synthetic graph %s' % graph.get_summary())
+
+            results = run_feed_benchmarks(graph=graph, viewers_count=options['viewers'], repeat=options['repeat'])
+            results['graph_parameters'] = parameters.to_dict()
+        finally:
+            self._clear_redis_state()
+            teardown_databases(old_databases_config, verbosity=0)
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                results['comparison'] = compare_feed_benchmark_results(baseline=json.load(baseline_file),
+                                                                       current=results)
+
+        with open(options['output'], 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+        for entry_point_name, entry_point_results in results['results'].items():
+            warm_results = entry_point_results['warm'] or entry_point_results['cold']
+            logger.info('%s: %s queries, %.4fs SQL, %.4fs wall (median)' % (
+                entry_point_name, warm_results.get('median_queries_count'), warm_results.get('median_sql_time', 0),
+                warm_results.get('median_wall_time', 0)))
+
+    def _clear_redis_state(self):
+        delete_all_timelines()
+        delete_all_trending_buckets()
+        delete_all_post_exclusions()
+        delete_top_posts_curation_watermark()
+        clear_reference_data()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+import logging
+
+from openbook_common.utils.counters import reconcile_counters
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Reconciles the denormalized post, comment, follow and membership counters against their source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Amount of rows reconciled per query')
+
+    def handle(self, *args, **options):
+        fixed_counters = reconcile_counters(batch_size=options['batch_size'])
+
+        for counter_name, fixed_count in fixed_counters.items():
+            logger.info('Reconciled %d rows for %s' % (fixed_count, counter_name))
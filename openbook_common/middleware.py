@@ -1,7 +1,12 @@
+import django_replicated.middleware
 import pytz
 
+from django.conf import settings
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from openbook_common.utils import replication
 
 
 class TimezoneMiddleware(MiddlewareMixin):
@@ -15,3 +20,31 @@ class TimezoneMiddleware(MiddlewareMixin):
             timezone.activate(pytz.timezone(tzname))
         else:
             timezone.deactivate()
+
+
+class ReplicationMiddleware(django_replicated.middleware.ReplicationMiddleware):
+    """
+    Sends the reads of a client to the primary database for a while after it wrote something, so it always reads
+    its own writes even when the replicas lag behind.
+    """
+
+    def process_request(self, request):
+        super(ReplicationMiddleware, self).process_request(request)
+        # The router looks the sticky window up once about to read from a replica
+        replication.start_request(request)
+
+    def process_response(self, request, response):
+        try:
+            return super(ReplicationMiddleware, self).process_response(request, response)
+        finally:
+            replication.finish_request()
+
+    def handle_redirect_after_write(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            # The sticky window expires by itself, the force master cookie only lasts for the next request
+            if settings.REPLICATED_FORCE_MASTER_COOKIE_NAME in request.COOKIES:
+                response.delete_cookie(settings.REPLICATED_FORCE_MASTER_COOKIE_NAME)
+            return
+
+        replication.set_sticky_window_for_request(request)
+        self.set_force_master_cookie(response)
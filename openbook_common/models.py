@@ -5,11 +5,14 @@ from urllib.parse import urlparse
 from django.conf import settings
 from django.db import models
 from django.db.models import QuerySet, Q, Count
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 # Create your views here.
 from openbook.settings import COLOR_ATTR_MAX_LENGTH
+from openbook_common.utils.reference_data import clear_reference_data
 from openbook_common.validators import hex_color_validator
 import tldextract
 
@@ -132,3 +135,13 @@ class ProxyBlacklistedDomain(models.Model):
         url_full_domain = '.'.join([tld_extract_result.subdomain, tld_extract_result.domain, tld_extract_result.suffix])
 
         return cls.objects.filter(Q(domain=url_root_domain) | Q(domain=url_full_domain)).exists()
+
+
+@receiver(post_save, sender=EmojiGroup, dispatch_uid='clear_reference_data_on_emoji_group_save')
+@receiver(post_delete, sender=EmojiGroup, dispatch_uid='clear_reference_data_on_emoji_group_delete')
+@receiver(post_save, sender=Emoji, dispatch_uid='clear_reference_data_on_emoji_save')
+@receiver(post_delete, sender=Emoji, dispatch_uid='clear_reference_data_on_emoji_delete')
+@receiver(post_save, sender=Language, dispatch_uid='clear_reference_data_on_language_save')
+@receiver(post_delete, sender=Language, dispatch_uid='clear_reference_data_on_language_delete')
+def clear_reference_data_on_change(sender, **kwargs):
+    clear_reference_data()
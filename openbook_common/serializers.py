@@ -28,7 +28,7 @@ class CommonEmojiGroupSerializer(serializers.ModelSerializer):
     emojis = serializers.SerializerMethodField()
 
     def get_emojis(self, obj):
-        emojis = obj.emojis.all().order_by('order')
+        emojis = sorted(obj.emojis.all(), key=lambda emoji: emoji.order)
 
         request = self.context['request']
         return CommonEmojiSerializer(emojis, many=True, context={'request': request}).data
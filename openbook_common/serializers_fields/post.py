@@ -2,6 +2,8 @@ from rest_framework.fields import Field
 
 from openbook_common.utils.model_loaders import get_post_model
 from openbook_communities.models import CommunityMembership
+from openbook_notifications.prefetch import get_notifications_context
+from openbook_posts.feed_context import get_posts_feed_context
 from openbook_posts.models import PostReaction, PostCommentReaction
 
 
@@ -19,11 +21,18 @@ class ReactionField(Field):
         serialized_reaction = None
 
         if not request_user.is_anonymous:
-            try:
-                reaction = request_user.get_reaction_for_post_with_id(post.pk)
-                serialized_reaction = self.reaction_serializer(reaction, context={'request': request}).data
-            except PostReaction.DoesNotExist:
-                pass
+            posts_feed_context = get_posts_feed_context(self.context)
+
+            if posts_feed_context:
+                reaction = posts_feed_context.get_reaction_for_post_with_id(post.pk)
+                if reaction:
+                    serialized_reaction = self.reaction_serializer(reaction, context={'request': request}).data
+            else:
+                try:
+                    reaction = request_user.get_reaction_for_post_with_id(post.pk)
+                    serialized_reaction = self.reaction_serializer(reaction, context={'request': request}).data
+                except PostReaction.DoesNotExist:
+                    pass
 
         return serialized_reaction
 
@@ -41,9 +50,14 @@ class CommentsCountField(Field):
         comments_count = None
 
         if request_user.is_anonymous:
-            comments_count = post.count_comments()
+            comments_count = post.comments_count
         else:
-            comments_count = request_user.get_comments_count_for_post(post=post)
+            posts_feed_context = get_posts_feed_context(self.context)
+
+            if posts_feed_context:
+                comments_count = posts_feed_context.get_comments_count_for_post_with_id(post.pk)
+            else:
+                comments_count = request_user.get_comments_count_for_post(post=post)
 
         return comments_count
 
@@ -65,7 +79,12 @@ class PostReactionsEmojiCountField(Field):
                 Post = get_post_model()
                 reaction_emoji_count = Post.get_emoji_counts_for_post_with_id(post.pk)
         else:
-            reaction_emoji_count = request_user.get_emoji_counts_for_post_with_id(post.pk)
+            posts_feed_context = get_posts_feed_context(self.context)
+
+            if posts_feed_context:
+                reaction_emoji_count = posts_feed_context.get_emoji_counts_for_post_with_id(post.pk)
+            else:
+                reaction_emoji_count = request_user.get_emoji_counts_for_post_with_id(post.pk)
 
         post_reactions_serializer = self.emoji_count_serializer(reaction_emoji_count, many=True,
                                                                 context={"request": request, 'post': post})
@@ -86,7 +105,12 @@ class CirclesField(Field):
         circles = []
 
         if post.creator_id == request_user.pk:
-            circles = post.circles
+            posts_feed_context = get_posts_feed_context(self.context)
+
+            if posts_feed_context:
+                circles = posts_feed_context.get_circles_for_post_with_id(post.pk)
+            else:
+                circles = post.circles
 
         return self.circle_serializer(circles, many=True, context={"request": request, 'post': post}).data
 
@@ -108,8 +132,16 @@ class PostCreatorField(Field):
         post_creator_serializer = self.post_creator_serializer(post_creator, context={"request": request}).data
 
         if post_community:
+            posts_feed_context = get_posts_feed_context(self.context)
+
             try:
-                post_creator_membership = post_community.memberships.get(user_id=post_creator.pk)
+                if posts_feed_context:
+                    post_creator_membership = posts_feed_context.get_creator_membership_for_post_with_id(post.pk)
+                    if not post_creator_membership:
+                        raise CommunityMembership.DoesNotExist
+                else:
+                    post_creator_membership = post_community.memberships.get(user_id=post_creator.pk)
+
                 post_creator_serializer['communities_memberships'] = [
                     self.community_membership_serializer(
                         post_creator_membership,
@@ -136,7 +168,12 @@ class PostIsMutedField(Field):
         is_muted = False
 
         if not request_user.is_anonymous:
-            is_muted = request_user.has_muted_post_with_id(post_id=post.pk)
+            posts_feed_context = get_posts_feed_context(self.context)
+
+            if posts_feed_context:
+                is_muted = posts_feed_context.has_muted_post_with_id(post_id=post.pk)
+            else:
+                is_muted = request_user.has_muted_post_with_id(post_id=post.pk)
 
         return is_muted
 
@@ -154,6 +191,11 @@ class IsEncircledField(Field):
         is_encircled = False
 
         if not request_user.is_anonymous:
-            is_encircled = post.is_encircled_post()
+            notifications_context = get_notifications_context(self.context)
+
+            if notifications_context:
+                is_encircled = notifications_context.is_encircled_post_with_id(post.pk)
+            else:
+                is_encircled = post.is_encircled_post()
 
         return is_encircled
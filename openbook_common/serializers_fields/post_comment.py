@@ -1,6 +1,7 @@
 from rest_framework.fields import Field
 
 from openbook_common.utils.model_loaders import get_post_comment_model
+from openbook_notifications.prefetch import get_notifications_context
 from openbook_posts.models import PostCommentReaction
 
 
@@ -110,6 +111,11 @@ class PostCommentIsMutedField(Field):
         is_muted = False
 
         if not request_user.is_anonymous:
-            is_muted = request_user.has_muted_post_comment_with_id(post_comment_id=post_comment.pk)
+            notifications_context = get_notifications_context(self.context)
+
+            if notifications_context:
+                is_muted = notifications_context.has_muted_post_comment_with_id(post_comment_id=post_comment.pk)
+            else:
+                is_muted = request_user.has_muted_post_comment_with_id(post_comment_id=post_comment.pk)
 
         return is_muted
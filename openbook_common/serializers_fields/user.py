@@ -168,7 +168,7 @@ class FollowersCountField(Field):
         if not user.profile.followers_count_visible and user.pk != request_user.pk:
             return None
 
-        return user.count_followers()
+        return user.followers_count
 
 
 class IsGlobalModeratorField(Field):
@@ -188,7 +188,7 @@ class FollowingCountField(Field):
         super(FollowingCountField, self).__init__(**kwargs)
 
     def to_representation(self, value):
-        return value.count_following()
+        return value.following_count
 
 
 class UserPostsCountField(Field):
@@ -202,7 +202,7 @@ class UserPostsCountField(Field):
 
         if not request.user.is_anonymous:
             if request.user.pk == value.pk:
-                return value.count_posts()
+                return value.posts_count
             return value.count_posts_for_user_with_id(request.user.pk)
 
         User = get_user_model()
@@ -1,12 +1,39 @@
 from unittest.mock import patch
 
+from django.db import transaction
+from django_rq import get_queue, get_worker
 from rest_framework.test import APITestCase
+from rq import SimpleWorker
+
+from openbook_common.utils.reference_data import clear_reference_data
+from openbook_notifications.unread_counts import delete_all_unread_notifications_counts
+from openbook_posts.exclusions import delete_all_post_exclusions
 
 
 class OpenbookAPITestCase(APITestCase):
     def setUp(self):
         self.patcher = patch('openbook_notifications.helpers._send_notification_to_user')
         self.mock_foo = self.patcher.start()
+        # Database ids get reused across tests, cached exclusions and counts must not leak into the next test
+        delete_all_post_exclusions()
+        delete_all_unread_notifications_counts()
+        clear_reference_data()
+        # Neither must the jobs enqueued by previous tests
+        get_queue('default').empty()
 
     def tearDown(self):
         self.patcher.stop()
+
+    def run_on_commit_jobs(self, queue_name='default'):
+        """
+        Runs the transaction.on_commit callbacks, which never run within the transaction wrapping every test, and
+        then the jobs they enqueued
+        """
+        connection = transaction.get_connection()
+        on_commit_callbacks = connection.run_on_commit
+        connection.run_on_commit = []
+
+        for savepoint_ids, on_commit_callback in on_commit_callbacks:
+            on_commit_callback()
+
+        get_worker(queue_name, worker_class=SimpleWorker).work(burst=True)
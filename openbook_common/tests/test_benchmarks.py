@@ -0,0 +1,36 @@
+from openbook_common.benchmarks.feeds import run_feed_benchmarks, compare_feed_benchmark_results
+from openbook_common.benchmarks.graph import SyntheticGraphParameters, make_synthetic_graph
+from openbook_common.tests.models import OpenbookAPITestCase
+
+
+class FeedBenchmarksTests(OpenbookAPITestCase):
+    """
+    FeedBenchmarksTests
+    """
+
+    def test_runs_every_feed_on_a_synthetic_graph(self):
+        """
+        should build a synthetic graph and record the metrics of every feed entry point
+        """
+        parameters = SyntheticGraphParameters(users_count=6, follows_per_user=3, connections_per_user=1,
+                                              communities_count=2, memberships_per_user=1, posts_per_user=2,
+                                              reactions_per_post=2, comments_per_post=1, reports_per_user=1,
+                                              blocks_per_user=0)
+
+        graph = make_synthetic_graph(parameters=parameters)
+
+        self.assertEqual(len(graph.users), 6)
+        self.assertTrue(graph.posts)
+
+        results = run_feed_benchmarks(graph=graph, viewers_count=2, repeat=2)
+
+        self.assertEqual(set(results['results'].keys()),
+                         {'timeline', 'top_posts', 'trending_posts', 'profile_posts', 'post_comments'})
+
+        timeline_results = results['results']['timeline']
+        self.assertEqual(timeline_results['cold']['runs_count'], 2)
+        self.assertEqual(timeline_results['warm']['runs_count'], 2)
+        self.assertTrue(timeline_results['cold']['median_queries_count'] > 0)
+
+        comparison = compare_feed_benchmark_results(baseline=results, current=results)
+        self.assertEqual(comparison['timeline']['warm']['queries_count'], 0)
@@ -2,9 +2,11 @@ from django.urls import reverse
 from django.conf import settings
 from rest_framework import status
 from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_common.utils import reference_data
 
 import logging
 import json
+from unittest import mock
 
 from openbook_common.tests.helpers import make_emoji_group, make_user, make_authentication_headers_for_user, \
     make_fake_post_text, make_proxy_blacklisted_domain
@@ -98,6 +100,46 @@ class TestEmojiGroups(OpenbookAPITestCase):
 
         self.assertEqual(len(response_groups), 0)
 
+    def test_retrieves_emoji_groups_created_after_reference_data_was_loaded(self):
+        """
+         should retrieve the emoji groups created after the reference data was loaded
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user)
+
+        group = make_emoji_group(is_reaction_group=False)
+
+        url = self._get_url()
+        self.client.get(url, **headers)
+
+        new_group = make_emoji_group(is_reaction_group=False)
+
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_groups_ids = [group['id'] for group in json.loads(response.content)]
+
+        self.assertEqual(sorted(response_groups_ids), sorted([group.pk, new_group.pk]))
+
+    def test_retrieves_emoji_groups_when_warming_reference_data_failed(self):
+        """
+        should not raise when warming the reference data fails and load it on first use instead
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user)
+
+        group = make_emoji_group(is_reaction_group=False)
+
+        with mock.patch('openbook_common.utils.reference_data._load_world_circle', side_effect=Exception):
+            reference_data.warm_reference_data()
+
+        response = self.client.get(self._get_url(), **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_groups_ids = [group['id'] for group in json.loads(response.content)]
+
+        self.assertEqual(response_groups_ids, [group.pk])
+
     def _get_url(self):
         return reverse('emoji-groups')
 
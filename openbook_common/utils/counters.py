@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models import F, Count
+
+from openbook_common.utils.model_loaders import get_post_model, get_post_comment_model, get_post_reaction_model, \
+    get_user_model, get_follow_model, get_community_model, get_community_membership_model
+
+
+def increment_counter_for_instance_with_id(model, instance_id, counter_name, amount=1):
+    model.objects.filter(pk=instance_id).update(**{counter_name: F(counter_name) + amount})
+
+
+def decrement_counter_for_instance_with_id(model, instance_id, counter_name, amount=1):
+    # Counters never go below zero, any drift gets fixed by the reconcile_counters command
+    model.objects.filter(**{'pk': instance_id, '%s__gte' % counter_name: amount}).update(
+        **{counter_name: F(counter_name) - amount})
+
+
+def reconcile_counters(batch_size=1000):
+    """
+    Recomputes every denormalized counter from its source table.
+    Returns a dict with the amount of fixed rows per counter.
+    """
+    Post = get_post_model()
+    PostComment = get_post_comment_model()
+    PostReaction = get_post_reaction_model()
+    User = get_user_model()
+    Follow = get_follow_model()
+    Community = get_community_model()
+    CommunityMembership = get_community_membership_model()
+
+    counters = (
+        (Post, 'comments_count',
+         PostComment.objects.filter(parent_comment__isnull=True, is_deleted=False), 'post_id'),
+        (Post, 'reactions_count', PostReaction.objects.filter(reactor__is_deleted=False), 'post_id'),
+        (User, 'followers_count', Follow.objects.all(), 'followed_user_id'),
+        (User, 'following_count', Follow.objects.all(), 'user_id'),
+        (User, 'posts_count', Post.objects.all(), 'creator_id'),
+        (Community, 'members_count', CommunityMembership.objects.all(), 'community_id'),
+    )
+
+    fixed_counters = {}
+
+    for model, counter_name, source_queryset, source_field in counters:
+        fixed_counters['%s.%s' % (model.__name__, counter_name)] = reconcile_counter(
+            model=model,
+            counter_name=counter_name,
+            source_queryset=source_queryset,
+            source_field=source_field,
+            batch_size=batch_size)
+
+    return fixed_counters
+
+
+def reconcile_counter(model, counter_name, source_queryset, source_field, batch_size=1000):
+    fixed_count = 0
+    last_id = 0
+
+    while True:
+        counter_values = list(model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', counter_name)[
+                              :batch_size])
+
+        if not counter_values:
+            break
+
+        last_id = counter_values[-1][0]
+        instances_ids = [instance_id for instance_id, counter_value in counter_values]
+
+        source_counts = source_queryset.filter(**{'%s__in' % source_field: instances_ids}). \
+            values(source_field). \
+            annotate(source_count=Count('pk')). \
+            order_by()
+
+        source_counts = {source_count[source_field]: source_count['source_count'] for source_count in source_counts}
+
+        with transaction.atomic():
+            for instance_id, counter_value in counter_values:
+                source_count = source_counts.get(instance_id, 0)
+                if source_count != counter_value:
+                    # Only overwrite the value we read, a concurrent update will get fixed on the next run
+                    fixed_count += model.objects.filter(**{'pk': instance_id, counter_name: counter_value}).update(
+                        **{counter_name: source_count})
+
+    return fixed_count
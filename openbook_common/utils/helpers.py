@@ -82,22 +82,27 @@ def delete_file_field(filefield):
         filefield.storage.delete(file.name)
 
 
-def sha256sum(filename=None, file=None):
+def sha256sum(filename=None, file=None, on_chunk=None):
+    """
+    If given, on_chunk gets called with every chunk of the file as it gets hashed
+    """
     if filename:
         with open(filename, 'rb', buffering=0) as f:
-            return _sha256sum(file=f)
+            return _sha256sum(file=f, on_chunk=on_chunk)
     elif file:
-        return _sha256sum(file=file)
+        return _sha256sum(file=file, on_chunk=on_chunk)
     else:
         raise Exception('file or filename are required')
 
 
-def _sha256sum(file):
+def _sha256sum(file, on_chunk=None):
     h = hashlib.sha256()
     b = bytearray(128 * 1024)
     mv = memoryview(b)
     for n in iter(lambda: file.readinto(mv), 0):
         h.update(mv[:n])
+        if on_chunk:
+            on_chunk(mv[:n])
     file.seek(0)
     return h.hexdigest()
 
@@ -132,14 +137,38 @@ def get_magic():
     return magic
 
 
-def write_in_memory_file_to_disk(in_memory_file):
-    extension = os.path.splitext(in_memory_file.name)[1]
+# Bytes from the start of a file its mime type gets sniffed from
+MIME_SNIFF_SIZE = 8 * 1024
+
+
+def sniff_file_mimetype(file):
+    """
+    Sniffs the mime type of a file from its first bytes only
+    """
+    file.seek(0)
+    mimetype = magic.from_buffer(file.read(MIME_SNIFF_SIZE))
+    file.seek(0)
+    return mimetype
+
+
+def hash_and_spool_file(file, spool=False):
+    """
+    Hashes a file reading it once in chunks. If spool, the chunks also get written to a temporary file, whose path
+    gets returned along the hash and which the caller is responsible for removing.
+    """
+    if not spool:
+        return sha256sum(file=file), None
+
+    extension = os.path.splitext(file.name)[1] if file.name else ''
+    spooled_file_descriptor, spooled_file_path = tempfile.mkstemp(suffix=extension)
+
+    try:
+        with os.fdopen(spooled_file_descriptor, 'wb') as spooled_file:
+            file.seek(0)
+            hash = sha256sum(file=file, on_chunk=spooled_file.write)
+    except Exception:
+        os.remove(spooled_file_path)
+        raise
+
+    return hash, spooled_file_path
 
-    tmp_file = tempfile.mkstemp(suffix=extension)
-    tmp_file_path = tmp_file[1]
-    tmp_file = open(tmp_file_path, 'wb')
-    # Was read for the magic headers thing
-    tmp_file.write(in_memory_file.read())
-    tmp_file.seek(0)
-    tmp_file.close()
-    return tmp_file
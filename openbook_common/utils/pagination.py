@@ -0,0 +1,113 @@
+"""
+Keyset pagination for the list endpoints, built on django-cursor-pagination.
+
+Pages are fetched with a WHERE clause on the ordering columns instead of an offset, so every page is an index range
+scan no matter how deep the client scrolled. Orderings can be composite, e.g. ('-created', '-id') or
+('-reactions_count', '-id'), and must end with the primary key so every position is unique.
+
+Cursors are opaque tokens encoding the ordering values of the last item of a page. Clients get the cursor of the
+next page in the NEXT_CURSOR_HEADER response header and send it back as the cursor query param.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+from cursor_pagination import CursorPaginator, InvalidCursor
+from rest_framework.exceptions import ValidationError
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+CURSOR_MAX_LENGTH = 512
+
+PRIMARY_KEY_ORDERING_FIELDS = ('id', 'pk')
+
+
+class KeysetPaginator(CursorPaginator):
+
+    def __init__(self, queryset, ordering=('-id',)):
+        ordering = tuple(ordering)
+
+        if not ordering or ordering[-1].lstrip('-') not in PRIMARY_KEY_ORDERING_FIELDS:
+            raise ValueError('Keyset orderings must end with the primary key')
+
+        descending = ordering[0].startswith('-')
+        if any(order.startswith('-') != descending for order in ordering):
+            raise ValueError('Keyset orderings must all have the same direction')
+
+        super(KeysetPaginator, self).__init__(queryset=queryset, ordering=ordering)
+        self.descending = descending
+        self.ordering_fields = [self._get_ordering_field(order) for order in ordering]
+
+    def get_page(self, count, cursor=None):
+        """
+        Returns the page with the first count items after the given cursor
+        """
+        return self.page(first=count, after=cursor)
+
+    def get_next_cursor(self, page):
+        if not page.has_next:
+            return None
+        return self.cursor(page[-1])
+
+    def get_position_for_cursor(self, cursor):
+        """
+        Returns the decoded ordering values of the cursor. Raises a ValidationError for malformed cursors
+        """
+        try:
+            position = self.decode_cursor(cursor)
+        except (InvalidCursor, TypeError, ValueError):
+            raise ValidationError({'cursor': _('Invalid cursor.')})
+
+        if len(position) != len(self.ordering_fields):
+            raise ValidationError({'cursor': _('Invalid cursor.')})
+
+        try:
+            return [field.to_python(value) for field, value in zip(self.ordering_fields, position)]
+        except DjangoValidationError:
+            raise ValidationError({'cursor': _('Invalid cursor.')})
+
+    def apply_cursor(self, cursor, queryset, reverse=False):
+        # Expanded row comparison, e.g. created < x OR (created = x AND id < y), typed with the model fields
+        # so datetimes get compared as such on every database backend
+        position = self.get_position_for_cursor(cursor)
+        comparison = 'lt' if self.descending != reverse else 'gt'
+
+        cursor_query = Q()
+        equal_query = Q()
+
+        for order, value in zip(self.ordering, position):
+            field_name = order.lstrip('-')
+            cursor_query = cursor_query | (equal_query & Q(**{'%s__%s' % (field_name, comparison): value}))
+            equal_query = equal_query & Q(**{field_name: value})
+
+        return queryset.filter(cursor_query)
+
+    def _get_ordering_field(self, order):
+        field_name = order.lstrip('-')
+        model = self.queryset.model
+
+        if field_name == 'pk':
+            return model._meta.pk
+
+        return model._meta.get_field(field_name)
+
+
+def get_max_id_for_cursor(model, cursor):
+    """
+    Returns the id a ('-id',) cursor points to. Meant for the posts queries that are built out of UNIONs, where the
+    id bound has to be pushed down into every subquery instead of being applied on the combined queryset.
+    """
+    return _make_id_paginator_for_model(model).get_position_for_cursor(cursor)[0]
+
+
+def make_cursor_for_id(model, item_id):
+    return _make_id_paginator_for_model(model).encode_cursor([str(item_id)])
+
+
+def add_next_cursor_header(response, next_cursor):
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+def _make_id_paginator_for_model(model):
+    return KeysetPaginator(queryset=model._default_manager.none(), ordering=('-id',))
@@ -0,0 +1,120 @@
+"""
+Process level registry of the reference data the query builders, checkers and serializers need.
+
+The world circle, the emoji groups and the languages only change through fixtures and the admin. Every process
+loads them once, at startup or on first use, and keeps them in memory instead of querying them on every request.
+Saving or deleting any of them clears the registry of the current process only, the other processes keep serving
+their copy until restarted.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from openbook_common.utils.model_loaders import get_circle_model, get_emoji_group_model, get_emoji_model, \
+    get_language_model
+
+_reference_data = {}
+# Reentrant as some loaders build on the data of other loaders
+_reference_data_lock = threading.RLock()
+
+logger = logging.getLogger(__name__)
+
+
+def get_world_circle_id():
+    return settings.WORLD_CIRCLE_ID
+
+
+def get_world_circle():
+    return _get_reference_data('world_circle', _load_world_circle)
+
+
+def get_emoji_groups():
+    return [emoji_group for emoji_group in _get_emoji_groups() if not emoji_group.is_reaction_group]
+
+
+def get_reaction_emoji_groups():
+    return [emoji_group for emoji_group in _get_emoji_groups() if emoji_group.is_reaction_group]
+
+
+def get_reaction_emojis_ids():
+    return _get_reference_data('reaction_emojis_ids', _load_reaction_emojis_ids)
+
+
+def get_languages():
+    return _get_reference_data('languages', _load_languages)
+
+
+def get_language_with_id(language_id):
+    return _get_reference_data('languages_by_id', _load_languages_by_id).get(language_id)
+
+
+def get_language_with_code(language_code):
+    return _get_reference_data('languages_by_code', _load_languages_by_code).get(language_code)
+
+
+def warm_reference_data():
+    """
+    Loads the reference data ahead of the first request. Failing to, e.g. on a database not migrated or seeded yet,
+    must not keep the app from booting, the data then gets loaded on first use instead.
+    """
+    try:
+        get_world_circle()
+        get_reaction_emojis_ids()
+        _get_reference_data('languages_by_id', _load_languages_by_id)
+        _get_reference_data('languages_by_code', _load_languages_by_code)
+    except Exception:
+        logger.exception('Could not warm the reference data, it will be loaded on first use')
+
+
+def clear_reference_data():
+    # Only clears the registry of the current process
+    with _reference_data_lock:
+        _reference_data.clear()
+
+
+def _get_reference_data(name, loader):
+    try:
+        return _reference_data[name]
+    except KeyError:
+        pass
+
+    with _reference_data_lock:
+        if name not in _reference_data:
+            _reference_data[name] = loader()
+        return _reference_data[name]
+
+
+def _get_emoji_groups():
+    return _get_reference_data('emoji_groups', _load_emoji_groups)
+
+
+def _load_world_circle():
+    Circle = get_circle_model()
+    return Circle.objects.get(pk=get_world_circle_id())
+
+
+def _load_emoji_groups():
+    EmojiGroup = get_emoji_group_model()
+    Emoji = get_emoji_model()
+
+    return list(EmojiGroup.objects.prefetch_related(
+        Prefetch('emojis', queryset=Emoji.objects.order_by('order'))).order_by('order'))
+
+
+def _load_reaction_emojis_ids():
+    return frozenset(emoji.pk for emoji_group in get_reaction_emoji_groups() for emoji in emoji_group.emojis.all())
+
+
+def _load_languages():
+    Language = get_language_model()
+    return list(Language.objects.order_by('id'))
+
+
+def _load_languages_by_id():
+    return {language.pk: language for language in get_languages()}
+
+
+def _load_languages_by_code():
+    return {language.code: language for language in get_languages()}
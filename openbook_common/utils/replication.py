@@ -0,0 +1,166 @@
+"""
+Read replica helpers for the replication router and middleware.
+
+Sticky windows: after a client writes something, its reads go to the primary for REPLICATION_STICKY_SECONDS so it
+always reads its own writes. Mobile clients authenticate with a token and carry no session, so the window is kept in
+redis, keyed by a hash of the Authorization header. The window only gets looked up when a request is about to read
+from a replica, at most once per request. Cookie based clients additionally get the django_replicated force master
+cookie for the request right after the write.
+
+Lag checks: every process measures the replication lag of each replica at most once per
+REPLICATION_LAG_CHECK_SECONDS and the router skips the replicas lagging more than REPLICATION_MAX_LAG_SECONDS. When the
+lag can not be measured at all, e.g. without the REPLICATION CLIENT grant, only the alive check applies.
+"""
+import hashlib
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils.decorators import method_decorator
+from django_redis import get_redis_connection
+from django_replicated.utils import routers
+
+logger = logging.getLogger(__name__)
+
+REPLICATION_STICKY_KEY_PREFIX = 'ob-api-replication-sticky-'
+
+# Lag of the replicas whose lag could not be measured
+UNKNOWN_LAG = object()
+
+_replicas_lags = {}
+_replicas_lags_lock = threading.Lock()
+
+# The sticky window key of the request being handled by the current thread
+_request_context = threading.local()
+
+
+def use_primary_database(view):
+    """
+    Sends every query of the view to the primary database. Decorates both function views and APIView classes.
+    """
+    if isinstance(view, type):
+        view.dispatch = method_decorator(use_primary_database)(view.dispatch)
+        return view
+
+    @wraps(view)
+    def wrapped_view(*args, **kwargs):
+        if not _is_replication_routing_enabled():
+            return view(*args, **kwargs)
+
+        routers.use_state('master')
+        try:
+            return view(*args, **kwargs)
+        finally:
+            routers.revert()
+
+    return wrapped_view
+
+
+def set_sticky_window_for_request(request):
+    sticky_key = _make_sticky_key_for_request(request)
+
+    if sticky_key:
+        _get_redis().set(sticky_key, 1, ex=settings.REPLICATION_STICKY_SECONDS)
+
+
+def start_request(request):
+    """
+    Remembers the request handled by the current thread, its sticky window gets looked up on its first replica read
+    """
+    _request_context.sticky_key = _make_sticky_key_for_request(request)
+    _request_context.is_within_sticky_window = None
+
+
+def finish_request():
+    _request_context.sticky_key = None
+    _request_context.is_within_sticky_window = None
+
+
+def is_current_request_within_sticky_window():
+    sticky_key = getattr(_request_context, 'sticky_key', None)
+
+    if not sticky_key:
+        return False
+
+    if _request_context.is_within_sticky_window is None:
+        _request_context.is_within_sticky_window = bool(_get_redis().exists(sticky_key))
+
+    return _request_context.is_within_sticky_window
+
+
+def is_replica_lagging(db_alias):
+    """
+    Returns whether the replica lags too much to be read from. Replicas whose replication is broken count as lagging,
+    the ones whose lag could not be measured do not.
+    """
+    lag = get_replica_lag(db_alias=db_alias)
+
+    if lag is UNKNOWN_LAG:
+        return False
+
+    # A NULL Seconds_Behind_Master means the replication is not running
+    return lag is None or lag > settings.REPLICATION_MAX_LAG_SECONDS
+
+
+def get_replica_lag(db_alias):
+    now = time.monotonic()
+
+    checked_at, lag = _replicas_lags.get(db_alias, (None, None))
+    if checked_at is not None and now - checked_at < settings.REPLICATION_LAG_CHECK_SECONDS:
+        return lag
+
+    with _replicas_lags_lock:
+        checked_at, lag = _replicas_lags.get(db_alias, (None, None))
+        if checked_at is None or now - checked_at >= settings.REPLICATION_LAG_CHECK_SECONDS:
+            lag = _measure_replica_lag(db_alias=db_alias)
+            _replicas_lags[db_alias] = (now, lag)
+
+    return lag
+
+
+def clear_replicas_lags():
+    with _replicas_lags_lock:
+        _replicas_lags.clear()
+
+
+def _measure_replica_lag(db_alias):
+    connection = connections[db_alias]
+
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute('SHOW SLAVE STATUS')
+                row = cursor.fetchone()
+                if row is None:
+                    # Not a binlog replica, e.g. an Aurora reader sharing the storage of the writer
+                    return 0
+                columns = [column[0] for column in cursor.description]
+                return dict(zip(columns, row)).get('Seconds_Behind_Master')
+            elif connection.vendor == 'postgresql':
+                cursor.execute('SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)')
+                return cursor.fetchone()[0]
+    except Exception as e:
+        logger.error('Could not measure the replication lag of %s, only checking it is alive: %s' % (db_alias, e))
+        return UNKNOWN_LAG
+
+    return 0
+
+
+def _is_replication_routing_enabled():
+    return any(hasattr(database_router, 'use_state') for database_router in router.routers)
+
+
+def _make_sticky_key_for_request(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+
+    if not authorization:
+        return None
+
+    return '%s%s' % (REPLICATION_STICKY_KEY_PREFIX, hashlib.sha256(authorization.encode()).hexdigest())
+
+
+def _get_redis():
+    return get_redis_connection('default')
@@ -3,7 +3,8 @@ import re
 from rest_framework.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
 
-from openbook_common.utils.model_loaders import get_emoji_model, get_emoji_group_model, get_language_model
+from openbook_common.utils import reference_data
+from openbook_common.utils.model_loaders import get_emoji_model, get_emoji_group_model
 
 
 def is_valid_hex_color(hex_color):
@@ -41,16 +42,14 @@ def name_characters_validator(name):
 
 
 def language_id_exists(language_id):
-    Language = get_language_model()
-    if not Language.objects.filter(pk=language_id).exists():
+    if not reference_data.get_language_with_id(language_id):
         raise ValidationError(
             _('No supported language with the provided id exists.'),
         )
 
 
 def language_code_exists(language_code):
-    Language = get_language_model()
-    if not Language.objects.filter(code=language_code).exists():
+    if not reference_data.get_language_with_code(language_code):
         raise ValidationError(
             _('No supported language with the provided code exists.'),
         )
@@ -9,7 +9,7 @@ from django.utils.translation import ugettext_lazy as _
 from openbook_common.checkers import check_url_can_be_proxied
 from openbook_common.serializers import CommonEmojiGroupSerializer, \
     ProxyDomainCheckSerializer
-from openbook_common.utils.model_loaders import get_emoji_group_model
+from openbook_common.utils import reference_data
 
 
 class Time(APIView):
@@ -42,8 +42,7 @@ class EmojiGroups(APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request):
-        EmojiGroup = get_emoji_group_model()
-        emoji_groups = EmojiGroup.objects.filter(is_reaction_group=False).all().order_by('order')
+        emoji_groups = reference_data.get_emoji_groups()
         serializer = CommonEmojiGroupSerializer(emoji_groups, many=True, context={'request': request})
 
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.5 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbook_communities', '0033_auto_20191209_1337'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='members_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
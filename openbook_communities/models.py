@@ -1,17 +1,20 @@
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
 
 # Create your models here.
 from django.utils import timezone
 from django.db.models import Q
-from django.db.models import Count
 from pilkit.processors import ResizeToFill, ResizeToFit
 
 from openbook.settings import COLOR_ATTR_MAX_LENGTH
 from openbook_auth.models import User
 from django.utils.translation import ugettext_lazy as _
 
+from openbook_common.utils.counters import increment_counter_for_instance_with_id, \
+    decrement_counter_for_instance_with_id
 from openbook_common.utils.model_loaders import get_community_invite_model, \
     get_community_log_model, get_category_model, get_user_model, get_moderated_object_model, \
     get_community_notifications_subscription_model, get_community_new_post_notification_model, \
@@ -22,6 +25,8 @@ from openbook_communities.queries import make_search_communities_query_for_user,
     make_search_joined_communities_query_for_user, make_get_joined_communities_query_for_user
 from openbook_communities.validators import community_name_characters_validator
 from openbook_moderation.models import ModeratedObject, ModerationCategory
+from openbook_notifications.bulk_deletion import bulk_delete_notifications
+from openbook_posts.exclusions import delete_post_exclusions_for_users_with_ids
 from openbook_posts.models import Post
 from imagekit.models import ProcessedImageField
 
@@ -61,6 +66,8 @@ class Community(models.Model):
     users_adjective = models.CharField(_('users adjective'), max_length=settings.COMMUNITY_USERS_ADJECTIVE_MAX_LENGTH,
                                        blank=False, null=True)
     invites_enabled = models.BooleanField(_('invites enabled'), default=True)
+    # Denormalized counter, maintained by the signal receivers at the bottom of this module
+    members_count = models.PositiveIntegerField(default=0, editable=False)
     # This only happens if the community was reported and found with critical severity content
     is_deleted = models.BooleanField(
         _('is deleted'),
@@ -156,8 +163,7 @@ class Community(models.Model):
 
     @classmethod
     def _get_trending_communities_with_query(cls, query):
-        return cls.objects.annotate(Count('memberships')).filter(query).order_by(
-            '-memberships__count', '-created')
+        return cls.objects.filter(query).order_by('-members_count', '-created')
 
     @classmethod
     def _make_trending_communities_query(cls, category_name=None):
@@ -303,8 +309,7 @@ class Community(models.Model):
         community_banned_users_query.add(Q(profile__name__icontains=query), Q.OR)
         return community.banned_users.filter(community_banned_users_query)
 
-    @property
-    def members_count(self):
+    def count_members(self):
         return self.memberships.all().count()
 
     def get_staff_members(self):
@@ -493,7 +498,9 @@ class Community(models.Model):
     def delete_notifications(self):
         # Remove all community new post notifications
         CommunityNewPostNotification = get_community_new_post_notification_model()
-        CommunityNewPostNotification.objects.filter(community_notifications_subscription__community_id=self.pk).delete()
+        bulk_delete_notifications(typed_notifications_querysets=[
+            CommunityNewPostNotification.objects.filter(community_notifications_subscription__community_id=self.pk)
+        ])
 
         # Remove all community invite notifications
         CommunityInviteNotification = get_community_invite_notification_model()
@@ -664,3 +671,28 @@ class CommunityNotificationsSubscription(models.Model):
         return cls.objects.filter(community__name=community_name,
                                   subscriber__username=username,
                                   new_post_notifications=True).exists()
+
+
+@receiver(post_save, sender=CommunityMembership, dispatch_uid='increment_community_members_count')
+def increment_community_members_count(sender, instance, created, **kwargs):
+    if created:
+        increment_counter_for_instance_with_id(model=Community, instance_id=instance.community_id,
+                                               counter_name='members_count')
+
+
+@receiver(post_delete, sender=CommunityMembership, dispatch_uid='decrement_community_members_count')
+def decrement_community_members_count(sender, instance, **kwargs):
+    decrement_counter_for_instance_with_id(model=Community, instance_id=instance.community_id,
+                                           counter_name='members_count')
+
+
+@receiver(m2m_changed, sender=Community.banned_users.through, dispatch_uid='delete_banned_users_post_exclusions')
+def delete_banned_users_post_exclusions(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # Changed through user.banned_of_communities, the instance is the banned user
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            delete_post_exclusions_for_users_with_ids(users_ids=[instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        delete_post_exclusions_for_users_with_ids(users_ids=pk_set)
+    elif action == 'pre_clear':
+        delete_post_exclusions_for_users_with_ids(users_ids=instance.banned_users.values_list('id', flat=True))
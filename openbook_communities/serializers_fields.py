@@ -1,6 +1,7 @@
 from rest_framework.fields import Field
 
 from openbook_communities.models import Community
+from openbook_posts.feed_context import get_posts_feed_context
 
 
 class IsInvitedField(Field):
@@ -128,11 +129,20 @@ class CommunityMembershipsField(Field):
         request = self.context.get('request')
         request_user = request.user
 
-        if request_user.is_anonymous or not request_user.is_member_of_community_with_name(
-                community_name=community.name):
+        if request_user.is_anonymous:
             return None
 
-        membership = community.memberships.get(user=request_user)
+        posts_feed_context = get_posts_feed_context(self.context)
+
+        if posts_feed_context:
+            membership = posts_feed_context.get_user_membership_for_community_with_id(community.pk)
+            if not membership:
+                return None
+        else:
+            if not request_user.is_member_of_community_with_name(community_name=community.name):
+                return None
+
+            membership = community.memberships.get(user=request_user)
 
         return self.community_membership_serializer([membership], context={"request": request}, many=True).data
 
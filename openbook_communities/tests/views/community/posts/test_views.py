@@ -727,6 +727,7 @@ class CommunityPostsAPITest(OpenbookAPITestCase):
             'text': make_fake_post_text()
         }
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
 
         community_notifications_subscription = CommunityNotificationsSubscription.objects.get(subscriber=user,
                                                                                               community=community)
@@ -763,6 +764,7 @@ class CommunityPostsAPITest(OpenbookAPITestCase):
             'text': make_fake_post_text()
         }
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
 
         community_notifications_subscription = CommunityNotificationsSubscription.objects.get(subscriber=blocking_user,
                                                                                               community=community)
@@ -795,6 +797,7 @@ class CommunityPostsAPITest(OpenbookAPITestCase):
             'text': make_fake_post_text()
         }
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
 
         community_notifications_subscription = CommunityNotificationsSubscription.objects.get(
             subscriber=community_admin,
@@ -834,6 +837,7 @@ class CommunityPostsAPITest(OpenbookAPITestCase):
             'text': make_fake_post_text()
         }
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
 
         # notification should only be for community susbcribed to
         self.assertEqual(CommunityNewPostNotification.objects.filter(
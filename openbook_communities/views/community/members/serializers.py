@@ -6,6 +6,7 @@ from openbook_auth.validators import username_characters_validator, user_usernam
 from openbook_common.models import Badge
 from openbook_common.serializers_fields.user import CommunitiesInvitesField, IsFollowingField, IsConnectedField, \
     AreNewPostNotificationsEnabledForUserField, IsFollowedField
+from openbook_common.utils.pagination import CURSOR_MAX_LENGTH
 from openbook_communities.models import Community, CommunityMembership, CommunityInvite
 from openbook_communities.serializers_fields import CommunityMembershipsField
 from openbook_communities.validators import community_name_characters_validator, community_name_exists
@@ -36,6 +37,10 @@ class GetCommunityMembersSerializer(serializers.Serializer):
     max_id = serializers.IntegerField(
         required=False,
     )
+    cursor = serializers.CharField(
+        required=False,
+        max_length=CURSOR_MAX_LENGTH,
+    )
     count = serializers.IntegerField(
         required=False,
         max_value=20
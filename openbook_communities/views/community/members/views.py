@@ -7,6 +7,7 @@ from rest_framework.views import APIView
 
 from openbook_moderation.permissions import IsNotSuspended
 from openbook_common.utils.helpers import normalise_request_data, normalize_list_value_in_request_data
+from openbook_common.utils.pagination import KeysetPaginator, add_next_cursor_header
 from openbook_communities.views.community.members.serializers import JoinCommunitySerializer, \
     GetCommunityMembersSerializer, GetCommunityMembersMemberSerializer, LeaveCommunitySerializer, \
     InviteCommunityMemberSerializer, MembersCommunitySerializer, SearchCommunityMembersSerializer, InviteUserSerializer
@@ -27,18 +28,21 @@ class CommunityMembers(APIView):
 
         count = data.get('count', 10)
         max_id = data.get('max_id')
+        cursor = data.get('cursor')
         exclude = data.get('exclude')
 
         user = request.user
 
         members = user.get_community_with_name_members(community_name=community_name, max_id=max_id,
-                                                       exclude_keywords=exclude).order_by(
-            '-id')[:count]
+                                                       exclude_keywords=exclude)
+        paginator = KeysetPaginator(queryset=members, ordering=('-id',))
+        members = paginator.get_page(count=count, cursor=cursor)
 
         response_serializer = GetCommunityMembersMemberSerializer(members, many=True,
                                                                   context={"request": request})
 
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return add_next_cursor_header(Response(response_serializer.data, status=status.HTTP_200_OK),
+                                      paginator.get_next_cursor(members))
 
 
 class JoinCommunity(APIView):
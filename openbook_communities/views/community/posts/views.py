@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from openbook_moderation.permissions import IsNotSuspended
 from openbook_common.utils.helpers import normalise_request_data
+from openbook_posts.feed_context import make_posts_feed_serializer_context
 from openbook_communities.views.community.posts.serializers import GetCommunityPostsSerializer, CommunityPostSerializer, \
     CreateCommunityPostSerializer, GetCommunityPostsCountsSerializer, GetCommunityPostsCountCommunitySerializer
 
@@ -29,9 +30,11 @@ class CommunityPosts(APIView):
 
         posts = user.get_posts_for_community_with_name(community_name=community_name, max_id=max_id).order_by(
             '-created')[:count]
+        posts = list(posts)
 
         response_serializer = CommunityPostSerializer(posts, many=True,
-                                                      context={"request": request})
+                                                      context=make_posts_feed_serializer_context(request=request,
+                                                                                                 posts=posts))
 
         return Response(response_serializer.data, status=status.HTTP_200_OK)
 
@@ -79,9 +82,11 @@ class ClosedCommunityPosts(APIView):
 
         posts = user.get_closed_posts_for_community_with_name(community_name=community_name, max_id=max_id).order_by(
             '-created')[:count]
+        posts = list(posts)
 
         response_serializer = CommunityPostSerializer(posts, many=True,
-                                                      context={"request": request})
+                                                      context=make_posts_feed_serializer_context(request=request,
+                                                                                                 posts=posts))
 
         return Response(response_serializer.data, status=status.HTTP_200_OK)
 
@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 # Create your models here.
 from openbook_auth.models import User
+from openbook_common.utils.counters import increment_counter_for_instance_with_id, \
+    decrement_counter_for_instance_with_id
 
 
 class Follow(models.Model):
@@ -22,3 +26,20 @@ class Follow(models.Model):
             follow.lists.add(*lists_ids)
 
         return follow
+
+
+@receiver(post_save, sender=Follow, dispatch_uid='increment_users_follow_counts')
+def increment_users_follow_counts(sender, instance, created, **kwargs):
+    if created:
+        increment_counter_for_instance_with_id(model=User, instance_id=instance.user_id,
+                                               counter_name='following_count')
+        increment_counter_for_instance_with_id(model=User, instance_id=instance.followed_user_id,
+                                               counter_name='followers_count')
+
+
+@receiver(post_delete, sender=Follow, dispatch_uid='decrement_users_follow_counts')
+def decrement_users_follow_counts(sender, instance, **kwargs):
+    decrement_counter_for_instance_with_id(model=User, instance_id=instance.user_id,
+                                           counter_name='following_count')
+    decrement_counter_for_instance_with_id(model=User, instance_id=instance.followed_user_id,
+                                           counter_name='followers_count')
@@ -8,6 +8,7 @@ from openbook_common.serializers import CommonHashtagSerializer
 from openbook_hashtags.views.hashtag.serializers import GetHashtagSerializer, \
     GetHashtagPostsSerializer, GetHashtagPostsPostSerializer, GetHashtagHashtagSerializer
 from openbook_moderation.permissions import IsNotSuspended
+from openbook_posts.feed_context import make_posts_feed_serializer_context
 
 
 class HashtagItem(APIView):
@@ -47,9 +48,12 @@ class HashtagPosts(APIView):
 
         user = request.user
 
-        hashtag_posts = user.get_posts_for_hashtag_with_name(hashtag_name=hashtag_name, max_id=max_id).order_by('-id')[
-                        :count]
+        hashtag_posts = list(
+            user.get_posts_for_hashtag_with_name(hashtag_name=hashtag_name, max_id=max_id).order_by('-id')[:count])
 
-        hashtag_posts_serializer = GetHashtagPostsPostSerializer(hashtag_posts, context={'request': request}, many=True)
+        hashtag_posts_serializer = GetHashtagPostsPostSerializer(hashtag_posts,
+                                                                 context=make_posts_feed_serializer_context(
+                                                                     request=request, posts=hashtag_posts),
+                                                                 many=True)
 
         return Response(hashtag_posts_serializer.data, status=status.HTTP_200_OK)
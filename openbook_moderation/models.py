@@ -2,6 +2,8 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 
 # Create your models here.
@@ -10,6 +12,7 @@ from django.utils import timezone
 from openbook_auth.models import User
 from openbook_common.utils.model_loaders import get_post_model, get_post_comment_model, get_community_model, \
     get_user_model, get_moderation_penalty_model, get_hashtag_model
+from openbook_posts.exclusions import delete_post_exclusions_for_users_with_ids
 
 
 class ModerationCategory(models.Model):
@@ -233,8 +236,8 @@ class ModeratedObject(models.Model):
                 content_object.soft_delete()
 
                 if moderation_severity == ModerationCategory.SEVERITY_CRITICAL and isinstance(content_object, Post):
-                    # We have hashes
-                    content_object.delete_media()
+                    # Other posts with the same media share its files, they go too
+                    content_object.delete_media_of_all_posts_with_it()
 
         content_object.save()
         self.save()
@@ -479,3 +482,9 @@ class ModeratedObjectVerifiedChangedLog(models.Model):
         ModeratedObjectLog.create_moderated_object_log(log_type=ModeratedObjectLog.LOG_TYPE_VERIFIED_CHANGED,
                                                        content_object=moderated_object_description_changed_log,
                                                        moderated_object_id=moderated_object_id, actor_id=actor_id)
+
+
+@receiver(post_save, sender=ModerationReport, dispatch_uid='delete_reporter_post_exclusions_on_save')
+@receiver(post_delete, sender=ModerationReport, dispatch_uid='delete_reporter_post_exclusions_on_delete')
+def delete_reporter_post_exclusions(sender, instance, **kwargs):
+    delete_post_exclusions_for_users_with_ids(users_ids=[instance.reporter_id])
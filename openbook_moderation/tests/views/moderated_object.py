@@ -25,7 +25,7 @@ from openbook_communities.models import Community
 from openbook_moderation.models import ModeratedObject, ModeratedObjectDescriptionChangedLog, \
     ModeratedObjectCategoryChangedLog, ModerationPenalty, ModerationCategory, ModeratedObjectStatusChangedLog, \
     ModeratedObjectVerifiedChangedLog
-from openbook_posts.models import Post, PostComment
+from openbook_posts.models import Post, PostComment, PostMediaContent
 
 fake = Faker()
 
@@ -1005,6 +1005,7 @@ class ApproveModeratedObjectApiTests(OpenbookAPITestCase):
         # subscribe to notifications
         reporter_user.enable_new_post_notifications_for_user_with_username(username=user.username)
         post = user.create_public_post(text=make_fake_post_text())
+        self.run_on_commit_jobs()
 
         report_category = make_moderation_category(severity=ModerationCategory.SEVERITY_CRITICAL)
         reporter_user.report_user_with_username(username=user.username, category_id=report_category.pk)
@@ -1204,6 +1205,7 @@ class ApproveModeratedObjectApiTests(OpenbookAPITestCase):
         reporter_community.enable_new_post_notifications_for_community_with_name(community_name=community.name)
 
         post = community_admin.create_community_post(text=make_fake_post_text(), community_name=community.name)
+        self.run_on_commit_jobs()
 
         report_category = make_moderation_category()
         reporter_community.report_community(community=community,
@@ -1368,6 +1370,7 @@ class ApproveModeratedObjectApiTests(OpenbookAPITestCase):
         emoji_id = make_emoji(group=emoji_group).pk
         community_post_reaction = community_post_reactor.react_to_post(
             post=community_post, emoji_id=emoji_id)
+        self.run_on_commit_jobs()
 
         reporter_community_post = make_user()
         report_category = make_moderation_category()
@@ -1507,6 +1510,7 @@ class ApproveModeratedObjectApiTests(OpenbookAPITestCase):
         community_post_comment_reaction = community_post_comment_reactor.react_to_post_comment(
             post_comment=community_post_comment,
             emoji_id=emoji.pk)
+        self.run_on_commit_jobs()
 
         reporter_community_post = make_user()
         report_category = make_moderation_category()
@@ -1564,6 +1568,7 @@ class ApproveModeratedObjectApiTests(OpenbookAPITestCase):
         community_post_comment_reply_reaction = community_post_comment_reply_reactor.react_to_post_comment(
             post_comment=community_post_comment_reply,
             emoji_id=emoji.pk)
+        self.run_on_commit_jobs()
 
         reporter_community_post = make_user()
         report_category = make_moderation_category()
@@ -1964,6 +1969,7 @@ class ApproveModeratedObjectApiTests(OpenbookAPITestCase):
         community_post_comment_reaction = community_post_comment_reactor.react_to_post_comment(
             post_comment=community_post_comment,
             emoji_id=emoji.pk)
+        self.run_on_commit_jobs()
 
         reporter_community_post_comment = make_user()
         report_category = make_moderation_category()
@@ -2022,6 +2028,7 @@ class ApproveModeratedObjectApiTests(OpenbookAPITestCase):
         community_post_comment_reply_reaction = community_post_comment_reply_reactor.react_to_post_comment(
             post_comment=community_post_comment_reply,
             emoji_id=emoji.pk)
+        self.run_on_commit_jobs()
 
         reporter_community_post_comment = make_user()
         report_category = make_moderation_category()
@@ -3871,6 +3878,57 @@ class VerifyModeratedObjectApiTests(OpenbookAPITestCase):
         with self.assertRaises(FileNotFoundError):
             file = post.image.image.file
 
+    def test_on_critical_severity_post_moderated_object_verify_should_delete_image_of_other_posts_with_it(self):
+        """
+        on critical severity post moderated object, verify should delete the image of the other posts with the same
+        image too, and never share the image again
+        """
+        global_moderator = make_global_moderator()
+
+        post_creator = make_user()
+        other_post_creator = make_user()
+
+        image = Image.new('RGB', (100, 100))
+        tmp_file = tempfile.NamedTemporaryFile(suffix='.jpg')
+        image.save(tmp_file)
+        tmp_file.seek(0)
+
+        post = post_creator.create_public_post(text=make_fake_post_text(), image=File(tmp_file))
+        tmp_file.seek(0)
+        other_post = other_post_creator.create_public_post(text=make_fake_post_text(), image=File(tmp_file))
+
+        self.assertEqual(post.image.image.name, other_post.image.image.name)
+        image_hash = post.image.hash
+
+        reporter_user = make_user()
+        report_category = make_moderation_category(severity=ModerationCategory.SEVERITY_CRITICAL)
+
+        reporter_user.report_post(post=post, category_id=report_category.pk)
+
+        moderated_object = ModeratedObject.get_or_create_moderated_object_for_post(post=post,
+                                                                                   category_id=report_category.pk)
+
+        global_moderator.approve_moderated_object(moderated_object=moderated_object)
+
+        url = self._get_url(moderated_object=moderated_object)
+        headers = make_authentication_headers_for_user(global_moderator)
+        response = self.client.post(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        other_post.refresh_from_db()
+
+        with self.assertRaises(FileNotFoundError):
+            file = other_post.image.image.file
+
+        self.assertTrue(PostMediaContent.objects.get(hash=image_hash).is_moderated)
+
+        tmp_file.seek(0)
+        new_post = other_post_creator.create_public_post(text=make_fake_post_text(), image=File(tmp_file))
+
+        self.assertNotEqual(new_post.image.image.name, other_post.image.image.name)
+        self.assertEqual(PostMediaContent.objects.get(hash=image_hash).references_count, 0)
+
     def _get_url(self, moderated_object):
         return reverse('verify-moderated-object', kwargs={
             'moderated_object_id': moderated_object.pk
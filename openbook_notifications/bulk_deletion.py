@@ -0,0 +1,91 @@
+"""
+Bulk deletion of notifications.
+
+Deleting typed notifications (e.g. PostReactionNotification) through the ORM makes the collector load every row and
+its generic Notification into memory, and delete them model by model while holding the locks. Here the ids of the
+typed notifications get resolved first, and then the typed notifications and their Notification rows are deleted
+with plain DELETE ... WHERE id IN (...) statements, a chunk at a time. Each chunk is atomic: run from a job it is its
+own short transaction, but nested within a request transaction it is only a savepoint, and the locks of every chunk
+are held until that request transaction commits.
+The unread notifications counts of the owners of unread deleted notifications get deleted along.
+
+As no delete signals are sent, only the typed notification models without delete signal receivers can go through it.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router, transaction
+
+from openbook_common.utils.model_loaders import get_notification_model
+from openbook_notifications import unread_counts
+
+NOTIFICATIONS_DELETION_CHUNK_SIZE = 500
+
+
+def bulk_delete_notifications(typed_notifications_querysets):
+    """
+    Deletes the typed notifications of the querysets along with their notifications. Returns the amount deleted
+    """
+    deleted_count = 0
+
+    for typed_notifications_queryset in typed_notifications_querysets:
+        deleted_count += _bulk_delete_typed_notifications(typed_notifications_queryset=typed_notifications_queryset)
+
+    return deleted_count
+
+
+def delete_notifications_with_ids(notifications_ids):
+    """
+    Deletes the notifications alone, e.g. the ones whose typed notification is already gone
+    """
+    Notification = get_notification_model()
+
+    _delete_rows_with_ids(model=Notification, ids=list(notifications_ids),
+                          db_alias=router.db_for_write(Notification))
+
+
+def _bulk_delete_typed_notifications(typed_notifications_queryset):
+    Notification = get_notification_model()
+
+    typed_notification_model = typed_notifications_queryset.model
+    content_type = ContentType.objects.get_for_model(typed_notification_model)
+    # The joins on the notifications can return a typed notification more than once
+    typed_notifications_ids = sorted(set(typed_notifications_queryset.values_list('id', flat=True)))
+
+    db_alias = router.db_for_write(typed_notification_model)
+
+    for chunk_start in range(0, len(typed_notifications_ids), NOTIFICATIONS_DELETION_CHUNK_SIZE):
+        chunk_ids = typed_notifications_ids[chunk_start:chunk_start + NOTIFICATIONS_DELETION_CHUNK_SIZE]
+
+        with transaction.atomic(using=db_alias):
+            notifications = Notification.objects.using(db_alias).filter(content_type_id=content_type.pk,
+                                                                         object_id__in=chunk_ids)
+            notifications_ids = []
+            unread_notifications_owners_ids = set()
+
+            for notification_id, owner_id, read in notifications.values_list('id', 'owner_id', 'read'):
+                notifications_ids.append(notification_id)
+                if not read:
+                    unread_notifications_owners_ids.add(owner_id)
+
+            unread_counts.delete_unread_notifications_counts_for_users_with_ids(
+                users_ids=unread_notifications_owners_ids)
+
+            # Notifications first, so a failed chunk never leaves notifications without content behind
+            _delete_rows_with_ids(model=Notification, ids=notifications_ids, db_alias=db_alias)
+            _delete_rows_with_ids(model=typed_notification_model, ids=chunk_ids, db_alias=db_alias)
+
+    return len(typed_notifications_ids)
+
+
+def _delete_rows_with_ids(model, ids, db_alias):
+    if not ids:
+        return
+
+    connection = connections[db_alias]
+    sql = 'DELETE FROM %s WHERE %s IN (%s)' % (
+        connection.ops.quote_name(model._meta.db_table),
+        connection.ops.quote_name(model._meta.pk.column),
+        ', '.join(['%s'] * len(ids)),
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ids)
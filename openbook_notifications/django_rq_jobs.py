@@ -1,32 +1,47 @@
-from hashlib import sha256
-import onesignal as onesignal_sdk
-from django.conf import settings
 from django_rq import job
 
 from openbook_common.utils.model_loaders import get_user_model
-
-onesignal_client = onesignal_sdk.Client(
-    app_id=settings.ONE_SIGNAL_APP_ID,
-    app_auth_key=settings.ONE_SIGNAL_API_KEY
-)
+from openbook_notifications import push, unread_counts, retention, reaction_coalescing
 
 
 @job('default')
 def send_notification_to_user_with_id(user_id, notification):
+    """
+    Kept for the jobs enqueued before the grouped delivery, notifications now go through the push groups
+    """
     User = get_user_model()
-    user = User.objects.only('username', 'uuid', 'id').get(pk=user_id)
-
-    for device in user.devices.all():
-        notification.set_parameter('ios_badgeType', 'Increase')
-        notification.set_parameter('ios_badgeCount', '1')
+    user = User.objects.only('id').get(pk=user_id)
+    push.dispatch_notification_to_user(user=user, notification=notification)
 
-        user_id_contents = (str(user.uuid) + str(user.id)).encode('utf-8')
 
-        user_id = sha256(user_id_contents).hexdigest()
+@job('default')
+def flush_push_notification_group(group_key):
+    devices_count = push.flush_push_group(group_key=group_key)
+    return 'Sent push notification group %s to %d devices' % (group_key, devices_count)
 
-        notification.set_filters([
-            {"field": "tag", "key": "user_id", "relation": "=", "value": user_id},
-            {"field": "tag", "key": "device_uuid", "relation": "=", "value": device.uuid},
-        ])
 
-        onesignal_client.send_notification(notification)
+@job('default')
+def flush_reaction_notifications_buffer(target, target_id):
+    reactions_count = reaction_coalescing.flush_reactions_buffer(target=target, target_id=target_id)
+    return 'Notified %d reactions to %s %d' % (reactions_count, target, target_id)
+
+
+@job('low')
+def reconcile_unread_notifications_counts():
+    """
+    Deletes the unread notifications counts that drifted from the database.
+    This job should be scheduled to be run every n hours.
+    """
+    drifted_counts_count = unread_counts.reconcile_unread_notifications_counts()
+    return 'Deleted %d drifted unread notifications counts' % drifted_counts_count
+
+
+@job('low')
+def clean_up_notifications():
+    """
+    Merges the recent bursts of notifications and deletes the expired read ones.
+    This job should be scheduled to be run every hour.
+    """
+    merged_count = retention.compact_notifications()
+    deleted_count = retention.delete_expired_notifications()
+    return 'Merged away %d notifications and deleted %d expired notifications' % (merged_count, deleted_count)
@@ -3,8 +3,9 @@ from django.utils import translation
 from django.utils.translation import ugettext_lazy as _
 import onesignal as onesignal_sdk
 
+from openbook_common.utils import reference_data
 from openbook_common.utils.model_loaders import get_notification_model
-from openbook_notifications.django_rq_jobs import send_notification_to_user_with_id
+from openbook_notifications import push
 from openbook_translation import translation_strategy
 
 import logging
@@ -15,35 +16,76 @@ NOTIFICATION_GROUP_LOW_PRIORITY = 'low'
 NOTIFICATION_GROUP_MEDIUM_PRIORITY = 'medium'
 NOTIFICATION_GROUP_HIGH_PRIORITY = 'high'
 
+PUSH_MESSAGE_POST_REACTION = 'post_reaction'
+PUSH_MESSAGE_FOLLOW = 'follow'
+PUSH_MESSAGE_CONNECTION_REQUEST = 'connection_request'
+PUSH_MESSAGE_POST_COMMENT_REACTION = 'post_comment_reaction'
+PUSH_MESSAGE_POST_COMMENT_USER_MENTION = 'post_comment_user_mention'
+PUSH_MESSAGE_POST_USER_MENTION = 'post_user_mention'
+PUSH_MESSAGE_COMMUNITY_INVITE = 'community_invite'
+PUSH_MESSAGE_COMMUNITY_NEW_POST = 'community_new_post'
+PUSH_MESSAGE_USER_NEW_POST = 'user_new_post'
+PUSH_MESSAGE_POST_COMMENT = 'post_comment'
+PUSH_MESSAGE_POST_COMMENT_ON_COMMENTED_POST = 'post_comment_on_commented_post'
+PUSH_MESSAGE_POST_COMMENT_REPLY = 'post_comment_reply'
+PUSH_MESSAGE_POST_COMMENT_REPLY_ON_OWN_POST = 'post_comment_reply_on_own_post'
+PUSH_MESSAGE_POST_COMMENT_REPLY_ON_REPLIED_COMMENT = 'post_comment_reply_on_replied_comment'
+
+# Push message templates, translated once per language and process instead of once per recipient
+PUSH_MESSAGES = {
+    PUSH_MESSAGE_POST_REACTION: _('%(post_reactor_name)s · @%(post_reactor_username)s reacted to your post.'),
+    PUSH_MESSAGE_FOLLOW: _(
+        '%(following_user_name)s · @%(following_user_username)s started following you'),
+    PUSH_MESSAGE_CONNECTION_REQUEST: _(
+        '%(connection_requester_name)s · @%(connection_requester_username)s wants to connect with you.'),
+    PUSH_MESSAGE_POST_COMMENT_REACTION: _(
+        '%(post_comment_reactor_name)s · @%(post_comment_reactor_username)s reacted to your comment.'),
+    PUSH_MESSAGE_POST_COMMENT_USER_MENTION: _(
+        '%(mentioner_name)s · @%(mentioner_username)s mentioned you in a comment.'),
+    PUSH_MESSAGE_POST_USER_MENTION: _('%(mentioner_name)s · @%(mentioner_username)s mentioned you in a post.'),
+    PUSH_MESSAGE_COMMUNITY_INVITE: _(
+        '%(invite_creator_name)s · @%(invite_creator_username)s has invited you to join c/%(community_name)s.'),
+    PUSH_MESSAGE_COMMUNITY_NEW_POST: _('A new post was posted in c/%(community_name)s.'),
+    PUSH_MESSAGE_USER_NEW_POST: _('%(post_creator_name)s · @%(post_creator_username)s posted something.'),
+    PUSH_MESSAGE_POST_COMMENT: _(
+        '%(post_commenter_name)s · %(post_commenter_username)s commented on your post.'),
+    PUSH_MESSAGE_POST_COMMENT_ON_COMMENTED_POST: _(
+        '%(post_commenter_name)s · @%(post_commenter_username)s commented on a post you also commented on.'),
+    PUSH_MESSAGE_POST_COMMENT_REPLY: _(
+        '%(post_commenter_name)s · @%(post_commenter_username)s replied to your comment on a post.'),
+    PUSH_MESSAGE_POST_COMMENT_REPLY_ON_OWN_POST: _(
+        '%(post_commenter_name)s · %(post_commenter_username)s replied to a comment on your post.'),
+    PUSH_MESSAGE_POST_COMMENT_REPLY_ON_REPLIED_COMMENT: _(
+        '%(post_commenter_name)s · @%(post_commenter_username)s replied on a comment you also replied on.'),
+}
+
+_push_messages_cache = {}
+
 
 def send_post_reaction_push_notification(post_reaction):
     post_creator = post_reaction.post.creator
 
     notification_group = NOTIFICATION_GROUP_LOW_PRIORITY
 
-    if post_creator.has_reaction_notifications_enabled_for_post_with_id(post_id=post_reaction.post_id):
-        post_reactor = post_reaction.reactor
-        target_user_language_code = get_notification_language_code_for_target_user(post_creator)
-        with translation.override(target_user_language_code):
-            one_signal_notification = onesignal_sdk.Notification(post_body={
-                "contents": {"en": _('%(post_reactor_name)s · @%(post_reactor_username)s reacted to your post.') % {
-                    'post_reactor_username': post_reactor.username,
-                    'post_reactor_name': post_reactor.profile.name,
-
-                }}
-            })
+    post_reactor = post_reaction.reactor
+    message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_POST_REACTION,
+                                               target_user=post_creator) % {
+        'post_reactor_username': post_reactor.username,
+        'post_reactor_name': post_reactor.profile.name,
+    }
+    one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
-        Notification = get_notification_model()
+    Notification = get_notification_model()
 
-        notification_data = {
-            'type': Notification.POST_REACTION,
-        }
+    notification_data = {
+        'type': Notification.POST_REACTION,
+    }
 
-        one_signal_notification.set_parameter('data', notification_data)
-        one_signal_notification.set_parameter('!thread_id', notification_group)
-        one_signal_notification.set_parameter('android_group', notification_group)
+    one_signal_notification.set_parameter('data', notification_data)
+    one_signal_notification.set_parameter('!thread_id', notification_group)
+    one_signal_notification.set_parameter('android_group', notification_group)
 
-        _send_notification_to_user(notification=one_signal_notification, user=post_creator)
+    _send_notification_to_user(notification=one_signal_notification, user=post_creator)
 
 
 def send_post_comment_push_notification_with_message(post_comment, message, target_user):
@@ -68,14 +110,11 @@ def send_post_comment_push_notification_with_message(post_comment, message, targ
 
 def send_follow_push_notification(followed_user, following_user):
     if followed_user.has_follow_notifications_enabled():
-        target_user_language_code = get_notification_language_code_for_target_user(followed_user)
-        with translation.override(target_user_language_code):
-            one_signal_notification = onesignal_sdk.Notification(post_body={
-                "contents": {"en": _('%(following_user_name)s · @%(following_user_username)s started following you') % {
-                    'following_user_name': following_user.profile.name,
-                    'following_user_username': following_user.username,
-                }}
-            })
+        message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_FOLLOW, target_user=followed_user) % {
+            'following_user_name': following_user.profile.name,
+            'following_user_username': following_user.username,
+        }
+        one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
         Notification = get_notification_model()
 
@@ -94,14 +133,12 @@ def send_follow_push_notification(followed_user, following_user):
 
 def send_connection_request_push_notification(connection_requester, connection_requested_for):
     if connection_requested_for.has_connection_request_notifications_enabled():
-        target_user_language_code = get_notification_language_code_for_target_user(connection_requested_for)
-        with translation.override(target_user_language_code):
-            one_signal_notification = onesignal_sdk.Notification(
-                post_body={"contents": {"en": _(
-                    '%(connection_requester_name)s · @%(connection_requester_username)s wants to connect with you.') % {
-                                                  'connection_requester_username': connection_requester.username,
-                                                  'connection_requester_name': connection_requester.profile.name,
-                                              }}})
+        message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_CONNECTION_REQUEST,
+                                                   target_user=connection_requested_for) % {
+            'connection_requester_username': connection_requester.username,
+            'connection_requester_name': connection_requester.profile.name,
+        }
+        one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
         Notification = get_notification_model()
 
@@ -124,16 +161,12 @@ def send_post_comment_reaction_push_notification(post_comment_reaction):
     notification_group = NOTIFICATION_GROUP_LOW_PRIORITY
 
     post_comment_reactor = post_comment_reaction.reactor
-    target_user_language_code = get_notification_language_code_for_target_user(post_comment_commenter)
-    with translation.override(target_user_language_code):
-        one_signal_notification = onesignal_sdk.Notification(post_body={
-            "contents": {
-                "en": _(
-                    '%(post_comment_reactor_name)s · @%(post_comment_reactor_username)s reacted to your comment.') % {
-                          'post_comment_reactor_name': post_comment_reactor.profile.name,
-                          'post_comment_reactor_username': post_comment_reactor.username,
-                      }}
-        })
+    message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_POST_COMMENT_REACTION,
+                                               target_user=post_comment_commenter) % {
+        'post_comment_reactor_name': post_comment_reactor.profile.name,
+        'post_comment_reactor_username': post_comment_reactor.username,
+    }
+    one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
     Notification = get_notification_model()
     notification_data = {
         'type': Notification.POST_COMMENT_REACTION,
@@ -154,16 +187,12 @@ def send_post_comment_user_mention_push_notification(post_comment_user_mention):
 
     mentioner = post_comment_user_mention.post_comment.commenter
 
-    target_user_language_code = get_notification_language_code_for_target_user(mentioned_user)
-    with translation.override(target_user_language_code):
-        one_signal_notification = onesignal_sdk.Notification(post_body={
-            "contents": {
-                "en": _(
-                    '%(mentioner_name)s · @%(mentioner_username)s mentioned you in a comment.') % {
-                          'mentioner_name': mentioner.profile.name,
-                          'mentioner_username': mentioner.username,
-                      }}
-        })
+    message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_POST_COMMENT_USER_MENTION,
+                                               target_user=mentioned_user) % {
+        'mentioner_name': mentioner.profile.name,
+        'mentioner_username': mentioner.username,
+    }
+    one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
     Notification = get_notification_model()
     notification_data = {
@@ -185,16 +214,12 @@ def send_post_user_mention_push_notification(post_user_mention):
 
     mentioner = post_user_mention.post.creator
 
-    target_user_language_code = get_notification_language_code_for_target_user(mentioned_user)
-    with translation.override(target_user_language_code):
-        one_signal_notification = onesignal_sdk.Notification(post_body={
-            "contents": {
-                "en": _(
-                    '%(mentioner_name)s · @%(mentioner_username)s mentioned you in a post.') % {
-                          'mentioner_name': mentioner.profile.name,
-                          'mentioner_username': mentioner.username,
-                      }}
-        })
+    message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_POST_USER_MENTION,
+                                               target_user=mentioned_user) % {
+        'mentioner_name': mentioner.profile.name,
+        'mentioner_username': mentioner.username,
+    }
+    one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
     Notification = get_notification_model()
     notification_data = {
@@ -212,15 +237,13 @@ def send_community_invite_push_notification(community_invite):
     if invited_user.has_community_invite_notifications_enabled():
         invite_creator = community_invite.creator
         community = community_invite.community
-        target_user_language_code = get_notification_language_code_for_target_user(invited_user)
-        with translation.override(target_user_language_code):
-            one_signal_notification = onesignal_sdk.Notification(
-                post_body={"contents": {"en": _(
-                    '%(invite_creator_name)s · @%(invite_creator_username)s has invited you to join c/%(community_name)s.') % {
-                                                  'invite_creator_username': invite_creator.username,
-                                                  'invite_creator_name': invite_creator.profile.name,
-                                                  'community_name': community.name,
-                                              }}})
+        message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_COMMUNITY_INVITE,
+                                                   target_user=invited_user) % {
+            'invite_creator_username': invite_creator.username,
+            'invite_creator_name': invite_creator.profile.name,
+            'community_name': community.name,
+        }
+        one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
         Notification = get_notification_model()
 
@@ -242,12 +265,11 @@ def send_community_new_post_push_notification(community_notifications_subscripti
     target_user = community_notifications_subscription.subscriber
 
     if target_user.has_community_new_post_notifications_enabled():
-        target_user_language_code = get_notification_language_code_for_target_user(target_user)
-        with translation.override(target_user_language_code):
-            one_signal_notification = onesignal_sdk.Notification(
-                post_body={"contents": {"en": _('A new post was posted in c/%(community_name)s.') % {
-                    'community_name': community_name,
-                }}})
+        message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_COMMUNITY_NEW_POST,
+                                                   target_user=target_user) % {
+            'community_name': community_name,
+        }
+        one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
         Notification = get_notification_model()
 
@@ -270,13 +292,11 @@ def send_user_new_post_push_notification(user_notifications_subscription, post):
     target_user = user_notifications_subscription.subscriber
 
     if target_user.has_user_new_post_notifications_enabled():
-        target_user_language_code = get_notification_language_code_for_target_user(target_user)
-        with translation.override(target_user_language_code):
-            one_signal_notification = onesignal_sdk.Notification(
-                post_body={"contents": {"en": _('%(post_creator_name)s · @%(post_creator_username)s posted something.') % {
-                    'post_creator_username': post_creator_username,
-                    'post_creator_name': post_creator_name,
-                }}})
+        message = get_push_message_for_target_user(message_name=PUSH_MESSAGE_USER_NEW_POST, target_user=target_user) % {
+            'post_creator_username': post_creator_username,
+            'post_creator_name': post_creator_name,
+        }
+        one_signal_notification = onesignal_sdk.Notification(post_body={"contents": {"en": message}})
 
         Notification = get_notification_model()
 
@@ -288,12 +308,42 @@ def send_user_new_post_push_notification(user_notifications_subscription, post):
         _send_notification_to_user(notification=one_signal_notification, user=target_user)
 
 
+def get_push_message_for_target_user(message_name, target_user):
+    return get_push_message(message_name=message_name,
+                            language_code=get_notification_language_code_for_target_user(target_user))
+
+
+def get_push_message(message_name, language_code):
+    """
+    Returns the push message template translated to the language, to be formatted with the message params
+    """
+    cache_key = (message_name, language_code)
+
+    try:
+        return _push_messages_cache[cache_key]
+    except KeyError:
+        pass
+
+    with translation.override(language_code):
+        push_message = str(PUSH_MESSAGES[message_name])
+
+    _push_messages_cache[cache_key] = push_message
+
+    return push_message
+
+
 def get_notification_language_code_for_target_user(target_user):
-    if target_user.language and translation.check_for_language(target_user.language.code):
-        return target_user.language.code
+    return get_notification_language_code_for_language_id(target_user.language_id)
+
+
+def get_notification_language_code_for_language_id(language_id):
+    language = reference_data.get_language_with_id(language_id) if language_id else None
+
+    if language and translation.check_for_language(language.code):
+        return language.code
 
     return translation_strategy.get_default_translation_language_code()
 
 
 def _send_notification_to_user(user, notification):
-    send_notification_to_user_with_id.delay(user_id=user.pk, notification=notification)
+    push.dispatch_notification_to_user(user=user, notification=notification)
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.5 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('openbook_notifications', '0017_auto_20191126_1809'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['content_type', 'object_id'], name='notification_content_obj_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.5 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbook_notifications', '0018_notification_content_object_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='aggregated_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
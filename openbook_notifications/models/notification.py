@@ -1,15 +1,22 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from collections import Counter
+
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 
 from openbook_auth.models import User
+from openbook_notifications import unread_counts, stream
 
 
 class Notification(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     created = models.DateTimeField(editable=False, db_index=True)
     read = models.BooleanField(default=False)
+    # Amount of notifications of the same type and target merged into this one
+    aggregated_count = models.PositiveIntegerField(default=1)
 
     POST_REACTION = 'PR'
     POST_COMMENT = 'PC'
@@ -46,9 +53,40 @@ class Notification(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='notification_content_obj_idx'),
+        ]
+
+    @classmethod
+    def create_notification(cls, owner_id, type, content_object, aggregated_count=1):
+        return cls.objects.create(notification_type=type, content_object=content_object, owner_id=owner_id,
+                                  aggregated_count=aggregated_count)
+
     @classmethod
-    def create_notification(cls, owner_id, type, content_object):
-        return cls.objects.create(notification_type=type, content_object=content_object, owner_id=owner_id)
+    def bulk_create_notifications(cls, type, content_object_model, owners_ids_by_object_id):
+        """
+        Creates the notifications of many content objects of the same model at once. Bypasses save(), so no
+        post_save signals get sent for them.
+        """
+        content_type = ContentType.objects.get_for_model(content_object_model)
+        created = timezone.now()
+
+        notifications = cls.objects.bulk_create([
+            cls(notification_type=type, content_type=content_type, object_id=object_id, owner_id=owner_id,
+                created=created) for object_id, owner_id in owners_ids_by_object_id.items()
+        ])
+
+        unread_counts.increment_unread_notifications_counts(amounts_by_user_id_and_type=Counter(
+            (owner_id, type) for owner_id in owners_ids_by_object_id.values()))
+
+        if stream.is_notifications_stream_enabled():
+            # bulk_create does not set the primary keys on MySQL, read them back
+            stream.publish_notifications(notifications=cls.objects.filter(
+                content_type=content_type, object_id__in=list(owners_ids_by_object_id.keys())).only(
+                'id', 'owner_id', 'notification_type'))
+
+        return notifications
 
     @classmethod
     def get_notification_types_values(cls):
@@ -60,3 +98,24 @@ class Notification(models.Model):
             self.created = timezone.now()
 
         return super(Notification, self).save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Notification, dispatch_uid='increment_unread_notifications_count_on_create')
+def increment_unread_notifications_count_on_create(sender, instance, created, **kwargs):
+    if created and not instance.read:
+        unread_counts.increment_unread_notifications_count_for_user_with_id(
+            user_id=instance.owner_id, notification_type=instance.notification_type)
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid='decrement_unread_notifications_count_on_delete')
+def decrement_unread_notifications_count_on_delete(sender, instance, **kwargs):
+    # Also sent for the notifications deleted through cascades, e.g. when their content object gets deleted
+    if not instance.read:
+        unread_counts.decrement_unread_notifications_count_for_user_with_id(
+            user_id=instance.owner_id, notification_type=instance.notification_type)
+
+
+@receiver(post_save, sender=Notification, dispatch_uid='publish_notification_on_create')
+def publish_notification_on_create(sender, instance, created, **kwargs):
+    if created:
+        stream.publish_notifications(notifications=[instance])
@@ -1,5 +1,5 @@
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db import models
+from django.db import models, transaction
 
 from openbook_notifications.models.notification import Notification
 from openbook_posts.models import PostComment
@@ -17,6 +17,24 @@ class PostCommentNotification(models.Model):
                                          owner_id=owner_id)
         return post_comment_notification
 
+    @classmethod
+    def bulk_create_post_comment_notifications(cls, post_comment_id, owners_ids):
+        """
+        Creates the notifications of a new post comment for all the owners at once
+        """
+        if not owners_ids:
+            return
+
+        with transaction.atomic():
+            cls.objects.bulk_create([cls(post_comment_id=post_comment_id) for owner_id in owners_ids])
+
+            # bulk_create does not set the primary keys on MySQL, read them back. The post comment is new, so these
+            # are all of its notifications and any of them can go to any of the owners
+            notifications_ids = cls.objects.filter(post_comment_id=post_comment_id).values_list('id', flat=True)
+
+            Notification.bulk_create_notifications(type=Notification.POST_COMMENT, content_object_model=cls,
+                                                   owners_ids_by_object_id=dict(zip(notifications_ids, owners_ids)))
+
     @classmethod
     def delete_post_comment_notification(cls, post_comment_id, owner_id):
         cls.objects.filter(post_comment_id=post_comment_id,
@@ -9,17 +9,40 @@ class PostReactionNotification(models.Model):
     post_reaction = models.ForeignKey(PostReaction, on_delete=models.CASCADE)
 
     @classmethod
-    def create_post_reaction_notification(cls, post_reaction_id, owner_id):
+    def create_post_reaction_notification(cls, post_reaction_id, owner_id, aggregated_count=1):
         post_reaction_notification = cls.objects.create(post_reaction_id=post_reaction_id)
         Notification.create_notification(type=Notification.POST_REACTION,
                                          content_object=post_reaction_notification,
-                                         owner_id=owner_id)
+                                         owner_id=owner_id, aggregated_count=aggregated_count)
         return post_reaction_notification
 
     @classmethod
     def delete_post_reaction_notification(cls, post_reaction_id, owner_id):
-        cls.objects.filter(post_reaction_id=post_reaction_id,
-                           notification__owner_id=owner_id).delete()
+        """
+        A notification coalescing several reactions moves to the next remaining one instead of getting deleted
+        """
+        post_reaction_notifications = cls.objects.filter(
+            post_reaction_id=post_reaction_id, notification__owner_id=owner_id).select_related('post_reaction')
+
+        for post_reaction_notification in post_reaction_notifications:
+            notification = post_reaction_notification.notification.get()
+
+            next_post_reaction_id = None
+
+            if notification.aggregated_count > 1:
+                post_id = post_reaction_notification.post_reaction.post_id
+                next_post_reaction_id = PostReaction.objects.filter(post_id=post_id, pk__lt=post_reaction_id).exclude(
+                    reactor_id=owner_id).exclude(reactor__blocked_by_users__blocker_id=owner_id).order_by(
+                    '-pk').values_list('pk', flat=True).first()
+
+            if next_post_reaction_id is None:
+                post_reaction_notification.delete()
+                continue
+
+            post_reaction_notification.post_reaction_id = next_post_reaction_id
+            post_reaction_notification.save(update_fields=['post_reaction'])
+            notification.aggregated_count = notification.aggregated_count - 1
+            notification.save(update_fields=['aggregated_count'])
 
     @classmethod
     def delete_post_reaction_notifications(cls, post_reaction_id):
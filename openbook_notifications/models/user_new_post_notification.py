@@ -1,5 +1,5 @@
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db import models
+from django.db import models, transaction
 from openbook_auth.models import UserNotificationsSubscription
 from openbook_notifications.models.notification import Notification
 from openbook_posts.models import Post
@@ -20,6 +20,43 @@ class UserNewPostNotification(models.Model):
                                          owner_id=owner_id)
         return user_new_post_notification
 
+    @classmethod
+    def bulk_create_user_new_post_notifications(cls, post_id, owners_ids_by_subscription_id):
+        """
+        Creates the notifications for the subscriptions that got none for the post yet and returns the ids of
+        those subscriptions
+        """
+        with transaction.atomic():
+            notified_subscriptions_ids = set(cls.objects.filter(
+                post_id=post_id,
+                user_notifications_subscription_id__in=owners_ids_by_subscription_id.keys()).values_list(
+                'user_notifications_subscription_id', flat=True))
+
+            subscriptions_ids = [subscription_id for subscription_id in owners_ids_by_subscription_id.keys() if
+                                 subscription_id not in notified_subscriptions_ids]
+
+            if not subscriptions_ids:
+                return []
+
+            cls.objects.bulk_create([cls(post_id=post_id, user_notifications_subscription_id=subscription_id) for
+                                     subscription_id in subscriptions_ids])
+
+            # bulk_create does not set the primary keys on MySQL, read them back
+            notifications_ids_by_subscription_id = dict(cls.objects.filter(
+                post_id=post_id,
+                user_notifications_subscription_id__in=subscriptions_ids).values_list(
+                'user_notifications_subscription_id', 'id'))
+
+            owners_ids_by_notification_id = {
+                notification_id: owners_ids_by_subscription_id[subscription_id] for subscription_id, notification_id
+                in notifications_ids_by_subscription_id.items()
+            }
+
+            Notification.bulk_create_notifications(type=Notification.USER_NEW_POST, content_object_model=cls,
+                                                   owners_ids_by_object_id=owners_ids_by_notification_id)
+
+        return subscriptions_ids
+
     @classmethod
     def delete_user_new_post_notification(cls, user_notifications_subscription_id, post_id, owner_id):
         cls.objects.filter(user_notifications_subscription_id=user_notifications_subscription_id,
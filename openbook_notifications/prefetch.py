@@ -0,0 +1,220 @@
+"""
+Polymorphic prefetching of notifications.
+
+The content object of a notification is a generic relation to one of the typed notifications, e.g. a
+PostReactionNotification, which the serializers then follow to its post, comment, user and profile. Resolved one
+notification at a time, that is a handful of queries per notification.
+
+Instead, the notifications of a page are grouped by content type and every typed notification model is loaded with
+a single query joining everything its serializer follows, plus the prefetch queries of its many to many relations.
+The loaded typed notifications are then attached to the generic relations of the notifications, and
+NotificationsContext answers the viewer specific questions, like whether a comment is muted, for the whole page.
+"""
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+
+from openbook_common.utils.model_loaders import get_notification_model, get_circle_model, \
+    get_post_comment_mute_model
+
+NOTIFICATIONS_CONTEXT_KEY = 'notifications_context'
+
+_POST_SELECT_RELATED = ('creator__profile', 'community', 'image')
+_POST_PREFETCH_RELATED = ('creator__profile__badges',)
+
+_POST_COMMENT_SELECT_RELATED = ('commenter__profile', 'language', 'parent_comment__commenter__profile',
+                                'parent_comment__language') + tuple(
+    'post__%s' % field for field in _POST_SELECT_RELATED)
+_POST_COMMENT_PREFETCH_RELATED = ('commenter__profile__badges', 'hashtags__emoji',
+                                  'parent_comment__commenter__profile__badges') + tuple(
+    'post__%s' % field for field in _POST_PREFETCH_RELATED)
+
+
+class ContentObjectsPrefetch():
+    """
+    What to load along with a typed notification model. post_path and post_comment_path point at the post or the
+    comment the serializer follows, if any
+    """
+
+    def __init__(self, post_path=None, post_comment_path=None, users_paths=(), select_related=()):
+        self.post_path = post_path
+        self.post_comment_path = post_comment_path
+
+        if post_path:
+            related_select_related = _prefix_paths(post_path, _POST_SELECT_RELATED)
+            related_prefetch_related = _prefix_paths(post_path, _POST_PREFETCH_RELATED)
+        elif post_comment_path:
+            related_select_related = _prefix_paths(post_comment_path, _POST_COMMENT_SELECT_RELATED)
+            related_prefetch_related = _prefix_paths(post_comment_path, _POST_COMMENT_PREFETCH_RELATED)
+        else:
+            related_select_related = ()
+            related_prefetch_related = ()
+
+        self.select_related = tuple(select_related) + related_select_related + tuple(
+            '%s__profile' % user_path for user_path in users_paths)
+        self.prefetch_related = related_prefetch_related + tuple(
+            '%s__profile__badges' % user_path for user_path in users_paths)
+
+    def get_post(self, content_object):
+        if self.post_path:
+            return _follow_path(content_object, self.post_path)
+
+        post_comment = self.get_post_comment(content_object)
+        return post_comment.post if post_comment else None
+
+    def get_post_comment(self, content_object):
+        if self.post_comment_path:
+            return _follow_path(content_object, self.post_comment_path)
+
+        return None
+
+
+CONTENT_OBJECTS_PREFETCHES = {
+    'PostCommentNotification': ContentObjectsPrefetch(post_comment_path='post_comment'),
+    'PostCommentReplyNotification': ContentObjectsPrefetch(post_comment_path='post_comment'),
+    'PostCommentReactionNotification': ContentObjectsPrefetch(
+        post_comment_path='post_comment_reaction__post_comment', users_paths=('post_comment_reaction__reactor',),
+        select_related=('post_comment_reaction__emoji',)),
+    'PostReactionNotification': ContentObjectsPrefetch(
+        post_path='post_reaction__post', users_paths=('post_reaction__reactor',),
+        select_related=('post_reaction__emoji',)),
+    'ConnectionRequestNotification': ContentObjectsPrefetch(users_paths=('connection_requester',)),
+    'ConnectionConfirmedNotification': ContentObjectsPrefetch(users_paths=('connection_confirmator',)),
+    'FollowNotification': ContentObjectsPrefetch(users_paths=('follower',)),
+    'CommunityInviteNotification': ContentObjectsPrefetch(users_paths=('community_invite__creator',),
+                                                          select_related=('community_invite__community',)),
+    'PostCommentUserMentionNotification': ContentObjectsPrefetch(
+        post_comment_path='post_comment_user_mention__post_comment',
+        users_paths=('post_comment_user_mention__user',)),
+    'PostUserMentionNotification': ContentObjectsPrefetch(post_path='post_user_mention__post',
+                                                          users_paths=('post_user_mention__user',)),
+    'CommunityNewPostNotification': ContentObjectsPrefetch(post_path='post'),
+    'UserNewPostNotification': ContentObjectsPrefetch(post_path='post'),
+}
+
+
+def make_notifications_serializer_context(request, notifications):
+    """
+    Returns a serializer context carrying everything the notification serializers need for the given page of
+    notifications, attaching their content objects along the way
+    """
+    return {
+        'request': request,
+        NOTIFICATIONS_CONTEXT_KEY: NotificationsContext(user=request.user, notifications=notifications)
+    }
+
+
+def get_notifications_context(serializer_context):
+    return serializer_context.get(NOTIFICATIONS_CONTEXT_KEY)
+
+
+class NotificationsContext():
+    """
+    Prefetches the content objects of a page of notifications and loads the viewer specific data of their posts
+    and comments with a fixed number of queries
+    """
+
+    def __init__(self, user, notifications):
+        self.user = user
+        self.posts = {}
+        self.post_comments = {}
+
+        self._encircled_posts_ids = set()
+        self._muted_post_comments_ids = set()
+
+        for content_object, content_objects_prefetch in prefetch_notifications_content_objects(notifications):
+            post = content_objects_prefetch.get_post(content_object)
+            if post:
+                self.posts[post.pk] = post
+
+            post_comment = content_objects_prefetch.get_post_comment(content_object)
+            if post_comment:
+                self.post_comments[post_comment.pk] = post_comment
+                if post_comment.parent_comment_id:
+                    self.post_comments[post_comment.parent_comment_id] = post_comment.parent_comment
+
+        self._load_encircled_posts()
+        self._load_muted_post_comments()
+
+    def is_encircled_post_with_id(self, post_id):
+        return post_id in self._encircled_posts_ids
+
+    def has_muted_post_comment_with_id(self, post_comment_id):
+        return post_comment_id in self._muted_post_comments_ids
+
+    def _load_encircled_posts(self):
+        # Mirrors Post.is_encircled_post
+        not_community_posts_ids = [post.pk for post in self.posts.values() if not post.community_id]
+
+        if not not_community_posts_ids:
+            return
+
+        Circle = get_circle_model()
+        PostCircle = Circle.posts.through
+
+        public_posts_ids = set(PostCircle.objects.filter(post_id__in=not_community_posts_ids,
+                                                         circle_id=Circle.get_world_circle_id()).values_list(
+            'post_id', flat=True))
+
+        self._encircled_posts_ids = set(not_community_posts_ids) - public_posts_ids
+
+    def _load_muted_post_comments(self):
+        if not self.post_comments or self.user.is_anonymous:
+            return
+
+        PostCommentMute = get_post_comment_mute_model()
+
+        self._muted_post_comments_ids = set(
+            PostCommentMute.objects.filter(muter_id=self.user.pk,
+                                           post_comment_id__in=list(self.post_comments.keys())).values_list(
+                'post_comment_id', flat=True))
+
+
+def prefetch_notifications_content_objects(notifications):
+    """
+    Loads the content objects of the notifications with a query per content type and attaches them to the
+    notifications. Returns the loaded content objects along with their ContentObjectsPrefetch
+    """
+    Notification = get_notification_model()
+    content_object_field = Notification._meta.get_field('content_object')
+
+    notifications_by_content_type_id = defaultdict(list)
+
+    for notification in notifications:
+        notifications_by_content_type_id[notification.content_type_id].append(notification)
+
+    loaded_content_objects = []
+
+    for content_type_id, content_type_notifications in notifications_by_content_type_id.items():
+        content_object_model = ContentType.objects.get_for_id(content_type_id).model_class()
+        content_objects_prefetch = CONTENT_OBJECTS_PREFETCHES.get(content_object_model.__name__,
+                                                                  ContentObjectsPrefetch())
+
+        content_objects = content_object_model.objects.select_related(
+            *content_objects_prefetch.select_related).prefetch_related(
+            *content_objects_prefetch.prefetch_related).in_bulk(
+            [notification.object_id for notification in content_type_notifications])
+
+        for notification in content_type_notifications:
+            content_object = content_objects.get(notification.object_id)
+            # Missing content objects are left for the generic relation to look up
+            if content_object is not None:
+                content_object_field.set_cached_value(notification, content_object)
+
+        loaded_content_objects.extend(
+            (content_object, content_objects_prefetch) for content_object in content_objects.values())
+
+    return loaded_content_objects
+
+
+def _prefix_paths(prefix, paths):
+    return tuple('%s__%s' % (prefix, path) for path in paths)
+
+
+def _follow_path(instance, path):
+    for field_name in path.split('__'):
+        if instance is None:
+            return None
+        instance = getattr(instance, field_name)
+
+    return instance
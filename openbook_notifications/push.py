@@ -0,0 +1,189 @@
+"""
+Grouped push notification delivery.
+
+Push notifications are not sent one by one. Every notification gets added to the redis group of its content, which
+holds the ids of the users to send it to. Since the contents are translated, a group always has a single language.
+The first notification of a group schedules its flush job after PUSH_NOTIFICATIONS_GROUP_WINDOW_SECONDS, which sends
+the whole group as a few requests, each one targeting many devices with OR'd tag filters.
+
+The requests go through the backend configured in PUSH_NOTIFICATIONS_BACKEND. FakePushBackend records them instead,
+so the delivery can be tested offline.
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+
+import django_rq
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from requests.adapters import HTTPAdapter
+
+from openbook_common.utils.model_loaders import get_device_model
+
+logger = logging.getLogger(__name__)
+
+PUSH_GROUP_KEY_PREFIX = 'ob-api-push-group-'
+
+# Keep abandoned groups, e.g. of a lost flush job, for a while only
+PUSH_GROUP_EXPIRE_SECONDS = 60 * 60
+
+# OneSignal accepts up to 200 filters per request, every device takes 3 (user tag, device tag and the OR)
+PUSH_MAX_DEVICES_PER_REQUEST = 60
+
+_push_backend = None
+
+
+class OneSignalPushBackend():
+    """
+    Sends the notifications through a pooled session, retrying with an exponential backoff on connection errors,
+    rate limits and server errors
+    """
+    API_URL = 'https://onesignal.com/api/v1/notifications'
+    MAX_ATTEMPTS = 4
+    BACKOFF_SECONDS = 0.5
+    TIMEOUT_SECONDS = 10
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=10))
+        self.session.headers.update({'Authorization': 'Basic %s' % settings.ONE_SIGNAL_API_KEY})
+
+    def send(self, post_body):
+        post_body = dict(post_body, app_id=settings.ONE_SIGNAL_APP_ID)
+
+        for attempt in range(self.MAX_ATTEMPTS):
+            try:
+                response = self.session.post(self.API_URL, json=post_body, timeout=self.TIMEOUT_SECONDS)
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    if response.status_code >= 400:
+                        logger.error('Push notification rejected with %d: %s' % (response.status_code,
+                                                                                  response.text))
+                    return response
+                error = 'status code %d' % response.status_code
+
+            if attempt < self.MAX_ATTEMPTS - 1:
+                time.sleep(self.BACKOFF_SECONDS * 2 ** attempt)
+
+        logger.error('Push notification failed after %d attempts, last error: %s' % (self.MAX_ATTEMPTS, error))
+        return None
+
+
+class FakePushBackend():
+    """
+    Records the notifications instead of sending them
+    """
+    sent_post_bodies = []
+
+    def send(self, post_body):
+        FakePushBackend.sent_post_bodies.append(post_body)
+
+    @classmethod
+    def reset(cls):
+        cls.sent_post_bodies = []
+
+
+def get_push_backend():
+    global _push_backend
+
+    if _push_backend is None:
+        _push_backend = import_string(settings.PUSH_NOTIFICATIONS_BACKEND)()
+
+    return _push_backend
+
+
+def dispatch_notification_to_user(user, notification):
+    post_body = dict(notification.post_body)
+    post_body['ios_badgeType'] = 'Increase'
+    post_body['ios_badgeCount'] = '1'
+
+    encoded_post_body = json.dumps(post_body, sort_keys=True)
+    group_key = '%s%s' % (PUSH_GROUP_KEY_PREFIX, hashlib.sha256(encoded_post_body.encode()).hexdigest())
+
+    pipeline = _get_redis().pipeline()
+    pipeline.set('%s-body' % group_key, encoded_post_body, ex=PUSH_GROUP_EXPIRE_SECONDS)
+    pipeline.sadd('%s-users' % group_key, user.pk)
+    pipeline.expire('%s-users' % group_key, PUSH_GROUP_EXPIRE_SECONDS)
+    # Only the first notification of a group schedules its flush
+    pipeline.set('%s-scheduled' % group_key, 1, nx=True, ex=PUSH_GROUP_EXPIRE_SECONDS)
+    is_flush_unscheduled = pipeline.execute()[-1]
+
+    if is_flush_unscheduled:
+        _schedule_push_group_flush(group_key=group_key)
+
+
+def flush_push_group(group_key):
+    """
+    Sends the notification of the group to the devices of all of its users. Returns the amount of devices
+    """
+    pipeline = _get_redis().pipeline()
+    pipeline.get('%s-body' % group_key)
+    pipeline.smembers('%s-users' % group_key)
+    pipeline.delete('%s-body' % group_key, '%s-users' % group_key, '%s-scheduled' % group_key)
+    encoded_post_body, users_ids, deleted_keys_count = pipeline.execute()
+
+    if not encoded_post_body or not users_ids:
+        return 0
+
+    post_body = json.loads(encoded_post_body.decode())
+
+    Device = get_device_model()
+    devices = Device.objects.filter(owner_id__in=[int(user_id) for user_id in users_ids]).values_list(
+        'owner_id', 'owner__uuid', 'uuid')
+
+    users_tags = {}
+    filters = []
+
+    for owner_id, owner_uuid, device_uuid in devices:
+        if owner_id not in users_tags:
+            users_tags[owner_id] = make_push_tag_for_user(user_id=owner_id, user_uuid=owner_uuid)
+
+        filters.append([
+            {'field': 'tag', 'key': 'user_id', 'relation': '=', 'value': users_tags[owner_id]},
+            {'field': 'tag', 'key': 'device_uuid', 'relation': '=', 'value': device_uuid},
+        ])
+
+    push_backend = get_push_backend()
+
+    for chunk_start in range(0, len(filters), PUSH_MAX_DEVICES_PER_REQUEST):
+        push_backend.send(dict(post_body, filters=_join_filters_with_or(
+            filters[chunk_start:chunk_start + PUSH_MAX_DEVICES_PER_REQUEST])))
+
+    return len(filters)
+
+
+def make_push_tag_for_user(user_id, user_uuid):
+    return hashlib.sha256((str(user_uuid) + str(user_id)).encode('utf-8')).hexdigest()
+
+
+def _join_filters_with_or(devices_filters):
+    filters = []
+
+    for device_filters in devices_filters:
+        if filters:
+            filters.append({'operator': 'OR'})
+        filters.extend(device_filters)
+
+    return filters
+
+
+def _schedule_push_group_flush(group_key):
+    from openbook_notifications.django_rq_jobs import flush_push_notification_group
+
+    window_seconds = settings.PUSH_NOTIFICATIONS_GROUP_WINDOW_SECONDS
+
+    if window_seconds:
+        django_rq.get_scheduler('default').enqueue_in(timedelta(seconds=window_seconds),
+                                                      flush_push_notification_group, group_key=group_key)
+    else:
+        flush_push_notification_group.delay(group_key=group_key)
+
+
+def _get_redis():
+    return get_redis_connection('default')
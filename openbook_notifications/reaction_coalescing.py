@@ -0,0 +1,179 @@
+"""
+Coalesced reaction notifications.
+
+Creating a notification and sending a push notification for every reaction makes a popular post write and push once
+per reaction. Instead, reacting adds the id of the reaction to the redis buffer of the reacted post or comment, once
+the reaction is committed. The first reaction of a buffer schedules its flush job after
+REACTION_NOTIFICATIONS_COALESCING_WINDOW_SECONDS, which checks the notifications settings, mutes and blocks of the
+creator once and creates a single notification about the newest reaction, keeping the amount of reactions in
+aggregated_count, along with a single push notification. A failed flush puts its reactions back into the buffer.
+When the reaction of a coalesced notification gets deleted, the notification moves to the next remaining reaction.
+"""
+from datetime import timedelta
+
+import django_rq
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from openbook_common.utils.model_loaders import get_post_reaction_model, get_post_comment_reaction_model, \
+    get_post_reaction_notification_model, get_post_comment_reaction_notification_model
+from openbook_notifications import helpers
+
+REACTIONS_BUFFER_KEY_PREFIX = 'ob-api-reactions-buffer-'
+
+REACTIONS_BUFFER_TARGET_POST = 'post'
+REACTIONS_BUFFER_TARGET_POST_COMMENT = 'post-comment'
+
+# Keep abandoned buffers, e.g. of a lost flush job, for a while only
+REACTIONS_BUFFER_EXPIRE_SECONDS = 60 * 60
+
+
+def add_post_reaction_to_buffer(post_reaction):
+    post_id = post_reaction.post_id
+    post_reaction_id = post_reaction.pk
+
+    transaction.on_commit(lambda: _add_reaction_to_buffer(target=REACTIONS_BUFFER_TARGET_POST, target_id=post_id,
+                                                          reaction_id=post_reaction_id))
+
+
+def add_post_comment_reaction_to_buffer(post_comment_reaction):
+    post_comment_id = post_comment_reaction.post_comment_id
+    post_comment_reaction_id = post_comment_reaction.pk
+
+    transaction.on_commit(lambda: _add_reaction_to_buffer(target=REACTIONS_BUFFER_TARGET_POST_COMMENT,
+                                                          target_id=post_comment_id,
+                                                          reaction_id=post_comment_reaction_id))
+
+
+def flush_reactions_buffer(target, target_id):
+    """
+    Notifies the reactions of the buffer with a single notification. Returns the amount of notified reactions
+    """
+    reactions_ids = _pop_buffered_reactions_ids(buffer_key=_make_reactions_buffer_key(target=target,
+                                                                                      target_id=target_id))
+
+    if not reactions_ids:
+        return 0
+
+    try:
+        if target == REACTIONS_BUFFER_TARGET_POST:
+            return _notify_post_reactions(post_id=target_id, post_reactions_ids=reactions_ids)
+
+        return _notify_post_comment_reactions(post_comment_id=target_id, post_comment_reactions_ids=reactions_ids)
+    except Exception:
+        # Back to the buffer, so the reactions get notified by the next flush instead of getting lost
+        _add_reactions_to_buffer(target=target, target_id=target_id, reactions_ids=reactions_ids)
+        raise
+
+
+def _notify_post_reactions(post_id, post_reactions_ids):
+    PostReaction = get_post_reaction_model()
+
+    # Newest first, the reactions deleted meanwhile are gone
+    post_reactions = list(PostReaction.objects.filter(pk__in=post_reactions_ids, post_id=post_id).select_related(
+        'reactor__profile', 'post__creator__notifications_settings').order_by('-id'))
+
+    if not post_reactions:
+        return 0
+
+    post_creator = post_reactions[0].post.creator
+
+    if not post_creator.has_reaction_notifications_enabled_for_post_with_id(post_id=post_id):
+        return 0
+
+    blocked_users_ids = set(post_creator.user_blocks.filter(
+        blocked_user_id__in=[post_reaction.reactor_id for post_reaction in post_reactions]).values_list(
+        'blocked_user_id', flat=True))
+
+    post_reactions = [post_reaction for post_reaction in post_reactions if
+                      post_reaction.reactor_id not in blocked_users_ids]
+
+    if not post_reactions:
+        return 0
+
+    newest_post_reaction = post_reactions[0]
+
+    PostReactionNotification = get_post_reaction_notification_model()
+    PostReactionNotification.create_post_reaction_notification(post_reaction_id=newest_post_reaction.pk,
+                                                               owner_id=post_creator.pk,
+                                                               aggregated_count=len(post_reactions))
+
+    helpers.send_post_reaction_push_notification(post_reaction=newest_post_reaction)
+
+    return len(post_reactions)
+
+
+def _notify_post_comment_reactions(post_comment_id, post_comment_reactions_ids):
+    PostCommentReaction = get_post_comment_reaction_model()
+
+    # Newest first, the reactions deleted meanwhile are gone
+    post_comment_reactions = list(PostCommentReaction.objects.filter(
+        pk__in=post_comment_reactions_ids, post_comment_id=post_comment_id).select_related(
+        'reactor__profile', 'post_comment__commenter__notifications_settings').order_by('-id'))
+
+    if not post_comment_reactions:
+        return 0
+
+    newest_post_comment_reaction = post_comment_reactions[0]
+    post_comment = newest_post_comment_reaction.post_comment
+    post_comment_commenter = post_comment.commenter
+
+    PostCommentReactionNotification = get_post_comment_reaction_notification_model()
+    PostCommentReactionNotification.create_post_comment_reaction_notification(
+        post_comment_reaction_id=newest_post_comment_reaction.pk,
+        owner_id=post_comment_commenter.pk,
+        aggregated_count=len(post_comment_reactions))
+
+    if post_comment_commenter.has_reaction_notifications_enabled_for_post_comment(post_comment=post_comment):
+        helpers.send_post_comment_reaction_push_notification(post_comment_reaction=newest_post_comment_reaction)
+
+    return len(post_comment_reactions)
+
+
+def _add_reaction_to_buffer(target, target_id, reaction_id):
+    _add_reactions_to_buffer(target=target, target_id=target_id, reactions_ids=[reaction_id])
+
+
+def _add_reactions_to_buffer(target, target_id, reactions_ids):
+    buffer_key = _make_reactions_buffer_key(target=target, target_id=target_id)
+
+    pipeline = _get_redis().pipeline()
+    pipeline.sadd(buffer_key, *reactions_ids)
+    pipeline.expire(buffer_key, REACTIONS_BUFFER_EXPIRE_SECONDS)
+    # Only the first reaction of a buffer schedules its flush
+    pipeline.set('%s-scheduled' % buffer_key, 1, nx=True, ex=REACTIONS_BUFFER_EXPIRE_SECONDS)
+    is_flush_unscheduled = pipeline.execute()[-1]
+
+    if is_flush_unscheduled:
+        _schedule_reactions_buffer_flush(target=target, target_id=target_id)
+
+
+def _pop_buffered_reactions_ids(buffer_key):
+    pipeline = _get_redis().pipeline()
+    pipeline.smembers(buffer_key)
+    pipeline.delete(buffer_key, '%s-scheduled' % buffer_key)
+    reactions_ids, deleted_keys_count = pipeline.execute()
+
+    return [int(reaction_id) for reaction_id in reactions_ids]
+
+
+def _schedule_reactions_buffer_flush(target, target_id):
+    from openbook_notifications.django_rq_jobs import flush_reaction_notifications_buffer
+
+    window_seconds = settings.REACTION_NOTIFICATIONS_COALESCING_WINDOW_SECONDS
+
+    if window_seconds:
+        django_rq.get_scheduler('default').enqueue_in(timedelta(seconds=window_seconds),
+                                                      flush_reaction_notifications_buffer, target=target,
+                                                      target_id=target_id)
+    else:
+        flush_reaction_notifications_buffer.delay(target=target, target_id=target_id)
+
+
+def _make_reactions_buffer_key(target, target_id):
+    return '%s%s-%d' % (REACTIONS_BUFFER_KEY_PREFIX, target, target_id)
+
+
+def _get_redis():
+    return get_redis_connection('default')
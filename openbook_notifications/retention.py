@@ -0,0 +1,136 @@
+"""
+Notifications retention and compaction.
+
+Read notifications older than NOTIFICATIONS_RETENTION_DAYS get deleted a chunk at a time. Bursts of notifications of
+the same type about the same post or comment, e.g. many reactions to a post, get merged into their newest
+notification, which keeps the amount of merged notifications in aggregated_count. Both run from the
+clean_up_notifications job, so the notifications of every user stay bounded.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from openbook_common.utils.model_loaders import get_notification_model, get_post_reaction_notification_model, \
+    get_post_comment_reaction_notification_model, get_post_comment_notification_model, \
+    get_post_comment_reply_notification_model
+from openbook_notifications.bulk_deletion import bulk_delete_notifications, delete_notifications_with_ids, \
+    NOTIFICATIONS_DELETION_CHUNK_SIZE
+
+CompactedNotification = namedtuple('CompactedNotification',
+                                   ['notification_id', 'typed_notification_id', 'read', 'aggregated_count'])
+
+
+def delete_expired_notifications(retention_days=None, chunk_size=NOTIFICATIONS_DELETION_CHUNK_SIZE):
+    """
+    Deletes the read notifications older than the retention days. Returns the amount deleted
+    """
+    Notification = get_notification_model()
+
+    if retention_days is None:
+        retention_days = settings.NOTIFICATIONS_RETENTION_DAYS
+
+    expired_before = timezone.now() - timedelta(days=retention_days)
+    deleted_count = 0
+
+    while True:
+        expired_notifications = list(Notification.objects.filter(read=True, created__lt=expired_before).values_list(
+            'id', 'content_type_id', 'object_id').order_by('id')[:chunk_size])
+
+        if not expired_notifications:
+            break
+
+        deleted_count += _delete_notifications(notifications=expired_notifications)
+
+    return deleted_count
+
+
+def compact_notifications(window_hours=None):
+    """
+    Merges the notifications of the same owner, type and target created within the window into the newest of them.
+    Returns the amount of merged away notifications
+    """
+    if window_hours is None:
+        window_hours = settings.NOTIFICATIONS_COMPACTION_WINDOW_HOURS
+
+    created_after = timezone.now() - timedelta(hours=window_hours)
+    merged_count = 0
+
+    for typed_notification_model, target_field in _get_compacted_notification_models():
+        merged_count += _compact_typed_notifications(typed_notification_model=typed_notification_model,
+                                                     target_field=target_field, created_after=created_after)
+
+    return merged_count
+
+
+def _compact_typed_notifications(typed_notification_model, target_field, created_after):
+    Notification = get_notification_model()
+
+    typed_notifications = typed_notification_model.objects.filter(notification__created__gte=created_after). \
+        values_list('id', target_field, 'notification__id', 'notification__owner_id', 'notification__read',
+                    'notification__aggregated_count')
+
+    notifications_by_owner_and_target = defaultdict(list)
+
+    for typed_notification_id, target_id, notification_id, owner_id, read, aggregated_count in \
+            typed_notifications.iterator():
+        notifications_by_owner_and_target[(owner_id, target_id)].append(CompactedNotification(
+            notification_id=notification_id, typed_notification_id=typed_notification_id, read=read,
+            aggregated_count=aggregated_count))
+
+    merged_notifications = []
+    merged_away_typed_notifications_ids = []
+
+    for notifications in notifications_by_owner_and_target.values():
+        if len(notifications) < 2:
+            continue
+
+        notifications.sort(key=lambda notification: notification.notification_id)
+        newest_notification = notifications[-1]
+
+        merged_notifications.append(Notification(
+            pk=newest_notification.notification_id,
+            read=all(notification.read for notification in notifications),
+            aggregated_count=sum(notification.aggregated_count for notification in notifications)))
+
+        merged_away_typed_notifications_ids.extend(
+            notification.typed_notification_id for notification in notifications[:-1])
+
+    if not merged_notifications:
+        return 0
+
+    Notification.objects.bulk_update(merged_notifications, ['read', 'aggregated_count'],
+                                     batch_size=NOTIFICATIONS_DELETION_CHUNK_SIZE)
+
+    return bulk_delete_notifications(typed_notifications_querysets=[
+        typed_notification_model.objects.filter(pk__in=merged_away_typed_notifications_ids)
+    ])
+
+
+def _delete_notifications(notifications):
+    objects_ids_by_content_type_id = defaultdict(list)
+
+    for notification_id, content_type_id, object_id in notifications:
+        objects_ids_by_content_type_id[content_type_id].append(object_id)
+
+    bulk_delete_notifications(typed_notifications_querysets=[
+        ContentType.objects.get_for_id(content_type_id).model_class().objects.filter(pk__in=objects_ids) for
+        content_type_id, objects_ids in objects_ids_by_content_type_id.items()
+    ])
+
+    # The notifications whose content object is already gone
+    delete_notifications_with_ids(
+        notifications_ids=[notification_id for notification_id, content_type_id, object_id in notifications])
+
+    return len(notifications)
+
+
+def _get_compacted_notification_models():
+    return (
+        (get_post_reaction_notification_model(), 'post_reaction__post_id'),
+        (get_post_comment_reaction_notification_model(), 'post_comment_reaction__post_comment_id'),
+        (get_post_comment_notification_model(), 'post_comment__post_id'),
+        (get_post_comment_reply_notification_model(), 'post_comment__parent_comment_id'),
+    )
@@ -6,6 +6,7 @@ from openbook_common.models import Emoji, Language, Badge
 from openbook_common.serializers import CommonHashtagSerializer
 from openbook_common.serializers_fields.post import IsEncircledField
 from openbook_common.serializers_fields.post_comment import PostCommentIsMutedField
+from openbook_common.utils.pagination import CURSOR_MAX_LENGTH
 from openbook_communities.models import Community, CommunityInvite
 from openbook_notifications.models import Notification, PostCommentNotification, ConnectionRequestNotification, \
     ConnectionConfirmedNotification, FollowNotification, CommunityInviteNotification, PostCommentReplyNotification, \
@@ -53,6 +54,10 @@ class GetNotificationsSerializer(serializers.Serializer):
     max_id = serializers.IntegerField(
         required=False,
     )
+    cursor = serializers.CharField(
+        required=False,
+        max_length=CURSOR_MAX_LENGTH,
+    )
     types = serializers.ListField(
         child=serializers.ChoiceField(
             choices=Notification.get_notification_types_values(),
@@ -635,6 +640,7 @@ class GetNotificationsNotificationSerializer(serializers.ModelSerializer):
             'content_object',
             'read',
             'created',
+            'aggregated_count',
         )
 
 
@@ -0,0 +1,123 @@
+"""
+Notifications stream.
+
+Instead of polling GET /notifications/, the apps can keep a Server-Sent Events connection open to
+GET /notifications/stream/. Creating notifications publishes a lightweight event per notification, with its id and
+type, to the redis channel of its owner once committed. The stream relays the events of the channel of the user,
+sending a comment line as heartbeat when idle, and ends after NOTIFICATIONS_STREAM_TIMEOUT_SECONDS for the clients to
+reconnect. The clients fetch the new notifications through GET /notifications/ as usual.
+
+An open stream holds its worker until it ends, so it is meant to be served by async workers, e.g. gunicorn gevent
+workers, where an idle stream is a parked greenlet waiting on its redis socket. In production Apache proxies the
+streams to the gevent workers of the gunicornnotificationsstream supervisord program, and the view closes its
+database connections before streaming. It is disabled unless FEATURE_NOTIFICATIONS_STREAM_ENABLED, and then nothing
+gets published either.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+from rest_framework.renderers import BaseRenderer
+
+NOTIFICATIONS_CHANNEL_PREFIX = 'ob-api-notifications-channel-'
+
+# Milliseconds the clients wait before reconnecting to an ended stream
+NOTIFICATIONS_STREAM_RETRY_MILLISECONDS = 1000
+
+NOTIFICATIONS_STREAM_EVENT_NAME = 'notification'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets the clients ask for text/event-stream, the errors get rendered as JSON
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+def is_notifications_stream_enabled():
+    return settings.FEATURE_NOTIFICATIONS_STREAM_ENABLED
+
+
+def make_notifications_channel_for_user_with_id(user_id):
+    return '%s%d' % (NOTIFICATIONS_CHANNEL_PREFIX, user_id)
+
+
+def make_notification_event(notification):
+    return {
+        'id': notification.pk,
+        'notification_type': notification.notification_type,
+    }
+
+
+def publish_notifications(notifications):
+    """
+    Publishes the events of the notifications to the channels of their owners once committed
+    """
+    if not is_notifications_stream_enabled():
+        return
+
+    events = [(notification.owner_id, make_notification_event(notification)) for notification in notifications]
+
+    if events:
+        transaction.on_commit(lambda: _publish_events(events=events))
+
+
+def stream_notifications_events_for_user_with_id(user_id, timeout_seconds=None, heartbeat_seconds=None):
+    """
+    Yields the notifications events of the user as Server-Sent Events until the timeout
+    """
+    if timeout_seconds is None:
+        timeout_seconds = settings.NOTIFICATIONS_STREAM_TIMEOUT_SECONDS
+
+    if heartbeat_seconds is None:
+        heartbeat_seconds = settings.NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS
+
+    ends_at = time.monotonic() + timeout_seconds
+
+    pubsub = _get_redis().pubsub(ignore_subscribe_messages=True)
+
+    try:
+        pubsub.subscribe(make_notifications_channel_for_user_with_id(user_id))
+        # Wait for the subscription to be confirmed, no event published from now on gets missed
+        pubsub.get_message(timeout=heartbeat_seconds)
+
+        yield 'retry: %d\n\n' % NOTIFICATIONS_STREAM_RETRY_MILLISECONDS
+
+        while True:
+            remaining_seconds = ends_at - time.monotonic()
+
+            if remaining_seconds <= 0:
+                break
+
+            message = pubsub.get_message(timeout=min(heartbeat_seconds, remaining_seconds))
+
+            if message is None:
+                yield ': heartbeat\n\n'
+                continue
+
+            encoded_event = message['data'].decode()
+            event = json.loads(encoded_event)
+
+            yield 'id: %d\nevent: %s\ndata: %s\n\n' % (event['id'], NOTIFICATIONS_STREAM_EVENT_NAME, encoded_event)
+    finally:
+        pubsub.close()
+
+
+def _publish_events(events):
+    pipeline = _get_redis().pipeline(transaction=False)
+
+    for owner_id, event in events:
+        pipeline.publish(make_notifications_channel_for_user_with_id(owner_id), json.dumps(event))
+
+    pipeline.execute()
+
+
+def _get_redis():
+    return get_redis_connection('default')
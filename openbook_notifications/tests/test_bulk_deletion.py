@@ -0,0 +1,66 @@
+from openbook_common.tests.helpers import make_user, make_fake_post_text, make_emoji, make_reactions_emoji_group
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_notifications import bulk_deletion
+from openbook_notifications.models import Notification, PostCommentNotification, PostReactionNotification
+
+
+class BulkDeletionTests(OpenbookAPITestCase):
+    """
+    BulkDeletionTests
+    """
+
+    def test_deletes_post_notifications_in_chunks(self):
+        """
+        should delete the typed notifications of a post and their notifications, a chunk at a time
+        """
+        post_creator = make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+        emoji_id = make_emoji(group=make_reactions_emoji_group()).pk
+
+        for i in range(3):
+            user = make_user()
+            user.react_to_post(post=post, emoji_id=emoji_id)
+            user.comment_post(post=post, text=make_fake_post_text())
+            # Flushes the reactions buffer, one notification per reaction
+            self.run_on_commit_jobs()
+
+        other_post = post_creator.create_public_post(text=make_fake_post_text())
+        make_user().react_to_post(post=other_post, emoji_id=emoji_id)
+        self.run_on_commit_jobs()
+
+        self.assertEqual(PostReactionNotification.objects.filter(post_reaction__post=post).count(), 3)
+
+        original_chunk_size = bulk_deletion.NOTIFICATIONS_DELETION_CHUNK_SIZE
+        bulk_deletion.NOTIFICATIONS_DELETION_CHUNK_SIZE = 2
+
+        try:
+            post.delete_notifications()
+        finally:
+            bulk_deletion.NOTIFICATIONS_DELETION_CHUNK_SIZE = original_chunk_size
+
+        self.assertFalse(PostReactionNotification.objects.filter(post_reaction__post=post).exists())
+        self.assertFalse(PostCommentNotification.objects.filter(post_comment__post=post).exists())
+        self.assertFalse(Notification.objects.filter(notification_type=Notification.POST_COMMENT).exists())
+        self.assertEqual(Notification.objects.filter(owner=post_creator).count(), 1)
+        self.assertTrue(PostReactionNotification.objects.filter(post_reaction__post=other_post).exists())
+
+    def test_deletes_post_notifications_for_user(self):
+        """
+        should only delete the post notifications of the given user
+        """
+        post_creator = make_user()
+        commenter = make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+
+        commenter.comment_post(post=post, text=make_fake_post_text())
+        post_creator.comment_post(post=post, text=make_fake_post_text())
+
+        self.assertTrue(Notification.objects.filter(owner=commenter, notification_type=Notification.POST_COMMENT)
+                        .exists())
+
+        post.delete_notifications_for_user(user=commenter)
+
+        self.assertFalse(Notification.objects.filter(owner=commenter, notification_type=Notification.POST_COMMENT)
+                         .exists())
+        self.assertTrue(Notification.objects.filter(owner=post_creator, notification_type=Notification.POST_COMMENT)
+                        .exists())
@@ -0,0 +1,19 @@
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_notifications.helpers import get_push_message, PUSH_MESSAGE_FOLLOW
+
+
+class PushMessagesTests(OpenbookAPITestCase):
+    """
+    PushMessagesTests
+    """
+
+    def test_push_message_is_translated_to_the_language(self):
+        """
+        should return the push message template translated to the given language
+        """
+        german_message = get_push_message(message_name=PUSH_MESSAGE_FOLLOW, language_code='de')
+        english_message = get_push_message(message_name=PUSH_MESSAGE_FOLLOW, language_code='en')
+
+        self.assertEqual(german_message, '%(following_user_name)s · @%(following_user_username)s folgt dir jetzt')
+        self.assertEqual(english_message,
+                         '%(following_user_name)s · @%(following_user_username)s started following you')
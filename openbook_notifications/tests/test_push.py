@@ -0,0 +1,64 @@
+import onesignal as onesignal_sdk
+from django_rq import get_worker
+from rq import SimpleWorker
+
+from openbook_common.tests.helpers import make_user, make_device
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_notifications import push
+from openbook_notifications.push import FakePushBackend
+
+
+class PushNotificationGroupsTests(OpenbookAPITestCase):
+    """
+    PushNotificationGroupsTests
+    """
+
+    def setUp(self):
+        super(PushNotificationGroupsTests, self).setUp()
+        FakePushBackend.reset()
+
+    def test_sends_same_content_to_all_devices_in_one_request(self):
+        """
+        should send a notification with the same content for several users as a single request to all their devices
+        """
+        user = make_user()
+        other_user = make_user()
+        user_device = make_device(owner=user)
+        other_user_devices = [make_device(owner=other_user), make_device(owner=other_user)]
+
+        for target_user in [user, other_user]:
+            push.dispatch_notification_to_user(user=target_user, notification=self._make_notification('Hello'))
+
+        get_worker('default', worker_class=SimpleWorker).work(burst=True)
+
+        self.assertEqual(len(FakePushBackend.sent_post_bodies), 1)
+
+        post_body = FakePushBackend.sent_post_bodies[0]
+        self.assertEqual(post_body['contents'], {'en': 'Hello'})
+
+        devices_uuids = [device_filter['value'] for device_filter in post_body['filters'] if
+                         device_filter.get('key') == 'device_uuid']
+        self.assertEqual(sorted(devices_uuids),
+                         sorted([device.uuid for device in [user_device] + other_user_devices]))
+        self.assertEqual(len([device_filter for device_filter in post_body['filters'] if
+                              device_filter.get('operator') == 'OR']), 2)
+
+    def test_sends_different_contents_in_different_requests(self):
+        """
+        should send notifications with different contents, e.g. in different languages, as separate requests
+        """
+        user = make_user()
+        other_user = make_user()
+        make_device(owner=user)
+        make_device(owner=other_user)
+
+        push.dispatch_notification_to_user(user=user, notification=self._make_notification('Hello'))
+        push.dispatch_notification_to_user(user=other_user, notification=self._make_notification('Hola'))
+
+        get_worker('default', worker_class=SimpleWorker).work(burst=True)
+
+        self.assertEqual(sorted([post_body['contents']['en'] for post_body in FakePushBackend.sent_post_bodies]),
+                         ['Hello', 'Hola'])
+
+    def _make_notification(self, text):
+        return onesignal_sdk.Notification(post_body={'contents': {'en': text}})
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from openbook_common.tests.helpers import make_user, make_fake_post_text, make_emoji, make_reactions_emoji_group, \
+    make_fake_post_comment_text
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_notifications import reaction_coalescing
+from openbook_notifications.models import Notification, PostReactionNotification, PostCommentReactionNotification
+
+
+class ReactionNotificationsCoalescingTests(OpenbookAPITestCase):
+    """
+    ReactionNotificationsCoalescingTests
+    """
+
+    @mock.patch('openbook_notifications.helpers.send_post_reaction_push_notification')
+    def test_coalesces_the_reactions_to_a_post(self, send_post_reaction_push_notification_call):
+        """
+        should create a single notification and send a single push notification for the buffered reactions to a post
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+        emoji_id = make_emoji(group=make_reactions_emoji_group()).pk
+
+        blocked_user = make_user()
+        blocked_user.react_to_post(post=post, emoji_id=emoji_id)
+        user.block_user_with_id(user_id=blocked_user.pk)
+
+        post_reactions = [make_user().react_to_post(post=post, emoji_id=emoji_id) for i in range(0, 3)]
+        user.react_to_post(post=post, emoji_id=emoji_id)
+
+        self.assertFalse(PostReactionNotification.objects.filter(post_reaction__post=post).exists())
+
+        self.run_on_commit_jobs()
+
+        post_reaction_notifications = PostReactionNotification.objects.filter(post_reaction__post=post)
+        self.assertEqual(list(post_reaction_notifications.values_list('post_reaction_id', 'notification__owner_id',
+                                                                      'notification__aggregated_count')),
+                         [(post_reactions[-1].pk, user.pk, 3)])
+
+        send_post_reaction_push_notification_call.assert_called_once_with(post_reaction=post_reactions[-1])
+
+    def test_coalesces_the_reactions_to_a_post_comment(self):
+        """
+        should create a single notification for the buffered reactions to a post comment, even if muted
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+        post_comment = user.comment_post(post=post, text=make_fake_post_comment_text())
+        user.mute_post_comment_with_id(post_comment_id=post_comment.pk)
+        emoji_id = make_emoji(group=make_reactions_emoji_group()).pk
+
+        for i in range(0, 2):
+            make_user().react_to_post_comment(post_comment=post_comment, emoji_id=emoji_id)
+
+        self.run_on_commit_jobs()
+
+        self.assertEqual(list(PostCommentReactionNotification.objects.filter(
+            post_comment_reaction__post_comment=post_comment).values_list('notification__aggregated_count',
+                                                                          flat=True)), [2])
+        self.assertEqual(Notification.objects.filter(owner=user,
+                                                     notification_type=Notification.POST_COMMENT_REACTION).count(), 1)
+
+        # Muted comments get no push notifications
+        self.mock_foo.assert_not_called()
+
+    def test_moves_coalesced_notification_to_next_reaction_when_deleting_its_reaction(self):
+        """
+        should keep the coalesced notification about the next remaining reaction when its reaction gets deleted
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+        emoji_id = make_emoji(group=make_reactions_emoji_group()).pk
+
+        reactors = [make_user() for i in range(0, 3)]
+        post_reactions = [reactor.react_to_post(post=post, emoji_id=emoji_id) for reactor in reactors]
+
+        self.run_on_commit_jobs()
+
+        reactors[-1].delete_reaction_with_id_for_post_with_id(post_reaction_id=post_reactions[-1].pk, post_id=post.pk)
+
+        post_reaction_notifications = PostReactionNotification.objects.filter(post_reaction__post=post)
+        self.assertEqual(list(post_reaction_notifications.values_list('post_reaction_id',
+                                                                      'notification__aggregated_count')),
+                         [(post_reactions[-2].pk, 2)])
+
+    def test_puts_reactions_back_into_buffer_when_flush_fails(self):
+        """
+        should put the reactions back into the buffer when notifying them fails
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+        emoji_id = make_emoji(group=make_reactions_emoji_group()).pk
+
+        post_reaction = make_user().react_to_post(post=post, emoji_id=emoji_id)
+
+        with mock.patch.object(reaction_coalescing, '_schedule_reactions_buffer_flush'):
+            self.run_on_commit_jobs()
+
+        with mock.patch.object(reaction_coalescing, '_notify_post_reactions', side_effect=Exception()), \
+                mock.patch.object(reaction_coalescing, '_schedule_reactions_buffer_flush'):
+            with self.assertRaises(Exception):
+                reaction_coalescing.flush_reactions_buffer(target=reaction_coalescing.REACTIONS_BUFFER_TARGET_POST,
+                                                           target_id=post.pk)
+
+        self.assertEqual(reaction_coalescing.flush_reactions_buffer(
+            target=reaction_coalescing.REACTIONS_BUFFER_TARGET_POST, target_id=post.pk), 1)
+        self.assertTrue(PostReactionNotification.objects.filter(post_reaction=post_reaction).exists())
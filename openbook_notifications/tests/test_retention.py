@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from openbook_common.tests.helpers import make_user, make_fake_post_text, make_emoji, make_reactions_emoji_group, \
+    make_notification
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_notifications import retention
+from openbook_notifications.models import Notification, PostReactionNotification
+
+
+class NotificationsRetentionTests(OpenbookAPITestCase):
+    """
+    NotificationsRetentionTests
+    """
+
+    def test_deletes_expired_read_notifications(self):
+        """
+        should delete the read notifications older than the retention days along with their content objects
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+        emoji_id = make_emoji(group=make_reactions_emoji_group()).pk
+
+        for i in range(0, 3):
+            make_user().react_to_post(post=post, emoji_id=emoji_id)
+            self.run_on_commit_jobs()
+
+        unread_notification = make_notification(owner=user)
+        recent_notification = make_notification(owner=user)
+        recent_notification.read = True
+        recent_notification.save()
+
+        Notification.objects.filter(notification_type=Notification.POST_REACTION).update(
+            read=True, created=timezone.now() - timedelta(days=91))
+        Notification.objects.filter(pk=unread_notification.pk).update(created=timezone.now() - timedelta(days=91))
+
+        deleted_count = retention.delete_expired_notifications(retention_days=90, chunk_size=2)
+
+        self.assertEqual(deleted_count, 3)
+        self.assertFalse(PostReactionNotification.objects.filter(post_reaction__post=post).exists())
+        self.assertEqual(set(Notification.objects.filter(owner=user).values_list('id', flat=True)),
+                         {unread_notification.pk, recent_notification.pk})
+
+    def test_merges_bursts_of_reactions_to_the_same_post(self):
+        """
+        should merge the reaction notifications of the same post into the newest one, keeping their amount
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+        other_post = user.create_public_post(text=make_fake_post_text())
+        emoji_id = make_emoji(group=make_reactions_emoji_group()).pk
+
+        # Flushing after every reaction gets a notification per reaction
+        for i in range(0, 3):
+            make_user().react_to_post(post=post, emoji_id=emoji_id)
+            self.run_on_commit_jobs()
+
+        make_user().react_to_post(post=other_post, emoji_id=emoji_id)
+        self.run_on_commit_jobs()
+
+        newest_notification_id = PostReactionNotification.objects.filter(post_reaction__post=post).values_list(
+            'notification__id', flat=True).order_by('-notification__id').first()
+
+        merged_count = retention.compact_notifications(window_hours=1)
+
+        self.assertEqual(merged_count, 2)
+
+        post_notifications = PostReactionNotification.objects.filter(post_reaction__post=post).values_list(
+            'notification__id', 'notification__aggregated_count', 'notification__read')
+        self.assertEqual(list(post_notifications), [(newest_notification_id, 3, False)])
+
+        other_post_notifications = PostReactionNotification.objects.filter(post_reaction__post=other_post). \
+            values_list('notification__aggregated_count', flat=True)
+        self.assertEqual(list(other_post_notifications), [1])
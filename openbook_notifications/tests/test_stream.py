@@ -0,0 +1,87 @@
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from openbook_common.tests.helpers import make_user, make_notification, make_authentication_headers_for_user
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_notifications.models import Notification
+from openbook_notifications.stream import stream_notifications_events_for_user_with_id
+
+
+@override_settings(FEATURE_NOTIFICATIONS_STREAM_ENABLED=True)
+class NotificationsStreamTests(OpenbookAPITestCase):
+    """
+    NotificationsStreamTests
+    """
+
+    def test_streams_the_created_notifications_of_the_user(self):
+        """
+        should stream an event for every created notification of the user once committed
+        """
+        user = make_user()
+        other_user = make_user()
+
+        events = stream_notifications_events_for_user_with_id(user_id=user.pk, timeout_seconds=5,
+                                                              heartbeat_seconds=1)
+
+        try:
+            self.assertEqual(next(events), 'retry: 1000\n\n')
+
+            make_notification(owner=other_user)
+            notification = make_notification(owner=user, notification_type=Notification.FOLLOW)
+            self.run_on_commit_jobs()
+
+            event_lines = next(events).splitlines()
+        finally:
+            events.close()
+
+        self.assertEqual(event_lines[:2], ['id: %d' % notification.pk, 'event: notification'])
+        self.assertEqual(json.loads(event_lines[2][len('data: '):]), {
+            'id': notification.pk,
+            'notification_type': Notification.FOLLOW,
+        })
+
+    def test_sends_heartbeats_when_idle(self):
+        """
+        should send a heartbeat comment when no events get published
+        """
+        user = make_user()
+
+        events = stream_notifications_events_for_user_with_id(user_id=user.pk, timeout_seconds=5,
+                                                              heartbeat_seconds=1)
+
+        try:
+            next(events)
+            self.assertEqual(next(events), ': heartbeat\n\n')
+        finally:
+            events.close()
+
+    def test_can_open_stream(self):
+        """
+        should open an event stream
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user)
+
+        response = self.client.get(reverse('notifications-stream'), HTTP_ACCEPT='text/event-stream', **headers)
+
+        try:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+        finally:
+            # Closes the events generator along with its redis subscription
+            response.close()
+
+    @override_settings(FEATURE_NOTIFICATIONS_STREAM_ENABLED=False)
+    def test_cant_open_stream_when_disabled(self):
+        """
+        should not open an event stream when the stream is disabled
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user)
+
+        response = self.client.get(reverse('notifications-stream'), **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
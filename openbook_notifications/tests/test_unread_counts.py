@@ -0,0 +1,102 @@
+from django.db import transaction
+
+from openbook_common.tests.helpers import make_user, make_notification
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_notifications import unread_counts
+from openbook_notifications.models import Notification
+
+
+class UnreadNotificationsCountsTests(OpenbookAPITestCase):
+    """
+    UnreadNotificationsCountsTests
+    """
+
+    def test_counts_follow_created_and_read_notifications(self):
+        """
+        should keep the unread notifications counts by type in sync when notifications get created and read
+        """
+        user = make_user()
+        make_notification(owner=user, notification_type=Notification.FOLLOW)
+
+        self.assertEqual(user.get_unread_notifications_counts(), {Notification.FOLLOW: 1})
+
+        follow_notification = make_notification(owner=user, notification_type=Notification.FOLLOW)
+        make_notification(owner=user, notification_type=Notification.POST_REACTION)
+        self.run_on_commit_jobs()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_unread_notifications_counts(), {
+                Notification.FOLLOW: 2,
+                Notification.POST_REACTION: 1,
+            })
+            self.assertEqual(user.count_unread_notifications(types=[Notification.POST_REACTION]), 1)
+
+        user.read_notification_with_id(notification_id=follow_notification.pk)
+        self.run_on_commit_jobs()
+
+        self.assertEqual(user.count_unread_notifications(), 2)
+
+        user.read_notifications(types=[Notification.FOLLOW])
+        self.run_on_commit_jobs()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_unread_notifications_counts(), {Notification.POST_REACTION: 1})
+
+    def test_counts_follow_notifications_deleted_through_cascades(self):
+        """
+        should decrement the unread notifications counts when unread notifications get deleted through cascades
+        """
+        user = make_user()
+        follower = make_user()
+        follower.follow_user_with_id(user_id=user.pk)
+        make_notification(owner=user, notification_type=Notification.POST_REACTION)
+        self.run_on_commit_jobs()
+
+        self.assertEqual(user.count_unread_notifications(), 2)
+
+        # Deletes the follow notification, which deletes its notification through the generic relation
+        follower.unfollow_user(user)
+        self.run_on_commit_jobs()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_unread_notifications_counts(), {Notification.POST_REACTION: 1})
+
+    def test_adds_up_the_changes_of_a_transaction(self):
+        """
+        should change the unread notifications counts of a transaction at once when it commits
+        """
+        user = make_user()
+        user.count_unread_notifications()
+        connection = transaction.get_connection()
+        on_commit_callbacks_count = len(connection.run_on_commit)
+
+        notifications = [make_notification(owner=user, notification_type=Notification.FOLLOW) for i in range(0, 3)]
+        make_notification(owner=user, notification_type=Notification.POST_REACTION)
+        Notification.objects.filter(pk__in=[notification.pk for notification in notifications[:2]]).delete()
+
+        self.assertEqual(len(connection.run_on_commit), on_commit_callbacks_count + 1)
+
+        self.run_on_commit_jobs()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_unread_notifications_counts(), {
+                Notification.FOLLOW: 1,
+                Notification.POST_REACTION: 1
+            })
+
+    def test_reconciles_drifted_counts(self):
+        """
+        should delete the counts that drifted from the database
+        """
+        user = make_user()
+        other_user = make_user()
+        make_notification(owner=user, notification_type=Notification.FOLLOW)
+
+        user.count_unread_notifications()
+        other_user.count_unread_notifications()
+
+        # Queryset updates do not touch the counts
+        Notification.objects.filter(owner=user).update(read=True)
+
+        self.assertEqual(unread_counts.reconcile_unread_notifications_counts(), 1)
+        self.assertEqual(user.count_unread_notifications(), 0)
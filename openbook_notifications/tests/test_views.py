@@ -1,11 +1,15 @@
 import json
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from faker import Faker
 from rest_framework import status
 from openbook_common.tests.models import OpenbookAPITestCase
 
-from openbook_common.tests.helpers import make_user, make_authentication_headers_for_user, make_notification
+from openbook_common.tests.helpers import make_user, make_authentication_headers_for_user, make_notification, \
+    make_fake_post_text, make_fake_post_comment_text, make_emoji, make_reactions_emoji_group
+from openbook_common.utils.pagination import NEXT_CURSOR_HEADER
 from openbook_notifications.models import Notification
 
 fake = Faker()
@@ -112,6 +116,87 @@ class NotificationsAPITests(OpenbookAPITestCase):
 
         self.assertFalse(Notification.objects.filter(owner=user).exists())
 
+    def test_can_retrieve_notifications_with_cursor(self):
+        """
+        should be able to walk through all notifications following the next cursor header and return 200
+        """
+        user = make_user()
+
+        amount_of_notifications = 5
+        notifications_ids = []
+
+        for i in range(0, amount_of_notifications):
+            notification = make_notification(owner=user)
+            notifications_ids.append(notification.pk)
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+
+        response_notifications_ids = []
+        cursor = None
+
+        while True:
+            query_params = {'count': 2}
+            if cursor:
+                query_params['cursor'] = cursor
+
+            response = self.client.get(url, query_params, **headers)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response_notifications_ids.extend(
+                [response_notification.get('id') for response_notification in json.loads(response.content)])
+
+            if NEXT_CURSOR_HEADER not in response:
+                break
+
+            cursor = response[NEXT_CURSOR_HEADER]
+
+        self.assertEqual(response_notifications_ids, list(reversed(notifications_ids)))
+
+    def test_cant_retrieve_notifications_with_invalid_cursor(self):
+        """
+        should not be able to retrieve notifications with an invalid cursor and return 400
+        """
+        user = make_user()
+        make_notification(owner=user)
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+        response = self.client.get(url, {'cursor': 'notacursor'}, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieving_notifications_makes_a_constant_amount_of_queries(self):
+        """
+        should retrieve the notifications with the same amount of queries regardless of their amount
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+        emoji = make_emoji(group=make_reactions_emoji_group())
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+
+        queries_counts = []
+
+        for i in range(0, 2):
+            for j in range(0, 2):
+                notifier = make_user()
+                notifier.follow_user_with_id(user_id=user.pk)
+                notifier.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
+                self.run_on_commit_jobs()
+                notifier.comment_post_with_id(post_id=post.pk, text=make_fake_post_comment_text())
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, {'count': 20}, **headers)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(json.loads(response.content)), 6 * (i + 1))
+            queries_counts.append(len(context.captured_queries))
+
+        self.assertEqual(queries_counts[0], queries_counts[1])
+
     def _get_url(self):
         return reverse('notifications')
 
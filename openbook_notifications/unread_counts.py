@@ -0,0 +1,231 @@
+"""
+Per user unread notifications counts.
+
+The apps poll the unread notifications count constantly, so instead of counting the unread notifications on every
+request, the counts are kept in redis. A user counts are a redis hash holding the amount of unread notifications of
+every type, plus their total.
+
+The counts get built from the database when missing. Creating, reading and deleting notifications, deletions
+through cascades included, increments and decrements them once the transaction commits, with the changes of a
+transaction added up and sent to redis at once, while bulk reads and
+deletions that can not tell the amounts involved delete them. The counts only change when they exist, and expire
+after a day, so the changes that bypass all of the above, e.g. queryset updates, only linger until then or until the
+reconcile_unread_notifications_counts job fixes them.
+"""
+import threading
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+from django_redis import get_redis_connection
+
+from openbook_common.utils.model_loaders import get_notification_model
+
+UNREAD_NOTIFICATIONS_COUNTS_KEY_PREFIX = 'ob-api-unread-notifications-counts-'
+
+UNREAD_NOTIFICATIONS_COUNTS_EXPIRE_SECONDS = 60 * 60 * 24
+
+TOTAL_FIELD = 'total'
+
+# Only touches existing counts, and drops them when they would go below zero, e.g. when a notification counted in
+# the database, but created before the counts were built, gets read
+_ADD_TO_UNREAD_NOTIFICATIONS_COUNT_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    return 0
+end
+local type_count = redis.call('hincrby', KEYS[1], ARGV[1], ARGV[2])
+local total_count = redis.call('hincrby', KEYS[1], ARGV[3], ARGV[2])
+if type_count < 0 or total_count < 0 then
+    redis.call('del', KEYS[1])
+end
+return 1
+"""
+
+_add_to_unread_notifications_count_script = None
+
+# The amounts to add to the counts once the current transaction commits, along with the on_commit callback adding them
+_pending_amounts = threading.local()
+
+
+def count_unread_notifications_for_user_with_id(user_id, types=None):
+    unread_notifications_counts = get_unread_notifications_counts_for_user_with_id(user_id=user_id)
+
+    if types:
+        return sum(unread_notifications_counts.get(notification_type, 0) for notification_type in types)
+
+    return sum(unread_notifications_counts.values())
+
+
+def get_unread_notifications_counts_for_user_with_id(user_id):
+    """
+    Returns the amount of unread notifications of the user by notification type
+    """
+    unread_notifications_counts = _get_redis().hgetall(make_unread_notifications_counts_key_for_user_with_id(user_id))
+
+    if not unread_notifications_counts:
+        return _build_unread_notifications_counts_for_user_with_id(user_id=user_id)
+
+    return {field.decode(): int(count) for field, count in unread_notifications_counts.items() if
+            field.decode() != TOTAL_FIELD and int(count)}
+
+
+def make_unread_notifications_counts_key_for_user_with_id(user_id):
+    return '%s%d' % (UNREAD_NOTIFICATIONS_COUNTS_KEY_PREFIX, user_id)
+
+
+def increment_unread_notifications_count_for_user_with_id(user_id, notification_type, amount=1):
+    increment_unread_notifications_counts(amounts_by_user_id_and_type={(user_id, notification_type): amount})
+
+
+def increment_unread_notifications_counts(amounts_by_user_id_and_type):
+    """
+    Adds the amounts to the ones the current transaction adds to the counts once it commits
+    """
+    pending_amounts = getattr(_pending_amounts, 'amounts', None)
+    pending_callback = getattr(_pending_amounts, 'callback', None)
+
+    connection = transaction.get_connection()
+
+    if pending_amounts is not None and any(
+            on_commit_callback is pending_callback for savepoint_ids, on_commit_callback in connection.run_on_commit):
+        pending_amounts.update(amounts_by_user_id_and_type)
+        return
+
+    # Either the first change of the transaction, or the previous transaction already committed or rolled back
+    pending_amounts = Counter(amounts_by_user_id_and_type)
+
+    def add_pending_amounts():
+        _add_to_unread_notifications_counts(amounts_by_user_id_and_type={
+            user_id_and_type: amount for user_id_and_type, amount in pending_amounts.items() if amount})
+
+    _pending_amounts.amounts = pending_amounts
+    _pending_amounts.callback = add_pending_amounts
+
+    transaction.on_commit(add_pending_amounts)
+
+
+def decrement_unread_notifications_count_for_user_with_id(user_id, notification_type, amount=1):
+    increment_unread_notifications_count_for_user_with_id(user_id=user_id, notification_type=notification_type,
+                                                          amount=-amount)
+
+
+def delete_unread_notifications_counts_for_users_with_ids(users_ids):
+    """
+    Deletes the counts right away and once more after the current transaction commits, so a concurrent request can
+    not cache the counts from before the change
+    """
+    keys = [make_unread_notifications_counts_key_for_user_with_id(user_id) for user_id in users_ids]
+
+    if not keys:
+        return
+
+    _delete_keys(keys)
+    transaction.on_commit(lambda: _delete_keys(keys))
+
+
+def delete_all_unread_notifications_counts():
+    redis = _get_redis()
+    for unread_notifications_counts_key in redis.scan_iter(match='%s*' % UNREAD_NOTIFICATIONS_COUNTS_KEY_PREFIX):
+        redis.delete(unread_notifications_counts_key)
+
+
+def reconcile_unread_notifications_counts(batch_size=500):
+    """
+    Compares the existing counts against the database a batch of users at a time and deletes the ones that drifted.
+    Returns the amount of deleted counts
+    """
+    Notification = get_notification_model()
+    redis = _get_redis()
+
+    drifted_counts_count = 0
+    keys = redis.scan_iter(match='%s*' % UNREAD_NOTIFICATIONS_COUNTS_KEY_PREFIX, count=batch_size)
+
+    while True:
+        users_ids = []
+        for key in keys:
+            users_ids.append(int(key.decode()[len(UNREAD_NOTIFICATIONS_COUNTS_KEY_PREFIX):]))
+            if len(users_ids) == batch_size:
+                break
+
+        if not users_ids:
+            break
+
+        database_counts = {user_id: {} for user_id in users_ids}
+        for owner_id, notification_type, count in Notification.objects.filter(
+                owner_id__in=users_ids, read=False).values_list('owner_id', 'notification_type').annotate(
+            count=Count('id')).order_by():
+            database_counts[owner_id][notification_type] = count
+
+        pipeline = redis.pipeline(transaction=False)
+        for user_id in users_ids:
+            pipeline.hgetall(make_unread_notifications_counts_key_for_user_with_id(user_id))
+
+        drifted_users_ids = []
+        for user_id, cached_counts in zip(users_ids, pipeline.execute()):
+            if not cached_counts:
+                continue
+
+            cached_counts = {field.decode(): int(count) for field, count in cached_counts.items() if int(count)}
+            expected_counts = dict(database_counts[user_id])
+            if expected_counts:
+                expected_counts[TOTAL_FIELD] = sum(database_counts[user_id].values())
+
+            if cached_counts != expected_counts:
+                drifted_users_ids.append(user_id)
+
+        if drifted_users_ids:
+            _delete_keys([make_unread_notifications_counts_key_for_user_with_id(user_id) for user_id in
+                          drifted_users_ids])
+            drifted_counts_count += len(drifted_users_ids)
+
+    return drifted_counts_count
+
+
+def _build_unread_notifications_counts_for_user_with_id(user_id):
+    Notification = get_notification_model()
+
+    unread_notifications_counts = dict(
+        Notification.objects.filter(owner_id=user_id, read=False).values_list('notification_type').annotate(
+            count=Count('id')).order_by())
+
+    unread_notifications_counts_key = make_unread_notifications_counts_key_for_user_with_id(user_id)
+
+    pipeline = _get_redis().pipeline()
+    pipeline.delete(unread_notifications_counts_key)
+    # The total is always set, so users without unread notifications have counts too
+    pipeline.hmset(unread_notifications_counts_key, dict(unread_notifications_counts, **{
+        TOTAL_FIELD: sum(unread_notifications_counts.values())
+    }))
+    pipeline.expire(unread_notifications_counts_key, UNREAD_NOTIFICATIONS_COUNTS_EXPIRE_SECONDS)
+    pipeline.execute()
+
+    return unread_notifications_counts
+
+
+def _add_to_unread_notifications_counts(amounts_by_user_id_and_type):
+    global _add_to_unread_notifications_count_script
+
+    if not amounts_by_user_id_and_type:
+        return
+
+    redis = _get_redis()
+
+    if _add_to_unread_notifications_count_script is None:
+        _add_to_unread_notifications_count_script = redis.register_script(_ADD_TO_UNREAD_NOTIFICATIONS_COUNT_SCRIPT)
+
+    pipeline = redis.pipeline(transaction=False)
+
+    for (user_id, notification_type), amount in amounts_by_user_id_and_type.items():
+        _add_to_unread_notifications_count_script(
+            keys=[make_unread_notifications_counts_key_for_user_with_id(user_id)],
+            args=[notification_type, amount, TOTAL_FIELD], client=pipeline)
+
+    pipeline.execute()
+
+
+def _delete_keys(keys):
+    _get_redis().delete(*keys)
+
+
+def _get_redis():
+    return get_redis_connection('default')
@@ -1,15 +1,22 @@
 # Create your views here.
-from django.db import transaction
+from django.db import connections, transaction
+from django.http import StreamingHttpResponse
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from openbook_common.utils.helpers import normalize_list_value_in_request_data
+from openbook_common.utils.pagination import KeysetPaginator, add_next_cursor_header
 from openbook_moderation.permissions import IsNotSuspended
+from openbook_notifications.prefetch import make_notifications_serializer_context
 from openbook_notifications.serializers import GetNotificationsSerializer, GetNotificationsNotificationSerializer, \
     DeleteNotificationSerializer, ReadNotificationSerializer, ReadNotificationsSerializer, \
     UnreadNotificationsCountSerializer
+from openbook_notifications.stream import EventStreamRenderer, is_notifications_stream_enabled, \
+    stream_notifications_events_for_user_with_id
 
 
 class Notifications(APIView):
@@ -28,14 +35,19 @@ class Notifications(APIView):
 
         count = data.get('count', 10)
         max_id = data.get('max_id')
+        cursor = data.get('cursor')
         types = data.get('types')
 
-        notifications = user.get_notifications(max_id=max_id, types=types).order_by('-created')[:count]
+        paginator = KeysetPaginator(queryset=user.get_notifications(max_id=max_id, types=types),
+                                    ordering=('-created', '-id'))
+        notifications = paginator.get_page(count=count, cursor=cursor)
 
-        response_serializer = GetNotificationsNotificationSerializer(notifications, many=True,
-                                                                     context={"request": request})
+        response_serializer = GetNotificationsNotificationSerializer(
+            notifications, many=True, context=make_notifications_serializer_context(request=request,
+                                                                                    notifications=notifications))
 
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return add_next_cursor_header(Response(response_serializer.data, status=status.HTTP_200_OK),
+                                      paginator.get_next_cursor(notifications))
 
     def delete(self, request):
         user = request.user
@@ -87,9 +99,35 @@ class UnreadNotificationsCount(APIView):
         max_id = data.get('max_id')
         types = data.get('types')
 
-        notifications = user.get_unread_notifications(max_id=max_id, types=types)
+        if max_id:
+            count = user.get_unread_notifications(max_id=max_id, types=types).count()
+        else:
+            count = user.count_unread_notifications(types=types)
 
-        return Response({'count': notifications.count()}, status=status.HTTP_200_OK)
+        return Response({'count': count}, status=status.HTTP_200_OK)
+
+
+class NotificationsStream(APIView):
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (JSONRenderer, EventStreamRenderer)
+
+    def get(self, request):
+        if not is_notifications_stream_enabled():
+            raise NotFound()
+
+        response = StreamingHttpResponse(stream_notifications_events_for_user_with_id(user_id=request.user.pk),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keeps proxies like nginx from buffering the events
+        response['X-Accel-Buffering'] = 'no'
+
+        # The stream stays open for minutes, it must not hold on to a database connection meanwhile
+        for connection in connections.all():
+            # Within a transaction, e.g. in the tests, the connection is left to the transaction owner
+            if not connection.in_atomic_block:
+                connection.close()
+
+        return response
 
 
 class NotificationItem(APIView):
@@ -62,8 +62,8 @@ class PostAdmin(admin.ModelAdmin):
         'id',
         'created',
         'creator',
-        'count_comments',
-        'count_reactions',
+        'comments_count',
+        'reactions_count',
         'has_text',
         'has_image'
     )
@@ -0,0 +1,149 @@
+"""
+Per user post exclusion sets.
+
+Nearly every post query excludes the posts of blocked users, the posts the user reported, the posts of the
+communities the user is banned from and the posts approved by moderators. As joins, those are several anti-joins per
+query. Instead, the ids to exclude are kept in redis and applied as plain NOT IN filters.
+
+A user exclusion set is a redis hash holding the comma separated blocked users, reported posts and banned
+communities ids. They get rebuilt from the database when missing and are deleted whenever blocks, reports or bans
+change. The approved posts are global and keep growing, so they are excluded with a subquery on the moderated objects
+instead of a list of ids.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django_redis import get_redis_connection
+
+from openbook_common.utils.model_loaders import get_user_block_model, get_moderation_report_model, \
+    get_moderated_object_model, get_community_model
+
+POST_EXCLUSIONS_KEY_PREFIX = 'ob-api-post-exclusions-'
+
+# Keep the sets for a day at most, so anything missed by the invalidations does not linger forever
+POST_EXCLUSIONS_EXPIRE_SECONDS = 60 * 60 * 24
+
+BLOCKED_USERS_FIELD = 'blocked_users'
+REPORTED_POSTS_FIELD = 'reported_posts'
+BANNED_COMMUNITIES_FIELD = 'banned_communities'
+
+
+class PostExclusions():
+
+    def __init__(self, blocked_users_ids, reported_posts_ids, banned_communities_ids):
+        self.blocked_users_ids = blocked_users_ids
+        self.reported_posts_ids = reported_posts_ids
+        self.banned_communities_ids = banned_communities_ids
+
+    def make_exclude_blocked_users_posts_query(self, creator_field='creator_id'):
+        return _make_exclude_ids_query(field=creator_field, ids=self.blocked_users_ids)
+
+    def make_exclude_reported_posts_query(self, post_field='id'):
+        return _make_exclude_ids_query(field=post_field, ids=self.reported_posts_ids)
+
+    def make_exclude_banned_communities_posts_query(self, community_field='community_id'):
+        return _make_exclude_ids_query(field=community_field, ids=self.banned_communities_ids)
+
+    def make_exclude_approved_posts_query(self, post_field='id'):
+        ModeratedObject = get_moderated_object_model()
+
+        approved_posts_ids = ModeratedObject.objects.filter(object_type=ModeratedObject.OBJECT_TYPE_POST,
+                                                            status=ModeratedObject.STATUS_APPROVED).values('object_id')
+
+        return ~Q(**{'%s__in' % post_field: approved_posts_ids})
+
+
+def get_post_exclusions_for_user_with_id(user_id):
+    user_exclusions = _get_redis().hgetall(make_post_exclusions_key_for_user_with_id(user_id))
+
+    if user_exclusions:
+        blocked_users_ids = _decode_ids(user_exclusions[BLOCKED_USERS_FIELD.encode()])
+        reported_posts_ids = _decode_ids(user_exclusions[REPORTED_POSTS_FIELD.encode()])
+        banned_communities_ids = _decode_ids(user_exclusions[BANNED_COMMUNITIES_FIELD.encode()])
+    else:
+        blocked_users_ids, reported_posts_ids, banned_communities_ids = _build_post_exclusions_for_user_with_id(
+            user_id=user_id)
+
+    return PostExclusions(blocked_users_ids=blocked_users_ids, reported_posts_ids=reported_posts_ids,
+                          banned_communities_ids=banned_communities_ids)
+
+
+def make_post_exclusions_key_for_user_with_id(user_id):
+    return '%s%d' % (POST_EXCLUSIONS_KEY_PREFIX, user_id)
+
+
+def delete_post_exclusions_for_users_with_ids(users_ids):
+    """
+    Deletes the exclusion sets right away and once more after the current transaction commits, so a concurrent
+    request can not cache the data from before the change
+    """
+    keys = [make_post_exclusions_key_for_user_with_id(user_id) for user_id in users_ids]
+
+    if not keys:
+        return
+
+    _delete_keys(keys)
+    transaction.on_commit(lambda: _delete_keys(keys))
+
+
+def delete_all_post_exclusions():
+    redis = _get_redis()
+    for post_exclusions_key in redis.scan_iter(match='%s*' % POST_EXCLUSIONS_KEY_PREFIX):
+        redis.delete(post_exclusions_key)
+
+
+def _build_post_exclusions_for_user_with_id(user_id):
+    UserBlock = get_user_block_model()
+    ModerationReport = get_moderation_report_model()
+    ModeratedObject = get_moderated_object_model()
+    Community = get_community_model()
+
+    user_blocks = UserBlock.objects.filter(Q(blocker_id=user_id) | Q(blocked_user_id=user_id)). \
+        values_list('blocker_id', 'blocked_user_id')
+
+    blocked_users_ids = set()
+    for blocker_id, blocked_user_id in user_blocks:
+        blocked_users_ids.add(blocked_user_id if blocker_id == user_id else blocker_id)
+
+    reported_posts_ids = set(ModerationReport.objects.filter(
+        reporter_id=user_id,
+        moderated_object__object_type=ModeratedObject.OBJECT_TYPE_POST).values_list('moderated_object__object_id',
+                                                                                   flat=True))
+
+    banned_communities_ids = set(Community.objects.filter(banned_users__id=user_id).values_list('id', flat=True))
+
+    post_exclusions_key = make_post_exclusions_key_for_user_with_id(user_id)
+
+    pipeline = _get_redis().pipeline()
+    pipeline.hmset(post_exclusions_key, {
+        BLOCKED_USERS_FIELD: _encode_ids(blocked_users_ids),
+        REPORTED_POSTS_FIELD: _encode_ids(reported_posts_ids),
+        BANNED_COMMUNITIES_FIELD: _encode_ids(banned_communities_ids),
+    })
+    pipeline.expire(post_exclusions_key, POST_EXCLUSIONS_EXPIRE_SECONDS)
+    pipeline.execute()
+
+    return blocked_users_ids, reported_posts_ids, banned_communities_ids
+
+
+def _make_exclude_ids_query(field, ids):
+    if not ids:
+        return Q()
+    return ~Q(**{'%s__in' % field: ids})
+
+
+def _encode_ids(ids):
+    return ','.join([str(item_id) for item_id in sorted(ids)])
+
+
+def _decode_ids(encoded_ids):
+    if not encoded_ids:
+        return set()
+    return {int(item_id) for item_id in encoded_ids.decode().split(',')}
+
+
+def _delete_keys(keys):
+    _get_redis().delete(*keys)
+
+
+def _get_redis():
+    return get_redis_connection('default')
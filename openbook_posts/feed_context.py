@@ -0,0 +1,243 @@
+from collections import defaultdict
+
+from django.db.models import Q, Count
+
+from openbook_common.utils.model_loaders import get_post_reaction_model, get_post_mute_model, \
+    get_community_membership_model, get_emoji_model, get_post_comment_model, get_user_block_model, \
+    get_moderated_object_model, get_circle_model
+
+POSTS_FEED_CONTEXT_KEY = 'posts_feed_context'
+
+
+def make_posts_feed_serializer_context(request, posts):
+    """
+    Returns a serializer context carrying everything the post serializer fields need for the given page of posts.
+    """
+    return {
+        'request': request,
+        POSTS_FEED_CONTEXT_KEY: PostsFeedContext(user=request.user, posts=posts)
+    }
+
+
+def get_posts_feed_context(serializer_context):
+    return serializer_context.get(POSTS_FEED_CONTEXT_KEY)
+
+
+class PostsFeedContext():
+    """
+    Loads the per post data of a whole feed page with a fixed number of queries, instead of the
+    several queries per post the serializer fields would otherwise make.
+    The visibility rules mirror the ones of the equivalent User methods.
+    """
+
+    def __init__(self, user, posts):
+        self.user = user
+        self.posts = {post.pk: post for post in posts}
+        self.posts_ids = list(self.posts.keys())
+
+        self._reactions = {}
+        self._muted_posts_ids = set()
+        self._creators_memberships = {}
+        self._user_memberships = {}
+        self._emoji_counts = {}
+        self._comments_counts = {}
+        self._circles = {}
+
+        if self.posts_ids:
+            self._load()
+
+    def get_reaction_for_post_with_id(self, post_id):
+        return self._reactions.get(post_id)
+
+    def has_muted_post_with_id(self, post_id):
+        return post_id in self._muted_posts_ids
+
+    def get_creator_membership_for_post_with_id(self, post_id):
+        return self._creators_memberships.get(post_id)
+
+    def get_user_membership_for_community_with_id(self, community_id):
+        return self._user_memberships.get(community_id)
+
+    def get_emoji_counts_for_post_with_id(self, post_id):
+        return self._emoji_counts.get(post_id, [])
+
+    def get_comments_count_for_post_with_id(self, post_id):
+        return self._comments_counts.get(post_id, 0)
+
+    def get_circles_for_post_with_id(self, post_id):
+        return self._circles.get(post_id, [])
+
+    def _load(self):
+        self._load_reactions()
+        self._load_mutes()
+        self._load_memberships()
+        self._load_blocked_users()
+        self._load_emoji_counts()
+        self._load_comments_counts()
+        self._load_circles()
+
+    def _load_reactions(self):
+        PostReaction = get_post_reaction_model()
+        reactions = PostReaction.objects.select_related('emoji').filter(reactor_id=self.user.pk,
+                                                                        post_id__in=self.posts_ids)
+        self._reactions = {reaction.post_id: reaction for reaction in reactions}
+
+    def _load_mutes(self):
+        PostMute = get_post_mute_model()
+        self._muted_posts_ids = set(
+            PostMute.objects.filter(muter_id=self.user.pk, post_id__in=self.posts_ids).values_list('post_id',
+                                                                                                  flat=True))
+
+    def _load_memberships(self):
+        CommunityMembership = get_community_membership_model()
+
+        self._communities_ids = {post.community_id for post in self.posts.values() if post.community_id}
+        self._staff_communities_ids = set()
+
+        if not self._communities_ids:
+            return
+
+        creators_ids = {post.creator_id for post in self.posts.values() if post.community_id}
+        creators_ids.add(self.user.pk)
+
+        memberships = CommunityMembership.objects.filter(community_id__in=self._communities_ids,
+                                                         user_id__in=creators_ids)
+
+        memberships_by_community_and_user = {}
+        for membership in memberships:
+            memberships_by_community_and_user[(membership.community_id, membership.user_id)] = membership
+
+            if membership.user_id == self.user.pk:
+                self._user_memberships[membership.community_id] = membership
+                if membership.is_administrator or membership.is_moderator:
+                    self._staff_communities_ids.add(membership.community_id)
+
+        for post in self.posts.values():
+            if post.community_id:
+                self._creators_memberships[post.pk] = memberships_by_community_and_user.get(
+                    (post.community_id, post.creator_id))
+
+    def _load_blocked_users(self):
+        UserBlock = get_user_block_model()
+        CommunityMembership = get_community_membership_model()
+
+        user_blocks = UserBlock.objects.filter(Q(blocker_id=self.user.pk) | Q(blocked_user_id=self.user.pk)). \
+            values_list('blocker_id', 'blocked_user_id')
+
+        self._blocked_users_ids = set()
+        for blocker_id, blocked_user_id in user_blocks:
+            self._blocked_users_ids.add(blocked_user_id if blocker_id == self.user.pk else blocker_id)
+
+        # Blocked users that are staff of a community remain visible within it
+        self._blocked_staff_memberships = set()
+
+        if self._blocked_users_ids and self._communities_ids:
+            blocked_staff_memberships = CommunityMembership.objects.filter(
+                Q(is_administrator=True) | Q(is_moderator=True),
+                user_id__in=self._blocked_users_ids,
+                community_id__in=self._communities_ids).values_list('community_id', 'user_id')
+            self._blocked_staff_memberships = set(blocked_staff_memberships)
+
+    def _is_hidden_blocked_user_for_post(self, user_id, post):
+        if user_id not in self._blocked_users_ids:
+            return False
+
+        if not post.community_id:
+            return True
+
+        if post.community_id in self._staff_communities_ids:
+            return False
+
+        return (post.community_id, user_id) not in self._blocked_staff_memberships
+
+    def _load_emoji_counts(self):
+        PostReaction = get_post_reaction_model()
+        Emoji = get_emoji_model()
+
+        emoji_counts = defaultdict(lambda: defaultdict(int))
+
+        reactions_counts = PostReaction.objects.filter(post_id__in=self.posts_ids). \
+            exclude(reactor_id__in=self._blocked_users_ids). \
+            values('post_id', 'emoji_id'). \
+            annotate(reactions_count=Count('id')). \
+            order_by()
+
+        for reaction_count in reactions_counts:
+            emoji_counts[reaction_count['post_id']][reaction_count['emoji_id']] += reaction_count['reactions_count']
+
+        if self._blocked_users_ids:
+            blocked_users_reactions = PostReaction.objects.filter(post_id__in=self.posts_ids,
+                                                                  reactor_id__in=self._blocked_users_ids). \
+                values_list('post_id', 'emoji_id', 'reactor_id')
+
+            for post_id, emoji_id, reactor_id in blocked_users_reactions:
+                if not self._is_hidden_blocked_user_for_post(user_id=reactor_id, post=self.posts[post_id]):
+                    emoji_counts[post_id][emoji_id] += 1
+
+        emojis_ids = {emoji_id for post_emoji_counts in emoji_counts.values() for emoji_id in post_emoji_counts}
+        emojis = Emoji.objects.in_bulk(list(emojis_ids))
+
+        for post_id, post_emoji_counts in emoji_counts.items():
+            post_emoji_counts = [{'emoji': emojis[emoji_id], 'count': count} for emoji_id, count in
+                                 post_emoji_counts.items()]
+            self._emoji_counts[post_id] = sorted(post_emoji_counts, key=lambda emoji_count: -emoji_count['count'])
+
+    def _load_comments_counts(self):
+        PostComment = get_post_comment_model()
+        ModeratedObject = get_moderated_object_model()
+
+        comments_query = Q(post_id__in=self.posts_ids, is_deleted=False)
+
+        comments_counts = PostComment.objects.filter(comments_query). \
+            values('post_id'). \
+            annotate(comments_count=Count('id')). \
+            order_by()
+
+        for comments_count in comments_counts:
+            self._comments_counts[comments_count['post_id']] = comments_count['comments_count']
+
+        hidden_comments = {}
+
+        reported_comments = PostComment.objects.filter(
+            comments_query & Q(moderated_object__reports__reporter_id=self.user.pk)). \
+            values_list('id', 'post_id')
+
+        for post_comment_id, post_id in reported_comments:
+            hidden_comments[post_comment_id] = post_id
+
+        if self._blocked_users_ids:
+            blocked_users_comments = PostComment.objects.filter(
+                comments_query & Q(commenter_id__in=self._blocked_users_ids)). \
+                values_list('id', 'post_id', 'commenter_id')
+
+            for post_comment_id, post_id, commenter_id in blocked_users_comments:
+                if self._is_hidden_blocked_user_for_post(user_id=commenter_id, post=self.posts[post_id]):
+                    hidden_comments[post_comment_id] = post_id
+
+        community_posts_ids = [post.pk for post in self.posts.values() if post.community_id]
+
+        if community_posts_ids:
+            # Items reported and approved by community moderators are not counted
+            approved_comments = PostComment.objects.filter(post_id__in=community_posts_ids, is_deleted=False,
+                                                           moderated_object__status=ModeratedObject.STATUS_APPROVED). \
+                values_list('id', 'post_id')
+
+            for post_comment_id, post_id in approved_comments:
+                hidden_comments[post_comment_id] = post_id
+
+        for post_id in hidden_comments.values():
+            self._comments_counts[post_id] -= 1
+
+    def _load_circles(self):
+        own_posts_ids = [post.pk for post in self.posts.values() if post.creator_id == self.user.pk]
+
+        if not own_posts_ids:
+            return
+
+        Circle = get_circle_model()
+        PostCircle = Circle.posts.through
+
+        posts_circles = PostCircle.objects.select_related('circle').filter(post_id__in=own_posts_ids)
+
+        for post_circle in posts_circles:
+            self._circles.setdefault(post_circle.post_id, []).append(post_circle.circle)
@@ -1,17 +1,29 @@
+import time
+
+from django.db import transaction
 from django.utils import timezone
 from django_rq import job
+from rq import get_current_job
 from video_encoding import tasks
 from datetime import timedelta
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Max
 from django.conf import settings
 from cursor_pagination import CursorPaginator
 
 from openbook_common.utils.model_loaders import get_post_model, get_post_media_model, get_community_model, \
-    get_top_post_model, get_post_comment_model, get_moderated_object_model, get_trending_post_model
+    get_top_post_model, get_post_comment_model, get_moderated_object_model, get_trending_post_model, \
+    get_user_model, get_post_reaction_model, get_community_notifications_subscription_model, \
+    get_user_notifications_subscription_model, get_community_new_post_notification_model, \
+    get_user_new_post_notification_model
+from openbook_notifications.helpers import send_community_new_post_push_notification, \
+    send_user_new_post_push_notification
+from openbook_posts import timelines, top_posts_curation, trending
 import logging
 
 logger = logging.getLogger(__name__)
 
+POST_SUBSCRIBERS_CHUNK_SIZE = 500
+
 
 @job('low')
 def flush_draft_posts():
@@ -43,9 +55,25 @@ def process_post_media(post_id):
     logger.info('Processing media of post with id: %d' % post_id)
 
     post_media_videos = post.media.filter(type=PostMedia.MEDIA_TYPE_VIDEO)
+    first_post_media = post.get_first_media()
 
     for post_media_video in post_media_videos.iterator():
         post_video = post_media_video.content_object
+
+        if post_video.needs_conversion:
+            # GIFs get converted here instead of within the upload request
+            try:
+                post_video.convert_to_mp4()
+            except Exception:
+                logger.exception('Failed to convert the GIF of post with id: %d' % post_id)
+                # Back to a draft, which gets flushed with the other drafts unless published again
+                post.status = Post.STATUS_DRAFT
+                post.save()
+                return
+
+            if post_media_video.pk == first_post_media.pk:
+                post.set_media_from_post_video(post_video=post_video)
+
         tasks.convert_video(post_video.file)
 
     # This updates the status and created attributes
@@ -53,70 +81,256 @@ def process_post_media(post_id):
     logger.info('Processed media of post with id: %d' % post_id)
 
 
+@job('default')
+def fan_out_post_to_timelines(post_id):
+    """
+    This job is called when a post gets published to add it to the materialized timelines of its audience
+    """
+    Post = get_post_model()
+
+    try:
+        post = Post.objects.only('id', 'creator_id', 'community_id').get(pk=post_id)
+    except Post.DoesNotExist:
+        return 'Post with id %d no longer exists' % post_id
+
+    target_users_ids = timelines.get_timeline_target_users_ids_for_post(post=post)
+    timelines.add_post_to_timelines_of_users_with_ids(post_id=post.pk, users_ids=target_users_ids)
+
+    return 'Fanned out post with id %d to %d timelines' % (post_id, len(target_users_ids))
+
+
+@job('default')
+def notify_post_subscribers(post_id):
+    """
+    This job is called when a post gets published to notify the subscribers of its community or creator.
+    The target subscriptions are fetched at once and notified in chunks, each one with its notifications bulk created
+    and a single push job. Chunks skip the subscriptions already notified of the post, so a job requeued after a
+    worker crash resumes where it stopped.
+    """
+    Post = get_post_model()
+
+    try:
+        post = Post.objects.select_related('creator', 'community').get(pk=post_id)
+    except Post.DoesNotExist:
+        return 'Post with id %d no longer exists' % post_id
+
+    if post.community_id:
+        NewPostNotification = get_community_new_post_notification_model()
+        bulk_create_new_post_notifications = NewPostNotification.bulk_create_community_new_post_notifications
+        target_subscriptions = Post.get_community_notification_target_subscriptions(post=post)
+    else:
+        NewPostNotification = get_user_new_post_notification_model()
+        bulk_create_new_post_notifications = NewPostNotification.bulk_create_user_new_post_notifications
+        target_subscriptions = Post.get_user_notification_target_subscriptions(post=post)
+
+    # Deduplicated and sorted, so every run goes through the chunks in the same order
+    subscribers_ids_by_subscription_id = dict(target_subscriptions.values_list('id', 'subscriber_id'))
+    subscriptions_ids = sorted(subscribers_ids_by_subscription_id.keys())
+
+    notified_subscriptions_count = 0
+
+    for chunk_start in range(0, len(subscriptions_ids), POST_SUBSCRIBERS_CHUNK_SIZE):
+        chunk_subscriptions_ids = subscriptions_ids[chunk_start:chunk_start + POST_SUBSCRIBERS_CHUNK_SIZE]
+
+        notified_chunk_subscriptions_ids = bulk_create_new_post_notifications(
+            post_id=post_id,
+            owners_ids_by_subscription_id={subscription_id: subscribers_ids_by_subscription_id[subscription_id] for
+                                           subscription_id in chunk_subscriptions_ids})
+
+        if notified_chunk_subscriptions_ids:
+            send_post_subscribers_push_notifications.delay(post_id=post_id,
+                                                           subscriptions_ids=notified_chunk_subscriptions_ids)
+
+        notified_subscriptions_count += len(notified_chunk_subscriptions_ids)
+        _set_job_progress(processed=chunk_start + len(chunk_subscriptions_ids), total=len(subscriptions_ids))
+
+    return 'Notified %d of %d subscribers of post with id %d' % (notified_subscriptions_count, len(subscriptions_ids),
+                                                                  post_id)
+
+
+@job('default')
+def send_post_subscribers_push_notifications(post_id, subscriptions_ids):
+    """
+    This job is called for every chunk of subscribers notified of a new post
+    """
+    Post = get_post_model()
+
+    try:
+        post = Post.objects.select_related('creator__profile').get(pk=post_id)
+    except Post.DoesNotExist:
+        return 'Post with id %d no longer exists' % post_id
+
+    if post.community_id:
+        CommunityNotificationsSubscription = get_community_notifications_subscription_model()
+        subscriptions = CommunityNotificationsSubscription.objects.select_related(
+            'community', 'subscriber__notifications_settings').filter(pk__in=subscriptions_ids)
+
+        for subscription in subscriptions.iterator():
+            send_community_new_post_push_notification(community_notifications_subscription=subscription)
+    else:
+        UserNotificationsSubscription = get_user_notifications_subscription_model()
+        subscriptions = UserNotificationsSubscription.objects.select_related(
+            'user__profile', 'subscriber__notifications_settings').filter(pk__in=subscriptions_ids)
+
+        for subscription in subscriptions.iterator():
+            send_user_new_post_push_notification(user_notifications_subscription=subscription, post=post)
+
+    return 'Sent %d new post push notifications for post with id %d' % (len(subscriptions_ids), post_id)
+
+
+@job('default')
+def remove_post_from_timelines(post_id, creator_id, community_id=None):
+    """
+    This job is called when a post gets deleted to remove it from the materialized timelines it was fanned out to
+    """
+    User = get_user_model()
+
+    if community_id:
+        target_users = User.objects.filter(communities_memberships__community_id=community_id)
+    else:
+        target_users = User.objects.filter(follows__followed_user_id=creator_id)
+
+    target_users_ids = set(target_users.values_list('id', flat=True))
+    target_users_ids.add(creator_id)
+
+    timelines.remove_post_from_timelines_of_users_with_ids(post_id=post_id, users_ids=target_users_ids)
+
+    return 'Removed post with id %d from %d timelines' % (post_id, len(target_users_ids))
+
+
 @job('low')
-def curate_top_posts():
+def curate_top_posts(full_rescan=False):
     """
     Curates the top posts.
     This job should be scheduled to be run every n hours.
+    Only the posts that got reactions or comments since the previous run are scored. A full rescan happens when
+    asked for or when no previous run was recorded, schedule one now and then to pick up posts that became
+    eligible without any new activity, e.g. when a community gets made public.
     """
     Post = get_post_model()
     Community = get_community_model()
     PostComment = get_post_comment_model()
+    PostReaction = get_post_reaction_model()
     ModeratedObject = get_moderated_object_model()
     TopPost = get_top_post_model()
     logger.info('Processing top posts at %s...' % timezone.now())
 
+    run_started_at = time.monotonic()
+
+    # Everything up to these ids gets covered by this run
+    last_reaction_id = PostReaction.objects.aggregate(Max('id'))['id__max'] or 0
+    last_comment_id = PostComment.objects.aggregate(Max('id'))['id__max'] or 0
+
+    watermark = None if full_rescan else top_posts_curation.get_top_posts_curation_watermark()
+
+    if watermark and (watermark[0] > last_reaction_id or watermark[1] > last_comment_id):
+        # The tables were reset since the watermark was recorded
+        watermark = None
+
+    candidate_posts_ids = None
+
+    if watermark:
+        # An id below the watermark might have got committed after the previous run read the highest ids, so the
+        # overlap below the watermark gets checked again
+        overlap = settings.TOP_POSTS_CURATION_WATERMARK_OVERLAP
+        watermark_reaction_id, watermark_comment_id = [max(watermark_id - overlap, 0) for watermark_id in watermark]
+
+        candidate_posts_ids = set(PostReaction.objects.filter(id__gt=watermark_reaction_id,
+                                                              id__lte=last_reaction_id).
+                                  values_list('post_id', flat=True).distinct())
+        candidate_posts_ids.update(PostComment.objects.filter(id__gt=watermark_comment_id,
+                                                              id__lte=last_comment_id).
+                                   values_list('post_id', flat=True).distinct())
+        candidate_posts_ids = sorted(candidate_posts_ids)
+
+    candidates_took = time.monotonic() - run_started_at
+
     top_posts_community_query = Q(top_post__isnull=True)
     top_posts_community_query.add(Q(community__isnull=False, community__type=Community.COMMUNITY_TYPE_PUBLIC), Q.AND)
     top_posts_community_query.add(Q(is_closed=False, is_deleted=False, status=Post.STATUS_PUBLISHED), Q.AND)
     top_posts_community_query.add(~Q(moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.AND)
 
-    top_posts_criteria_query = Q(total_comments_count__gte=settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT) | \
+    # Intentionally prefilters on the comments_count counter, which leaves the replies out, so a post only commented
+    # through replies is no longer a candidate. Counting the replies too would take the COUNT per post the counter
+    # avoids, the unique commenters of the candidates below still include the repliers
+    top_posts_criteria_query = Q(comments_count__gte=settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT) | \
                                Q(reactions_count__gte=settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT)
 
-    posts_select_related = 'community'
-    posts_prefetch_related = ('comments__commenter', 'reactions__reactor')
-    posts_only = ('id', 'status', 'is_deleted', 'is_closed', 'community__type')
+    posts_query = top_posts_community_query & top_posts_criteria_query
 
-    posts = Post.objects. \
-        select_related(posts_select_related). \
-        prefetch_related(*posts_prefetch_related). \
-        only(*posts_only). \
-        filter(top_posts_community_query). \
-        annotate(total_comments_count=Count('comments__commenter_id'),
-                 reactions_count=Count('reactions__reactor_id')). \
-        filter(top_posts_criteria_query)
-
-    top_posts_objects = []
     total_checked_posts = 0
     total_curated_posts = 0
 
-    for post in _chunked_queryset_iterator(posts, 1000):
-        total_checked_posts = total_checked_posts + 1
-        if not post.reactions_count >= settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT:
-            unique_comments_count = PostComment.objects.filter(post=post). \
-                values('commenter_id'). \
-                annotate(user_comments_count=Count('commenter_id')).count()
+    for posts_batch in _get_top_posts_candidates_batches(posts_query=posts_query,
+                                                         candidate_posts_ids=candidate_posts_ids,
+                                                         batch_size=1000):
+        total_checked_posts += len(posts_batch)
 
-            if unique_comments_count >= settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT:
-                top_post = _add_post_to_top_post(post=post)
-                if top_post is not None:
-                    top_posts_objects.append(top_post)
-        else:
-            top_post = _add_post_to_top_post(post=post)
-            if top_post is not None:
-                top_posts_objects.append(top_post)
+        top_posts_ids = [post_id for post_id, reactions_count in posts_batch if
+                         reactions_count >= settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT]
 
-        if len(top_posts_objects) > 1000:
-            TopPost.objects.bulk_create(top_posts_objects)
-            total_curated_posts += len(top_posts_objects)
-            top_posts_objects = []
+        comments_posts_ids = [post_id for post_id, reactions_count in posts_batch if
+                              reactions_count < settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT]
 
-    if len(top_posts_objects) > 0:
-        total_curated_posts += len(top_posts_objects)
-        TopPost.objects.bulk_create(top_posts_objects)
+        if comments_posts_ids:
+            unique_commenters_counts = PostComment.objects.filter(post_id__in=comments_posts_ids). \
+                values('post_id'). \
+                annotate(unique_commenters_count=Count('commenter_id', distinct=True)). \
+                filter(unique_commenters_count__gte=settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT). \
+                order_by()
 
-    return 'Checked: %d. Curated: %d' % (total_checked_posts, total_curated_posts)
+            top_posts_ids.extend(
+                [unique_commenters_count['post_id'] for unique_commenters_count in unique_commenters_counts])
+
+        if top_posts_ids:
+            now = timezone.now()
+            TopPost.objects.bulk_create([TopPost(post_id=post_id, created=now) for post_id in top_posts_ids],
+                                        ignore_conflicts=True)
+            # The posts curated meanwhile by another run got skipped
+            total_curated_posts += TopPost.objects.filter(post_id__in=top_posts_ids, created=now).count()
+
+    top_posts_curation.set_top_posts_curation_watermark(last_reaction_id=last_reaction_id,
+                                                        last_comment_id=last_comment_id)
+
+    run_took = time.monotonic() - run_started_at
+
+    result = 'Checked: %d. Curated: %d. Full rescan: %s. Took: %.3fs (candidates: %.3fs, scoring: %.3fs)' % (
+        total_checked_posts, total_curated_posts, candidate_posts_ids is None, run_took, candidates_took,
+        run_took - candidates_took)
+
+    logger.info(result)
+
+    return result
+
+
+def _get_top_posts_candidates_batches(posts_query, candidate_posts_ids=None, batch_size=1000):
+    """
+    Yields lists of (post_id, reactions_count) matching the posts query, restricted to the candidate posts if given
+    """
+    Post = get_post_model()
+
+    if candidate_posts_ids is not None:
+        for batch_start in range(0, len(candidate_posts_ids), batch_size):
+            batch_posts_ids = candidate_posts_ids[batch_start:batch_start + batch_size]
+            posts_batch = list(Post.objects.filter(posts_query & Q(id__in=batch_posts_ids)).
+                               values_list('id', 'reactions_count'))
+            if posts_batch:
+                yield posts_batch
+        return
+
+    last_post_id = 0
+
+    while True:
+        posts_batch = list(Post.objects.filter(posts_query & Q(id__gt=last_post_id)).
+                           order_by('id').
+                           values_list('id', 'reactions_count')[:batch_size])
+
+        if not posts_batch:
+            return
+
+        yield posts_batch
+
+        last_post_id = posts_batch[-1][0]
 
 
 @job('low')
@@ -139,19 +353,16 @@ def clean_top_posts():
     top_posts_community_query.add(Q(post__moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.OR)
 
     # counts less than minimum
-    top_posts_criteria_query = Q(total_comments_count__lt=settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT) & \
-                               Q(reactions_count__lt=settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT)
+    top_posts_criteria_query = Q(post__comments_count__lt=settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT) & \
+                               Q(post__reactions_count__lt=settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT)
 
     posts_select_related = 'post__community'
-    posts_prefetch_related = ('post__comments__commenter', 'post__reactions__reactor')
-    posts_only = ('post__id', 'post__status', 'post__is_deleted', 'post__is_closed', 'post__community__type')
+    posts_only = ('post__id', 'post__status', 'post__is_deleted', 'post__is_closed', 'post__community__type',
+                  'post__comments_count', 'post__reactions_count')
 
     direct_removable_top_posts = TopPost.objects.select_related(posts_select_related). \
-        prefetch_related(*posts_prefetch_related). \
         only(*posts_only). \
         filter(top_posts_community_query). \
-        annotate(total_comments_count=Count('post__comments__commenter_id'),
-                 reactions_count=Count('post__reactions__reactor_id')). \
         filter(top_posts_criteria_query)
 
     # bulk delete all that definitely dont meet the criteria anymore
@@ -165,21 +376,18 @@ def clean_top_posts():
                                   Q.AND)
     top_posts_community_query.add(~Q(post__moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.AND)
 
-    top_posts_criteria_query = Q(total_comments_count__gte=settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT) | \
-                               Q(reactions_count__gte=settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT)
+    top_posts_criteria_query = Q(post__comments_count__gte=settings.MIN_UNIQUE_TOP_POST_COMMENTS_COUNT) | \
+                               Q(post__reactions_count__gte=settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT)
 
     top_posts = TopPost.objects.select_related(posts_select_related). \
-        prefetch_related(*posts_prefetch_related). \
         only(*posts_only). \
         filter(top_posts_community_query). \
-        annotate(total_comments_count=Count('post__comments__commenter_id'),
-                 reactions_count=Count('post__reactions__reactor_id')). \
         filter(top_posts_criteria_query)
 
     delete_ids = []
 
     for top_post in _chunked_queryset_iterator(top_posts, 1000):
-        if not top_post.reactions_count >= settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT:
+        if not top_post.post.reactions_count >= settings.MIN_UNIQUE_TOP_POST_REACTIONS_COUNT:
             unique_comments_count = PostComment.objects.filter(post=top_post.post). \
                 values('commenter_id'). \
                 annotate(user_comments_count=Count('commenter_id')).count()
@@ -191,18 +399,13 @@ def clean_top_posts():
     TopPost.objects.filter(id__in=delete_ids).delete()
 
 
-def _add_post_to_top_post(post):
-    TopPost = get_top_post_model()
-    if not TopPost.objects.filter(post=post).exists():
-        return TopPost(post=post, created=timezone.now())
-    return None
-
-
 @job('low')
 def curate_trending_posts():
     """
     Curates the trending posts.
     This job should be scheduled to be run every n hours.
+    Posts are ranked by their decayed activity score from the trending buckets and the whole trending set
+    gets replaced at once.
     """
     Post = get_post_model()
     Community = get_community_model()
@@ -211,7 +414,7 @@ def curate_trending_posts():
     logger.info('Processing trending posts at %s...' % timezone.now())
 
     trending_posts_query = Q(created__gte=timezone.now() - timedelta(
-        hours=12))
+        hours=settings.TRENDING_POSTS_WINDOW_HOURS))
 
     trending_posts_community_query = Q(community__isnull=False, community__type=Community.COMMUNITY_TYPE_PUBLIC,
                                        status=Post.STATUS_PUBLISHED,
@@ -220,33 +423,31 @@ def curate_trending_posts():
 
     trending_posts_query.add(trending_posts_community_query, Q.AND)
 
-    posts_select_related = 'community'
-    posts_prefetch_related = 'reactions__reactor'
-    posts_only = ('id', 'status', 'is_deleted', 'is_closed', 'community__type')
-
     trending_posts_criteria_query = Q(reactions_count__gte=settings.MIN_UNIQUE_TRENDING_POST_REACTIONS_COUNT)
 
-    posts = Post.objects. \
-        select_related(posts_select_related). \
-        prefetch_related(posts_prefetch_related). \
-        only(*posts_only). \
+    candidate_posts = Post.objects. \
         filter(trending_posts_query). \
-        annotate(reactions_count=Count('reactions__reactor_id')).\
-        filter(trending_posts_criteria_query).\
-        order_by('-reactions_count', '-created')[:30]
+        filter(trending_posts_criteria_query). \
+        values_list('id', 'reactions_count', 'created')
 
-    trending_posts_objects = []
+    trending_scores = trending.get_trending_scores()
 
-    for post in posts.iterator():
-        if TrendingPost.objects.filter(post=post).exists():
-            TrendingPost.objects.filter(post=post).delete()
+    ranked_posts = sorted(candidate_posts,
+                          key=lambda candidate_post: (trending_scores.get(candidate_post[0], 0),
+                                                      candidate_post[1], candidate_post[2]),
+                          reverse=True)[:30]
 
-        trending_post = TrendingPost(post=post, created=timezone.now())
-        trending_posts_objects.insert(0, trending_post)
+    now = timezone.now()
 
-    TrendingPost.objects.bulk_create(trending_posts_objects)
+    # Trending posts are listed by descending id, create the top ranked post last
+    trending_posts_objects = [TrendingPost(post_id=post_id, created=now) for post_id, reactions_count, created in
+                              reversed(ranked_posts)]
 
-    return 'Curated: %d posts' % posts.count()
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(trending_posts_objects)
+
+    return 'Curated: %d posts' % len(trending_posts_objects)
 
 
 @job('low')
@@ -268,17 +469,14 @@ def bootstrap_trending_posts():
     trending_posts_community_query.add(~Q(moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.AND)
 
     posts_select_related = 'community'
-    posts_prefetch_related = 'reactions__reactor'
-    posts_only = ('id', 'status', 'is_deleted', 'is_closed', 'community__type')
+    posts_only = ('id', 'status', 'is_deleted', 'is_closed', 'community__type', 'reactions_count')
 
     trending_posts_criteria_query = Q(reactions_count__gte=settings.MIN_UNIQUE_TRENDING_POST_REACTIONS_COUNT)
 
     posts = Post.objects. \
         select_related(posts_select_related). \
-        prefetch_related(posts_prefetch_related). \
         only(*posts_only). \
         filter(trending_posts_community_query). \
-        annotate(reactions_count=Count('reactions__reactor_id')). \
         filter(trending_posts_criteria_query). \
         order_by('-created')
 
@@ -335,12 +533,10 @@ def clean_trending_posts():
     TrendingPost.objects.filter(id__in=direct_removable_delete_ids).delete()
 
     # Now we filter trending posts that do not meet criteria anymore
-    trending_posts_criteria_query = Q(reactions_count__lt=settings.MIN_UNIQUE_TRENDING_POST_REACTIONS_COUNT)
+    trending_posts_criteria_query = Q(post__reactions_count__lt=settings.MIN_UNIQUE_TRENDING_POST_REACTIONS_COUNT)
 
     less_than_min_reactions_trending_posts = TrendingPost.objects.\
-        prefetch_related('post__reactions__reactor'). \
         only('id'). \
-        annotate(reactions_count=Count('post__reactions__reactor_id')). \
         filter(trending_posts_criteria_query)
 
     delete_ids = [trending_post.pk for trending_post in less_than_min_reactions_trending_posts]
@@ -368,3 +564,13 @@ def _chunked_queryset_iterator(queryset, size, *, ordering=('id',)):
             break
         # take last item, next page starts after this.
         after = pager.cursor(instance=page[-1])
+
+
+def _set_job_progress(**progress):
+    current_job = get_current_job()
+
+    if current_job is None:
+        return
+
+    current_job.meta['progress'] = progress
+    current_job.save_meta()
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.5 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbook_posts', '0068_profilepostscommunityexclusion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reactions_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.5 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def forwards_func(apps, schema_editor):
+    # We get the model from the versioned app registry;
+    # if we directly import it, it'll be the wrong version
+    PostImage = apps.get_model('openbook_posts', 'PostImage')
+    PostVideo = apps.get_model('openbook_posts', 'PostVideo')
+    PostMediaContent = apps.get_model('openbook_posts', 'PostMediaContent')
+    db_alias = schema_editor.connection.alias
+
+    references_counts = {}
+
+    post_images_hashes = PostImage.objects.using(db_alias).exclude(Q(hash__isnull=True) | Q(image__isnull=True) |
+                                                                   Q(image='')).values('hash')
+    post_videos_hashes = PostVideo.objects.using(db_alias).exclude(Q(hash__isnull=True) | Q(file__isnull=True) |
+                                                                   Q(file='')).values('hash')
+
+    # The existing images and videos each own their files, the count only tells whether the content has stored files
+    # to reuse. Releasing a reference deletes the files once no other image or video has the same file name.
+    for hashes in (post_images_hashes, post_videos_hashes):
+        for hash_count in hashes.annotate(references_count=Count('id')).order_by():
+            hash = hash_count['hash']
+            references_counts[hash] = references_counts.get(hash, 0) + hash_count['references_count']
+
+    PostMediaContent.objects.using(db_alias).bulk_create([
+        PostMediaContent(hash=hash, references_count=references_count)
+        for hash, references_count in references_counts.items()
+    ], batch_size=1000)
+
+
+def reverse_func(apps, schema_editor):
+    # We get the model from the versioned app registry;
+    # if we directly import it, it'll be the wrong version
+    PostMediaContent = apps.get_model('openbook_posts', 'PostMediaContent')
+    db_alias = schema_editor.connection.alias
+    PostMediaContent.objects.using(db_alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbook_posts', '0069_post_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostMediaContent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True, verbose_name='hash')),
+                ('references_count', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='postimage',
+            name='hash',
+            field=models.CharField(db_index=True, max_length=64, null=True, verbose_name='hash'),
+        ),
+        migrations.AlterField(
+            model_name='postvideo',
+            name='hash',
+            field=models.CharField(db_index=True, max_length=64, null=True, verbose_name='hash'),
+        ),
+        migrations.RunPython(forwards_func, reverse_func),
+    ]
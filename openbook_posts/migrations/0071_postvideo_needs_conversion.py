@@ -0,0 +1,28 @@
+# Generated by Django 2.2.5 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbook_posts', '0070_postmediacontent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postvideo',
+            name='needs_conversion',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='postvideo',
+            name='thumbnail_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='postvideo',
+            name='thumbnail_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
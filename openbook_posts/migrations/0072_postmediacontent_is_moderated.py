@@ -0,0 +1,18 @@
+# Generated by Django 2.2.5 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openbook_posts', '0071_postvideo_needs_conversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postmediacontent',
+            name='is_moderated',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
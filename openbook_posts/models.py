@@ -9,8 +9,10 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.files import File
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile, SimpleUploadedFile
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.db.models import Count
@@ -27,13 +29,16 @@ from openbook_posts.validators import post_text_validators, post_comment_text_va
 from video_encoding.backends import get_backend
 from video_encoding.fields import VideoField
 from video_encoding.models import Format
+from video_encoding.utils import get_fieldfile_local_path
 
 from openbook.storage_backends import S3PrivateMediaStorage
 from openbook_auth.models import User
 
 from openbook_common.models import Emoji, Language
-from openbook_common.utils.helpers import delete_file_field, sha256sum, extract_usernames_from_string, get_magic, \
-    write_in_memory_file_to_disk, extract_hashtags_from_string
+from openbook_common.utils.counters import increment_counter_for_instance_with_id, \
+    decrement_counter_for_instance_with_id
+from openbook_common.utils.helpers import delete_file_field, sha256sum, extract_usernames_from_string, \
+    extract_hashtags_from_string, sniff_file_mimetype, hash_and_spool_file
 from openbook_common.utils.model_loaders import get_emoji_model, \
     get_circle_model, get_community_model, get_post_comment_notification_model, \
     get_post_comment_reply_notification_model, get_post_reaction_notification_model, get_moderated_object_model, \
@@ -45,16 +50,18 @@ from openbook_common.utils.model_loaders import get_emoji_model, \
 from imagekit.models import ProcessedImageField
 
 from openbook_moderation.models import ModeratedObject
+from openbook_notifications.bulk_deletion import bulk_delete_notifications
 from openbook_notifications.helpers import send_post_comment_user_mention_push_notification, \
-    send_post_user_mention_push_notification, send_community_new_post_push_notification, \
-    send_user_new_post_push_notification
+    send_post_user_mention_push_notification
 from openbook_posts.checkers import check_can_be_updated, check_can_add_media, check_can_be_published, \
     check_mimetype_is_supported_media_mimetypes
 from openbook_posts.helpers import upload_to_post_image_directory, upload_to_post_video_directory, \
     upload_to_post_directory
-from openbook_posts.jobs import process_post_media
+from openbook_posts.jobs import process_post_media, fan_out_post_to_timelines, remove_post_from_timelines, \
+    notify_post_subscribers
+from openbook_posts import timelines, trending
+from openbook_posts.exclusions import get_post_exclusions_for_user_with_id
 
-magic = get_magic()
 from openbook_common.helpers import get_language_for_text
 
 post_image_storage = S3PrivateMediaStorage() if settings.IS_PRODUCTION else default_storage
@@ -77,6 +84,9 @@ class Post(models.Model):
     is_edited = models.BooleanField(default=False)
     is_closed = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False)
+    # Denormalized counters, maintained by the signal receivers at the bottom of this module
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    reactions_count = models.PositiveIntegerField(default=0, editable=False)
     STATUS_DRAFT = 'D'
     STATUS_PROCESSING = 'PG'
     STATUS_PUBLISHED = 'P'
@@ -177,24 +187,27 @@ class Post(models.Model):
                       'post__community__avatar',
                       'post__community__color', 'post__community__title')
 
-        reported_posts_exclusion_query = ~Q(post__moderated_object__reports__reporter_id=user_id)
+        post_exclusions = get_post_exclusions_for_user_with_id(user_id=user_id)
+
+        reported_posts_exclusion_query = post_exclusions.make_exclude_reported_posts_query(post_field='post_id')
 
         trending_community_posts_query = Q(post__is_closed=False,
                                            post__is_deleted=False,
                                            post__status=Post.STATUS_PUBLISHED)
 
-        trending_community_posts_query.add(~Q(Q(post__creator__blocked_by_users__blocker_id=user_id) | Q(
-            post__creator__user_blocks__blocked_user_id=user_id)), Q.AND)
+        trending_community_posts_query.add(
+            post_exclusions.make_exclude_blocked_users_posts_query(creator_field='post__creator_id'), Q.AND)
         trending_community_posts_query.add(Q(post__community__type=Community.COMMUNITY_TYPE_PUBLIC), Q.AND)
-        trending_community_posts_query.add(~Q(post__community__banned_users__id=user_id), Q.AND)
+        trending_community_posts_query.add(
+            post_exclusions.make_exclude_banned_communities_posts_query(community_field='post__community_id'), Q.AND)
 
         if max_id:
             trending_community_posts_query.add(Q(id__lt=max_id), Q.AND)
         elif min_id:
             trending_community_posts_query.add(Q(id__gt=min_id), Q.AND)
 
-        ModeratedObject = get_moderated_object_model()
-        trending_community_posts_query.add(~Q(post__moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.AND)
+        trending_community_posts_query.add(post_exclusions.make_exclude_approved_posts_query(post_field='post_id'),
+                                           Q.AND)
 
         trending_community_posts_query.add(reported_posts_exclusion_query, Q.AND)
 
@@ -242,43 +255,6 @@ class Post(models.Model):
 
         return trending_posts_query
 
-    @classmethod
-    def get_post_comment_notification_target_users(cls, post, post_commenter):
-        """
-        Returns the users that should be notified of a post comment.
-        This includes the post creator and other post commenters
-        :return:
-        """
-
-        # Add other post commenters, exclude replies to comments, the post commenter
-        other_commenters = User.objects.filter(
-            Q(posts_comments__post_id=post.pk, posts_comments__parent_comment_id=None, ) & ~Q(
-                id=post_commenter.pk))
-
-        post_creator = User.objects.filter(pk=post.creator_id)
-
-        return other_commenters.union(post_creator)
-
-    @classmethod
-    def get_post_comment_reply_notification_target_users(cls, post_commenter, parent_post_comment):
-        """
-        Returns the users that should be notified of a post comment reply.
-        :return:
-        """
-
-        # Add other post commenters, exclude non replies, the post commenter
-        other_repliers = User.objects.filter(
-            Q(posts_comments__parent_comment_id=parent_post_comment.pk, ) & ~Q(
-                id=post_commenter.pk))
-
-        # Add post comment creator
-        post_comment_creator = User.objects.filter(pk=parent_post_comment.commenter_id)
-
-        # Add post creator
-        post = parent_post_comment.post
-        post_creator = User.objects.filter(pk=post.creator.id)
-        return other_repliers.union(post_comment_creator, post_creator)
-
     @classmethod
     def get_community_notification_target_subscriptions(cls, post):
         CommunityNotificationsSubscription = get_community_notifications_subscription_model()
@@ -346,8 +322,11 @@ class Post(models.Model):
         return PostComment.count_comments_for_post_with_id(self.pk)
 
     def count_comments_with_user(self, user):
+        # Dont count soft deleted items
+        count_query = Q(is_deleted=False)
+
         # Count comments excluding users blocked by authenticated user
-        count_query = ~Q(Q(commenter__blocked_by_users__blocker_id=user.pk) | Q(
+        blocked_users_query = ~Q(Q(commenter__blocked_by_users__blocker_id=user.pk) | Q(
             commenter__user_blocks__blocked_user_id=user.pk))
 
         if self.community:
@@ -358,14 +337,14 @@ class Post(models.Model):
                 blocked_users_query_staff_members.add(Q(commenter__communities_memberships__is_administrator=True) | Q(
                     commenter__communities_memberships__is_moderator=True), Q.AND)
 
-                count_query.add(~blocked_users_query_staff_members, Q.AND)
+                blocked_users_query.add(~blocked_users_query_staff_members, Q.AND)
+                count_query.add(blocked_users_query, Q.AND)
 
             # Don't count items that have been reported and approved by community moderators
             ModeratedObject = get_moderated_object_model()
             count_query.add(~Q(moderated_object__status=ModeratedObject.STATUS_APPROVED), Q.AND)
-
-        # Dont count soft deleted items
-        count_query.add(Q(is_deleted=False), Q.AND)
+        else:
+            count_query.add(blocked_users_query, Q.AND)
 
         # Dont count items we have reported
         count_query.add(~Q(moderated_object__reports__reporter_id=user.pk), Q.AND)
@@ -438,65 +417,59 @@ class Post(models.Model):
     def add_media(self, file, order=None):
         check_can_add_media(post=self)
 
-        is_in_memory_file = isinstance(file, InMemoryUploadedFile) or isinstance(file, SimpleUploadedFile)
-
-        if is_in_memory_file:
-            file_mime = magic.from_buffer(file.read())
-        elif isinstance(file, TemporaryUploadedFile):
-            file_mime = magic.from_file(file.temporary_file_path())
-        else:
-            file_mime = magic.from_file(file.name)
+        file_mime = sniff_file_mimetype(file)
 
         check_mimetype_is_supported_media_mimetypes(file_mime)
-        # Mime check moved pointer
-        file.seek(0)
 
         file_mime_types = file_mime.split('/')
 
         file_mime_type = file_mime_types[0]
         file_mime_subtype = file_mime_types[1]
 
-        temp_files_to_close = []
+        # GIFs are stored as they are and converted to MP4 videos when processing the post media
+        is_gif = file_mime_subtype == 'gif'
 
-        if file_mime_subtype == 'gif':
-            if is_in_memory_file:
-                file = write_in_memory_file_to_disk(file)
+        is_in_memory_file = isinstance(file, InMemoryUploadedFile) or isinstance(file, SimpleUploadedFile)
+        needs_file_path = file_mime_type == 'video'
 
-            temp_dir = tempfile.gettempdir()
-            converted_gif_file_name = os.path.join(temp_dir, str(uuid.uuid4()) + '.mp4')
+        # Hashed in the same pass in which the uploads kept in memory get spooled to disk when ffmpeg needs a path
+        file_hash, spooled_file_path = hash_and_spool_file(file=file, spool=is_in_memory_file and needs_file_path)
 
-            ff = ffmpy.FFmpeg(
-                inputs={file.temporary_file_path() if hasattr(file, 'temporary_file_path') else file.name: None},
-                outputs={converted_gif_file_name: None})
-            ff.run()
-            converted_gif_file = open(converted_gif_file_name, 'rb')
-            temp_files_to_close.append(converted_gif_file)
-            file = File(file=converted_gif_file)
-            file_mime_type = 'video'
-
-        has_other_media = self.media.exists()
-
-        if file_mime_type == 'image':
-            post_image = self._add_media_image(image=file, order=order)
-            if not has_other_media:
-                self.media_width = post_image.width
-                self.media_height = post_image.height
-                self.media_thumbnail = file
-        elif file_mime_type == 'video':
-            post_video = self._add_media_video(video=file, order=order)
-            if not has_other_media:
-                self.media_width = post_video.width
-                self.media_height = post_video.height
-                self.media_thumbnail = post_video.thumbnail.file
+        if spooled_file_path:
+            file_path = spooled_file_path
+        elif isinstance(file, TemporaryUploadedFile):
+            file_path = file.temporary_file_path()
         else:
-            raise ValidationError(
-                _('Unsupported media file type')
-            )
+            file_path = file.name
+
+        try:
+            has_other_media = self.media.exists()
+
+            if file_mime_type == 'image' and not is_gif:
+                post_image = self._add_media_image(image=file, hash=file_hash, order=order)
+                if not has_other_media:
+                    self.media_width = post_image.width
+                    self.media_height = post_image.height
+                    self.media_thumbnail = file
+            elif file_mime_type == 'video' or is_gif:
+                post_video = self._add_media_video(video=file, video_path=file_path, hash=file_hash, order=order,
+                                                   needs_conversion=is_gif)
+                if not has_other_media and not post_video.needs_conversion:
+                    self.set_media_from_post_video(post_video=post_video)
+            else:
+                raise ValidationError(
+                    _('Unsupported media file type')
+                )
 
-        for file_to_close in temp_files_to_close:
-            file_to_close.close()
+            self.save()
+        finally:
+            if spooled_file_path:
+                os.remove(spooled_file_path)
 
-        self.save()
+    def set_media_from_post_video(self, post_video):
+        self.media_width = post_video.width
+        self.media_height = post_video.height
+        self.media_thumbnail = post_video.thumbnail.file
 
     def get_first_media(self):
         return self.media.first()
@@ -504,11 +477,12 @@ class Post(models.Model):
     def get_first_media_image(self):
         return self.media.filter(type=PostMedia.MEDIA_TYPE_IMAGE).first()
 
-    def _add_media_image(self, image, order):
-        return PostImage.create_post_media_image(image=image, post_id=self.pk, order=order)
+    def _add_media_image(self, image, hash, order):
+        return PostImage.create_post_media_image(image=image, hash=hash, post_id=self.pk, order=order)
 
-    def _add_media_video(self, video, order):
-        return PostVideo.create_post_media_video(file=video, post_id=self.pk, order=order)
+    def _add_media_video(self, video, video_path, hash, order, needs_conversion=False):
+        return PostVideo.create_post_media_video(file=video, file_path=video_path, hash=hash, post_id=self.pk,
+                                                 order=order, needs_conversion=needs_conversion)
 
     def count_media(self):
         return self.media.count()
@@ -529,6 +503,7 @@ class Post(models.Model):
         self.created = timezone.now()
         self._process_post_subscribers()
         self.save()
+        self._fan_out_to_timelines()
 
     def is_draft(self):
         return self.status == Post.STATUS_DRAFT
@@ -554,12 +529,35 @@ class Post(models.Model):
         return post
 
     def delete(self, *args, **kwargs):
+        self._remove_from_timelines()
         self.delete_media()
         super(Post, self).delete(*args, **kwargs)
 
     def delete_media(self):
-        if self.has_image():
-            delete_file_field(self.image.image)
+        # The media files might be shared with other posts, they only get deleted once no longer referenced
+        for post_image in PostImage.objects.filter(post_id=self.pk).iterator():
+            post_image.delete_media()
+
+        for post_video in self.videos.all().iterator():
+            post_video.delete_media()
+
+    def delete_media_of_all_posts_with_it(self):
+        """
+        Deletes the media of the post along with the media of every other post with the same content, and keeps the
+        content from being shared again, e.g. once the post got moderated as critical
+        """
+        hashes = set(PostImage.objects.filter(post_id=self.pk, hash__isnull=False).values_list('hash', flat=True))
+        hashes.update(self.videos.filter(hash__isnull=False).values_list('hash', flat=True))
+
+        for hash in hashes:
+            PostMediaContent.moderate_media_content_with_hash(hash=hash)
+
+        # With the content moderated it gets no new references, the shared files go along with the last post with them
+        for post_image in PostImage.objects.filter(Q(post_id=self.pk) | Q(hash__in=hashes)).iterator():
+            post_image.delete_media()
+
+        for post_video in PostVideo.objects.filter(Q(post_id=self.pk) | Q(hash__in=hashes)).iterator():
+            post_video.delete_media()
 
     def soft_delete(self):
         self.delete_notifications()
@@ -567,6 +565,7 @@ class Post(models.Model):
             comment.soft_delete()
         self.is_deleted = True
         self.save()
+        self._remove_from_timelines()
 
     def unsoft_delete(self):
         self.is_deleted = False
@@ -575,126 +574,43 @@ class Post(models.Model):
         self.save()
 
     def delete_notifications(self):
-        # Remove all post reaction notifications
-        PostReactionNotification = get_post_reaction_notification_model()
-        PostReactionNotification.objects.filter(post_reaction__post_id=self.pk).delete()
-
-        # Remove all post user mention notifications
-        PostUserMentionNotification = get_post_user_mention_notification_model()
-        PostUserMentionNotification.objects.filter(post_user_mention__post_id=self.pk).delete()
-
-        # Remove all post comment notifications
-        PostCommentNotification = get_post_comment_notification_model()
-        PostCommentNotification.objects.filter(post_comment__post_id=self.pk).delete()
-
-        # Remove all post comment reply notifications
-        PostCommentReplyNotification = get_post_comment_reply_notification_model()
-        PostCommentReplyNotification.objects.filter(post_comment__post_id=self.pk).delete()
-
-        # Remove all post comment reaction notifications
-        PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.objects.filter(
-            post_comment_reaction__post_comment__post_id=self.pk).delete()
-
-        # Remove all post comment user mention notifications
-        PostCommentUserMentionNotification = get_post_comment_user_mention_notification_model()
-        PostCommentUserMentionNotification.objects.filter(
-            post_comment_user_mention__post_comment__post_id=self.pk).delete()
-
-        # Remove all community new post notifications
-        CommunityNewPostNotification = get_community_new_post_notification_model()
-        CommunityNewPostNotification.objects.filter(post_id=self.pk).delete()
-
-        # Remove all user new post notifications
-        UserNewPostNotification = get_user_new_post_notification_model()
-        UserNewPostNotification.objects.filter(post_id=self.pk).delete()
+        bulk_delete_notifications(typed_notifications_querysets=self._get_notifications_querysets())
 
     def delete_notifications_for_user(self, user):
-        # Remove all post reaction notifications
-        PostReactionNotification = get_post_reaction_notification_model()
-        PostReactionNotification.objects.filter(
-            notification__owner_id=user.pk,
-            post_reaction__post_id=self.pk).delete()
-
-        # Remove all post user mention notifications
-        PostUserMentionNotification = get_post_user_mention_notification_model()
-        PostUserMentionNotification.objects.filter(
-            notification__owner_id=user.pk,
-            post_user_mention__post_id=self.pk).delete()
-
-        # Remove all post comment notifications
-        PostCommentNotification = get_post_comment_notification_model()
-        PostCommentNotification.objects.filter(post_comment__post_id=self.pk,
-                                               notification__owner_id=user.pk).delete()
-
-        # Remove all post comment reply notifications
-        PostCommentReplyNotification = get_post_comment_reply_notification_model()
-        PostCommentReplyNotification.objects.filter(post_comment__post_id=self.pk,
-                                                    notification__owner_id=user.pk).delete()
-
-        # Remove all post comment user mention notifications
-        PostCommentUserMentionNotification = get_post_comment_user_mention_notification_model()
-        PostCommentUserMentionNotification.objects.filter(
-            notification__owner_id=user.pk,
-            post_comment_user_mention__post_comment__post_id=self.pk).delete()
-
-        # Remove all post comment reaction notifications
-        PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.objects.filter(
-            notification__owner_id=user.pk,
-            post_comment_reaction__post_comment__post_id=self.pk).delete()
-
-        # Remove all community new post notifications
-        CommunityNewPostNotification = get_community_new_post_notification_model()
-        CommunityNewPostNotification.objects.filter(notification__owner_id=user.pk,
-                                                    post_id=self.pk).delete()
-
-        # Remove all user new post notifications
-        UserNewPostNotification = get_user_new_post_notification_model()
-        UserNewPostNotification.objects.filter(notification__owner_id=user.pk,
-                                               post_id=self.pk).delete()
+        bulk_delete_notifications(typed_notifications_querysets=[
+            notifications_queryset.filter(notification__owner_id=user.pk) for notifications_queryset in
+            self._get_notifications_querysets()
+        ])
 
     def delete_notifications_except_for_users(self, excluded_users):
         excluded_ids = [user.pk for user in excluded_users]
 
-        # Remove all post user mention notifications
-        PostUserMentionNotification = get_post_user_mention_notification_model()
-        PostUserMentionNotification.objects.filter(post_user_mention__post_id=self.pk).exclude(
-            notification__owner_id__in=excluded_ids).delete()
-
-        # Remove all post comment notifications
-        PostCommentNotification = get_post_comment_notification_model()
-        PostCommentNotification.objects.filter(post_comment__post_id=self.pk).\
-            exclude(notification__owner_id__in=excluded_ids).delete()
+        bulk_delete_notifications(typed_notifications_querysets=[
+            notifications_queryset.exclude(notification__owner_id__in=excluded_ids) for notifications_queryset in
+            self._get_notifications_querysets()
+        ])
 
-        # Remove all post reaction notifications
+    def _get_notifications_querysets(self):
         PostReactionNotification = get_post_reaction_notification_model()
-        PostReactionNotification.objects.filter(post_reaction__post_id=self.pk).exclude(
-            notification__owner_id__in=excluded_ids).delete()
-
-        # Remove all post comment reply notifications
+        PostUserMentionNotification = get_post_user_mention_notification_model()
+        PostCommentNotification = get_post_comment_notification_model()
         PostCommentReplyNotification = get_post_comment_reply_notification_model()
-        PostCommentReplyNotification.objects.filter(post_comment__post_id=self.pk).exclude(
-            notification__owner_id__in=excluded_ids).delete()
-
-        # Remove all post comment reaction notifications
         PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.objects.filter(post_comment_reaction__post_comment__post_id=self.pk).exclude(
-            notification__owner_id__in=excluded_ids).delete()
-
-        # Remove all post comment user mention notifications
         PostCommentUserMentionNotification = get_post_comment_user_mention_notification_model()
-        PostCommentUserMentionNotification.objects.filter(post_comment_user_mention__post_comment__post_id=self.pk).exclude(
-            notification__owner_id__in=excluded_ids).delete()
-
-        # Remove all community new post notifications
         CommunityNewPostNotification = get_community_new_post_notification_model()
-        CommunityNewPostNotification.objects.filter(post_id=self.pk).exclude(
-            notification__owner_id__in=excluded_ids).delete()
-
-        # Remove all user new post notifications
         UserNewPostNotification = get_user_new_post_notification_model()
-        UserNewPostNotification.objects.filter(post_id=self.pk).exclude(notification__owner_id__in=excluded_ids).delete()
+
+        return [
+            PostReactionNotification.objects.filter(post_reaction__post_id=self.pk),
+            PostUserMentionNotification.objects.filter(post_user_mention__post_id=self.pk),
+            PostCommentNotification.objects.filter(post_comment__post_id=self.pk),
+            PostCommentReplyNotification.objects.filter(post_comment__post_id=self.pk),
+            PostCommentReactionNotification.objects.filter(post_comment_reaction__post_comment__post_id=self.pk),
+            PostCommentUserMentionNotification.objects.filter(
+                post_comment_user_mention__post_comment__post_id=self.pk),
+            CommunityNewPostNotification.objects.filter(post_id=self.pk),
+            UserNewPostNotification.objects.filter(post_id=self.pk),
+        ]
 
     def get_participants(self):
         User = get_user_model()
@@ -769,25 +685,24 @@ class Post(models.Model):
                     if hashtag not in existing_hashtags:
                         self.hashtags.add(hashtag_obj)
 
-    def _process_post_subscribers(self):
-        if self.community:
-            CommunityNewPostNotification = get_community_new_post_notification_model()
-            community_subscriptions = Post.get_community_notification_target_subscriptions(post=self)
-
-            for subscription in community_subscriptions:
-                CommunityNewPostNotification.create_community_new_post_notification(
-                    post_id=self.pk,
-                    owner_id=subscription.subscriber.pk, community_notifications_subscription_id=subscription.pk)
-                send_community_new_post_push_notification(community_notifications_subscription=subscription)
-        else:
-            UserNewPostNotification = get_user_new_post_notification_model()
-            user_subscriptions = Post.get_user_notification_target_subscriptions(post=self)
+    def _fan_out_to_timelines(self):
+        if not timelines.is_timelines_store_enabled():
+            return
+        post_id = self.pk
+        transaction.on_commit(lambda: fan_out_post_to_timelines.delay(post_id=post_id))
+
+    def _remove_from_timelines(self):
+        if not timelines.is_timelines_store_enabled():
+            return
+        post_id = self.pk
+        creator_id = self.creator_id
+        community_id = self.community_id
+        transaction.on_commit(lambda: remove_post_from_timelines.delay(post_id=post_id, creator_id=creator_id,
+                                                                      community_id=community_id))
 
-            for subscription in user_subscriptions:
-                UserNewPostNotification.create_user_new_post_notification(
-                    post_id=self.pk, owner_id=subscription.subscriber.pk,
-                    user_notifications_subscription_id=subscription.pk)
-                send_user_new_post_push_notification(user_notifications_subscription=subscription, post=self)
+    def _process_post_subscribers(self):
+        post_id = self.pk
+        transaction.on_commit(lambda: notify_post_subscribers.delay(post_id=post_id))
 
 
 class TopPost(models.Model):
@@ -876,6 +791,63 @@ class PostMedia(OrderedModel):
         return cls.objects.create(type=type, content_object=content_object, post_id=post_id, order=order)
 
 
+class PostMediaContent(models.Model):
+    """
+    Content addressed store of the post media. The files stored for a sha256 hash are reused by the post images and
+    videos uploaded again with the same hash while any of them still references its files. The stored files only get
+    deleted once no other post image or video has the same file name, as the ones stored before the content got
+    tracked each own their files even when sharing its hash.
+
+    Once moderated, e.g. when a post with it got moderated as critical, the files of every post with the content get
+    deleted, and the content is no longer shared: its new uploads get stored on their own.
+    """
+    hash = models.CharField(_('hash'), max_length=64, unique=True)
+    references_count = models.PositiveIntegerField(default=0, editable=False)
+    is_moderated = models.BooleanField(default=False, editable=False)
+
+    @classmethod
+    def get_locked_media_content_with_hash(cls, hash):
+        """
+        Must be called within a transaction, the lock serializes storing and releasing the same content
+        """
+        media_content, created = cls.objects.get_or_create(hash=hash)
+        return cls.objects.select_for_update().get(pk=media_content.pk)
+
+    @classmethod
+    def release_media_content_with_hash(cls, hash):
+        """
+        Must be called within a transaction, the lock serializes releasing a reference with reusing the stored files
+        """
+        if not hash:
+            return
+
+        media_content = cls.objects.select_for_update().filter(hash=hash).first()
+
+        if not media_content or media_content.is_moderated or not media_content.references_count:
+            return
+
+        media_content.references_count -= 1
+        media_content.save(update_fields=['references_count'])
+
+    @classmethod
+    def moderate_media_content_with_hash(cls, hash):
+        with transaction.atomic():
+            media_content = cls.get_locked_media_content_with_hash(hash=hash)
+            media_content.is_moderated = True
+            media_content.references_count = 0
+            media_content.save(update_fields=['is_moderated', 'references_count'])
+
+    def is_reusable(self):
+        return self.references_count > 0 and not self.is_moderated
+
+    def add_reference(self):
+        if self.is_moderated:
+            return
+
+        self.references_count = self.references_count + 1
+        self.save(update_fields=['references_count'])
+
+
 class PostImage(models.Model):
     post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='image', null=True)
     image = ProcessedImageField(verbose_name=_('image'), storage=post_image_storage,
@@ -886,7 +858,7 @@ class PostImage(models.Model):
                                 processors=[ResizeToFit(width=1024, upscale=False)])
     width = models.PositiveIntegerField(editable=False, null=False, blank=False)
     height = models.PositiveIntegerField(editable=False, null=False, blank=False)
-    hash = models.CharField(_('hash'), max_length=64, blank=False, null=True)
+    hash = models.CharField(_('hash'), max_length=64, blank=False, null=True, db_index=True)
     thumbnail = ProcessedImageField(verbose_name=_('thumbnail'), storage=post_image_storage,
                                     upload_to=upload_to_post_image_directory,
                                     blank=False, null=True, format='JPEG', options={'quality': 30},
@@ -900,19 +872,59 @@ class PostImage(models.Model):
         return cls.objects.create(image=image, post_id=post_id, hash=hash)
 
     @classmethod
-    def create_post_media_image(cls, image, post_id, order):
-        hash = sha256sum(file=image.file)
-        post_image = cls.objects.create(image=image, post_id=post_id, hash=hash, thumbnail=image)
+    def create_post_media_image(cls, image, hash, post_id, order):
+        with transaction.atomic():
+            media_content = PostMediaContent.get_locked_media_content_with_hash(hash=hash)
+
+            stored_post_image = cls._get_stored_post_image_with_hash(hash=hash) \
+                if media_content.is_reusable() else None
+
+            if stored_post_image:
+                # Reuses the stored image and thumbnail instead of processing and uploading them again
+                post_image = cls.objects.create(image=stored_post_image.image.name,
+                                                thumbnail=stored_post_image.thumbnail.name,
+                                                width=stored_post_image.width, height=stored_post_image.height,
+                                                post_id=post_id, hash=hash)
+            else:
+                post_image = cls.objects.create(image=image, post_id=post_id, hash=hash, thumbnail=image)
+
+            media_content.add_reference()
+
         PostMedia.create_post_media(type=PostMedia.MEDIA_TYPE_IMAGE,
                                     content_object=post_image,
                                     post_id=post_id, order=order)
         return post_image
 
+    @classmethod
+    def _get_stored_post_image_with_hash(cls, hash):
+        return cls.objects.filter(hash=hash).exclude(Q(image__isnull=True) | Q(image='')).first()
+
+    def delete_media(self):
+        if not self.image:
+            # Already deleted
+            return
+
+        with transaction.atomic():
+            PostMediaContent.release_media_content_with_hash(hash=self.hash)
+            is_shared = PostImage.objects.filter(image=self.image.name).exclude(pk=self.pk).exists()
+
+        if not is_shared:
+            delete_file_field(self.image)
+            delete_file_field(self.thumbnail)
+        else:
+            # The files stay with the other posts sharing them
+            self.image = None
+            self.thumbnail = None
+
+        # Released, so deleting the media again does not release another reference
+        self.hash = None
+        self.save(update_fields=['image', 'thumbnail', 'hash'])
+
 
 class PostVideo(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='videos', null=True)
 
-    hash = models.CharField(_('hash'), max_length=64, blank=False, null=True)
+    hash = models.CharField(_('hash'), max_length=64, blank=False, null=True, db_index=True)
 
     media = GenericRelation(PostMedia)
 
@@ -933,28 +945,181 @@ class PostVideo(models.Model):
                                     blank=False, null=True, format='JPEG', options={'quality': 30},
                                     processors=[ResizeToFit(width=1024, upscale=False)])
 
-    thumbnail_width = models.PositiveIntegerField(editable=False, null=False, blank=False)
-    thumbnail_height = models.PositiveIntegerField(editable=False, null=False, blank=False)
+    # Unknown until a GIF gets converted
+    thumbnail_width = models.PositiveIntegerField(editable=False, null=True, blank=False)
+    thumbnail_height = models.PositiveIntegerField(editable=False, null=True, blank=False)
+
+    # GIFs are stored as uploaded and converted when processing the post media
+    needs_conversion = models.BooleanField(default=False, editable=False)
 
     @classmethod
-    def create_post_media_video(cls, file, post_id, order):
-        hash = sha256sum(file=file.file)
-        video_backend = get_backend()
-
-        if isinstance(file, InMemoryUploadedFile):
-            # If its in memory, doing read shouldn't be an issue as the file should be small.
-            in_disk_file = write_in_memory_file_to_disk(file)
-            thumbnail_path = video_backend.get_thumbnail(video_path=in_disk_file.name, at_time=0.0)
-        else:
-            thumbnail_path = video_backend.get_thumbnail(video_path=file.file.name, at_time=0.0)
+    def create_post_media_video(cls, file, file_path, hash, post_id, order, needs_conversion=False):
+        with transaction.atomic():
+            media_content = PostMediaContent.get_locked_media_content_with_hash(hash=hash)
+
+            stored_post_video = cls._get_stored_post_video_with_hash(hash=hash) \
+                if media_content.is_reusable() else None
+
+            if stored_post_video:
+                # Reuses the stored video, thumbnail and encoded formats instead of uploading and encoding them again
+                post_video = cls(post_id=post_id, hash=hash)
+                post_video._reuse_files_of_post_video(post_video=stored_post_video)
+                media_content.add_reference()
+            elif needs_conversion:
+                # Thumbnailed once converted. Until then the GIF is stored on its own, even when uploaded twice, and
+                # counts no reference
+                post_video = cls.objects.create(file=file, post_id=post_id, hash=hash, needs_conversion=True)
+            else:
+                video_backend = get_backend()
+
+                thumbnail_path = video_backend.get_thumbnail(video_path=file_path, at_time=0.0)
+
+                with open(thumbnail_path, 'rb+') as thumbnail_file:
+                    post_video = cls.objects.create(file=file, post_id=post_id, hash=hash,
+                                                    thumbnail=File(thumbnail_file), )
+
+                media_content.add_reference()
 
-        with open(thumbnail_path, 'rb+') as thumbnail_file:
-            post_video = cls.objects.create(file=file, post_id=post_id, hash=hash, thumbnail=File(thumbnail_file), )
         PostMedia.create_post_media(type=PostMedia.MEDIA_TYPE_VIDEO,
                                     content_object=post_video,
                                     post_id=post_id, order=order)
         return post_video
 
+    @classmethod
+    def _get_stored_post_video_with_hash(cls, hash):
+        return cls.objects.filter(hash=hash, needs_conversion=False).exclude(Q(file__isnull=True) | Q(file='')).first()
+
+    def convert_to_mp4(self):
+        """
+        Converts the stored GIF to an MP4 video and creates its thumbnail, replacing the GIF. When the same GIF got
+        converted already, its video gets reused instead
+        """
+        gif_name = self.file.name
+
+        if not self._store_converted_gif():
+            # Converts without holding the lock, so the uploads of the same content do not wait for ffmpeg
+            converted_file_path, thumbnail_path = self._convert_gif_to_mp4()
+
+            try:
+                self._store_converted_gif(converted_file_path=converted_file_path, thumbnail_path=thumbnail_path)
+            finally:
+                for temp_file_path in (converted_file_path, thumbnail_path):
+                    if os.path.exists(temp_file_path):
+                        os.remove(temp_file_path)
+
+        self.file.storage.delete(gif_name)
+
+    def _store_converted_gif(self, converted_file_path=None, thumbnail_path=None):
+        """
+        Reuses the video of the same GIF when already converted, e.g. by another post while converting this one, or
+        else stores the given conversion. Returns whether the GIF got stored converted
+        """
+        with transaction.atomic():
+            # Also serializes storing the conversions of the same GIF, so it only gets stored converted once
+            media_content = PostMediaContent.get_locked_media_content_with_hash(hash=self.hash) if self.hash else None
+
+            stored_post_video = self._get_stored_post_video_with_hash(hash=self.hash) \
+                if media_content and media_content.is_reusable() else None
+
+            if stored_post_video:
+                self._reuse_files_of_post_video(post_video=stored_post_video)
+            elif converted_file_path:
+                with open(converted_file_path, 'rb') as converted_file, open(thumbnail_path, 'rb') as thumbnail_file:
+                    self.file = File(converted_file)
+                    self.thumbnail = File(thumbnail_file)
+                    self.needs_conversion = False
+                    self.save()
+            else:
+                return False
+
+            if media_content:
+                media_content.add_reference()
+
+        return True
+
+    def _convert_gif_to_mp4(self):
+        """
+        Returns the paths of the converted video and its thumbnail, both temporary files
+        """
+        gif_path, gif_temp_file = get_fieldfile_local_path(fieldfile=self.file)
+
+        converted_file_path = os.path.join(tempfile.gettempdir(), str(uuid.uuid4()) + '.mp4')
+
+        try:
+            ff = ffmpy.FFmpeg(
+                inputs={gif_path: None},
+                outputs={converted_file_path: None})
+            ff.run()
+
+            video_backend = get_backend()
+            thumbnail_path = video_backend.get_thumbnail(video_path=converted_file_path, at_time=0.0)
+        except Exception:
+            if os.path.exists(converted_file_path):
+                os.remove(converted_file_path)
+            raise
+        finally:
+            if gif_temp_file:
+                os.unlink(gif_temp_file.name)
+                gif_temp_file.close()
+
+        return converted_file_path, thumbnail_path
+
+    def _reuse_files_of_post_video(self, post_video):
+        self.file = post_video.file.name
+        self.width = post_video.width
+        self.height = post_video.height
+        self.duration = post_video.duration
+        self.thumbnail = post_video.thumbnail.name
+        self.thumbnail_width = post_video.thumbnail_width
+        self.thumbnail_height = post_video.thumbnail_height
+        self.needs_conversion = False
+        self.save()
+
+        self._add_formats_of_post_video(post_video=post_video)
+
+    def _add_formats_of_post_video(self, post_video):
+        # Only the encoded formats, the ones still being encoded get encoded again when processing the post media
+        encoded_formats = post_video.format_set.filter(progress=100).exclude(file='')
+        content_type = ContentType.objects.get_for_model(self)
+
+        Format.objects.bulk_create([
+            Format(object_id=self.pk, content_type=content_type, field_name=encoded_format.field_name,
+                   format=encoded_format.format, file=encoded_format.file.name, width=encoded_format.width,
+                   height=encoded_format.height, duration=encoded_format.duration, progress=100)
+            for encoded_format in encoded_formats
+        ])
+
+    def delete_media(self):
+        if not self.file:
+            # Already deleted
+            return
+
+        with transaction.atomic():
+            # A GIF pending conversion is stored on its own and counts no reference
+            if not self.needs_conversion:
+                PostMediaContent.release_media_content_with_hash(hash=self.hash)
+            is_shared = PostVideo.objects.filter(file=self.file.name).exclude(pk=self.pk).exists()
+
+        if not is_shared:
+            delete_file_field(self.file)
+            delete_file_field(self.thumbnail)
+        else:
+            # The files stay with the other posts sharing them
+            self.file = None
+            self.thumbnail = None
+
+        for video_format in self.format_set.all():
+            # Formats encoded for this video only are not shared even when the content still is
+            if video_format.file and \
+                    not Format.objects.filter(file=video_format.file.name).exclude(pk=video_format.pk).exists():
+                delete_file_field(video_format.file)
+
+        self.format_set.all().delete()
+
+        # Released, so deleting the media again does not release another reference
+        self.hash = None
+        self.save(update_fields=['file', 'thumbnail', 'hash'])
+
 
 class PostComment(models.Model):
     moderated_object = GenericRelation(ModeratedObject, related_query_name='post_comments')
@@ -1125,64 +1290,49 @@ class PostComment(models.Model):
         self.save()
 
     def soft_delete(self):
+        if self.is_counted_in_post_comments_count():
+            decrement_counter_for_instance_with_id(model=Post, instance_id=self.post_id,
+                                                   counter_name='comments_count')
         self.is_deleted = True
         self.delete_notifications()
         self.save()
 
     def unsoft_delete(self):
+        if self.is_deleted and self.parent_comment_id is None:
+            increment_counter_for_instance_with_id(model=Post, instance_id=self.post_id,
+                                                   counter_name='comments_count')
         self.is_deleted = False
         self.save()
 
-    def delete_notifications(self):
-        # Delete all post comment notifications
-        PostCommentNotification = get_post_comment_notification_model()
-        PostCommentNotification.objects.filter(post_comment_id=self.pk).delete()
-
-        # Delete all post comments reply notifications
-        PostCommentReplyNotification = get_post_comment_reply_notification_model()
-        PostCommentReplyNotification.objects.filter(post_comment__parent_comment_id=self.pk).delete()
-
-        # Delete all post comment reaction notifications
-        PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.objects.filter(post_comment_reaction__post_comment_id=self.pk).delete()
-
-        # Delete all post comment reply reaction notifications
-        PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.objects.filter(
-            post_comment_reaction__post_comment__parent_comment_id=self.pk).delete()
+    def is_counted_in_post_comments_count(self):
+        return self.parent_comment_id is None and not self.is_deleted
 
-        # Delete all post comment user mention notifications
-        PostCommentUserMentionNotification = get_post_comment_user_mention_notification_model()
-        PostCommentUserMentionNotification.objects.filter(
-            post_comment_user_mention__post_comment__post_id=self.pk).delete()
+    def delete_notifications(self):
+        bulk_delete_notifications(typed_notifications_querysets=self._get_notifications_querysets())
 
     def delete_notifications_for_user(self, user):
-        # Delete all post comment notifications
-        PostCommentNotification = get_post_comment_notification_model()
-        PostCommentNotification.objects.filter(post_comment_id=self.pk,
-                                               notification__owner_id=user.pk).delete()
+        bulk_delete_notifications(typed_notifications_querysets=[
+            notifications_queryset.filter(notification__owner_id=user.pk) for notifications_queryset in
+            self._get_notifications_querysets()
+        ])
 
-        # Delete all post comments reply notifications
+    def _get_notifications_querysets(self):
+        PostCommentNotification = get_post_comment_notification_model()
         PostCommentReplyNotification = get_post_comment_reply_notification_model()
-        PostCommentReplyNotification.objects.filter(post_comment__parent_comment_id=self.pk,
-                                                    notification__owner_id=user.pk).delete()
-
-        # Delete all post comment reaction notifications
         PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.objects.filter(post_comment_reaction__post_comment_id=self.pk,
-                                                       notification__owner_id=user.pk).delete()
-
-        # Delete all post comment reply reaction notifications
-        PostCommentReactionNotification = get_post_comment_reaction_notification_model()
-        PostCommentReactionNotification.objects.filter(
-            notification__owner_id=user.pk,
-            post_comment_reaction__post_comment__parent_comment_id=self.pk).delete()
-
-        # Delete all post comment user mention notifications
         PostCommentUserMentionNotification = get_post_comment_user_mention_notification_model()
-        PostCommentUserMentionNotification.objects.filter(
-            post_comment_user_mention__post_comment__post_id=self.pk,
-            notification__owner_id=user.pk).delete()
+
+        return [
+            PostCommentNotification.objects.filter(post_comment_id=self.pk),
+            PostCommentReplyNotification.objects.filter(post_comment_id=self.pk),
+            PostCommentReplyNotification.objects.filter(post_comment__parent_comment_id=self.pk),
+            PostCommentReactionNotification.objects.filter(post_comment_reaction__post_comment_id=self.pk),
+            PostCommentReactionNotification.objects.filter(
+                post_comment_reaction__post_comment__parent_comment_id=self.pk),
+            PostCommentUserMentionNotification.objects.filter(post_comment_user_mention__post_comment_id=self.pk),
+            PostCommentUserMentionNotification.objects.filter(
+                post_comment_user_mention__post_comment__parent_comment_id=self.pk),
+        ]
 
 
 class PostReaction(models.Model):
@@ -1300,3 +1450,72 @@ class PostCommentUserMention(models.Model):
             owner_id=user.pk)
         send_post_comment_user_mention_push_notification(post_comment_user_mention=post_comment_user_mention)
         return post_comment_user_mention
+
+
+@receiver(post_save, sender=PostComment, dispatch_uid='increment_post_comments_count')
+def increment_post_comments_count(sender, instance, created, **kwargs):
+    if created and instance.is_counted_in_post_comments_count():
+        increment_counter_for_instance_with_id(model=Post, instance_id=instance.post_id,
+                                               counter_name='comments_count')
+
+
+@receiver(post_delete, sender=PostComment, dispatch_uid='decrement_post_comments_count')
+def decrement_post_comments_count(sender, instance, **kwargs):
+    if instance.is_counted_in_post_comments_count():
+        decrement_counter_for_instance_with_id(model=Post, instance_id=instance.post_id,
+                                               counter_name='comments_count')
+
+
+@receiver(post_save, sender=PostReaction, dispatch_uid='increment_post_reactions_count')
+def increment_post_reactions_count(sender, instance, created, **kwargs):
+    if created:
+        increment_counter_for_instance_with_id(model=Post, instance_id=instance.post_id,
+                                               counter_name='reactions_count')
+
+
+@receiver(post_save, sender=PostComment, dispatch_uid='record_trending_post_comment')
+def record_trending_post_comment(sender, instance, created, **kwargs):
+    if created:
+        post_id = instance.post_id
+        commenter_id = instance.commenter_id
+        _record_trending_community_post_activity_on_commit(
+            post_id=post_id, record_activity=lambda: trending.record_post_comment(post_id=post_id,
+                                                                                  commenter_id=commenter_id))
+
+
+@receiver(post_save, sender=PostReaction, dispatch_uid='record_trending_post_reaction')
+def record_trending_post_reaction(sender, instance, created, **kwargs):
+    if created:
+        post_id = instance.post_id
+        reactor_id = instance.reactor_id
+        _record_trending_community_post_activity_on_commit(
+            post_id=post_id, record_activity=lambda: trending.record_post_reaction(post_id=post_id,
+                                                                                   reactor_id=reactor_id))
+
+
+def _record_trending_community_post_activity_on_commit(post_id, record_activity):
+    def record_community_post_activity():
+        # Only community posts trend
+        if Post.is_post_with_id_a_community_post(post_id=post_id):
+            record_activity()
+
+    transaction.on_commit(record_community_post_activity)
+
+
+@receiver(post_delete, sender=PostReaction, dispatch_uid='decrement_post_reactions_count')
+def decrement_post_reactions_count(sender, instance, **kwargs):
+    decrement_counter_for_instance_with_id(model=Post, instance_id=instance.post_id,
+                                           counter_name='reactions_count')
+
+
+@receiver(post_save, sender=Post, dispatch_uid='increment_user_posts_count')
+def increment_user_posts_count(sender, instance, created, **kwargs):
+    if created:
+        increment_counter_for_instance_with_id(model=User, instance_id=instance.creator_id,
+                                               counter_name='posts_count')
+
+
+@receiver(post_delete, sender=Post, dispatch_uid='decrement_user_posts_count')
+def decrement_user_posts_count(sender, instance, **kwargs):
+    decrement_counter_for_instance_with_id(model=User, instance_id=instance.creator_id,
+                                           counter_name='posts_count')
@@ -0,0 +1,209 @@
+"""
+Notification targets of post comments and replies.
+
+The targets of a comment are the post creator and the other commenters of the post, and the targets of a reply the
+post creator, the parent comment creator and the other repliers. Checking one target at a time whether it can see
+the comment, has the notifications enabled and muted the post takes a handful of queries per target, so busy
+threads took hundreds of queries per comment.
+
+Here the targets are loaded with a single query annotating their notifications setting, mutes, blocks, reports and
+community memberships, plus a query for the facts about the post shared by all of them. Whether a target can see the
+comment and should get a push notification is then decided in memory.
+"""
+from django.db.models import Q, F, Exists, OuterRef
+
+from openbook_common.utils import reference_data
+from openbook_common.utils.model_loaders import get_user_model, get_post_model, get_post_comment_model, \
+    get_post_mute_model, get_post_comment_mute_model, get_user_block_model, get_community_membership_model, \
+    get_community_model, get_circle_model, get_moderated_object_model
+
+
+def get_post_comment_notification_target_users(post_comment):
+    """
+    Returns the users to notify of a post comment. Their has_notifications_enabled attribute tells whether they
+    should get a push notification
+    """
+    PostComment = get_post_comment_model()
+    post = post_comment.post
+
+    other_commenters_ids = PostComment.objects.filter(post_id=post.pk, parent_comment_id=None).values('commenter_id')
+
+    target_users = _make_target_users_queryset(
+        target_users_query=Q(pk__in=other_commenters_ids) | Q(pk=post.creator_id),
+        post_comment=post_comment).annotate(
+        notifications_setting=F('notifications_settings__post_comment_notifications'))
+
+    return _resolve_target_users(target_users=target_users, post_comment=post_comment)
+
+
+def get_post_comment_reply_notification_target_users(post_comment_reply):
+    """
+    Returns the users to notify of a post comment reply. Their has_notifications_enabled attribute tells whether
+    they should get a push notification
+    """
+    PostComment = get_post_comment_model()
+    PostCommentMute = get_post_comment_mute_model()
+    parent_post_comment = post_comment_reply.parent_comment
+    post = post_comment_reply.post
+
+    other_repliers_ids = PostComment.objects.filter(parent_comment_id=parent_post_comment.pk).values('commenter_id')
+
+    target_users = _make_target_users_queryset(
+        target_users_query=Q(pk__in=other_repliers_ids) | Q(pk=parent_post_comment.commenter_id) | Q(
+            pk=post.creator_id),
+        post_comment=post_comment_reply).annotate(
+        notifications_setting=F('notifications_settings__post_comment_reply_notifications'),
+        has_muted_post_comment=Exists(PostCommentMute.objects.filter(post_comment_id=parent_post_comment.pk,
+                                                                     muter_id=OuterRef('pk'))))
+
+    return _resolve_target_users(target_users=target_users, post_comment=post_comment_reply)
+
+
+def _make_target_users_queryset(target_users_query, post_comment):
+    User = get_user_model()
+    Post = get_post_model()
+    PostMute = get_post_mute_model()
+
+    post = post_comment.post
+
+    target_users = User.objects.filter(target_users_query).exclude(pk=post_comment.commenter_id).only(
+        'id', 'username', 'language').annotate(
+        has_muted_post=Exists(PostMute.objects.filter(post_id=post.pk, muter_id=OuterRef('pk'))),
+        is_blocked_with_post_commenter=_make_is_blocked_with_user_with_id_expression(
+            user_id=post_comment.commenter_id),
+        is_blocked_with_post_creator=_make_is_blocked_with_user_with_id_expression(user_id=post.creator_id),
+        has_reported_post=Exists(Post.objects.filter(pk=post.pk, moderated_object__reports__reporter_id=OuterRef(
+            'pk'))),
+    )
+
+    if post.community_id:
+        Community = get_community_model()
+        CommunityMembership = get_community_membership_model()
+        community_memberships = CommunityMembership.objects.filter(community_id=post.community_id,
+                                                                   user_id=OuterRef('pk'))
+
+        target_users = target_users.annotate(
+            is_community_member=Exists(community_memberships),
+            is_community_staff=Exists(community_memberships.filter(Q(is_administrator=True) | Q(is_moderator=True))),
+            is_banned_from_community=Exists(Community.objects.filter(pk=post.community_id,
+                                                                     banned_users__id=OuterRef('pk'))),
+        )
+    else:
+        target_users = target_users.annotate(
+            is_in_post_circles=Exists(Post.objects.filter(
+                pk=post.pk, circles__connections__target_user_id=OuterRef('pk'),
+                circles__connections__target_connection__circles__isnull=False)))
+
+    return target_users
+
+
+def _resolve_target_users(target_users, post_comment):
+    post_facts = _get_post_facts(post_comment=post_comment)
+
+    resolved_target_users = []
+
+    for target_user in target_users:
+        if not _can_see_post_comment(target_user=target_user, post_comment=post_comment, post_facts=post_facts):
+            continue
+
+        target_user.has_notifications_enabled = bool(target_user.notifications_setting) and \
+                                                not target_user.has_muted_post and \
+                                                not getattr(target_user, 'has_muted_post_comment', False)
+        resolved_target_users.append(target_user)
+
+    return resolved_target_users
+
+
+def _can_see_post_comment(target_user, post_comment, post_facts):
+    # Mirrors User.can_see_post_comment
+    post = post_comment.post
+
+    if post.community_id:
+        if not _can_see_community_post(target_user=target_user, post=post, post_facts=post_facts):
+            return False
+
+        if target_user.is_community_staff:
+            return True
+
+        # The comment was just created, so it cannot have been reported and approved yet
+        return not target_user.is_blocked_with_post_commenter or post_facts['is_post_commenter_community_staff']
+
+    if post.creator_id == target_user.pk:
+        if post.is_deleted:
+            return False
+    elif not _can_see_post(target_user=target_user, post=post, post_facts=post_facts):
+        return False
+
+    return not target_user.is_blocked_with_post_commenter
+
+
+def _can_see_post(target_user, post, post_facts):
+    # Mirrors User._make_get_posts_query_for_user
+    Post = get_post_model()
+
+    if post.is_deleted or post.status != Post.STATUS_PUBLISHED:
+        return False
+
+    if not post_facts['is_public'] and not target_user.is_in_post_circles:
+        return False
+
+    return not target_user.is_blocked_with_post_creator and not target_user.has_reported_post
+
+
+def _can_see_community_post(target_user, post, post_facts):
+    # Mirrors User._make_get_community_with_id_posts_query
+    Post = get_post_model()
+    Community = get_community_model()
+
+    if post.creator_id == target_user.pk:
+        return True
+
+    if post.is_deleted or post.status != Post.STATUS_PUBLISHED or post_facts['is_approved']:
+        return False
+
+    if target_user.has_reported_post or target_user.is_banned_from_community:
+        return False
+
+    if not target_user.is_community_member and post_facts['community__type'] != Community.COMMUNITY_TYPE_PUBLIC:
+        return False
+
+    if target_user.is_community_staff:
+        return True
+
+    if post.is_closed:
+        return False
+
+    return not target_user.is_blocked_with_post_creator or post_facts['is_post_creator_community_staff']
+
+
+def _get_post_facts(post_comment):
+    """
+    Returns what the visibility of the comment depends on that is the same for all the targets
+    """
+    Post = get_post_model()
+    Circle = get_circle_model()
+    CommunityMembership = get_community_membership_model()
+    ModeratedObject = get_moderated_object_model()
+
+    post = post_comment.post
+
+    community_staff_memberships = CommunityMembership.objects.filter(
+        Q(is_administrator=True) | Q(is_moderator=True), community_id=post.community_id)
+
+    return Post.objects.filter(pk=post.pk).annotate(
+        is_public=Exists(Circle.posts.through.objects.filter(post_id=OuterRef('pk'),
+                                                             circle_id=reference_data.get_world_circle_id())),
+        is_approved=Exists(Post.objects.filter(pk=OuterRef('pk'),
+                                               moderated_object__status=ModeratedObject.STATUS_APPROVED)),
+        is_post_creator_community_staff=Exists(community_staff_memberships.filter(user_id=post.creator_id)),
+        is_post_commenter_community_staff=Exists(
+            community_staff_memberships.filter(user_id=post_comment.commenter_id)),
+    ).values('is_public', 'is_approved', 'is_post_creator_community_staff', 'is_post_commenter_community_staff',
+             'community__type').get()
+
+
+def _make_is_blocked_with_user_with_id_expression(user_id):
+    UserBlock = get_user_block_model()
+
+    return Exists(UserBlock.objects.filter(Q(blocker_id=OuterRef('pk'), blocked_user_id=user_id) | Q(
+        blocker_id=user_id, blocked_user_id=OuterRef('pk'))))
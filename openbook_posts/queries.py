@@ -1,7 +1,8 @@
 from django.db.models import Q
 
-from openbook_common.utils.model_loaders import get_post_model, get_moderated_object_model, get_community_model, \
-    get_circle_model
+from openbook_common.utils.model_loaders import get_post_model, get_moderated_object_model, get_community_model
+from openbook_common.utils.reference_data import get_world_circle_id
+from openbook_posts.exclusions import get_post_exclusions_for_user_with_id
 
 
 def make_only_posts_with_max_id(max_id):
@@ -93,9 +94,7 @@ def make_only_public_community_posts_query():
 
 
 def make_only_world_circle_posts_query():
-    Circle = get_circle_model()
-    world_circle_id = Circle.get_world_circle().pk
-    return Q(circles__id=world_circle_id)
+    return Q(circles__id=get_world_circle_id())
 
 
 def make_only_public_posts_query():
@@ -112,20 +111,22 @@ def make_get_hashtag_posts_for_user_with_id_query(hashtag, user_id):
     # Dont retrieve soft deleted posts
     hashtag_posts_query.add(make_exclude_soft_deleted_posts_query(), Q.AND)
 
+    post_exclusions = get_post_exclusions_for_user_with_id(user_id=user_id)
+
     # Dont retrieve posts from blocked people
-    hashtag_posts_query.add(make_exclude_blocked_posts_for_user_with_id_query(user_id=user_id), Q.AND)
+    hashtag_posts_query.add(post_exclusions.make_exclude_blocked_users_posts_query(), Q.AND)
 
     # Only retrieve published posts
     hashtag_posts_query.add(make_only_published_posts_query(), Q.AND)
 
     # Don't retrieve items that have been reported and approved
-    hashtag_posts_query.add(make_exclude_reported_and_approved_posts_query(), Q.AND)
+    hashtag_posts_query.add(post_exclusions.make_exclude_approved_posts_query(), Q.AND)
 
     # Dont retrieve items we have reported
-    hashtag_posts_query.add(make_exclude_reported_posts_by_user_with_id_query(user_id=user_id), Q.AND)
+    hashtag_posts_query.add(post_exclusions.make_exclude_reported_posts_query(), Q.AND)
 
     # Dont retrieve posts from communities we're  banned from
-    hashtag_posts_query.add(make_exclude_community_posts_banned_from_for_user_with_id_query(user_id=user_id), Q.AND)
+    hashtag_posts_query.add(post_exclusions.make_exclude_banned_communities_posts_query(), Q.AND)
 
     # Dont retrieve closed posts
     hashtag_posts_query.add(make_exclude_closed_posts_query(), Q.AND)
@@ -1,6 +1,7 @@
 from django.db.models import Q
 
-from openbook_common.utils.model_loaders import get_post_model, get_moderated_object_model
+from openbook_common.utils.model_loaders import get_post_model
+from openbook_posts.exclusions import get_post_exclusions_for_user_with_id
 from openbook_posts.queries import \
     make_community_posts_query_for_user, make_only_posts_with_max_id, \
     make_only_posts_with_min_id, make_circles_posts_query_for_user
@@ -52,20 +53,18 @@ def get_posts_for_user_collection(target_user, source_user, posts_only=None, pos
     if id_boundary_query:
         query.add(id_boundary_query, Q.AND)
 
-    ModeratedObject = get_moderated_object_model()
-
-    posts_visibility_exclude_query = Q(
-        # Excluded communities posts
-        Q(community__profile_posts_community_exclusions__user=target_user.pk) |
-        # Reported posts
-        Q(moderated_object__reports__reporter_id=source_user.pk) |
-        # Approved reported posts
-        Q(moderated_object__status=ModeratedObject.STATUS_APPROVED) |
-        # Posts of users we blocked or that have blocked us
-        Q(creator__blocked_by_users__blocker_id=source_user.pk) | Q(
-            creator__user_blocks__blocked_user_id=source_user.pk) |
-        # Posts of communities banned from
-        Q(community__banned_users__id=source_user.pk)
-    )
+    post_exclusions = get_post_exclusions_for_user_with_id(user_id=source_user.pk)
+
+    # Reported posts
+    query.add(post_exclusions.make_exclude_reported_posts_query(), Q.AND)
+    # Approved reported posts
+    query.add(post_exclusions.make_exclude_approved_posts_query(), Q.AND)
+    # Posts of users we blocked or that have blocked us
+    query.add(post_exclusions.make_exclude_blocked_users_posts_query(), Q.AND)
+    # Posts of communities banned from
+    query.add(post_exclusions.make_exclude_banned_communities_posts_query(), Q.AND)
+
+    # Excluded communities posts
+    posts_visibility_exclude_query = Q(community__profile_posts_community_exclusions__user=target_user.pk)
 
     return posts_collection_manager.filter(query).exclude(posts_visibility_exclude_query).distinct()
@@ -0,0 +1,290 @@
+from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_common.tests.helpers import make_user, make_circle, make_community, make_private_community, \
+    make_fake_post_text, make_fake_post_comment_text, make_moderation_category
+from openbook_moderation.models import ModeratedObject
+from openbook_posts.models import PostComment
+from openbook_posts.notification_targets import get_post_comment_notification_target_users, \
+    get_post_comment_reply_notification_target_users
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PostCommentNotificationTargetsTests(OpenbookAPITestCase):
+    """
+    PostCommentNotificationTargetsTests
+
+    The notification targets decide in memory whether every target can see the comment, these tests compare their
+    decisions against User.can_see_post_comment across the visibility matrix
+    """
+
+    def test_public_post(self):
+        """
+        should match the visibility of a comment on a public post
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_public_post_target_blocked_commenter(self):
+        """
+        should match the visibility of a comment on a public post by a user blocked by the target
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+        target_user.block_user_with_id(user_id=commenter.pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_public_post_commenter_blocked_target(self):
+        """
+        should match the visibility of a comment on a public post by a user who blocked the target
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+        commenter.block_user_with_id(user_id=target_user.pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_public_post_target_blocked_post_creator(self):
+        """
+        should match the visibility of a comment on a public post whose creator is blocked by the target
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+        target_user.block_user_with_id(user_id=post_creator.pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_public_post_reported_by_target(self):
+        """
+        should match the visibility of a comment on a public post reported by the target
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+        target_user.report_post(post=post, category_id=make_moderation_category().pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_deleted_public_post(self):
+        """
+        should match the visibility of a comment on a deleted public post
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+        post.is_deleted = True
+        post.save()
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_encircled_post_target_in_circle(self):
+        """
+        should match the visibility of a comment on an encircled post the target is in the circle of
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        circle = make_circle(creator=post_creator)
+        self._connect_users_in_circle(user=post_creator, other_user=target_user, circle=circle)
+        self._connect_users_in_circle(user=post_creator, other_user=commenter, circle=circle)
+        post = post_creator.create_encircled_post(circles_ids=[circle.pk], text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_encircled_post_target_disconnected(self):
+        """
+        should match the visibility of a comment on an encircled post the target is no longer in the circle of
+        """
+        post_creator, target_user, commenter = make_user(), make_user(), make_user()
+        circle = make_circle(creator=post_creator)
+        self._connect_users_in_circle(user=post_creator, other_user=target_user, circle=circle)
+        self._connect_users_in_circle(user=post_creator, other_user=commenter, circle=circle)
+        post = post_creator.create_encircled_post(circles_ids=[circle.pk], text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+        target_user.disconnect_from_user_with_id(user_id=post_creator.pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_public_community_post(self):
+        """
+        should match the visibility of a comment on a public community post
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_public_community_post_target_left_community(self):
+        """
+        should match the visibility of a comment on a public community post when the target left the community
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+        target_user.leave_community_with_name(community_name=community.name)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_private_community_post_target_left_community(self):
+        """
+        should match the visibility of a comment on a private community post when the target left the community
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_private_community(creator=community_creator)
+
+        for user in [post_creator, target_user, commenter]:
+            community_creator.invite_user_with_username_to_community_with_name(username=user.username,
+                                                                               community_name=community.name)
+
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+        target_user.leave_community_with_name(community_name=community.name)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_community_post_target_banned(self):
+        """
+        should match the visibility of a comment on a community post when the target got banned from the community
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+        community_creator.ban_user_with_username_from_community_with_name(username=target_user.username,
+                                                                          community_name=community.name)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_closed_community_post(self):
+        """
+        should match the visibility of a comment on a closed community post for staff and non staff targets
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+        community_creator.comment_post(post=post, text=make_fake_post_comment_text())
+        community_creator.close_post(post=post)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user, community_creator])
+
+    def test_community_post_target_blocked_staff_commenter(self):
+        """
+        should match the visibility of a comment on a community post by a moderator blocked by the target
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+        community_creator.add_moderator_with_username_to_community_with_name(username=commenter.username,
+                                                                            community_name=community.name)
+        target_user.block_user_with_id(user_id=commenter.pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_community_post_staff_target_blocked_commenter(self):
+        """
+        should match the visibility of a comment on a community post for a moderator who blocked the commenter
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+        community_creator.add_moderator_with_username_to_community_with_name(username=target_user.username,
+                                                                            community_name=community.name)
+        target_user.block_user_with_id(user_id=commenter.pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_community_post_target_blocked_post_creator(self):
+        """
+        should match the visibility of a comment on a community post whose creator is blocked by the target
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+        target_user.block_user_with_id(user_id=post_creator.pk)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def test_approved_community_post(self):
+        """
+        should match the visibility of a comment on a community post whose report got approved
+        """
+        community_creator, post_creator, target_user, commenter = make_user(), make_user(), make_user(), make_user()
+        community = make_community(creator=community_creator)
+        post, target_comment = self._make_community_post_with_target_comment(
+            community=community, post_creator=post_creator, target_user=target_user, commenter=commenter)
+
+        post_reporter = make_user()
+        report_category = make_moderation_category()
+        post_reporter.report_post(post=post, category_id=report_category.pk)
+        moderated_object = ModeratedObject.get_or_create_moderated_object_for_post(post=post,
+                                                                                   category_id=report_category.pk)
+        community_creator.approve_moderated_object(moderated_object=moderated_object)
+
+        self._assert_targets_match_visibility(post=post, commenter=commenter, target_comment=target_comment,
+                                              users=[post_creator, target_user])
+
+    def _assert_targets_match_visibility(self, post, commenter, target_comment, users):
+        """
+        Comments and replies to the target comment as the commenter, and checks the users are targets of both
+        exactly when they can see them
+        """
+        post.refresh_from_db()
+
+        post_comment = PostComment.create_comment(text=make_fake_post_comment_text(), commenter=commenter, post=post)
+        post_comment_reply = PostComment.create_comment(text=make_fake_post_comment_text(), commenter=commenter,
+                                                        post=post, parent_comment=target_comment)
+
+        post_comment_target_users_ids = [target_user.pk for target_user in
+                                         get_post_comment_notification_target_users(post_comment=post_comment)]
+        post_comment_reply_target_users_ids = [
+            target_user.pk for target_user in
+            get_post_comment_reply_notification_target_users(post_comment_reply=post_comment_reply)]
+
+        for user in users:
+            self.assertEqual(user.pk in post_comment_target_users_ids,
+                             user.can_see_post_comment(post_comment=post_comment), msg=user.username)
+            self.assertEqual(user.pk in post_comment_reply_target_users_ids,
+                             user.can_see_post_comment(post_comment=post_comment_reply), msg=user.username)
+
+    def _make_community_post_with_target_comment(self, community, post_creator, target_user, commenter):
+        for user in [post_creator, target_user, commenter]:
+            user.join_community_with_name(community_name=community.name)
+
+        post = post_creator.create_community_post(community_name=community.name, text=make_fake_post_text())
+        target_comment = target_user.comment_post(post=post, text=make_fake_post_comment_text())
+
+        return post, target_comment
+
+    def _connect_users_in_circle(self, user, other_user, circle):
+        user.connect_with_user_with_id(user_id=other_user.pk, circles_ids=[circle.pk])
+        other_user.confirm_connection_with_user_with_id(user_id=user.pk)
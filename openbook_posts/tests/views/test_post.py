@@ -31,7 +31,7 @@ from openbook_common.utils.model_loaders import get_language_model, get_communit
 from openbook_communities.models import Community
 from openbook_hashtags.models import Hashtag
 from openbook_notifications.models import PostUserMentionNotification, Notification
-from openbook_posts.models import Post, PostUserMention, PostMedia
+from openbook_posts.models import Post, PostUserMention, PostMedia, PostMediaContent, PostImage
 from openbook_common.models import ProxyBlacklistedDomain
 
 logger = logging.getLogger(__name__)
@@ -688,6 +688,69 @@ class PostItemAPITests(OpenbookAPITestCase):
 
             self.assertFalse(Post.objects.filter(pk=post.pk).exists())
 
+    def test_delete_image_post_keeps_file_shared_with_other_post(self):
+        """
+        should reuse the file of an image posted twice and only delete it when deleting the last post with it
+        """
+        user = make_user()
+
+        image = Image.new('RGB', (100, 100))
+        tmp_file = tempfile.NamedTemporaryFile(suffix='.jpg')
+        image.save(tmp_file)
+        tmp_file.seek(0)
+
+        post = user.create_public_post(text=make_fake_post_text(), image=ImageFile(tmp_file))
+        tmp_file.seek(0)
+        other_post = user.create_public_post(text=make_fake_post_text(), image=ImageFile(tmp_file))
+
+        self.assertEqual(post.image.image.name, other_post.image.image.name)
+        self.assertEqual(PostMediaContent.objects.get(hash=post.image.hash).references_count, 2)
+
+        file = other_post.image.image.file
+
+        user.delete_post(post=post)
+
+        self.assertTrue(access(file.name, F_OK))
+        self.assertEqual(PostMediaContent.objects.get(hash=other_post.image.hash).references_count, 1)
+
+        user.delete_post(post=other_post)
+
+        self.assertFalse(access(file.name, F_OK))
+
+    def test_delete_image_post_deletes_file_stored_before_content_got_tracked(self):
+        """
+        should delete the own file of an image stored before its content got tracked, even when sharing its hash
+        """
+        user = make_user()
+
+        image = Image.new('RGB', (100, 100))
+        tmp_file = tempfile.NamedTemporaryFile(suffix='.jpg')
+        image.save(tmp_file)
+        tmp_file.seek(0)
+
+        post = user.create_public_post(text=make_fake_post_text(), image=ImageFile(tmp_file))
+        tmp_file.seek(0)
+        legacy_post = user.create_public_post(text=make_fake_post_text())
+        legacy_post_image = PostImage.create_post_image(image=ImageFile(tmp_file), post_id=legacy_post.pk)
+
+        # Counted per image, as the migration tracking the content did
+        PostMediaContent.objects.filter(hash=legacy_post_image.hash).update(references_count=2)
+
+        self.assertEqual(post.image.hash, legacy_post_image.hash)
+        self.assertNotEqual(post.image.image.name, legacy_post_image.image.name)
+
+        file = post.image.image.file
+        legacy_file = legacy_post_image.image.file
+
+        user.delete_post(post=legacy_post)
+
+        self.assertFalse(access(legacy_file.name, F_OK))
+        self.assertTrue(access(file.name, F_OK))
+
+        user.delete_post(post=post)
+
+        self.assertFalse(access(file.name, F_OK))
+
     def test_can_delete_post_of_community_if_mod(self):
         """
         should be able to delete a community post if moderator and return 200
@@ -1806,6 +1869,7 @@ class PostCloseAPITests(OpenbookAPITestCase):
         community_member.enable_new_post_notifications_for_community_with_name(community_name=community.name)
 
         post = community_post_creator.create_community_post(community.name, text=make_fake_post_text())
+        self.run_on_commit_jobs()
 
         url = self._get_url(post)
         headers = make_authentication_headers_for_user(admin)
@@ -1889,6 +1953,7 @@ class PostCloseAPITests(OpenbookAPITestCase):
         community_post_comment_reply_reaction = community_member_reactor.react_to_post_comment(
             post_comment=post_comment,
             emoji_id=emoji.pk)
+        self.run_on_commit_jobs()
 
         url = self._get_url(post)
         headers = make_authentication_headers_for_user(admin)
@@ -1972,6 +2037,7 @@ class PostCloseAPITests(OpenbookAPITestCase):
         community_member.enable_new_post_notifications_for_community_with_name(community_name=community.name)
 
         post = community_post_creator.create_community_post(community.name, text=make_fake_post_text())
+        self.run_on_commit_jobs()
 
         url = self._get_url(post)
         headers = make_authentication_headers_for_user(admin)
@@ -441,6 +441,7 @@ class PostCommentReactionItemAPITests(OpenbookAPITestCase):
 
         post_comment_reaction = reactor.react_to_post_comment_with_id(post.pk, emoji_id=post_comment_reaction_emoji_id,
                                                                       )
+        self.run_on_commit_jobs()
 
         post_comment_reaction_notification = PostCommentReactionNotification.objects.get(
             post_comment_reaction=post_comment_reaction,
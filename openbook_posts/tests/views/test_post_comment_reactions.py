@@ -623,6 +623,7 @@ class PostCommentReactionsAPITests(OpenbookAPITestCase):
 
         url = self._get_url(post=post, post_comment=post_comment)
         self.client.put(url, data, **headers)
+        self.run_on_commit_jobs()
 
         self.assertTrue(PostCommentReactionNotification.objects.filter(
             post_comment_reaction__emoji__id=post_comment_reaction_emoji_id,
@@ -649,6 +650,7 @@ class PostCommentReactionsAPITests(OpenbookAPITestCase):
 
         url = self._get_url(post=post, post_comment=post_comment)
         self.client.put(url, data, **headers)
+        self.run_on_commit_jobs()
 
         post_comment_reaction = PostCommentReaction.objects.get(
             reactor_id=reactor.pk,
@@ -679,6 +681,7 @@ class PostCommentReactionsAPITests(OpenbookAPITestCase):
 
         url = self._get_url(post=post, post_comment=post_comment)
         self.client.put(url, data, **headers)
+        self.run_on_commit_jobs()
 
         send_post_comment_reaction_push_notification_call.assert_not_called()
 
@@ -704,6 +707,7 @@ class PostCommentReactionsAPITests(OpenbookAPITestCase):
 
         url = self._get_url(post=post, post_comment=post_comment)
         self.client.put(url, data, **headers)
+        self.run_on_commit_jobs()
 
         send_post_comment_reaction_push_notification_call.assert_not_called()
 
@@ -725,6 +729,7 @@ class PostCommentReactionsAPITests(OpenbookAPITestCase):
 
         url = self._get_url(post=post, post_comment=post_comment)
         self.client.put(url, data, **headers)
+        self.run_on_commit_jobs()
 
         self.assertFalse(PostCommentReactionNotification.objects.filter(
             post_comment_reaction__emoji__id=post_comment_reaction_emoji_id,
@@ -1,5 +1,7 @@
 # Create your tests here.
 import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from faker import Faker
 from rest_framework import status
@@ -577,6 +579,40 @@ class PostCommentsAPITests(OpenbookAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(PostComment.objects.filter(post_id=post.pk, text=post_comment_text).count() == 1)
 
+    def test_commenting_increments_post_comments_count(self):
+        """
+        should increment the comments count of the post when commenting
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user)
+        post = user.create_public_post(text=make_fake_post_text())
+
+        data = self._get_create_post_comment_request_data(make_fake_post_comment_text())
+
+        url = self._get_url(post)
+        response = self.client.put(url, data, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_soft_deleting_comment_decrements_post_comments_count(self):
+        """
+        should decrement the comments count of the post when a comment gets soft deleted
+        """
+        user = make_user()
+        post = user.create_public_post(text=make_fake_post_text())
+
+        post_comment = user.comment_post_with_id(post_id=post.pk, text=make_fake_post_comment_text())
+        user.comment_post_with_id(post_id=post.pk, text=make_fake_post_comment_text())
+
+        post_comment.soft_delete()
+
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.comments_count, post.count_comments())
+
     def test_commenting_detects_mentions(self):
         """
         should be able to comment with a mention and detect it once
@@ -1615,6 +1651,32 @@ class PostCommentsAPITests(OpenbookAPITestCase):
         self.assertFalse(PostCommentReplyNotification.objects.filter(post_comment__text=comment_text,
                                                                      notification__owner=user).exists())
 
+    def test_commenting_in_post_takes_the_same_queries_for_any_amount_of_commenters(self):
+        """
+        should resolve the notification targets of a comment with a fixed amount of queries
+        """
+        post_creator = make_user()
+        post = post_creator.create_public_post(text=make_fake_post_text())
+
+        queries_counts = []
+
+        for i in range(0, 2):
+            for j in range(0, 3):
+                commenter = make_user()
+                commenter.comment_post(post=post, text=make_fake_post_comment_text())
+                commenter.mute_post_with_id(post_id=post.pk)
+
+            user = make_user()
+            user.comment_post(post=post, text=make_fake_post_comment_text())
+
+            with CaptureQueriesContext(connection) as context:
+                post_comment = user.comment_post(post=post, text=make_fake_post_comment_text())
+
+            self.assertEqual(PostCommentNotification.objects.filter(post_comment=post_comment).count(), 4 * (i + 1))
+            queries_counts.append(len(context.captured_queries))
+
+        self.assertEqual(queries_counts[0], queries_counts[1])
+
     def test_should_retrieve_all_comments_on_public_post(self):
         """
         should retrieve all comments on public post
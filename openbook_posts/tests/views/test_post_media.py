@@ -1,17 +1,26 @@
 # Create your tests here.
+import hashlib
 import json
+import os
 import tempfile
+from unittest import mock
 
 from PIL import Image
 from django.conf import settings
 from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from django.urls import reverse
 from django_rq import get_worker
 from faker import Faker
 from rest_framework import status
 from rq import SimpleWorker
+from video_encoding import tasks
+from video_encoding.models import Format
+from video_encoding.progress import ProgressReporter
 
 from openbook_common.tests.models import OpenbookAPITestCase
+from openbook_common.utils.helpers import hash_and_spool_file
 import random
 
 import logging
@@ -19,7 +28,7 @@ import logging
 from openbook_common.tests.helpers import make_authentication_headers_for_user, make_fake_post_text, \
     make_user, get_test_videos, get_test_image, get_test_video, make_circle, make_community, get_test_images
 from openbook_communities.models import Community
-from openbook_posts.models import PostMedia, Post
+from openbook_posts.models import PostMedia, Post, PostMediaContent, PostVideo
 
 logger = logging.getLogger(__name__)
 fake = Faker()
@@ -189,7 +198,10 @@ class PostMediaAPITests(OpenbookAPITestCase):
         user = make_user()
         headers = make_authentication_headers_for_user(user=user)
 
-        for test_video in get_test_videos():
+        # GIFs are only converted to videos when processing the post media
+        test_videos = [test_video for test_video in get_test_videos() if not test_video['path'].endswith('.gif')]
+
+        for test_video in test_videos:
             with open(test_video['path'], 'rb') as file:
                 post = user.create_public_post(is_draft=True)
 
@@ -217,6 +229,260 @@ class PostMediaAPITests(OpenbookAPITestCase):
                 self.assertIsNotNone(post.media_width)
                 self.assertIsNotNone(post.media_height)
 
+    def test_add_first_media_gif_converts_it_when_processing_media(self):
+        """
+        should store a media gif as it is and convert it, creating the post media_thumbnail and dimensions, when
+        processing the post media
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user=user)
+
+        test_gifs = [test_video for test_video in get_test_videos() if test_video['path'].endswith('.gif')]
+
+        for test_gif in test_gifs:
+            with open(test_gif['path'], 'rb') as file:
+                post = user.create_public_post(is_draft=True)
+
+                response = self.client.put(self._get_url(post=post), {'file': file}, **headers, format='multipart')
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+                post.refresh_from_db()
+
+                post_video = post.get_first_media().content_object
+
+                self.assertTrue(post_video.needs_conversion)
+                self.assertFalse(post.media_thumbnail)
+
+                user.publish_post(post=post)
+
+                post.refresh_from_db()
+
+                self.assertEqual(post.status, Post.STATUS_PROCESSING)
+
+                get_worker('high', worker_class=SimpleWorker).work(burst=True)
+
+                post.refresh_from_db()
+                post_video.refresh_from_db()
+
+                self.assertEqual(post.status, Post.STATUS_PUBLISHED)
+                self.assertFalse(post_video.needs_conversion)
+                self.assertTrue(post_video.file.name.endswith('.mp4'))
+                self.assertIsNotNone(post_video.thumbnail_width)
+
+                self.assertTrue(post.media_thumbnail)
+                self.assertEqual(post.media_width, post_video.width)
+                self.assertEqual(post.media_height, post_video.height)
+
+    def test_add_same_media_gif_twice_converts_it_once(self):
+        """
+        should store a gif uploaded to two posts before processing them once converted, and only delete it with the
+        last post
+        """
+        user = make_user()
+
+        test_gif = [test_video for test_video in get_test_videos() if test_video['path'].endswith('.gif')][0]
+
+        posts = []
+
+        for i in range(2):
+            with open(test_gif['path'], 'rb') as file:
+                post = user.create_public_post(is_draft=True)
+                user.add_media_to_post(file=File(file), post=post)
+                posts.append(post)
+
+        for post in posts:
+            user.publish_post(post=post)
+
+        get_worker('high', worker_class=SimpleWorker).work(burst=True)
+
+        post_videos = []
+
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.status, Post.STATUS_PUBLISHED)
+            post_videos.append(post.get_first_media().content_object)
+
+        post_video, other_post_video = post_videos
+
+        self.assertEqual(post_video.file.name, other_post_video.file.name)
+        self.assertEqual(PostMediaContent.objects.get(hash=post_video.hash).references_count, 2)
+
+        file_path = post_video.file.path
+
+        user.delete_post(post=posts[0])
+
+        self.assertTrue(os.access(file_path, os.F_OK))
+
+        user.delete_post(post=posts[1])
+
+        self.assertFalse(os.access(file_path, os.F_OK))
+
+    def test_convert_gif_reuses_video_of_same_gif_converted_meanwhile(self):
+        """
+        should reuse the video of the same gif when another post got it converted while converting it
+        """
+        user = make_user()
+
+        test_gif = [test_video for test_video in get_test_videos() if test_video['path'].endswith('.gif')][0]
+
+        post_videos = []
+
+        for i in range(2):
+            with open(test_gif['path'], 'rb') as file:
+                post = user.create_public_post(is_draft=True)
+                user.add_media_to_post(file=File(file), post=post)
+                post_videos.append(post.get_first_media().content_object)
+
+        post_video, other_post_video = post_videos
+        convert_gif_to_mp4 = PostVideo._convert_gif_to_mp4
+
+        def convert_gif_to_mp4_while_other_post_converts_it(post_video_to_convert):
+            converted_paths = convert_gif_to_mp4(post_video_to_convert)
+            if post_video_to_convert.pk == post_video.pk:
+                other_post_video.convert_to_mp4()
+            return converted_paths
+
+        with mock.patch.object(PostVideo, '_convert_gif_to_mp4', autospec=True,
+                               side_effect=convert_gif_to_mp4_while_other_post_converts_it):
+            post_video.convert_to_mp4()
+
+        post_video.refresh_from_db()
+        other_post_video.refresh_from_db()
+
+        self.assertFalse(post_video.needs_conversion)
+        self.assertEqual(post_video.file.name, other_post_video.file.name)
+        self.assertEqual(PostMediaContent.objects.get(hash=post_video.hash).references_count, 2)
+
+    def test_process_media_gif_conversion_failure_moves_post_to_draft(self):
+        """
+        should move the post back to draft when its gif can not be converted when processing the post media
+        """
+        user = make_user()
+
+        test_gif = [test_video for test_video in get_test_videos() if test_video['path'].endswith('.gif')][0]
+
+        with open(test_gif['path'], 'rb') as file:
+            post = user.create_public_post(is_draft=True)
+            user.add_media_to_post(file=File(file), post=post)
+
+        user.publish_post(post=post)
+
+        with mock.patch('openbook_posts.models.ffmpy.FFmpeg', side_effect=Exception('Conversion failed')):
+            get_worker('high', worker_class=SimpleWorker).work(burst=True)
+
+        post.refresh_from_db()
+        post_video = post.get_first_media().content_object
+
+        self.assertEqual(post.status, Post.STATUS_DRAFT)
+        self.assertTrue(post_video.needs_conversion)
+        self.assertTrue(post_video.file.name.endswith('.gif'))
+
+    def test_add_in_memory_media_video_hashes_it_and_removes_spooled_file(self):
+        """
+        should hash a media video uploaded in memory and remove the file it got spooled to
+        """
+        user = make_user()
+
+        test_video = get_test_videos()[0]
+
+        with open(test_video['path'], 'rb') as file:
+            video_content = file.read()
+
+        video = SimpleUploadedFile('test_video.mp4', video_content, content_type='video/mp4')
+
+        draft_post = user.create_public_post(is_draft=True)
+
+        spooled_files_paths = []
+
+        def record_spooled_file_path(**kwargs):
+            hash, spooled_file_path = hash_and_spool_file(**kwargs)
+            spooled_files_paths.append(spooled_file_path)
+            return hash, spooled_file_path
+
+        with mock.patch('openbook_posts.models.hash_and_spool_file', side_effect=record_spooled_file_path):
+            user.add_media_to_post(file=video, post=draft_post)
+
+        self.assertEqual(len(spooled_files_paths), 1)
+        self.assertIsNotNone(spooled_files_paths[0])
+        self.assertFalse(os.path.exists(spooled_files_paths[0]))
+
+        post_video = draft_post.get_first_media().content_object
+
+        self.assertEqual(post_video.hash, hashlib.sha256(video_content).hexdigest())
+        self.assertIsNotNone(post_video.thumbnail)
+
+    def test_encodes_media_video_formats_in_parallel(self):
+        """
+        should encode all the formats of a media video at once within the cpu budget and report every format
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user=user)
+
+        test_video = get_test_videos()[0]
+
+        with open(test_video['path'], 'rb') as file:
+            post = user.create_public_post(is_draft=True)
+            self.client.put(self._get_url(post=post), {'file': file}, **headers, format='multipart')
+
+        post_video = post.get_first_media().content_object
+
+        video_encoding_formats = {
+            'FFmpeg': [
+                {
+                    'name': 'mp4_%d' % height,
+                    'extension': 'mp4',
+                    'params': ['-codec:v', 'libx264', '-preset', 'ultrafast', '-vf', 'scale=-2:%d' % height,
+                               '-codec:a', 'aac'],
+                } for height in (144, 240)
+            ]
+        }
+
+        with override_settings(VIDEO_ENCODING_FORMATS=video_encoding_formats, VIDEO_ENCODING_CPU_BUDGET=2):
+            encoding_reports = tasks.convert_video(post_video.file, force=True)
+
+        self.assertEqual(sorted(report.format for report in encoding_reports), ['mp4_144', 'mp4_240'])
+
+        for report in encoding_reports:
+            self.assertTrue(report.succeeded)
+            self.assertGreater(report.wall_seconds, 0)
+            self.assertGreater(report.cpu_seconds, 0)
+
+        self.assertEqual(sorted(post_video.format_set.filter(format__in=['mp4_144', 'mp4_240']).values_list(
+            'format', 'progress')), [('mp4_144', 100), ('mp4_240', 100)])
+
+    def test_persists_only_milestones_of_media_video_encoding_progress(self):
+        """
+        should keep the live progress of a media video encoding in the cache and only persist its milestones
+        """
+        user = make_user()
+        headers = make_authentication_headers_for_user(user=user)
+
+        test_video = get_test_videos()[0]
+
+        with open(test_video['path'], 'rb') as file:
+            post = user.create_public_post(is_draft=True)
+            self.client.put(self._get_url(post=post), {'file': file}, **headers, format='multipart')
+
+        post_video = post.get_first_media().content_object
+
+        video_format = post_video.format_set.create(field_name='file', format='mp4_test')
+        video_format.reset_progress()
+
+        progress_reporter = ProgressReporter(video_format)
+
+        with mock.patch.object(Format, 'save') as mock_save:
+            for tick in range(1, 1000):
+                progress_reporter.report(tick / 1000)
+
+        self.assertEqual(mock_save.call_count, 3)
+        self.assertEqual(video_format.progress, 75)
+        self.assertEqual(video_format.get_live_progress(), 99)
+
+        progress_reporter.finish()
+
+        self.assertEqual(video_format.get_live_progress(), 75)
+
     def test_add_first_media_image_creates_media_thumbnail_and_dimensions(self):
         """
         should create a post media_thumbnail and dimensions when adding the first media image
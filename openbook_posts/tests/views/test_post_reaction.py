@@ -418,6 +418,7 @@ class PostReactionItemAPITests(OpenbookAPITestCase):
 
         post_reaction = reactor.react_to_post_with_id(post.pk, emoji_id=post_reaction_emoji_id,
                                                          )
+        self.run_on_commit_jobs()
 
         post_reaction_notification = PostReactionNotification.objects.get(post_reaction=post_reaction,
                                                                           notification__owner=user)
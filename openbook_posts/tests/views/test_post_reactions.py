@@ -557,6 +557,7 @@ class PostReactionsAPITests(OpenbookAPITestCase):
 
         url = self._get_url(post)
         self.client.put(url, data, **headers)
+        self.run_on_commit_jobs()
 
         self.assertTrue(PostReactionNotification.objects.filter(post_reaction__emoji__id=post_reaction_emoji_id,
                                                                 notification__owner=user).exists())
@@ -578,6 +579,7 @@ class PostReactionsAPITests(OpenbookAPITestCase):
 
         url = self._get_url(post)
         self.client.put(url, data, **headers)
+        self.run_on_commit_jobs()
 
         self.assertFalse(PostReactionNotification.objects.filter(post_reaction__emoji__id=post_reaction_emoji_id,
                                                                  notification__owner=user).exists())
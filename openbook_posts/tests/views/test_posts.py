@@ -6,6 +6,7 @@ from PIL import Image
 from django.conf import settings
 from django.core.files import File
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from django.urls import reverse
 from django_rq import get_worker
 from faker import Faker
@@ -28,13 +29,17 @@ from openbook_common.tests.helpers import make_user, make_users, make_fake_post_
     get_test_usernames, get_test_videos, get_test_image, make_global_moderator, \
     make_fake_post_comment_text, make_reactions_emoji_group, make_emoji, make_hashtag_name, make_hashtag, \
     get_test_valid_hashtags, get_test_invalid_hashtags
+from openbook_common.utils.counters import reconcile_counters
 from openbook_common.utils.helpers import sha256sum
+from openbook_common.utils.pagination import NEXT_CURSOR_HEADER
 from openbook_communities.models import Community
 from openbook_hashtags.models import Hashtag
 from openbook_lists.models import List
 from openbook_moderation.models import ModeratedObject
 from openbook_notifications.models import PostUserMentionNotification, Notification, UserNewPostNotification
-from openbook_posts.jobs import curate_top_posts, curate_trending_posts
+from openbook_posts import timelines, top_posts_curation, trending
+from openbook_posts.jobs import curate_top_posts, curate_trending_posts, fan_out_post_to_timelines, \
+    notify_post_subscribers
 from openbook_posts.models import Post, PostUserMention, PostMedia, TopPost, TrendingPost
 
 logger = logging.getLogger(__name__)
@@ -873,6 +878,9 @@ class PostsAPITests(OpenbookAPITestCase):
 
                 response_post_id = response_post.get('id')
 
+                # GIFs get thumbnailed when processing the post media
+                get_worker('high', worker_class=SimpleWorker).work(burst=True)
+
                 media = PostMedia.objects.get(post_id=response_post_id, type=PostMedia.MEDIA_TYPE_VIDEO)
                 self.assertIsNotNone(media.content_object.thumbnail)
                 self.assertIsNotNone(media.content_object.thumbnail_width)
@@ -3274,6 +3282,71 @@ class PostsAPITests(OpenbookAPITestCase):
         comments_count = response_post['comments_count']
         self.assertTrue(comments_count, 2)
 
+    def test_comment_counts_on_posts_should_not_include_soft_deleted_comments(self):
+        """
+        should not count soft deleted comments in the comment counts on posts
+        """
+        user = make_user()
+        commenter = make_user()
+
+        post = user.create_public_post(text=make_fake_post_text())
+
+        user.comment_post_with_id(post_id=post.pk, text=make_fake_post_comment_text())
+        post_comment = commenter.comment_post_with_id(post_id=post.pk, text=make_fake_post_comment_text())
+        post_comment.soft_delete()
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_posts = json.loads(response.content)
+
+        self.assertEqual(1, len(response_posts))
+
+        response_post = response_posts[0]
+        self.assertEqual(response_post['comments_count'], 1)
+        self.assertEqual(user.get_comments_count_for_post(post=post), 1)
+
+    def test_reactions_emoji_counts_on_posts_should_not_include_blocked_users(self):
+        """
+        should not count the reactions of blocked users in the reactions emoji counts on posts
+        """
+        user = make_user()
+        reactor = make_user()
+        blocked_user = make_user()
+
+        emoji_group = make_reactions_emoji_group()
+        emoji = make_emoji(group=emoji_group)
+
+        post = user.create_public_post(text=make_fake_post_text())
+
+        user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
+        reactor.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
+        blocked_user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
+
+        user.block_user_with_id(user_id=blocked_user.pk)
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_posts = json.loads(response.content)
+
+        self.assertEqual(1, len(response_posts))
+
+        response_post = response_posts[0]
+        reactions_emoji_counts = response_post['reactions_emoji_counts']
+        self.assertEqual(len(reactions_emoji_counts), 1)
+        self.assertEqual(reactions_emoji_counts[0]['emoji']['id'], emoji.pk)
+        self.assertEqual(reactions_emoji_counts[0]['count'], 2)
+        self.assertEqual(response_post['reaction']['emoji']['id'], emoji.pk)
+
     def test_cant_retrieve_own_draft_posts_by_username(self):
         """
         should not be able to retrieve own draft posts by username
@@ -3679,6 +3752,7 @@ class PostsAPITests(OpenbookAPITestCase):
 
         url = self._get_url()
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
 
         user_notifications_subscription = UserNotificationsSubscription.objects.get(subscriber=subscriber, user=user)
 
@@ -3702,6 +3776,7 @@ class PostsAPITests(OpenbookAPITestCase):
 
         url = self._get_url()
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
         response_post = json.loads(response.content)
         post = Post.objects.get(id=response_post['id'])
 
@@ -3725,6 +3800,7 @@ class PostsAPITests(OpenbookAPITestCase):
 
         url = self._get_url()
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
         response_post = json.loads(response.content)
         post = Post.objects.get(id=response_post['id'])
 
@@ -3758,6 +3834,7 @@ class PostsAPITests(OpenbookAPITestCase):
 
         url = self._get_url()
         response = self.client.put(url, data, **headers, format='multipart')
+        self.run_on_commit_jobs()
 
         other_subscriber_notifications_subscription = UserNotificationsSubscription.objects.get(
             subscriber=other_subscriber, user=post_creator)
@@ -3771,6 +3848,314 @@ class PostsAPITests(OpenbookAPITestCase):
         self.assertTrue(UserNewPostNotification.objects.filter(
             user_notifications_subscription=subscriber_notifications_subscription).count() == 1)
 
+    def test_notify_post_subscribers_job_resumes_without_notifying_twice(self):
+        """
+        should not notify subscribers again when the post subscribers job gets run again
+        """
+        user = make_user()
+        subscriber = make_user()
+
+        subscriber.enable_new_post_notifications_for_user_with_username(user.username)
+
+        post = user.create_public_post(text=make_fake_post_text())
+        self.run_on_commit_jobs()
+
+        notify_post_subscribers(post_id=post.pk)
+
+        self.assertEqual(UserNewPostNotification.objects.filter(post=post).count(), 1)
+        self.assertEqual(Notification.objects.filter(owner=subscriber,
+                                                     notification_type=Notification.USER_NEW_POST).count(), 1)
+
+    def _get_url(self):
+        return reverse('posts')
+
+
+class ReconcileCountersTests(OpenbookAPITestCase):
+    """
+    reconcile_counters
+    """
+
+    fixtures = [
+        'openbook_circles/fixtures/circles.json'
+    ]
+
+    def test_reconciles_drifted_counters(self):
+        """
+        should set the drifted counters back to the counts of their source tables
+        """
+        user = make_user()
+        follower = make_user()
+        community = make_community(creator=user)
+
+        follower.follow_user_with_id(user_id=user.pk)
+        post = user.create_public_post(text=make_fake_post_text())
+        follower.comment_post_with_id(post_id=post.pk, text=make_fake_post_comment_text())
+
+        Post.objects.filter(pk=post.pk).update(comments_count=7)
+        User.objects.filter(pk=user.pk).update(followers_count=0, posts_count=9)
+        Community.objects.filter(pk=community.pk).update(members_count=3)
+
+        reconcile_counters(batch_size=1)
+
+        post.refresh_from_db()
+        user.refresh_from_db()
+        community.refresh_from_db()
+
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(user.followers_count, 1)
+        self.assertEqual(user.posts_count, 1)
+        self.assertEqual(community.members_count, 1)
+
+    def test_keeps_counters_in_sync_with_source_tables(self):
+        """
+        should leave nothing to reconcile when counters are maintained by the models
+        """
+        user = make_user()
+        follower = make_user()
+        community = make_community(creator=user)
+
+        follower.follow_user_with_id(user_id=user.pk)
+        follower.join_community_with_name(community_name=community.name)
+        post = user.create_public_post(text=make_fake_post_text())
+        follower.comment_post_with_id(post_id=post.pk, text=make_fake_post_comment_text())
+        follower.unfollow_user_with_id(user_id=user.pk)
+
+        fixed_counters = reconcile_counters()
+
+        self.assertEqual(sum(fixed_counters.values()), 0)
+
+
+class PostExclusionsPostsAPITests(OpenbookAPITestCase):
+    """
+    PostsAPI with already cached post exclusions
+    """
+
+    fixtures = [
+        'openbook_circles/fixtures/circles.json'
+    ]
+
+    def test_cant_retrieve_community_posts_of_user_blocked_after_exclusions_were_cached(self):
+        """
+        should not be able to retrieve the community posts of a user blocked after the exclusions were cached
+        """
+        user = make_user()
+        community = make_community()
+        post_creator = make_user()
+
+        user.join_community_with_name(community_name=community.name)
+        post_creator.join_community_with_name(community_name=community.name)
+        post_creator.create_community_post(community_name=community.name, text=make_fake_post_text())
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(1, len(json.loads(response.content)))
+
+        user.block_user_with_id(user_id=post_creator.pk)
+
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(0, len(json.loads(response.content)))
+
+    def test_cant_retrieve_posts_reported_after_exclusions_were_cached(self):
+        """
+        should not be able to retrieve a post reported after the exclusions were cached
+        """
+        user = make_user()
+        following_user = make_user()
+        user.follow_user_with_id(user_id=following_user.pk)
+
+        post = following_user.create_public_post(text=make_fake_post_text())
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(1, len(json.loads(response.content)))
+
+        user.report_post(post=post, category_id=make_moderation_category().pk)
+
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(0, len(json.loads(response.content)))
+
+    def _get_url(self):
+        return reverse('posts')
+
+
+@override_settings(FEATURE_TIMELINES_STORE_ENABLED=True)
+class TimelinesStorePostsAPITests(OpenbookAPITestCase):
+    """
+    PostsAPI with the materialized timelines store enabled
+    """
+
+    fixtures = [
+        'openbook_circles/fixtures/circles.json',
+        'openbook_common/fixtures/languages.json'
+    ]
+
+    def setUp(self):
+        super(TimelinesStorePostsAPITests, self).setUp()
+        timelines.delete_all_timelines()
+
+    def test_rebuilds_cold_timeline(self):
+        """
+        should rebuild a cold timeline from the timeline query and retrieve its posts
+        """
+        user = make_user()
+        following_user = make_user()
+        user.follow_user_with_id(user_id=following_user.pk)
+
+        following_user_post = following_user.create_public_post(text=make_fake_post_text())
+
+        self.assertFalse(timelines.is_timeline_warm_for_user_with_id(user_id=user.pk))
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_posts = json.loads(response.content)
+
+        self.assertEqual(1, len(response_posts))
+        self.assertEqual(following_user_post.pk, response_posts[0]['id'])
+        self.assertTrue(timelines.is_timeline_warm_for_user_with_id(user_id=user.pk))
+
+    def test_fans_out_published_post_to_warm_timelines(self):
+        """
+        should add a published post to the warm timelines of the creator followers
+        """
+        user = make_user()
+        following_user = make_user()
+        user.follow_user_with_id(user_id=following_user.pk)
+
+        user.rebuild_timeline()
+
+        following_user_post = following_user.create_public_post(text=make_fake_post_text())
+
+        fan_out_post_to_timelines(post_id=following_user_post.pk)
+
+        self.assertIn(following_user_post.pk, timelines.get_timeline_post_ids_for_user_with_id(user_id=user.pk))
+
+    def test_does_not_fan_out_encircled_post_to_non_circle_followers(self):
+        """
+        should not add an encircled post to the timelines of followers outside of the circle
+        """
+        user = make_user()
+        following_user = make_user()
+        user.follow_user_with_id(user_id=following_user.pk)
+
+        user.rebuild_timeline()
+
+        circle = make_circle(creator=following_user)
+        following_user_post = following_user.create_encircled_post(text=make_fake_post_text(),
+                                                                   circles_ids=[circle.pk])
+
+        fan_out_post_to_timelines(post_id=following_user_post.pk)
+
+        self.assertNotIn(following_user_post.pk,
+                         timelines.get_timeline_post_ids_for_user_with_id(user_id=user.pk))
+
+    def test_unfollow_removes_posts_from_timeline(self):
+        """
+        should remove the unfollowed user posts from the timeline
+        """
+        user = make_user()
+        following_user = make_user()
+        user.follow_user_with_id(user_id=following_user.pk)
+
+        following_user_post = following_user.create_public_post(text=make_fake_post_text())
+
+        user.rebuild_timeline()
+
+        self.assertIn(following_user_post.pk, timelines.get_timeline_post_ids_for_user_with_id(user_id=user.pk))
+
+        user.unfollow_user_with_id(user_id=following_user.pk)
+
+        self.assertNotIn(following_user_post.pk,
+                         timelines.get_timeline_post_ids_for_user_with_id(user_id=user.pk))
+
+    def test_leave_community_removes_community_posts_from_timeline(self):
+        """
+        should remove the community posts from the timeline when leaving the community
+        """
+        user = make_user()
+        community_creator = make_user()
+        community = make_community(creator=community_creator)
+        user.join_community_with_name(community_name=community.name)
+
+        community_post = community_creator.create_community_post(text=make_fake_post_text(),
+                                                                 community_name=community.name)
+
+        user.rebuild_timeline()
+
+        self.assertIn(community_post.pk, timelines.get_timeline_post_ids_for_user_with_id(user_id=user.pk))
+
+        user.leave_community_with_name(community_name=community.name)
+
+        self.assertNotIn(community_post.pk, timelines.get_timeline_post_ids_for_user_with_id(user_id=user.pk))
+
+    def test_cant_retrieve_soft_deleted_post_from_warm_timeline(self):
+        """
+        should not retrieve a post from a warm timeline after it got soft deleted
+        """
+        user = make_user()
+        following_user = make_user()
+        user.follow_user_with_id(user_id=following_user.pk)
+
+        following_user_post = following_user.create_public_post(text=make_fake_post_text())
+
+        user.rebuild_timeline()
+
+        following_user_post.soft_delete()
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_posts = json.loads(response.content)
+
+        self.assertEqual(0, len(response_posts))
+
+    def test_skips_invisible_posts_of_warm_timeline_and_keeps_paginating(self):
+        """
+        should keep reading the timeline past the posts that became invisible, remove them from it, and still return
+        a next cursor
+        """
+        user = make_user()
+        following_user = make_user()
+        user.follow_user_with_id(user_id=following_user.pk)
+
+        posts = [following_user.create_public_post(text=make_fake_post_text()) for i in range(4)]
+
+        user.rebuild_timeline()
+
+        report_category = make_moderation_category()
+        for reported_post in posts[2:]:
+            user.report_post(post=reported_post, category_id=report_category.pk)
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+        response = self.client.get(url, {'count': 1}, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_posts = json.loads(response.content)
+
+        self.assertEqual([posts[1].pk], [response_post['id'] for response_post in response_posts])
+        self.assertIn(NEXT_CURSOR_HEADER, response)
+
+        timeline_post_ids = timelines.get_timeline_post_ids_for_user_with_id(user_id=user.pk)
+
+        for reported_post in posts[2:]:
+            self.assertNotIn(reported_post.pk, timeline_post_ids)
+
     def _get_url(self):
         return reverse('posts')
 
@@ -3784,6 +4169,98 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         'openbook_circles/fixtures/circles.json'
     ]
 
+    def setUp(self):
+        super(TrendingPostsAPITests, self).setUp()
+        trending.delete_all_trending_buckets()
+
+    def test_ranks_posts_by_trending_score(self):
+        """
+        should rank the posts with more recent activity first
+        """
+        user = make_user()
+        commenter = make_user()
+        community = make_community(creator=user)
+        commenter.join_community_with_name(community_name=community.name)
+
+        active_post = user.create_community_post(community_name=community.name, text=make_fake_post_text())
+        newer_post = user.create_community_post(community_name=community.name, text=make_fake_post_text())
+
+        emoji_group = make_reactions_emoji_group()
+        emoji = make_emoji(group=emoji_group)
+
+        user.react_to_post_with_id(post_id=active_post.pk, emoji_id=emoji.pk)
+        user.react_to_post_with_id(post_id=newer_post.pk, emoji_id=emoji.pk)
+        commenter.comment_post_with_id(post_id=active_post.pk, text=make_fake_post_comment_text())
+
+        self.run_on_commit_jobs()
+
+        curate_trending_posts()
+
+        url = self._get_url()
+        headers = make_authentication_headers_for_user(user)
+
+        response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_posts = json.loads(response.content)
+
+        self.assertEqual(2, len(response_posts))
+        self.assertEqual(response_posts[0]['post']['id'], active_post.pk)
+        self.assertEqual(response_posts[1]['post']['id'], newer_post.pk)
+
+    def test_counts_reactions_once_per_reactor(self):
+        """
+        should not raise the trending score of a post when reacting to it again after unreacting
+        """
+        user = make_user()
+        community = make_community(creator=user)
+
+        post = user.create_community_post(community_name=community.name, text=make_fake_post_text())
+        other_post = user.create_community_post(community_name=community.name, text=make_fake_post_text())
+
+        emoji_group = make_reactions_emoji_group()
+        emoji = make_emoji(group=emoji_group)
+
+        for i in range(0, 3):
+            post_reaction = user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
+            user.delete_reaction_with_id_for_post_with_id(post_reaction_id=post_reaction.pk, post_id=post.pk)
+
+        user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
+        user.react_to_post_with_id(post_id=other_post.pk, emoji_id=emoji.pk)
+
+        self.run_on_commit_jobs()
+
+        trending_scores = trending.get_trending_scores()
+
+        self.assertAlmostEqual(trending_scores[post.pk], trending_scores[other_post.pk])
+
+    def test_curating_replaces_the_previous_trending_posts(self):
+        """
+        should replace the whole set of trending posts when curating
+        """
+        user = make_user()
+        community = make_community(creator=user)
+
+        post = user.create_community_post(community_name=community.name, text=make_fake_post_text())
+
+        emoji_group = make_reactions_emoji_group()
+        emoji = make_emoji(group=emoji_group)
+
+        user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
+
+        self.run_on_commit_jobs()
+
+        curate_trending_posts()
+
+        post.soft_delete()
+
+        self.run_on_commit_jobs()
+
+        curate_trending_posts()
+
+        self.assertFalse(TrendingPost.objects.filter(post__id=post.pk).exists())
+
     def test_displays_community_posts_only(self):
         """
         should display community posts only and return 200
@@ -3802,6 +4279,8 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         # react once, min required while testing
         user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
 
+        self.run_on_commit_jobs()
+
         curate_trending_posts()
 
         url = self._get_url()
@@ -3831,6 +4310,8 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
 
         headers = make_authentication_headers_for_user(user)
 
+        self.run_on_commit_jobs()
+
         curate_trending_posts()
 
         url = self._get_url()
@@ -3866,6 +4347,8 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
         user.react_to_post_with_id(post_id=post_two.pk, emoji_id=emoji.pk)
 
+        self.run_on_commit_jobs()
+
         curate_trending_posts()
 
         url = self._get_url()
@@ -3907,6 +4390,8 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
 
         headers = make_authentication_headers_for_user(user)
 
+        self.run_on_commit_jobs()
+
         curate_trending_posts()
 
         url = self._get_url()
@@ -3939,6 +4424,8 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
 
         user.block_user_with_id(user_id=user_to_retrieve_posts_from.pk)
 
+        self.run_on_commit_jobs()
+
         curate_trending_posts()
 
         url = self._get_url()
@@ -3972,6 +4459,8 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
 
         user_to_retrieve_posts_from.block_user_with_id(user_id=user.pk)
 
+        self.run_on_commit_jobs()
+
         curate_trending_posts()
 
         url = self._get_url()
@@ -4006,6 +4495,8 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         # block user
         user.block_user_with_id(user_id=community_owner.pk)
 
+        self.run_on_commit_jobs()
+
         curate_trending_posts()
 
         url = self._get_url()
@@ -4041,6 +4532,7 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
 
         # curate trending posts
+        self.run_on_commit_jobs()
         curate_trending_posts()
 
         headers = make_authentication_headers_for_user(user)
@@ -4074,6 +4566,7 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
 
         # curate trending posts
+        self.run_on_commit_jobs()
         curate_trending_posts()
 
         headers = make_authentication_headers_for_user(user)
@@ -4107,6 +4600,7 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         user.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk)
 
         # curate trending posts
+        self.run_on_commit_jobs()
         curate_trending_posts()
 
         community.type = Community.COMMUNITY_TYPE_PRIVATE
@@ -4146,6 +4640,7 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         user.react_to_post_with_id(post_id=post_two.pk, emoji_id=emoji.pk)
 
         # curate trending posts
+        self.run_on_commit_jobs()
         curate_trending_posts()
 
         post_two.is_closed = True
@@ -4192,6 +4687,7 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         user.react_to_post_with_id(post_id=post_two.pk, emoji_id=emoji.pk)
 
         # curate trending posts
+        self.run_on_commit_jobs()
         curate_trending_posts()
 
         headers = make_authentication_headers_for_user(user)
@@ -4238,6 +4734,7 @@ class TrendingPostsAPITests(OpenbookAPITestCase):
         user.react_to_post_with_id(post_id=post_two.pk, emoji_id=emoji.pk)
 
         # curate trending posts
+        self.run_on_commit_jobs()
         curate_trending_posts()
 
         user.approve_moderated_object(moderated_object=moderated_object)
@@ -4267,6 +4764,10 @@ class TopPostsAPITests(OpenbookAPITestCase):
         'openbook_circles/fixtures/circles.json',
     ]
 
+    def setUp(self):
+        super(TopPostsAPITests, self).setUp()
+        top_posts_curation.delete_top_posts_curation_watermark()
+
     def test_displays_community_posts_only(self):
         """
         should display community posts only in top posts and return 200
@@ -4800,6 +5301,79 @@ class TopPostsAPITests(OpenbookAPITestCase):
         self.assertEqual(1, len(top_posts))
         self.assertTrue(TopPost.objects.filter(post__id=post.pk).exists())
 
+    def test_should_curate_posts_reacted_to_after_the_previous_curation(self):
+        """
+        should curate the posts that got reactions after the previous curation run
+        """
+        community_owner = make_user()
+
+        community = make_community(creator=community_owner)
+        post = community_owner.create_community_post(community_name=community.name, text=make_fake_post_text())
+        post_two = community_owner.create_community_post(community_name=community.name, text=make_fake_post_text())
+
+        emoji_group = make_reactions_emoji_group()
+        emoji = make_emoji(group=emoji_group)
+
+        community_owner.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk, )
+
+        curate_top_posts()
+
+        self.assertIsNotNone(top_posts_curation.get_top_posts_curation_watermark())
+
+        community_owner.react_to_post_with_id(post_id=post_two.pk, emoji_id=emoji.pk, )
+
+        curate_top_posts()
+
+        self.assertEqual(2, TopPost.objects.count())
+        self.assertTrue(TopPost.objects.filter(post__id=post_two.pk).exists())
+
+    @override_settings(TOP_POSTS_CURATION_WATERMARK_OVERLAP=0)
+    def test_full_rescan_curates_posts_without_new_activity(self):
+        """
+        should curate eligible posts without new reactions or comments when doing a full rescan
+        """
+        community_owner = make_user()
+
+        community = make_community(creator=community_owner)
+        post = community_owner.create_community_post(community_name=community.name, text=make_fake_post_text())
+
+        emoji_group = make_reactions_emoji_group()
+        emoji = make_emoji(group=emoji_group)
+
+        community_owner.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk, )
+
+        curate_top_posts()
+        TopPost.objects.all().delete()
+
+        curate_top_posts()
+        self.assertFalse(TopPost.objects.filter(post__id=post.pk).exists())
+
+        curate_top_posts(full_rescan=True)
+        self.assertTrue(TopPost.objects.filter(post__id=post.pk).exists())
+
+    def test_should_curate_posts_reacted_to_below_the_watermark(self):
+        """
+        should curate the posts whose reactions got committed after the previous curation run saw higher ids
+        """
+        community_owner = make_user()
+
+        community = make_community(creator=community_owner)
+        post = community_owner.create_community_post(community_name=community.name, text=make_fake_post_text())
+
+        emoji_group = make_reactions_emoji_group()
+        emoji = make_emoji(group=emoji_group)
+
+        post_reaction = community_owner.react_to_post_with_id(post_id=post.pk, emoji_id=emoji.pk, )
+
+        # The previous run covered the ids up to this reaction, before it got committed
+        top_posts_curation.set_top_posts_curation_watermark(last_reaction_id=post_reaction.pk,
+                                                            last_comment_id=0)
+
+        result = curate_top_posts()
+
+        self.assertTrue(TopPost.objects.filter(post__id=post.pk).exists())
+        self.assertIn('Curated: 1.', result)
+
     def test_should_respect_max_id_param_for_top_posts(self):
         """
         should take into account max_id in when returning top posts
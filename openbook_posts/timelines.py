@@ -0,0 +1,173 @@
+"""
+Materialized home timelines (fan-out-on-write).
+
+A user timeline is a redis sorted set of post ids where every member is scored with its own id. This makes the
+existing max_id/min_id cursors map directly onto ZREVRANGEBYSCORE.
+
+Timelines are filled when a post gets published and rebuilt lazily from the regular timeline query when cold.
+Follows, blocks, community exits and post removals repair the affected timelines incrementally.
+"""
+from django.conf import settings
+from django.db.models import Q
+from django_redis import get_redis_connection
+
+from openbook_common.utils.model_loaders import get_user_model, get_connection_model, get_post_model
+
+TIMELINE_KEY_PREFIX = 'ob-api-timeline-'
+
+# Every built timeline contains this member so an empty timeline is not mistaken for a cold one
+TIMELINE_WARM_MARKER = 0
+
+TIMELINE_FAN_OUT_CHUNK_SIZE = 1000
+
+
+def is_timelines_store_enabled():
+    return settings.FEATURE_TIMELINES_STORE_ENABLED
+
+
+def make_timeline_key_for_user_with_id(user_id):
+    return '%s%d' % (TIMELINE_KEY_PREFIX, user_id)
+
+
+def is_timeline_warm_for_user_with_id(user_id):
+    redis = _get_redis()
+    return redis.exists(make_timeline_key_for_user_with_id(user_id)) > 0
+
+
+def get_timeline_post_ids_for_user_with_id(user_id, max_id=None, min_id=None, count=None):
+    redis = _get_redis()
+
+    max_score = '(%d' % max_id if max_id else '+inf'
+    min_score = '(%d' % (min_id if min_id else TIMELINE_WARM_MARKER)
+
+    if count:
+        post_ids = redis.zrevrangebyscore(make_timeline_key_for_user_with_id(user_id), max_score, min_score,
+                                          start=0, num=count)
+    else:
+        post_ids = redis.zrevrangebyscore(make_timeline_key_for_user_with_id(user_id), max_score, min_score)
+
+    return [int(post_id) for post_id in post_ids]
+
+
+def set_timeline_for_user_with_id(user_id, post_ids):
+    """
+    Replaces the whole timeline of the user with the given post ids
+    """
+    timeline_key = make_timeline_key_for_user_with_id(user_id)
+
+    timeline_members = {TIMELINE_WARM_MARKER: TIMELINE_WARM_MARKER}
+    for post_id in post_ids:
+        timeline_members[post_id] = post_id
+
+    pipeline = _get_redis().pipeline()
+    pipeline.delete(timeline_key)
+    pipeline.zadd(timeline_key, timeline_members)
+    pipeline.execute()
+
+
+def delete_timeline_for_user_with_id(user_id):
+    """
+    Marks the timeline as cold, it will get rebuilt on the next read
+    """
+    _get_redis().delete(make_timeline_key_for_user_with_id(user_id))
+
+
+def delete_all_timelines():
+    redis = _get_redis()
+    for timeline_key in redis.scan_iter(match='%s*' % TIMELINE_KEY_PREFIX):
+        redis.delete(timeline_key)
+
+
+def add_post_to_timelines_of_users_with_ids(post_id, users_ids):
+    """
+    Adds the post to the warm timelines of the given users. Cold timelines are left alone,
+    they will contain the post once rebuilt.
+    """
+    redis = _get_redis()
+    users_ids = list(users_ids)
+
+    for chunk_start in range(0, len(users_ids), TIMELINE_FAN_OUT_CHUNK_SIZE):
+        timeline_keys = [make_timeline_key_for_user_with_id(user_id) for user_id in
+                         users_ids[chunk_start:chunk_start + TIMELINE_FAN_OUT_CHUNK_SIZE]]
+
+        pipeline = redis.pipeline(transaction=False)
+        for timeline_key in timeline_keys:
+            pipeline.exists(timeline_key)
+        timelines_exist = pipeline.execute()
+
+        pipeline = redis.pipeline(transaction=False)
+        for timeline_key, timeline_exists in zip(timeline_keys, timelines_exist):
+            if not timeline_exists:
+                continue
+            pipeline.zadd(timeline_key, {post_id: post_id})
+            # Keep the marker plus the most recent TIMELINE_MAX_LENGTH posts
+            pipeline.zremrangebyrank(timeline_key, 1, -(settings.TIMELINE_MAX_LENGTH + 1))
+        pipeline.execute()
+
+
+def remove_post_from_timelines_of_users_with_ids(post_id, users_ids):
+    redis = _get_redis()
+    users_ids = list(users_ids)
+
+    for chunk_start in range(0, len(users_ids), TIMELINE_FAN_OUT_CHUNK_SIZE):
+        pipeline = redis.pipeline(transaction=False)
+        for user_id in users_ids[chunk_start:chunk_start + TIMELINE_FAN_OUT_CHUNK_SIZE]:
+            pipeline.zrem(make_timeline_key_for_user_with_id(user_id), post_id)
+        pipeline.execute()
+
+
+def remove_posts_with_ids_from_timeline_of_user_with_id(user_id, posts_ids):
+    _get_redis().zrem(make_timeline_key_for_user_with_id(user_id), *posts_ids)
+
+
+def remove_posts_matching_query_from_timeline_of_user_with_id(user_id, posts_query):
+    """
+    Incremental repair. Removes the timeline posts matching the given query, e.g. Q(creator_id=unfollowed_user_id)
+    """
+    timeline_post_ids = get_timeline_post_ids_for_user_with_id(user_id=user_id)
+
+    if not timeline_post_ids:
+        return
+
+    Post = get_post_model()
+    posts_query = posts_query & Q(id__in=timeline_post_ids)
+    removable_post_ids = list(Post.objects.filter(posts_query).values_list('id', flat=True))
+
+    if removable_post_ids:
+        remove_posts_with_ids_from_timeline_of_user_with_id(user_id=user_id, posts_ids=removable_post_ids)
+
+
+def get_timeline_target_users_ids_for_post(post):
+    """
+    Returns the ids of the users whose timeline should contain the post.
+    Mirrors the visibility rules of User._get_timeline_posts_with_no_filters
+    """
+    User = get_user_model()
+
+    exclude_blocked_users_query = Q(user_blocks__blocked_user_id=post.creator_id) | Q(
+        blocked_by_users__blocker_id=post.creator_id)
+
+    if post.community_id:
+        target_users = User.objects.filter(communities_memberships__community_id=post.community_id). \
+            exclude(exclude_blocked_users_query)
+        return set(target_users.values_list('id', flat=True))
+
+    followers_query = Q(follows__followed_user_id=post.creator_id)
+
+    if not post.is_public_post():
+        Connection = get_connection_model()
+        post_circles_ids = post.circles.values_list('id', flat=True)
+        connected_users_ids = Connection.objects.filter(user_id=post.creator_id,
+                                                        circles__id__in=post_circles_ids,
+                                                        target_connection__circles__isnull=False). \
+            values_list('target_user_id', flat=True)
+        followers_query.add(Q(id__in=connected_users_ids), Q.AND)
+
+    target_users_ids = set(User.objects.filter(followers_query).values_list('id', flat=True))
+    target_users_ids.add(post.creator_id)
+
+    return target_users_ids
+
+
+def _get_redis():
+    return get_redis_connection('default')
@@ -0,0 +1,36 @@
+"""
+Watermark of the incremental top posts curation.
+
+The watermark holds the highest post reaction and post comment ids seen by the last curation run, so the next run
+only has to score the posts that got reactions or comments since then.
+"""
+from django_redis import get_redis_connection
+
+TOP_POSTS_CURATION_WATERMARK_KEY = 'ob-api-top-posts-curation-watermark'
+
+
+def get_top_posts_curation_watermark():
+    """
+    Returns a (last_reaction_id, last_comment_id) tuple or None if no curation run was recorded
+    """
+    watermark = _get_redis().hgetall(TOP_POSTS_CURATION_WATERMARK_KEY)
+
+    if not watermark:
+        return None
+
+    return int(watermark[b'reaction_id']), int(watermark[b'comment_id'])
+
+
+def set_top_posts_curation_watermark(last_reaction_id, last_comment_id):
+    _get_redis().hmset(TOP_POSTS_CURATION_WATERMARK_KEY, {
+        'reaction_id': last_reaction_id,
+        'comment_id': last_comment_id
+    })
+
+
+def delete_top_posts_curation_watermark():
+    _get_redis().delete(TOP_POSTS_CURATION_WATERMARK_KEY)
+
+
+def _get_redis():
+    return get_redis_connection('default')
@@ -0,0 +1,128 @@
+"""
+Rolling window activity counters for trending posts.
+
+Every reaction and comment on a community post is counted into the redis bucket of the time it got committed. A
+bucket holds the comments count of every post, its reactors and its participants, and expires once it leaves the
+window. Reactions count once per reactor and bucket, so unreacting and reacting again does not inflate the score.
+
+The trending score of a post adds up the activity of all buckets in the window, each one decayed with the
+configured half-life by its age, so recent activity weighs more than older one.
+"""
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+TRENDING_BUCKET_KEY_PREFIX = 'ob-api-trending-bucket-'
+
+REACTION_WEIGHT = 1
+COMMENT_WEIGHT = 2
+PARTICIPANT_WEIGHT = 3
+
+
+def record_post_reaction(post_id, reactor_id):
+    _record_post_activity(post_id=post_id, user_id=reactor_id, activity='r')
+
+
+def record_post_comment(post_id, commenter_id):
+    _record_post_activity(post_id=post_id, user_id=commenter_id, activity='c')
+
+
+def get_trending_scores(now=None):
+    """
+    Returns a dict with the decayed trending score of every post with activity within the window
+    """
+    now = now if now is not None else time.time()
+    bucket_size = _get_bucket_size()
+    current_bucket = _get_bucket_for_timestamp(now)
+    buckets = range(current_bucket - _get_window_buckets_count() + 1, current_bucket + 1)
+
+    redis = _get_redis()
+    pipeline = redis.pipeline(transaction=False)
+    for bucket in buckets:
+        pipeline.hgetall(_make_bucket_counts_key(bucket))
+        pipeline.smembers(_make_bucket_reactors_key(bucket))
+        pipeline.smembers(_make_bucket_participants_key(bucket))
+    buckets_data = pipeline.execute()
+
+    half_life = settings.TRENDING_POSTS_HALF_LIFE_HOURS * 3600
+    scores = defaultdict(float)
+
+    for index, bucket in enumerate(buckets):
+        bucket_counts = buckets_data[index * 3]
+        bucket_reactors = buckets_data[index * 3 + 1]
+        bucket_participants = buckets_data[index * 3 + 2]
+
+        bucket_age = max(now - (bucket * bucket_size + bucket_size / 2), 0)
+        decay = 0.5 ** (bucket_age / half_life)
+
+        for field, count in bucket_counts.items():
+            activity, post_id = field.decode().split(':')
+            weight = REACTION_WEIGHT if activity == 'r' else COMMENT_WEIGHT
+            scores[int(post_id)] += int(count) * weight * decay
+
+        for reactor in bucket_reactors:
+            post_id = reactor.decode().split(':')[0]
+            scores[int(post_id)] += REACTION_WEIGHT * decay
+
+        for participant in bucket_participants:
+            post_id = participant.decode().split(':')[0]
+            scores[int(post_id)] += PARTICIPANT_WEIGHT * decay
+
+    return scores
+
+
+def delete_all_trending_buckets():
+    redis = _get_redis()
+    for bucket_key in redis.scan_iter(match='%s*' % TRENDING_BUCKET_KEY_PREFIX):
+        redis.delete(bucket_key)
+
+
+def _record_post_activity(post_id, user_id, activity):
+    bucket = _get_bucket_for_timestamp(time.time())
+    counts_key = _make_bucket_counts_key(bucket)
+    participants_key = _make_bucket_participants_key(bucket)
+
+    # Keep the buckets for as long as they are within the window
+    expire_seconds = (_get_window_buckets_count() + 1) * _get_bucket_size()
+
+    pipeline = _get_redis().pipeline(transaction=False)
+    if activity == 'r':
+        reactors_key = _make_bucket_reactors_key(bucket)
+        pipeline.sadd(reactors_key, '%d:%d' % (post_id, user_id))
+        pipeline.expire(reactors_key, expire_seconds)
+    else:
+        pipeline.hincrby(counts_key, '%s:%d' % (activity, post_id), 1)
+    pipeline.sadd(participants_key, '%d:%d' % (post_id, user_id))
+    pipeline.expire(counts_key, expire_seconds)
+    pipeline.expire(participants_key, expire_seconds)
+    pipeline.execute()
+
+
+def _get_bucket_size():
+    return settings.TRENDING_POSTS_BUCKET_MINUTES * 60
+
+
+def _get_window_buckets_count():
+    return max(int(settings.TRENDING_POSTS_WINDOW_HOURS * 3600 / _get_bucket_size()), 1)
+
+
+def _get_bucket_for_timestamp(timestamp):
+    return int(timestamp // _get_bucket_size())
+
+
+def _make_bucket_counts_key(bucket):
+    return '%s%d' % (TRENDING_BUCKET_KEY_PREFIX, bucket)
+
+
+def _make_bucket_reactors_key(bucket):
+    return '%s%d-reactors' % (TRENDING_BUCKET_KEY_PREFIX, bucket)
+
+
+def _make_bucket_participants_key(bucket):
+    return '%s%d-participants' % (TRENDING_BUCKET_KEY_PREFIX, bucket)
+
+
+def _get_redis():
+    return get_redis_connection('default')
@@ -7,6 +7,7 @@ from django.utils.translation import ugettext_lazy as _
 from webpreview import URLUnreachable, URLNotFound
 
 from openbook_common.responses import ApiMessageResponse
+from openbook_common.utils.replication import use_primary_database
 from openbook_common.utils.helpers import get_post_id_for_post_uuid
 from openbook_moderation.permissions import IsNotSuspended
 from openbook_posts.views.post.serializers import DeletePostSerializer, GetPostSerializer, GetPostPostSerializer, \
@@ -274,6 +275,8 @@ class PublishPost(APIView):
         return Response(post_comments_serializer.data, status=status.HTTP_200_OK)
 
 
+# The status is updated by the media processing workers, not by the polling client
+@use_primary_database
 class PostStatus(APIView):
     permission_classes = (IsAuthenticated,)
 
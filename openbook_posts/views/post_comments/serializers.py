@@ -6,6 +6,7 @@ from openbook_common.models import Emoji, Language
 from openbook_common.serializers import CommonUserProfileBadgeSerializer, CommonHashtagSerializer
 from openbook_common.serializers_fields.post_comment import PostCommenterField, RepliesCountField, \
     PostCommentReactionsEmojiCountField, PostCommentReactionField, PostCommentIsMutedField
+from openbook_common.utils.pagination import CURSOR_MAX_LENGTH
 from openbook_communities.models import CommunityMembership
 from openbook_posts.models import PostComment, Post, PostCommentReaction
 from openbook_posts.validators import post_uuid_exists, post_comment_text_validators
@@ -174,6 +175,10 @@ class GetPostCommentsSerializer(serializers.Serializer):
     min_id = serializers.IntegerField(
         required=False,
     )
+    cursor = serializers.CharField(
+        required=False,
+        max_length=CURSOR_MAX_LENGTH,
+    )
     count_max = serializers.IntegerField(
         required=False,
         max_value=20
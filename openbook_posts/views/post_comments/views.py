@@ -9,6 +9,7 @@ import operator
 # TODO Use post uuid also internally, not only as API resource identifier
 # In order to prevent enumerable posts API in alpha, this is done as a hotfix
 from openbook_common.utils.model_loaders import get_post_model
+from openbook_common.utils.pagination import KeysetPaginator, add_next_cursor_header
 from openbook_moderation.permissions import IsNotSuspended
 from openbook_posts.views.post_comments.serializers import EnableDisableCommentsPostSerializer, \
     EnableCommentsPostSerializer, DisableCommentsPostSerializer, GetPostCommentsSerializer, PostCommentSerializer, \
@@ -27,6 +28,10 @@ class PostComments(APIView):
         'DESC': '-created',
         'ASC': 'created'
     }
+    SORT_CHOICE_TO_KEYSET_ORDERING = {
+        'DESC': ('-created', '-id'),
+        'ASC': ('created', 'id')
+    }
 
     def get(self, request, post_uuid):
         request_data = self._get_request_data(request, post_uuid)
@@ -37,6 +42,7 @@ class PostComments(APIView):
         data = serializer.validated_data
         max_id = data.get('max_id')
         min_id = data.get('min_id')
+        cursor = data.get('cursor')
         count_max = data.get('count_max', 10)
         count_min = data.get('count_min', 10)
         sort = data.get('sort', 'DESC')
@@ -46,9 +52,13 @@ class PostComments(APIView):
         post_id = get_post_id_for_post_uuid(post_uuid)
 
         sort_query = self.SORT_CHOICE_TO_QUERY[sort]
+        next_cursor = None
 
         if not max_id and not min_id:
-            all_comments = user.get_comments_for_post_with_id(post_id).order_by(sort_query)[:count_max].all()
+            paginator = KeysetPaginator(queryset=user.get_comments_for_post_with_id(post_id),
+                                        ordering=self.SORT_CHOICE_TO_KEYSET_ORDERING[sort])
+            all_comments = paginator.get_page(count=count_max, cursor=cursor)
+            next_cursor = paginator.get_next_cursor(all_comments)
         else:
             post_comments_max = []
             post_comments_min = []
@@ -74,7 +84,7 @@ class PostComments(APIView):
         post_comments_serializer = PostCommentSerializer(all_comments, many=True, context={"request": request,
                                                                                            "sort_query": sort_query})
 
-        return Response(post_comments_serializer.data, status=status.HTTP_200_OK)
+        return add_next_cursor_header(Response(post_comments_serializer.data, status=status.HTTP_200_OK), next_cursor)
 
     def put(self, request, post_uuid):
         request_data = self._get_request_data(request, post_uuid)
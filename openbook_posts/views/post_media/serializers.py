@@ -40,6 +40,11 @@ class PostImageSerializer(serializers.ModelSerializer):
 
 
 class PostVideoFormatSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    def get_progress(self, obj):
+        return obj.get_live_progress()
+
     class Meta:
         model = Format
         fields = (
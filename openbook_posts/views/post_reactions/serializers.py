@@ -61,7 +61,7 @@ class PostReactionEmojiGroupSerializer(serializers.ModelSerializer):
     emojis = serializers.SerializerMethodField()
 
     def get_emojis(self, obj):
-        emojis = obj.emojis.all().order_by('order')
+        emojis = sorted(obj.emojis.all(), key=lambda emoji: emoji.order)
 
         request = self.context['request']
         return PostReactionEmojiSerializer(emojis, many=True, context={'request': request}).data
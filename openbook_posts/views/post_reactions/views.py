@@ -4,7 +4,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from openbook_common.utils.model_loaders import get_emoji_group_model, get_post_model
+from openbook_common.utils import reference_data
+from openbook_common.utils.model_loaders import get_post_model
 
 
 # TODO Use post uuid also internally, not only as API resource identifier
@@ -109,8 +110,7 @@ class PostReactionEmojiGroups(APIView):
     permission_classes = (IsAuthenticated, IsNotSuspended)
 
     def get(self, request):
-        EmojiGroup = get_emoji_group_model()
-        emoji_groups = EmojiGroup.objects.filter(is_reaction_group=True).all().order_by('order')
+        emoji_groups = reference_data.get_reaction_emoji_groups()
         serializer = PostReactionEmojiGroupSerializer(emoji_groups, many=True, context={'request': request})
 
         return Response(serializer.data, status=status.HTTP_200_OK)
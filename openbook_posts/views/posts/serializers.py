@@ -11,6 +11,7 @@ from openbook_common.serializers_fields.post import ReactionField, CommentsCount
     CirclesField, PostCreatorField, PostIsMutedField, IsEncircledField
 from openbook_common.serializers_fields.request import RestrictedImageFileSizeField, RestrictedFileSizeField
 from openbook_common.models import Language
+from openbook_common.utils.pagination import CURSOR_MAX_LENGTH
 from openbook_communities.models import Community, CommunityMembership
 from openbook_communities.serializers_fields import CommunityMembershipsField
 from openbook_lists.validators import list_id_exists
@@ -30,6 +31,10 @@ class GetPostsSerializer(serializers.Serializer):
     max_id = serializers.IntegerField(
         required=False,
     )
+    cursor = serializers.CharField(
+        required=False,
+        max_length=CURSOR_MAX_LENGTH,
+    )
     min_id = serializers.IntegerField(
         required=False,
     )
@@ -53,6 +58,10 @@ class GetTopPostsSerializer(serializers.Serializer):
     max_id = serializers.IntegerField(
         required=False,
     )
+    cursor = serializers.CharField(
+        required=False,
+        max_length=CURSOR_MAX_LENGTH,
+    )
     min_id = serializers.IntegerField(
         required=False,
     )
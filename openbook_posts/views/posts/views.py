@@ -11,6 +11,10 @@ from openbook_common.serializers import CommonSearchCommunitiesSerializer, Commo
     CommonCommunityNameSerializer
 from openbook_moderation.permissions import IsNotSuspended
 from openbook_common.utils.helpers import normalize_list_value_in_request_data, normalise_request_data
+from openbook_common.utils.model_loaders import get_post_model
+from openbook_common.utils.pagination import KeysetPaginator, add_next_cursor_header, get_max_id_for_cursor, \
+    make_cursor_for_id
+from openbook_posts.feed_context import make_posts_feed_serializer_context
 from openbook_posts.permissions import IsGetOrIsAuthenticated
 from openbook_posts.views.posts.serializers import AuthenticatedUserPostSerializer, \
     GetPostsSerializer, UnauthenticatedUserPostSerializer, CreatePostSerializer, GetTopPostsSerializer, \
@@ -66,10 +70,16 @@ class Posts(APIView):
         lists_ids = data.get('list_id')
         max_id = data.get('max_id')
         min_id = data.get('min_id')
+        cursor = data.get('cursor')
         count = data.get('count', 10)
         username = data.get('username')
 
         user = request.user
+        Post = get_post_model()
+
+        if cursor:
+            # The timeline queries are UNIONs, the cursor bound gets pushed down into each of them as max_id
+            max_id = get_max_id_for_cursor(model=Post, cursor=cursor)
 
         if username:
             if username == user.username:
@@ -82,14 +92,18 @@ class Posts(APIView):
                 lists_ids=lists_ids,
                 max_id=max_id,
                 min_id=min_id,
-                count=count
+                count=count + 1
             )
 
-        posts = posts.order_by('-id')[:count]
+        posts = list(posts.order_by('-id')[:count + 1])
+        next_cursor = make_cursor_for_id(model=Post, item_id=posts[count - 1].pk) if len(posts) > count else None
+        posts = posts[:count]
 
-        post_serializer_data = AuthenticatedUserPostSerializer(posts, many=True, context={"request": request}).data
+        post_serializer_data = AuthenticatedUserPostSerializer(posts, many=True,
+                                                               context=make_posts_feed_serializer_context(
+                                                                   request=request, posts=posts)).data
 
-        return Response(post_serializer_data, status=status.HTTP_200_OK)
+        return add_next_cursor_header(Response(post_serializer_data, status=status.HTTP_200_OK), next_cursor)
 
     def get_posts_for_unauthenticated_user(self, request):
         query_params = request.query_params.dict()
@@ -140,9 +154,11 @@ class TrendingPostsNew(APIView):
         count = data.get('count', 30)
         user = request.user
 
-        trending_posts = user.get_trending_posts(max_id=max_id, min_id=min_id).order_by('-id')[:count]
+        trending_posts = list(user.get_trending_posts(max_id=max_id, min_id=min_id).order_by('-id')[:count])
+        posts = [trending_post.post for trending_post in trending_posts]
         posts_serializer = AuthenticatedUserTrendingPostSerializer(trending_posts, many=True,
-                                                                   context={"request": request})
+                                                                   context=make_posts_feed_serializer_context(
+                                                                       request=request, posts=posts))
         return Response(posts_serializer.data, status=status.HTTP_200_OK)
 
 
@@ -158,15 +174,22 @@ class TopPosts(APIView):
 
         max_id = data.get('max_id')
         min_id = data.get('min_id')
+        cursor = data.get('cursor')
         count = data.get('count', 20)
         exclude_joined_communities = data.get('exclude_joined_communities', False)
 
         user = request.user
 
-        top_posts = user.get_top_posts(max_id=max_id, min_id=min_id,
-                                       exclude_joined_communities=exclude_joined_communities).order_by('-id')[:count]
-        posts_serializer = AuthenticatedUserTopPostSerializer(top_posts, many=True, context={"request": request})
-        return Response(posts_serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPaginator(queryset=user.get_top_posts(max_id=max_id, min_id=min_id,
+                                                                exclude_joined_communities=exclude_joined_communities),
+                                    ordering=('-id',))
+        top_posts = paginator.get_page(count=count, cursor=cursor)
+        posts = [top_post.post for top_post in top_posts]
+        posts_serializer = AuthenticatedUserTopPostSerializer(top_posts, many=True,
+                                                              context=make_posts_feed_serializer_context(
+                                                                  request=request, posts=posts))
+        return add_next_cursor_header(Response(posts_serializer.data, status=status.HTTP_200_OK),
+                                      paginator.get_next_cursor(top_posts))
 
 
 class TopPostsExcludedCommunities(APIView):
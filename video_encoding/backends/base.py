@@ -12,10 +12,11 @@ class BaseEncodingBackend(six.with_metaclass(abc.ABCMeta)):
         return []
 
     @abc.abstractmethod
-    def encode(self, source_path, target_path, params):  # pragma: no cover
+    def encode(self, source_path, target_path, params, usage=None):  # pragma: no cover
         """
         Encodes a video to a specified file. All encoder specific options
-        are passed in using `params`.
+        are passed in using `params`. If given, the `usage` dict receives the
+        `cpu_seconds` the encoding took.
         """
         pass
 
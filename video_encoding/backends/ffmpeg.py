@@ -71,6 +71,20 @@ class FFmpegBackend(BaseEncodingBackend):
             raise six.raise_from(
                 exceptions.FFmpegError('Error while running ffmpeg binary'), e)
 
+    def _wait_for_cpu_seconds(self, process):
+        """
+        Reaps the process itself, as only then its own resource usage is known,
+        and returns the CPU time it took.
+        """
+        __, exit_status, resource_usage = os.wait4(process.pid, 0)
+
+        if os.WIFSIGNALED(exit_status):
+            process.returncode = -os.WTERMSIG(exit_status)
+        else:
+            process.returncode = os.WEXITSTATUS(exit_status)
+
+        return resource_usage.ru_utime + resource_usage.ru_stime
+
     def _check_returncode(self, process):
         stdout, stderr = process.communicate()
         if process.returncode != 0:
@@ -81,10 +95,11 @@ class FFmpegBackend(BaseEncodingBackend):
         return self.stdout, self.stderr
 
     # TODO reduce complexity
-    def encode(self, source_path, target_path, params):  # NOQA: C901
+    def encode(self, source_path, target_path, params, usage=None):  # NOQA: C901
         """
         Encodes a video to a specified file. All encoder specific options
-        are passed in using `params`.
+        are passed in using `params`. If given, the `usage` dict receives the
+        `cpu_seconds` the encoding took.
         """
         total_time = self.get_media_info(source_path)['duration']
 
@@ -130,6 +145,8 @@ class FFmpegBackend(BaseEncodingBackend):
             raise exceptions.FFmpegError("File size of generated file is 0")
 
         # wait for process to exit
+        if usage is not None:
+            usage['cpu_seconds'] = self._wait_for_cpu_seconds(process)
         self._check_returncode(process)
 
         logger.debug(output)
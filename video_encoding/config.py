@@ -4,7 +4,14 @@ from django.conf import settings  # NOQA
 
 class VideoEncodingAppConf(AppConf):
     THREADS = 1
+    # Cores the encodings of a video may use at once, every encoding takes THREADS
+    CPU_BUDGET = 1
+    # Seconds and percent after which the live progress of an encoding gets
+    # updated, whichever comes first
     PROGRESS_UPDATE = 30
+    PROGRESS_STEP = 1
+    # Percent after which the progress gets persisted to the format
+    PROGRESS_MILESTONE = 25
     BACKEND = 'video_encoding.backends.ffmpeg.FFmpegBackend'
     BACKEND_PARAMS = {}
     FORMATS = {
@@ -7,6 +7,7 @@ from django.utils.translation import ugettext_lazy as _
 
 from .fields import VideoField
 from .manager import FormatManager
+from .progress import clear_live_progress, get_live_progress
 
 
 def upload_format_to(i, f):
@@ -77,14 +78,27 @@ class Format(models.Model):
         return self.__str__()
 
     def update_progress(self, percent, commit=True):
-        if 0 > percent > 100:
+        if not 0 <= percent <= 100:
             raise ValueError("Invalid percent value.")
 
         self.progress = percent
         if commit:
-            self.save()
+            self.save(update_fields=['progress'])
 
     def reset_progress(self, commit=True):
-        self.percent = 0
+        self.progress = 0
+        clear_live_progress(self.pk)
         if commit:
             self.save()
+
+    def get_live_progress(self):
+        """
+        Returns the progress of an ongoing encoding, which is only persisted
+        in milestones, from the cache
+        """
+        if self.progress >= 100:
+            return self.progress
+
+        live_progress = get_live_progress(self.pk)
+
+        return self.progress if live_progress is None else max(self.progress, live_progress)
@@ -0,0 +1,63 @@
+import time
+
+from django.core.cache import cache
+
+from .config import settings
+
+LIVE_PROGRESS_CACHE_KEY_PREFIX = 'video-encoding-progress-'
+
+# Seconds the live progress of an abandoned encoding lingers
+LIVE_PROGRESS_TIMEOUT = 3600
+
+
+def make_live_progress_cache_key(format_id):
+    return '%s%d' % (LIVE_PROGRESS_CACHE_KEY_PREFIX, format_id)
+
+
+def get_live_progress(format_id):
+    return cache.get(make_live_progress_cache_key(format_id))
+
+
+def clear_live_progress(format_id):
+    cache.delete(make_live_progress_cache_key(format_id))
+
+
+class ProgressReporter(object):
+    """
+    Coalesces the progress ticks of an encoding, given as fractions of 1.
+    Keeps the live progress in the cache every `PROGRESS_STEP` percent or
+    every `PROGRESS_UPDATE` seconds, and only persists it to the `Format`
+    every `PROGRESS_MILESTONE` percent.
+    """
+
+    def __init__(self, video_format):
+        self.video_format = video_format
+        self.reported_percent = video_format.progress
+        self.reported_at = time.monotonic()
+
+    def report(self, progress):
+        # 100 is reserved for when the encoded file is saved
+        percent = min(int(progress * 100), 99)
+
+        if percent <= self.reported_percent:
+            return
+
+        now = time.monotonic()
+
+        if percent - self.reported_percent < settings.VIDEO_ENCODING_PROGRESS_STEP and \
+                now - self.reported_at < settings.VIDEO_ENCODING_PROGRESS_UPDATE:
+            return
+
+        milestone = settings.VIDEO_ENCODING_PROGRESS_MILESTONE
+        reached_milestone = percent // milestone > self.reported_percent // milestone
+
+        self.reported_percent = percent
+        self.reported_at = now
+
+        cache.set(make_live_progress_cache_key(self.video_format.pk), percent, LIVE_PROGRESS_TIMEOUT)
+
+        if reached_milestone:
+            self.video_format.update_progress(percent)
+
+    def finish(self):
+        clear_live_progress(self.video_format.pk)
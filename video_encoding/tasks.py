@@ -1,5 +1,10 @@
+import logging
 import os
+import queue
 import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
@@ -11,6 +16,14 @@ from .config import settings
 from .exceptions import VideoEncodingError
 from .fields import VideoField
 from .models import Format
+from .progress import ProgressReporter
+
+logger = logging.getLogger(__name__)
+
+EncodingReport = namedtuple('EncodingReport', ['format', 'succeeded', 'wall_seconds', 'cpu_seconds'])
+
+_Encoding = namedtuple('_Encoding', ['video_format', 'options', 'target_path', 'progress_reporter'])
+_EncodingOutcome = namedtuple('_EncodingOutcome', ['error', 'wall_seconds', 'cpu_seconds'])
 
 
 def convert_all_videos(app_label, model_name, object_pk):
@@ -36,7 +49,9 @@ def convert_all_videos(app_label, model_name, object_pk):
 
 def convert_video(fieldfile, force=False):
     """
-    Converts a given video file into all defined formats.
+    Converts a given video file into all defined formats, running as many
+    encodings at once as fit in `VIDEO_ENCODING_CPU_BUDGET`.
+    Returns an `EncodingReport` per encoded format.
     """
     instance = fieldfile.instance
     field = fieldfile.field
@@ -48,6 +63,8 @@ def convert_video(fieldfile, force=False):
 
     encoding_backend = get_backend()
 
+    encodings = []
+
     for options in settings.VIDEO_ENCODING_FORMATS[encoding_backend.name]:
         video_format, created = Format.objects.get_or_create(
             object_id=instance.pk,
@@ -66,32 +83,122 @@ def convert_video(fieldfile, force=False):
         _, target_path = tempfile.mkstemp(
             suffix='_{name}.{extension}'.format(**options))
 
-        try:
-            encoding = encoding_backend.encode(
-                source_path, target_path, options['params'])
-            while encoding:
-                try:
-                    progress = next(encoding)
-                except StopIteration:
-                    break
-                video_format.update_progress(progress)
-        except VideoEncodingError:
+        encodings.append(_Encoding(video_format=video_format, options=options,
+                                   target_path=target_path,
+                                   progress_reporter=ProgressReporter(video_format)))
+
+    try:
+        return _run_encodings(encoding_backend=encoding_backend,
+                              source_path=source_path, filename=filename,
+                              encodings=encodings)
+    finally:
+        if temp_file:
+            os.unlink(temp_file.name)
+            temp_file.close()
+
+
+def get_max_parallel_encodings():
+    return max(1, settings.VIDEO_ENCODING_CPU_BUDGET // settings.VIDEO_ENCODING_THREADS)
+
+
+def _run_encodings(encoding_backend, source_path, filename, encodings):
+    """
+    Runs the encodings in worker threads, each one waiting on its ffmpeg
+    process. The progress and outcomes come back through a queue, so the
+    database is only ever touched from the calling thread.
+    """
+    if not encodings:
+        return []
+
+    progress_queue = queue.Queue()
+    reports = []
+
+    try:
+        with ThreadPoolExecutor(max_workers=get_max_parallel_encodings()) as executor:
+            for encoding in encodings:
+                executor.submit(_encode, encoding_backend=encoding_backend,
+                                source_path=source_path, encoding=encoding,
+                                progress_queue=progress_queue)
+
+            while len(reports) < len(encodings):
+                encoding, progress, outcome = progress_queue.get()
+
+                if outcome is None:
+                    encoding.progress_reporter.report(progress)
+                    continue
+
+                reports.append(_finish_encoding(encoding=encoding, outcome=outcome,
+                                                filename=filename))
+    finally:
+        # remove temporary files, also of the encodings that never finished
+        for encoding in encodings:
+            if os.path.exists(encoding.target_path):
+                os.remove(encoding.target_path)
+
+    return reports
+
+
+def _encode(encoding_backend, source_path, encoding, progress_queue):
+    usage = {}
+    error = None
+    started_at = time.monotonic()
+
+    try:
+        for progress in encoding_backend.encode(source_path, encoding.target_path,
+                                                encoding.options['params'],
+                                                usage=usage):
+            progress_queue.put((encoding, progress, None))
+    except Exception as e:
+        error = e
+    finally:
+        # Always report back, the calling thread waits for every encoding
+        progress_queue.put((encoding, None, _EncodingOutcome(
+            error=error, wall_seconds=time.monotonic() - started_at,
+            cpu_seconds=usage.get('cpu_seconds'))))
+
+
+def _finish_encoding(encoding, outcome, filename):
+    """
+    Saves the encoded file, or discards the format when the encoding
+    failed. Never raises, a failure is recorded in the report so the
+    other formats still get finished.
+    """
+    video_format = encoding.video_format
+    options = encoding.options
+    error = outcome.error
+
+    try:
+        if error is None:
+            # save encoded file
+            with open(encoding.target_path, mode='rb') as encoded_file:
+                video_format.file.save(
+                    '{filename}_{name}.{extension}'.format(filename=filename,
+                                                           **options),
+                    File(encoded_file))
+
+            video_format.update_progress(100)  # now we are ready
+    except Exception as e:
+        error = e
+
+    try:
+        if error is not None:
+            if not isinstance(error, VideoEncodingError):
+                logger.error('Failed to encode format {}'.format(options['name']),
+                             exc_info=error)
             # TODO handle with more care
             video_format.delete()
-            os.remove(target_path)
-            continue
-
-        # save encoded file
-        video_format.file.save(
-            '{filename}_{name}.{extension}'.format(filename=filename,
-                                                   **options),
-            File(open(target_path, mode='rb')))
+    except Exception:
+        logger.exception('Failed to discard format {}'.format(options['name']))
+    finally:
+        encoding.progress_reporter.finish()
 
-        video_format.update_progress(100)  # now we are ready
+    report = EncodingReport(format=options['name'], succeeded=error is None,
+                            wall_seconds=outcome.wall_seconds,
+                            cpu_seconds=outcome.cpu_seconds)
 
-        # remove temporary file
-        os.remove(target_path)
+    logger.info('Encoded format {} {} in {:.2f}s wall clock time and {}s CPU time'.format(
+        report.format, 'successfully' if report.succeeded else 'unsuccessfully',
+        report.wall_seconds,
+        '{:.2f}'.format(report.cpu_seconds) if report.cpu_seconds is not None else 'unknown'))
 
-        if temp_file:
-            os.unlink(temp_file.name)
-            temp_file.close()
+    return report